@@ -0,0 +1,42 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from agno.agent import Agent
+
+
+class AgentPool:
+    """
+    Lends Agno agents to concurrent workflow runs.
+
+    An Agno `Agent` keeps per-run bookkeeping (run id, run response, memory) on the
+    instance, so two runs must never drive the same agent at the same time. The pool
+    hands each run an idle agent and only builds a new one when every agent is busy,
+    so a single workflow instance can serve many in-flight runs without constructing
+    fresh agents for each of them.
+    """
+
+    def __init__(self, factory: Callable[[], Agent], max_idle: int = 4):
+        """
+        Args:
+            factory (Callable[[], Agent]): Builds a new agent when none is idle.
+            max_idle (int): Maximum number of idle agents kept for reuse (default: 4).
+        """
+        self._factory = factory
+        self._max_idle = max_idle
+        self._idle: List[Agent] = [factory()]  # Build one eagerly so misconfiguration fails at startup
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self) -> Iterator[Agent]:
+        """Borrow an agent for the duration of the `with` block."""
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+        if agent is None:
+            agent = self._factory()
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                if len(self._idle) < self._max_idle:
+                    self._idle.append(agent)
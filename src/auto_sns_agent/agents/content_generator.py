@@ -2,13 +2,18 @@ from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 
 from auto_sns_agent.config import OPENAI_API_KEY
+from auto_sns_agent.model_router import DRAFTING, MODEL_ROUTER
 
-def get_content_generator_agent() -> Agent:
+def get_content_generator_agent(model_id: str | None = None) -> Agent:
     """
     Initializes and returns the Content Generator agent.
     This agent takes text input and generates a short social media post.
+
+    Args:
+        model_id (str, optional): OpenAI model to use. Defaults to the first (cheapest)
+            model of the drafting chain.
     """
-    llm = OpenAIChat(api_key=OPENAI_API_KEY, id="gpt-4o-mini") # Using gpt-4o-mini for cost/speed
+    llm = OpenAIChat(api_key=OPENAI_API_KEY, id=model_id or MODEL_ROUTER.primary_model(DRAFTING))
     
     agent = Agent(
         model=llm,
@@ -0,0 +1,155 @@
+import json
+from typing import List
+
+from agno.agent import Agent
+
+from auto_sns_agent.config import (
+    ORCHESTRATOR_HISTORY_RUNS,
+    ORCHESTRATOR_MAX_HISTORY_TOKENS,
+    ORCHESTRATOR_TOOL_OUTPUT_TOKENS,
+)
+from auto_sns_agent.research.ranking import estimate_tokens, select_passages, split_passages
+
+_COMPACTED_MARKER = "[compacted tool output"
+# Tool outputs are cut into smaller passages than research articles, so a few hundred tokens hold several of them
+_PASSAGE_WORDS = 40
+
+
+class MemoryReport:
+    """What one turn cost and what the memory policy kept afterwards."""
+
+    def __init__(self, prompt_tokens: List[int], history_runs: int, history_tokens: int, compacted_outputs: int, dropped_runs: int):
+        self.prompt_tokens = prompt_tokens  # Input tokens of each model call of the turn
+        self.history_runs = history_runs
+        self.history_tokens = history_tokens
+        self.compacted_outputs = compacted_outputs
+        self.dropped_runs = dropped_runs
+
+    def summary(self) -> str:
+        if self.prompt_tokens:
+            calls = " + ".join(str(tokens) for tokens in self.prompt_tokens)
+            prompt = f"{sum(self.prompt_tokens)} prompt tokens ({calls})" if len(self.prompt_tokens) > 1 else f"{calls} prompt tokens"
+        else:
+            prompt = "prompt tokens not reported"
+        line = f"Orchestrator turn: {prompt}; history kept: {self.history_runs} turns, ~{self.history_tokens} tokens"
+        if self.compacted_outputs:
+            line += f", {self.compacted_outputs} tool outputs compacted"
+        if self.dropped_runs:
+            line += f", {self.dropped_runs} turns forgotten"
+        return line
+
+
+class OrchestratorMemoryPolicy:
+    """
+    Keeps the conversation memory of a long-lived orchestrator bounded.
+
+    Agno stores every run of an agent in its memory, including full tool outputs such
+    as a whole webpage. After each turn the policy keeps only the last `history_runs`
+    runs (the ones sent with the next request), replaces long tool outputs with their
+    passages most relevant to the turn's request, and forgets the oldest kept runs
+    while the history exceeds `max_history_tokens`. The prompt of a turn is then its
+    system message, at most `max_history_tokens` of history, and its own messages.
+    """
+
+    def __init__(
+        self,
+        history_runs: int = ORCHESTRATOR_HISTORY_RUNS,
+        tool_output_tokens: int = ORCHESTRATOR_TOOL_OUTPUT_TOKENS,
+        max_history_tokens: int = ORCHESTRATOR_MAX_HISTORY_TOKENS,
+    ):
+        """
+        Args:
+            history_runs (int): Previous turns sent with each request; 0 sends none.
+            tool_output_tokens (int): Estimated tokens a tool output is cut down to once its turn is over.
+            max_history_tokens (int): Hard ceiling on the estimated tokens of the kept history.
+        """
+        self.history_runs = max(0, history_runs)
+        self.tool_output_tokens = tool_output_tokens
+        self.max_history_tokens = max_history_tokens
+
+    def configure(self, agent: Agent) -> None:
+        """Makes `agent` send its kept history with each request."""
+        agent.add_history_to_messages = self.history_runs > 0
+        agent.num_history_runs = self.history_runs
+
+    def apply(self, agent: Agent, response=None) -> MemoryReport:
+        """
+        Bounds `agent`'s memory after a turn.
+
+        Args:
+            agent (Agent): The orchestrator that just served a turn.
+            response (RunResponse, optional): The turn's response, for its prompt token counts.
+        """
+        compacted = dropped = 0
+        history_tokens = 0
+        kept = 0
+        for runs in _stored_runs(agent):
+            dropped += _drop_oldest(runs, len(runs) - self.history_runs)
+            for run in runs:
+                _strip_repeated_messages(run, agent.system_message_role)
+                compacted += self._compact_tool_outputs(run)
+            while runs and sum(_run_tokens(run) for run in runs) > self.max_history_tokens:
+                dropped += _drop_oldest(runs, 1)
+            history_tokens += sum(_run_tokens(run) for run in runs)
+            kept += len(runs)
+        return MemoryReport(_prompt_tokens(response), kept, history_tokens, compacted, dropped)
+
+    def _compact_tool_outputs(self, run) -> int:
+        request = next((message.get_content_string() for message in run.messages or [] if message.role == "user"), "")
+        compacted = 0
+        for message in run.messages or []:
+            if message.role == "tool" and isinstance(message.content, str):
+                summary = self.compact(request, message.content)
+                if summary is not message.content:
+                    message.content = summary
+                    compacted += 1
+        # The response's own copy of the tool results
+        for tool in run.tools or []:
+            if isinstance(tool.get("content"), str):
+                tool["content"] = self.compact(request, tool["content"])
+        return compacted
+
+    def compact(self, request: str, output: str) -> str:
+        """Short summary of a tool output: its passages most relevant to `request`, in their original order."""
+        if output.startswith(_COMPACTED_MARKER) or estimate_tokens(output) <= self.tool_output_tokens:
+            return output
+        passages = select_passages(request, split_passages(output, max_words=_PASSAGE_WORDS), top_k=max(1, self.tool_output_tokens // _PASSAGE_WORDS), token_budget=self.tool_output_tokens, keep_order=True)
+        return f"{_COMPACTED_MARKER}, ~{estimate_tokens(output)} tokens originally]\n" + "\n...\n".join(passages)
+
+
+def _stored_runs(agent: Agent) -> List[list]:
+    """The agent's stored run lists, one per session (Agno keeps `RunResponse`s per session id)."""
+    runs = getattr(agent.memory, "runs", None)
+    return list(runs.values()) if isinstance(runs, dict) else []
+
+
+def _drop_oldest(runs: list, count: int) -> int:
+    count = max(0, min(count, len(runs)))
+    del runs[:count]
+    return count
+
+
+def _strip_repeated_messages(run, system_message_role: str) -> None:
+    # Each stored run holds its own copy of the system message and of the history it was
+    # sent with; neither is read back when building the next request's history.
+    if run.messages:
+        run.messages = [message for message in run.messages if message.role != system_message_role and not message.from_history]
+
+
+def _run_tokens(run) -> int:
+    tokens = 0
+    for message in run.messages or []:
+        tokens += estimate_tokens(message.get_content_string())
+        if message.tool_calls:
+            tokens += estimate_tokens(json.dumps(message.tool_calls, default=str))
+    return tokens
+
+
+def _prompt_tokens(response) -> List[int]:
+    """Input tokens of each model call in an Agno RunResponse's metrics."""
+    metrics = getattr(response, "metrics", None)
+    if not isinstance(metrics, dict):
+        return []
+    tokens = metrics.get("input_tokens") or metrics.get("prompt_tokens") or []
+    # Agno reports one value per model call
+    return [int(value) for value in tokens] if isinstance(tokens, list) else [int(tokens)]
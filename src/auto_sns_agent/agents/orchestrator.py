@@ -1,28 +1,44 @@
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 
+from auto_sns_agent.agents.memory_policy import OrchestratorMemoryPolicy
 from auto_sns_agent.config import OPENAI_API_KEY
+from auto_sns_agent.model_router import MODEL_ROUTER, RESEARCH_PLANNING
+from auto_sns_agent.profiling import profiling_tool_hook
+from auto_sns_agent.tools.batch_search import get_social_media_posts_for_topics
 from auto_sns_agent.tools.browser_tools import get_webpage_main_content
+from auto_sns_agent.tools.cross_posting import cross_post
+from auto_sns_agent.tools.multi_account_posting import post_to_accounts
 from auto_sns_agent.tools.social_media_tools import get_social_media_posts_for_topic, post_to_social_media
 
 
-def get_orchestrator_agent() -> Agent:
+def get_orchestrator_agent(model_id: str | None = None, memory_policy: OrchestratorMemoryPolicy | None = None) -> Agent:
     """
     Initializes and returns the orchestrator agent. 
     This agent can research topics on the general web or social media, 
     and then conceptualize content based on that research.
+
+    Args:
+        model_id (str, optional): OpenAI model to use. Defaults to the first model of the
+            research planning chain.
+        memory_policy (OrchestratorMemoryPolicy, optional): Conversation memory for an agent
+            that serves many turns; without one, no history is sent with a request.
     """
-    llm = OpenAIChat(api_key=OPENAI_API_KEY, id="gpt-4o")
+    llm = OpenAIChat(api_key=OPENAI_API_KEY, id=model_id or MODEL_ROUTER.primary_model(RESEARCH_PLANNING))
     
     tools = [
         get_webpage_main_content,
         get_social_media_posts_for_topic,
-        post_to_social_media
+        get_social_media_posts_for_topics,
+        post_to_social_media,
+        post_to_accounts,
+        cross_post
     ]
 
     agent = Agent(
         model=llm,
         tools=tools,
+        tool_hooks=[profiling_tool_hook],  # Profiles each tool call with --profile
         description=(
             "An AI agent that orchestrates tasks for social media content creation. "
             "It can research topics on the web or social media, and then use that info "
@@ -35,14 +51,19 @@ def get_orchestrator_agent() -> Agent:
             "  1. Decide if you need to research general web articles or recent social media posts.",
             "     - Use the 'get_webpage_main_content' tool if you need to understand a topic from a detailed article or blog post.",
             "     - Use the 'get_social_media_posts_for_topic' tool if you need to find existing social media discussions or recent posts on a topic (e.g., on Twitter/X).",
+            "     - If you need social media posts on several topics or hashtags, call the 'get_social_media_posts_for_topics' tool once with all of them instead of searching each one separately.",
             "  2. After gathering information with the appropriate tool, state what information you found.",
             "  3. Then, based on the gathered information, briefly outline or conceptualize the social media post that should be created.",
             "     (You are not writing the final post yourself; you are providing the gathered info and a concept to a specialist content generator).",
             "If a specific research source (general web vs. social media) is implied by the request, prioritize that.",
             "You also have a tool to post content to social media. If asked to post provided content, use the 'post_to_social_media' tool.",
+            "If asked to post as several registered accounts (e.g. a campaign across brand accounts), use the 'post_to_accounts' tool once instead of posting to each account yourself.",
+            "If asked to post the same content to several platforms, use the 'cross_post' tool once; it posts to all of them at the same time.",
             "Always clearly state which tool you are using and for what purpose if you decide to use one."
         ],
         show_tool_calls=True,
         markdown=True,
     )
+    if memory_policy is not None:
+        memory_policy.configure(agent)
     return agent 
\ No newline at end of file
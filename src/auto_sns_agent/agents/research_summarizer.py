@@ -0,0 +1,32 @@
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+
+from auto_sns_agent.config import OPENAI_API_KEY
+from auto_sns_agent.model_router import MODEL_ROUTER, RESEARCH_PLANNING
+
+def get_research_summarizer_agent(model_id: str | None = None) -> Agent:
+    """
+    Initializes and returns the Research Summarizer agent.
+    This tool-less agent only condenses research results that were collected by code
+    (the workflow's direct research mode), so it never spends a turn choosing tools.
+
+    Args:
+        model_id (str, optional): OpenAI model to use. Defaults to the first model of the
+            research planning chain.
+    """
+    llm = OpenAIChat(api_key=OPENAI_API_KEY, id=model_id or MODEL_ROUTER.primary_model(RESEARCH_PLANNING))
+
+    agent = Agent(
+        model=llm,
+        tools=[],
+        description="An AI agent that summarizes collected social media research for content creation.",
+        instructions=[
+            "You receive social media posts that were already collected for a topic.",
+            "Summarize the key discussion points, overall sentiment and any actionable insights suitable for creating a new social media post.",
+            "Only use information present in the provided posts; do not invent facts, names or URLs.",
+            "Keep the summary concise.",
+        ],
+        show_tool_calls=False,
+        markdown=True,
+    )
+    return agent
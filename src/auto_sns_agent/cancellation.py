@@ -0,0 +1,85 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+# Token for the request currently being served. Set by the CLI, UI or workflow around a
+# request; read by the browser tools, which agno calls synchronously in the same context.
+_current_token: contextvars.ContextVar["CancellationToken | None"] = contextvars.ContextVar(
+    "cancellation_token", default=None
+)
+
+
+class CancelledError(Exception):
+    """Raised by `CancellationToken.raise_if_cancelled` once the token has been cancelled."""
+
+
+class CancellationToken:
+    """
+    Thread-safe, one-shot cancellation signal shared by a request and the work it starts.
+
+    Cancellation is cooperative: long-running work either polls `cancelled` between steps
+    or registers a callback that interrupts it (e.g. cancels an asyncio task).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: str | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelled") -> None:
+        """Cancels the token and runs registered callbacks once. Later calls are no-ops."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registers `callback` to run on cancellation (immediately if already cancelled).
+
+        Returns:
+            Callable[[], None]: Function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise CancelledError(self.reason or "Cancelled")
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def current_cancellation_token() -> CancellationToken | None:
+    """Returns the token of the request being served in this context, if any."""
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Makes `token` the current cancellation token inside the `with` block."""
+    reset_token = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset_token)
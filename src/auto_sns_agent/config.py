@@ -15,6 +15,178 @@ X_PASSWORD = os.getenv("X_PASSWORD")
 # Prioritize Username > Email > Phone Number if multiple are set, or just take the first one found.
 X_LOGIN_IDENTIFIER = X_USERNAME or X_EMAIL or X_PHONE_NUMBER
 
+# Browser resource lifecycle
+# Maximum time the posting step waits for a run's research browsers to report that they are closed.
+BROWSER_RELEASE_TIMEOUT_SECONDS = float(os.getenv("BROWSER_RELEASE_TIMEOUT_SECONDS", "10"))
+# Browser process watchdog (Linux; reads /proc). Every BROWSER_WATCHDOG_INTERVAL_SECONDS the
+# Chromium process trees started by this process are sampled: a tree whose summed RSS exceeds
+# BROWSER_MEMORY_CAP_MB or that is older than BROWSER_MAX_LIFETIME_SECONDS is killed, and trees
+# left behind by processes that died are reaped. Each sample is appended to BROWSER_METRICS_PATH
+# (JSONL) if set.
+BROWSER_WATCHDOG_ENABLED = os.getenv("BROWSER_WATCHDOG_ENABLED", "true").lower() in ("1", "true", "yes")
+BROWSER_WATCHDOG_INTERVAL_SECONDS = float(os.getenv("BROWSER_WATCHDOG_INTERVAL_SECONDS", "5"))
+BROWSER_MEMORY_CAP_MB = float(os.getenv("BROWSER_MEMORY_CAP_MB", "2048"))
+BROWSER_MAX_LIFETIME_SECONDS = float(os.getenv("BROWSER_MAX_LIFETIME_SECONDS", "1800"))
+BROWSER_METRICS_PATH = os.getenv("BROWSER_METRICS_PATH")
+
+# Default budgets for a single LLM-driven browser agent run (tools accept per-call overrides)
+BROWSER_AGENT_MAX_STEPS = int(os.getenv("BROWSER_AGENT_MAX_STEPS", "25"))
+BROWSER_AGENT_TIMEOUT_SECONDS = float(os.getenv("BROWSER_AGENT_TIMEOUT_SECONDS", "300"))
+BROWSER_AGENT_MAX_INPUT_TOKENS = int(os.getenv("BROWSER_AGENT_MAX_INPUT_TOKENS", "250000"))
+# Tasks whose browser agent gets page screenshots (vision); all others see only the DOM text.
+# Task names: search, article, post, profile_lookup
+BROWSER_AGENT_VISION_TASKS = tuple(task.strip() for task in os.getenv("BROWSER_AGENT_VISION_TASKS", "post").split(",") if task.strip())
+# Steps of an agent run kept in full in its history; older steps are compacted to their actions
+BROWSER_AGENT_HISTORY_FULL_STEPS = int(os.getenv("BROWSER_AGENT_HISTORY_FULL_STEPS", "3"))
+
+# Local state (recorded action scripts, caches, history) lives under this directory
+AUTO_SNS_DATA_DIR = os.getenv("AUTO_SNS_DATA_DIR", ".auto_sns")
+
+# Replay recorded posting actions with plain Playwright before falling back to the LLM agent
+ACTION_REPLAY_ENABLED = os.getenv("ACTION_REPLAY_ENABLED", "true").lower() in ("1", "true", "yes")
+# How long to wait for X's create-post response (carrying the new post's id) after the post button was clicked
+POST_CAPTURE_TIMEOUT_SECONDS = float(os.getenv("POST_CAPTURE_TIMEOUT_SECONDS", "5"))
+
+# Local corpus of scraped posts and articles (stored under AUTO_SNS_DATA_DIR/corpus).
+# Research answers from it first and scrapes live only for what is missing.
+CORPUS_ENABLED = os.getenv("CORPUS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Items fetched longer ago than this are not used to answer research requests
+CORPUS_FRESHNESS_SECONDS = float(os.getenv("CORPUS_FRESHNESS_SECONDS", str(6 * 3600)))
+# Retention applied by compaction: maximum age and maximum number of items kept
+CORPUS_RETENTION_SECONDS = float(os.getenv("CORPUS_RETENTION_DAYS", "30")) * 86400
+CORPUS_MAX_ITEMS = int(os.getenv("CORPUS_MAX_ITEMS", "200000"))
+# Opening the corpus compacts it when the last compaction is older than this
+CORPUS_COMPACTION_INTERVAL_SECONDS = float(os.getenv("CORPUS_COMPACTION_INTERVAL_SECONDS", "86400"))
+CORPUS_MAX_SEGMENT_BYTES = int(os.getenv("CORPUS_MAX_SEGMENT_MB", "64")) * 1024 * 1024
+
+# Local relevance ranking (BM25) of research items before they reach a prompt:
+# at most RESEARCH_TOP_K posts or passages, within RESEARCH_TOKEN_BUDGET estimated tokens
+RESEARCH_TOP_K = int(os.getenv("RESEARCH_TOP_K", "8"))
+RESEARCH_TOKEN_BUDGET = int(os.getenv("RESEARCH_TOKEN_BUDGET", "1500"))
+
+# Near-duplicate detection (MinHash/LSH, estimated Jaccard similarity of word shingles):
+# research items at or above NEAR_DUPLICATE_THRESHOLD are dropped before prompting, and
+# drafts at or above DRAFT_SIMILARITY_THRESHOLD to an earlier post are flagged for confirmation
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+DRAFT_SIMILARITY_THRESHOLD = float(os.getenv("DRAFT_SIMILARITY_THRESHOLD", "0.6"))
+
+# Background topic monitor (`auto-sns-monitor`): polling interval bounds for each watch,
+# the interval new watches start with, and the maximum number of posts read per poll
+MONITOR_MIN_INTERVAL_SECONDS = float(os.getenv("MONITOR_MIN_INTERVAL_SECONDS", "300"))
+MONITOR_MAX_INTERVAL_SECONDS = float(os.getenv("MONITOR_MAX_INTERVAL_SECONDS", str(6 * 3600)))
+MONITOR_DEFAULT_INTERVAL_SECONDS = float(os.getenv("MONITOR_DEFAULT_INTERVAL_SECONDS", "900"))
+MONITOR_MAX_ITEMS_PER_POLL = int(os.getenv("MONITOR_MAX_ITEMS_PER_POLL", "40"))
+
+# Warm posting: while a workflow draft awaits confirmation, its posting process already
+# launches the browser, logs in (restoring the session kept under AUTO_SNS_DATA_DIR/sessions
+# when it is still valid) and opens the post editor, so a "yes" only has to type and submit.
+# The warm browser is released on "no", on cancellation, or after WARM_POSTING_TIMEOUT_SECONDS
+# without an answer. Off by default: every draft then launches a browser and logs in, even
+# the drafts that are declined.
+WARM_POSTING_ENABLED = os.getenv("WARM_POSTING_ENABLED", "false").lower() in ("1", "true", "yes")
+WARM_POSTING_TIMEOUT_SECONDS = float(os.getenv("WARM_POSTING_TIMEOUT_SECONDS", "600"))
+
+# Batch search (`get_social_media_posts_for_topics`): queries searched in one logged-in
+# browser session, in up to SEARCH_BATCH_MAX_TABS tabs at the same time, each tab's search
+# started at least SEARCH_BATCH_TAB_STAGGER_SECONDS after the previous one to pace requests
+SEARCH_BATCH_MAX_TABS = int(os.getenv("SEARCH_BATCH_MAX_TABS", "3"))
+SEARCH_BATCH_TAB_STAGGER_SECONDS = float(os.getenv("SEARCH_BATCH_TAB_STAGGER_SECONDS", "2"))
+
+# Posting backend for X: "browser" (LLM-driven browser agent) or "api" (X's official API
+# over HTTP, falling back to the browser when the API cannot be used). Accounts registered
+# with `auto-sns-accounts` choose their own backend.
+X_POSTING_BACKEND = os.getenv("X_POSTING_BACKEND", "browser")
+# OAuth 2.0 app credentials for the API backend. X_API_REFRESH_TOKEN seeds the token file of
+# the default account; rotated tokens are kept under AUTO_SNS_DATA_DIR/api_tokens.
+X_API_BASE_URL = os.getenv("X_API_BASE_URL", "https://api.x.com")
+X_API_CLIENT_ID = os.getenv("X_API_CLIENT_ID")
+X_API_CLIENT_SECRET = os.getenv("X_API_CLIENT_SECRET")
+X_API_REFRESH_TOKEN = os.getenv("X_API_REFRESH_TOKEN")
+X_API_TIMEOUT_SECONDS = float(os.getenv("X_API_TIMEOUT_SECONDS", "15"))
+# Longest wait for an exhausted rate limit window before falling back to the browser
+X_API_MAX_RATE_LIMIT_WAIT_SECONDS = float(os.getenv("X_API_MAX_RATE_LIMIT_WAIT_SECONDS", "60"))
+
+# Lean browser mode: tasks whose browsers block heavy resources (images, video, fonts),
+# third-party scripts and trackers, with a capped viewport. Remove a task to browse it in full.
+LEAN_BROWSER_TASKS = tuple(task.strip() for task in os.getenv("LEAN_BROWSER_TASKS", "search,article,post").split(",") if task.strip())
+LEAN_VIEWPORT_WIDTH = int(os.getenv("LEAN_VIEWPORT_WIDTH", "1280"))
+LEAN_VIEWPORT_HEIGHT = int(os.getenv("LEAN_VIEWPORT_HEIGHT", "900"))
+# Pixels beyond the viewport whose elements browser-use includes in the DOM sent to the LLM
+LEAN_VIEWPORT_EXPANSION = int(os.getenv("LEAN_VIEWPORT_EXPANSION", "200"))
+
+# Media attachments: images and videos are re-encoded to the platform's limits in a pool of
+# MEDIA_WORKERS processes and cached under AUTO_SNS_DATA_DIR/media_cache by content hash
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Size of each chunk of a chunked API media upload (files are streamed, never read whole)
+MEDIA_UPLOAD_CHUNK_BYTES = int(os.getenv("MEDIA_UPLOAD_CHUNK_MB", "4")) * 1024 * 1024
+# How long to wait for attached media to finish uploading in the browser, or processing on X's API
+MEDIA_UPLOAD_TIMEOUT_SECONDS = float(os.getenv("MEDIA_UPLOAD_TIMEOUT_SECONDS", "300"))
+
+# Multi-account posting (accounts registered with `auto-sns-accounts`): accounts posted to at
+# the same time (each in its own browser context of one shared browser), the minimum time
+# between two posts of the same account, the longest a post waits for that interval to pass
+# (accounts that would wait longer are skipped), and the delay between starting accounts
+ACCOUNT_POST_CONCURRENCY = int(os.getenv("ACCOUNT_POST_CONCURRENCY", "3"))
+ACCOUNT_MIN_POST_INTERVAL_SECONDS = float(os.getenv("ACCOUNT_MIN_POST_INTERVAL_SECONDS", "600"))
+ACCOUNT_MAX_PACING_WAIT_SECONDS = float(os.getenv("ACCOUNT_MAX_PACING_WAIT_SECONDS", "300"))
+ACCOUNT_POST_STAGGER_SECONDS = float(os.getenv("ACCOUNT_POST_STAGGER_SECONDS", "5"))
+
+# Default research mode of the content creation workflow (selectable per run):
+# "agent" lets the orchestrator choose and call research tools, "direct" calls them from code
+# and only asks an LLM to summarize the results.
+WORKFLOW_RESEARCH_MODE = os.getenv("WORKFLOW_RESEARCH_MODE", "agent")
+
+# Retries of failed operations: attempts per operation class, with a jittered exponential
+# backoff between them (a random delay of up to RETRY_BASE_DELAY_SECONDS * 2^retry, capped
+# at RETRY_MAX_DELAY_SECONDS). Only failures of a dependency (network, browser, server
+# errors, rate limits) are retried, never rejected requests.
+RETRY_ATTEMPTS = {
+    "search": int(os.getenv("RETRY_SEARCH_ATTEMPTS", "3")),
+    "article": int(os.getenv("RETRY_ARTICLE_ATTEMPTS", "2")),
+    "post": int(os.getenv("RETRY_POST_ATTEMPTS", "2")),
+    "model": int(os.getenv("RETRY_MODEL_ATTEMPTS", "2")),
+}
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "2"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "30"))
+# Circuit breakers per platform and per model: after CIRCUIT_FAILURE_THRESHOLD failures in a
+# row, calls fail fast for CIRCUIT_RESET_SECONDS; then a single trial call decides whether
+# the dependency is back
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "120"))
+# How long the idempotency key of a post is remembered (AUTO_SNS_DATA_DIR/post_ledger.jsonl)
+POST_IDEMPOTENCY_WINDOW_SECONDS = float(os.getenv("POST_IDEMPOTENCY_WINDOW_HOURS", "24")) * 3600
+
+# Conversation memory of the CLI chat's orchestrator: the last ORCHESTRATOR_HISTORY_RUNS turns
+# are sent with each request (0 sends none), tool outputs kept in memory are cut down to their
+# ORCHESTRATOR_TOOL_OUTPUT_TOKENS most relevant estimated tokens, and the oldest turns are
+# forgotten while the kept history exceeds ORCHESTRATOR_MAX_HISTORY_TOKENS
+ORCHESTRATOR_HISTORY_RUNS = int(os.getenv("ORCHESTRATOR_HISTORY_RUNS", "4"))
+ORCHESTRATOR_TOOL_OUTPUT_TOKENS = int(os.getenv("ORCHESTRATOR_TOOL_OUTPUT_TOKENS", "300"))
+ORCHESTRATOR_MAX_HISTORY_TOKENS = int(os.getenv("ORCHESTRATOR_MAX_HISTORY_TOKENS", "4000"))
+
+# Model chains per pipeline stage, cheapest first. Each stage escalates to the next model
+# only on an explicit failure signal. Override with e.g. MODEL_CHAIN_DRAFTING="gpt-4o-mini,gpt-4o".
+def _model_chain(stage: str, default: str) -> list[str]:
+    value = os.getenv(f"MODEL_CHAIN_{stage.upper()}", default)
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+MODEL_CHAINS = {
+    "research_planning": _model_chain("research_planning", "gpt-4o-mini,gpt-4o"),
+    "browser_navigation": _model_chain("browser_navigation", "gpt-4o-mini,gpt-4o"),
+    "extraction": _model_chain("extraction", "gpt-4o-mini,gpt-4o"),
+    "drafting": _model_chain("drafting", "gpt-4o-mini,gpt-4o"),
+    "posting": _model_chain("posting", "gpt-4o-mini,gpt-4o"),
+}
+# Optional JSONL file that receives one line per model attempt, for tuning the chains offline
+STAGE_METRICS_PATH = os.getenv("STAGE_METRICS_PATH")
+
+# Opt-in sampling profiler (`auto-sns --profile`): the Python stacks of each workflow stage and
+# tool call are sampled every PROFILE_SAMPLE_INTERVAL_MS; collapsed stacks and a summary of the
+# PROFILE_TOP_N hottest functions are written to a new directory under PROFILE_DIR per process
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(AUTO_SNS_DATA_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "20"))
+
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY not found in environment variables. Please ensure it is set in your .env file.")
 
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from auto_sns_agent.profiling import profile_stage
+
+
+class RunTimings:
+    """Wall-clock spans recorded while a single workflow run progresses."""
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times the enclosed block and records it under `name`, even if it raises (and profiles it with `--profile`)."""
+        start = time.perf_counter()
+        try:
+            with profile_stage(f"workflow.{name}"):
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns total seconds per span name, in the order spans were first recorded."""
+        totals: Dict[str, float] = {}
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def format(self) -> str:
+        """Returns a one-line summary such as 'research=12.31s | drafting=2.05s | total=14.36s'."""
+        totals = self.as_dict()
+        parts = [f"{name}={seconds:.2f}s" for name, seconds in totals.items()]
+        parts.append(f"total={sum(totals.values()):.2f}s")
+        return " | ".join(parts)
+
+
+class StageMetrics:
+    """
+    Per-stage, per-model outcome counters shared by every run in the process.
+
+    Used to tune the model chains of the model router from observed success rates
+    and latencies instead of guesses.
+    """
+
+    def __init__(self, log_path: str | None = None):
+        """
+        Args:
+            log_path (str, optional): JSONL file that receives one line per recorded attempt.
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.log_path = log_path
+
+    def record(self, stage: str, model: str, succeeded: bool, seconds: float, signal: str | None = None, tokens: int | None = None) -> None:
+        """
+        Records one attempt of `model` at `stage`.
+
+        Args:
+            signal (str, optional): The failure that triggered escalation.
+            tokens (int, optional): LLM tokens the attempt used, when known.
+        """
+        with self._lock:
+            stats = self._stats.setdefault((stage, model), {"attempts": 0, "successes": 0, "total_seconds": 0.0, "signals": {}, "total_tokens": 0, "token_attempts": 0})
+            stats["attempts"] += 1
+            stats["successes"] += int(succeeded)
+            stats["total_seconds"] += seconds
+            if signal:
+                stats["signals"][signal] = stats["signals"].get(signal, 0) + 1
+            if tokens is not None:
+                stats["total_tokens"] += tokens
+                stats["token_attempts"] += 1
+        if self.log_path:
+            self._append_log({"time": time.time(), "stage": stage, "model": model, "succeeded": succeeded, "seconds": round(seconds, 3), "signal": signal, "tokens": tokens})
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Returns {stage: {model: {attempts, success_rate, mean_seconds, mean_tokens, signals}}}."""
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (stage, model), stats in self._stats.items():
+                result.setdefault(stage, {})[model] = {
+                    "attempts": stats["attempts"],
+                    "success_rate": stats["successes"] / stats["attempts"],
+                    "mean_seconds": stats["total_seconds"] / stats["attempts"],
+                    "mean_tokens": stats["total_tokens"] / stats["token_attempts"] if stats["token_attempts"] else None,
+                    "signals": dict(stats["signals"]),
+                }
+            return result
+
+    def format(self) -> str:
+        """Returns one line per stage and model, e.g. 'drafting gpt-4o-mini: 9/10 ok, mean 1.80s'."""
+        lines = []
+        for stage, models in self.summary().items():
+            for model, stats in models.items():
+                successes = round(stats["success_rate"] * stats["attempts"])
+                line = f"{stage} {model}: {successes}/{stats['attempts']} ok, mean {stats['mean_seconds']:.2f}s"
+                if stats["mean_tokens"] is not None:
+                    line += f", mean {stats['mean_tokens']:.0f} tokens"
+                if stats["signals"]:
+                    line += " (" + ", ".join(f"{name}={count}" for name, count in stats["signals"].items()) + ")"
+                lines.append(line)
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _append_log(self, entry: Dict[str, Any]) -> None:
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write stage metrics to {self.log_path}: {e}")
@@ -0,0 +1,233 @@
+import time
+from typing import Awaitable, Callable, Dict, Generator, List, TypeVar
+
+from auto_sns_agent.cancellation import current_cancellation_token
+from auto_sns_agent.config import MODEL_CHAINS, STAGE_METRICS_PATH
+from auto_sns_agent.metrics import StageMetrics
+from auto_sns_agent.resilience import (
+    CIRCUIT_BREAKERS,
+    MODEL,
+    CircuitBreakers,
+    ErrorResult,
+    RetryPolicy,
+    classify_exception,
+    retry_policy,
+    sleep_unless_cancelled,
+    wait_unless_cancelled,
+)
+
+T = TypeVar("T")
+
+# Pipeline stages that choose their model through the router
+RESEARCH_PLANNING = "research_planning"
+BROWSER_NAVIGATION = "browser_navigation"
+EXTRACTION = "extraction"
+DRAFTING = "drafting"
+POSTING = "posting"
+
+# Stages whose attempt may have taken effect before it raised (a post may have been
+# submitted): the exception reaches the caller, which checks the outcome, instead of
+# being retried or escalated
+NO_RETRY_ON_ERROR_STAGES = frozenset({POSTING})
+
+# Failure signals that make a stage escalate to the next model in its chain
+INVALID_OUTPUT = "invalid_output"
+BUDGET_EXHAUSTED = "budget_exhausted"
+TOOL_ERROR = "tool_error"
+# Recorded for a model skipped because its circuit breaker is open
+CIRCUIT_OPEN = "circuit_open"
+
+# Steps of the shared attempt loop (see `ModelRouter._attempts`)
+_CALL = "call"
+_WAIT = "wait"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every model of a stage is skipped because their circuit breakers are open."""
+
+
+# Process-wide per-stage success rates and latencies
+STAGE_METRICS = StageMetrics(log_path=STAGE_METRICS_PATH)
+
+
+class ModelRouter:
+    """
+    Maps each pipeline stage to a chain of models, cheapest first.
+
+    A stage runs on the first model of its chain and moves to the next one only when
+    the attempt produces an explicit failure signal (invalid output, exhausted budget
+    or a tool error). Every attempt is recorded in `metrics`.
+
+    An attempt that raises because the model's API failed (server error, timeout, rate
+    limit) is retried on the same model with the `MODEL` retry policy before the
+    router escalates. Stages in `NO_RETRY_ON_ERROR_STAGES` are neither retried nor
+    escalated after an exception. Each model has a circuit breaker: a model whose API keeps
+    failing is skipped without being called until its breaker lets a trial call
+    through.
+    """
+
+    def __init__(self, chains: Dict[str, List[str]], metrics: StageMetrics | None = None, breakers: CircuitBreakers | None = None, retry: RetryPolicy | None = None):
+        """
+        Args:
+            chains (Dict[str, List[str]]): Stage name -> model ids, cheapest first.
+            metrics (StageMetrics, optional): Where attempts are recorded (default: STAGE_METRICS).
+            breakers (CircuitBreakers, optional): Per-model circuit breakers (default: CIRCUIT_BREAKERS).
+            retry (RetryPolicy, optional): Retries of a failing model API (default: the `MODEL` policy).
+        """
+        self.chains = {stage: list(models) for stage, models in chains.items() if models}
+        self.metrics = metrics if metrics is not None else STAGE_METRICS
+        self.breakers = breakers if breakers is not None else CIRCUIT_BREAKERS
+        self.retry = retry or retry_policy(MODEL)
+
+    def chain(self, stage: str) -> List[str]:
+        if stage not in self.chains:
+            raise KeyError(f"No model chain configured for stage '{stage}'")
+        return self.chains[stage]
+
+    def primary_model(self, stage: str) -> str:
+        """Returns the model a stage tries first."""
+        return self.chain(stage)[0]
+
+    def run(self, stage: str, attempt: Callable[[str], T], failure_signal: Callable[[T], str | None]) -> T:
+        """
+        Runs `attempt(model_id)` along the stage's chain until one attempt succeeds.
+
+        Args:
+            stage (str): Stage name.
+            attempt (Callable[[str], T]): Does the stage's work with the given model.
+            failure_signal (Callable[[T], str | None]): Returns a signal name if the result
+                should trigger escalation, or None if it is acceptable.
+
+        Returns:
+            T: The first acceptable result, or the last model's result if none was.
+            An exception raised by the last model propagates; earlier ones escalate
+            (except in `NO_RETRY_ON_ERROR_STAGES`, where any exception propagates).
+
+        Raises:
+            CircuitOpenError: If no model of the chain could be called because their circuits are open.
+        """
+        steps = self._attempts(stage, failure_signal)
+        try:
+            action, value = next(steps)
+            while True:
+                if action == _WAIT:
+                    action, value = steps.send(sleep_unless_cancelled(value))
+                    continue
+                try:
+                    outcome = attempt(value), None
+                except Exception as e:
+                    outcome = None, e
+                except BaseException:
+                    # Cancelled or interrupted: end the call on the breaker, or a half-open trial never finishes
+                    self.breakers.model(value).record_neutral()
+                    raise
+                action, value = steps.send(outcome)
+        except StopIteration as done:
+            return done.value
+
+    async def arun(self, stage: str, attempt: Callable[[str], Awaitable[T]], failure_signal: Callable[[T], str | None]) -> T:
+        """Async counterpart of `run` for coroutine attempts (e.g. browser agents)."""
+        steps = self._attempts(stage, failure_signal)
+        try:
+            action, value = next(steps)
+            while True:
+                if action == _WAIT:
+                    action, value = steps.send(await wait_unless_cancelled(value))
+                    continue
+                try:
+                    outcome = await attempt(value), None
+                except Exception as e:
+                    outcome = None, e
+                except BaseException:
+                    # Cancelled or interrupted: end the call on the breaker, or a half-open trial never finishes
+                    self.breakers.model(value).record_neutral()
+                    raise
+                action, value = steps.send(outcome)
+        except StopIteration as done:
+            return done.value
+
+    def _attempts(self, stage: str, failure_signal: Callable[[T], str | None]) -> Generator[tuple, object, T]:
+        """
+        The retry and escalation loop shared by `run` and `arun`, which only make the calls and waits.
+
+        Yields `(_CALL, model id)`, to be answered with the attempt's `(result, exception)`,
+        and `(_WAIT, seconds)`, to be answered with True once the delay has passed (False
+        if the request was cancelled first). Returns the stage's result or raises.
+        """
+        models = self.chain(stage)
+        result = None
+        error: Exception | None = None  # Set while the latest attempt raised
+        attempted = False
+        for index, model in enumerate(models):
+            for number in range(1, self.retry.max_attempts + 1):
+                if not self._allow(stage, model):
+                    break
+                attempted = True
+                start = time.perf_counter()
+                result, error = yield _CALL, model
+                if error is not None:
+                    delay = self._failed(stage, model, error, start, number)
+                    if stage in NO_RETRY_ON_ERROR_STAGES:
+                        raise error
+                    if delay is not None and (yield _WAIT, delay):
+                        continue
+                    if index == len(models) - 1 or self._cancelled():
+                        raise error
+                    print(f"ModelRouter: {stage} on {model} raised; escalating to {models[index + 1]}.")
+                    break
+                self.breakers.model(model).record_success()
+                if self._accept(stage, model, result, failure_signal, start, models, index):
+                    return result
+                break
+            if self._cancelled():
+                break
+        if error is not None:
+            raise error
+        if not attempted:
+            raise CircuitOpenError(f"Every model for {stage} is failing ({', '.join(models)}); try again later.")
+        return result
+
+    def _allow(self, stage: str, model: str) -> bool:
+        """False (recorded as a skipped attempt) while the model's circuit is open."""
+        breaker = self.breakers.model(model)
+        if breaker.allow():
+            return True
+        self.metrics.record(stage, model, False, 0.0, CIRCUIT_OPEN)
+        print(f"ModelRouter: {stage} skips {model}; its circuit is open for another {breaker.retry_after():.0f}s.")
+        return False
+
+    def _failed(self, stage: str, model: str, error: Exception, start: float, number: int) -> float | None:
+        """Records a raised attempt; returns the delay before retrying the same model, or None to move on."""
+        self.metrics.record(stage, model, False, time.perf_counter() - start, TOOL_ERROR)
+        kind = classify_exception(error)
+        breaker = self.breakers.model(model)
+        if kind in ErrorResult.DEPENDENCY_FAILURES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()  # The API answered; the request or the caller's code failed
+        if kind not in ErrorResult.RETRYABLE or number >= self.retry.max_attempts or self._cancelled():
+            return None
+        delay = self.retry.delay(number, getattr(error, "retry_after", None))
+        print(f"ModelRouter: {stage} on {model} failed ({kind}: {error}); retrying in {delay:.1f}s.")
+        return delay
+
+    def _accept(self, stage: str, model: str, result, failure_signal, start: float, models: List[str], index: int) -> bool:
+        """Records the attempt and returns True if the router should stop at this result."""
+        signal = failure_signal(result)
+        self.metrics.record(stage, model, signal is None, time.perf_counter() - start, signal)
+        if signal is None:
+            return True
+        if index == len(models) - 1 or self._cancelled():
+            return True
+        print(f"ModelRouter: {stage} on {model} failed ({signal}); escalating to {models[index + 1]}.")
+        return False
+
+    @staticmethod
+    def _cancelled() -> bool:
+        # A cancelled request must not start a fresh attempt on a stronger model
+        token = current_cancellation_token()
+        return token is not None and token.cancelled
+
+
+# Router used by the agents, tools and workflows
+MODEL_ROUTER = ModelRouter(MODEL_CHAINS)
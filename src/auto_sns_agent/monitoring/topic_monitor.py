@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import AsyncExitStack, contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List
+
+try:
+    import fcntl  # POSIX only: serializes watchlist writers across processes (CLI, monitor)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from auto_sns_agent.cancellation import CancellationToken
+from auto_sns_agent.config import (
+    AUTO_SNS_DATA_DIR,
+    MONITOR_DEFAULT_INTERVAL_SECONDS,
+    MONITOR_MAX_INTERVAL_SECONDS,
+    MONITOR_MAX_ITEMS_PER_POLL,
+    MONITOR_MIN_INTERVAL_SECONDS,
+    X_LOGIN_IDENTIFIER,
+    X_PASSWORD,
+    X_USERNAME,
+)
+from auto_sns_agent.storage.corpus import CorpusItem, PostCorpus, get_corpus
+from auto_sns_agent.tools.browser_resources import managed_browser
+from auto_sns_agent.tools.browser_watchdog import BROWSER_WATCHDOG
+from auto_sns_agent.tools.lean_browser import lean_profile
+from auto_sns_agent.tools.x_login import scripted_x_login
+from auto_sns_agent.tools.x_search_scraper import ScrapedPost, is_newer_post_id, scrape_x_search
+
+# Source recorded on corpus items, matching what the search tool looks up
+X_SOURCE = "x.com"
+
+
+class Watch:
+    """A topic, mention or hashtag the monitor polls, with its cursor and schedule."""
+
+    TOPIC = "topic"
+    MENTION = "mention"
+    HASHTAG = "hashtag"
+    KINDS = (TOPIC, MENTION, HASHTAG)
+
+    def __init__(self, kind: str, value: str, interval_seconds: float = MONITOR_DEFAULT_INTERVAL_SECONDS, cursor: str | None = None, next_poll_at: float = 0.0, last_polled_at: float | None = None, last_new_items: int = 0):
+        """
+        Args:
+            kind (str): One of Watch.KINDS.
+            value (str): Topic text, account handle or hashtag (with or without '@'/'#').
+            interval_seconds (float): Current polling interval; adapted after every poll.
+            cursor (str, optional): Id of the newest post seen; only newer posts are fetched.
+            next_poll_at (float): Unix time at which the watch is next due.
+            last_polled_at (float, optional): Unix time of the last poll.
+            last_new_items (int): New posts found by the last poll.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown watch kind '{kind}'. Expected one of {self.KINDS}.")
+        self.kind = kind
+        self.value = value.strip().lstrip("@#") if kind != self.TOPIC else value.strip()
+        self.interval_seconds = interval_seconds
+        self.cursor = cursor
+        self.next_poll_at = next_poll_at
+        self.last_polled_at = last_polled_at
+        self.last_new_items = last_new_items
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.value.lower()}"
+
+    @property
+    def query(self) -> str:
+        """X search query for this watch."""
+        if self.kind == self.MENTION:
+            return f"@{self.value}"
+        if self.kind == self.HASHTAG:
+            return f"#{self.value}"
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Watch":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"Watch({self.key!r}, interval={self.interval_seconds:.0f}s, cursor={self.cursor!r})"
+
+
+class Watchlist:
+    """
+    Watches persisted as one JSON file, written atomically after every change.
+
+    Several processes share the file (`auto-sns-monitor add` while `run` polls), so every
+    change is made under a file lock on the file as it is now: watches added or removed
+    elsewhere are picked up, and the watches this process holds keep their schedules.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watches: Dict[str, Watch] = self._read() or {}
+
+    def add(self, watch: Watch) -> Watch:
+        """Adds `watch`, keeping the cursor of an existing watch with the same key."""
+        with self._locked():
+            self._merge_file()
+            existing = self.watches.get(watch.key)
+            if existing is not None:
+                return existing
+            self.watches[watch.key] = watch
+            self._write()
+        return watch
+
+    def remove(self, key: str) -> bool:
+        with self._locked():
+            self._merge_file()
+            if self.watches.pop(key, None) is None:
+                return False
+            self._write()
+        return True
+
+    def due(self, now: float | None = None) -> List[Watch]:
+        """Watches whose next poll time has passed, most overdue first."""
+        now = now if now is not None else time.time()
+        return sorted((watch for watch in self.watches.values() if watch.next_poll_at <= now), key=lambda watch: watch.next_poll_at)
+
+    def reload(self) -> None:
+        """Picks up watches added or removed by other processes."""
+        with self._locked():
+            self._merge_file()
+
+    def save(self) -> None:
+        """Writes the schedules and cursors of the held watches, merged into the file as it is now."""
+        with self._locked():
+            self._merge_file()
+            self._write()
+
+    def _merge_file(self) -> None:
+        # Membership comes from the file; a watch held here keeps its object, and so its state
+        on_disk = self._read()
+        if on_disk is not None:
+            self.watches = {key: self.watches.get(key, watch) for key, watch in on_disk.items()}
+
+    def _read(self) -> Dict[str, Watch] | None:
+        """Watches in the file ({} if there is none yet), or None if it cannot be read."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {watch.key: watch for watch in map(Watch.from_dict, json.load(f))}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable watchlist {self.path}: {e}")
+            return None
+
+    def _write(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([watch.to_dict() for watch in self.watches.values()], f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive lock on the watchlist, shared by every process."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class XSearchSession:
+    """
+    One logged-in browser shared by every poll of the monitor.
+
+    The browser is opened on the first fetch and kept warm between polls; after a
+    failed fetch it is closed and reopened (and logged in again) on the next one.
+    """
+
+    def __init__(self, base_url: str = "https://x.com"):
+        self.base_url = base_url
+        self._stack: AsyncExitStack | None = None
+        self._page = None
+
+    async def fetch(self, watch: Watch, max_items: int) -> List[ScrapedPost]:
+        if self._page is None:
+            await self._open()
+        try:
+            return await scrape_x_search(self._page, watch.query, since_id=watch.cursor, max_items=max_items, base_url=self.base_url)
+        except Exception:
+            await self.close()
+            raise
+
+    async def _open(self) -> None:
+        self._stack = AsyncExitStack()
+        _, browser_context = await self._stack.enter_async_context(managed_browser(owner="monitor:x.com", lean=lean_profile("search")))
+        page = await browser_context.get_current_page()
+        if X_LOGIN_IDENTIFIER and X_PASSWORD:
+            login = await scripted_x_login(page, X_LOGIN_IDENTIFIER, X_PASSWORD, base_url=self.base_url, alternate_identifier=X_USERNAME)
+            print(f"Monitor login: {login.status} {login.detail}".rstrip())
+        self._page = page
+
+    async def close(self) -> None:
+        self._page = None
+        if self._stack is not None:
+            stack, self._stack = self._stack, None
+            await stack.aclose()
+
+
+class TopicMonitor:
+    """
+    Polls a watchlist on an adaptive schedule and stores new posts in the local corpus.
+
+    Each poll fetches only posts newer than the watch's cursor. A watch that keeps
+    producing new posts is polled more often (down to `min_interval_seconds`); a quiet
+    one backs off (up to `max_interval_seconds`). Posts are stored under their X post id,
+    so a post seen by several watches or polls is stored once.
+    """
+
+    def __init__(self, watchlist: Watchlist, corpus: PostCorpus, fetch: Callable[[Watch, int], Awaitable[List[ScrapedPost]]], min_interval_seconds: float = MONITOR_MIN_INTERVAL_SECONDS, max_interval_seconds: float = MONITOR_MAX_INTERVAL_SECONDS, max_items_per_poll: int = MONITOR_MAX_ITEMS_PER_POLL):
+        """
+        Args:
+            watchlist (Watchlist): Watches to poll; cursors and schedules are saved back to it.
+            corpus (PostCorpus): Where new posts are stored.
+            fetch (Callable[[Watch, int], Awaitable[List[ScrapedPost]]]): Returns posts newer
+                than the watch's cursor, at most the given number (e.g. XSearchSession.fetch).
+            min_interval_seconds (float): Shortest polling interval.
+            max_interval_seconds (float): Longest polling interval.
+            max_items_per_poll (int): Maximum posts read per poll.
+        """
+        self.watchlist = watchlist
+        self.corpus = corpus
+        self.fetch = fetch
+        self.min_interval_seconds = min_interval_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.max_items_per_poll = max_items_per_poll
+
+    def next_interval(self, watch: Watch, new_items: int) -> float:
+        """Halves the interval of a busy watch, grows a quiet one by half, and clamps the result."""
+        if new_items >= max(self.max_items_per_poll // 4, 1):
+            interval = watch.interval_seconds / 2
+        elif new_items == 0:
+            interval = watch.interval_seconds * 1.5
+        else:
+            interval = watch.interval_seconds
+        return min(max(interval, self.min_interval_seconds), self.max_interval_seconds)
+
+    async def poll(self, watch: Watch) -> int:
+        """Polls one watch, stores its new posts and reschedules it. Returns the number of new posts stored."""
+        posts = [post for post in await self.fetch(watch, self.max_items_per_poll) if is_newer_post_id(post.id, watch.cursor)]
+        stored = self.corpus.add_many(
+            CorpusItem(post.id, CorpusItem.POST, X_SOURCE, post.text, topic=watch.query, url=post.url, author=post.author, posted_at=post.posted_at)
+            for post in posts
+        )
+        if posts:
+            watch.cursor = max((post.id for post in posts), key=int)
+        now = time.time()
+        watch.last_polled_at = now
+        watch.last_new_items = stored
+        watch.interval_seconds = self.next_interval(watch, stored)
+        watch.next_poll_at = now + watch.interval_seconds
+        self.watchlist.save()
+        return stored
+
+    async def poll_due(self, now: float | None = None, cancellation: CancellationToken | None = None) -> Dict[str, int]:
+        """Polls every due watch once. Returns watch key -> new posts stored; failed polls are retried at the minimum interval."""
+        results: Dict[str, int] = {}
+        self.watchlist.reload()
+        for watch in self.watchlist.due(now):
+            if cancellation is not None and cancellation.cancelled:
+                break
+            try:
+                results[watch.key] = await self.poll(watch)
+                print(f"Monitor: {watch.key}: {results[watch.key]} new posts, next poll in {watch.interval_seconds:.0f}s")
+            except Exception as e:
+                print(f"Monitor: polling {watch.key} failed: {e}")
+                watch.next_poll_at = time.time() + self.min_interval_seconds
+                self.watchlist.save()
+        return results
+
+    async def run(self, cancellation: CancellationToken | None = None) -> None:
+        """Polls until cancelled, sleeping until the next watch is due."""
+        cancellation = cancellation or CancellationToken()
+        while not cancellation.cancelled:
+            await self.poll_due(cancellation=cancellation)
+            # Sleep in short slices, re-reading the watchlist, so cancellation and watches
+            # added from the command line are noticed promptly
+            while not cancellation.cancelled:
+                self.watchlist.reload()
+                wait = min((watch.next_poll_at for watch in self.watchlist.watches.values()), default=time.time() + self.min_interval_seconds) - time.time()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(5.0, wait))
+
+
+def _watchlist() -> Watchlist:
+    return Watchlist(os.path.join(AUTO_SNS_DATA_DIR, "watchlist.json"))
+
+
+async def _run_monitor(once: bool) -> None:
+    session = XSearchSession()
+    monitor = TopicMonitor(_watchlist(), get_corpus(), session.fetch)
+    try:
+        if once:
+            await monitor.poll_due(now=float("inf"))
+        else:
+            await monitor.run()
+    finally:
+        await session.close()
+
+
+def main():
+    """Command line entry point: `auto-sns-monitor add|remove|list|run`."""
+    parser = argparse.ArgumentParser(description="Keep the local post corpus up to date for a watchlist of topics, mentions and hashtags.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Add a watch")
+    add.add_argument("kind", choices=Watch.KINDS)
+    add.add_argument("value", help="Topic text, account handle or hashtag")
+    remove = commands.add_parser("remove", help="Remove a watch")
+    remove.add_argument("key", help="Watch key as shown by 'list', e.g. hashtag:aiethics")
+    commands.add_parser("list", help="Show watches and their schedules")
+    run = commands.add_parser("run", help="Poll due watches until interrupted")
+    run.add_argument("--once", action="store_true", help="Poll every watch once and exit")
+    args = parser.parse_args()
+
+    watchlist = _watchlist()
+    if args.command == "add":
+        print(f"Watching {watchlist.add(Watch(args.kind, args.value)).key}")
+    elif args.command == "remove":
+        print("Removed." if watchlist.remove(args.key) else f"No watch '{args.key}'.")
+    elif args.command == "list":
+        for watch in watchlist.watches.values():
+            due_in = max(watch.next_poll_at - time.time(), 0)
+            print(f"{watch.key:40} every {watch.interval_seconds:>6.0f}s  due in {due_in:>6.0f}s  cursor={watch.cursor}  last new={watch.last_new_items}")
+    else:
+        # Reaps browsers left behind by earlier runs before any new one starts
+        BROWSER_WATCHDOG.start()
+        try:
+            asyncio.run(_run_monitor(args.once))
+        except KeyboardInterrupt:
+            print("\nMonitor stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import re
+from typing import Dict, List, Sequence
+from urllib.parse import urlparse
+
+from auto_sns_agent.tools.media import MediaLimits
+
+
+class PlatformAdapter:
+    """
+    Everything the social media tools need to know about one platform.
+
+    The tools drive every platform the same way: log in, search, post, capture the new
+    post's URL. An adapter supplies the platform-specific parts: its URL, length rules,
+    selectors, the scripted routines it supports and the prompts for the LLM browser
+    agent. The base class is a working adapter for a platform without scripted
+    support: every step is left to the browser agent. Subclasses override the steps
+    they can do deterministically (see `XAdapter`).
+
+    `base_url` is a constructor argument so that an adapter can be pointed at a local
+    stand-in site in tests.
+    """
+
+    # Named CSS selectors the adapter's scripted routines rely on, e.g. "post_button"
+    selectors: Dict[str, str] = {}
+    # Root of the platform's official API, if posts can be published through it (see `XApiClient`)
+    api_base_url: str | None = None
+    # Attachments the platform accepts; None if media cannot be attached
+    media_limits: MediaLimits | None = None
+
+    def __init__(self, name: str, base_url: str, aliases: Sequence[str] = (), max_length: int | None = None):
+        """
+        Args:
+            name (str): Platform name used by the tools, e.g. "Twitter".
+            base_url (str): Site root, e.g. "https://x.com".
+            aliases (Sequence[str]): Other names the platform can be selected by.
+            max_length (int, optional): Longest post the platform accepts, as counted by `length`.
+        """
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.aliases = tuple(alias.lower() for alias in aliases)
+        self.max_length = max_length
+
+    @property
+    def source(self) -> str:
+        """Host recorded as the source of corpus items scraped from this platform."""
+        return urlparse(self.base_url).netloc or self.base_url
+
+    def matches(self, name: str) -> bool:
+        name = name.lower()
+        return name == self.name.lower() or name in self.aliases or name == self.source
+
+    # ---- length rules -----------------------------------------------------------
+
+    def length(self, text: str) -> int:
+        """Length of `text` as the platform counts it."""
+        return len(text)
+
+    def length_error(self, text: str, prefix: str = "") -> str | None:
+        """Error message if `prefix + text` is too long for the platform, else None."""
+        if self.max_length is None:
+            return None
+        total = self.length(prefix + text)
+        if total <= self.max_length:
+            return None
+        return (
+            f"Error: Content exceeds {self.name}'s {self.max_length} character limit. "
+            f"Current length with prefix: {total} characters. "
+            f"Please shorten your content by at least {total - self.max_length} characters."
+        )
+
+    # ---- login ------------------------------------------------------------------
+
+    async def login(self, page, identifier: str, password: str, username: str | None = None):
+        """
+        Logs in with a scripted routine, before any agent runs.
+
+        Returns:
+            LoginResult | None: None when the platform has no scripted login; the agent is
+            then asked to log in (see `login_instructions`).
+        """
+        return None
+
+    def login_instructions(self, identifier: str, password: str, on_failure: str) -> str:
+        """Login steps for the browser agent when there is no (working) scripted login."""
+        return (
+            f"If you encounter a login page, log in using the identifier '{identifier}' and password '{password}'. "
+            f"{on_failure} "
+            f"If the site requests a 2-Factor Authentication (2FA) code or shows a captcha, you won't be able to proceed - report this as an error. "
+        )
+
+    # ---- search -----------------------------------------------------------------
+
+    async def scrape_search(self, page, query: str, max_items: int) -> List[str] | None:
+        """
+        Reads the texts of posts matching `query` without an LLM.
+
+        Returns:
+            List[str] | None: None when the platform has no scripted search.
+        """
+        return None
+
+    async def own_posts(self, page, username: str, max_items: int) -> List[Dict[str, str]] | None:
+        """
+        Reads the latest posts of the account `username` without an LLM, newest first.
+
+        Used to check whether a post whose submission had no known outcome was published.
+
+        Returns:
+            List[Dict[str, str]] | None: `{"text", "url"}` of each post; None when the
+            platform has no scripted way to read them or they could not be read.
+        """
+        return None
+
+    def search_task(self, topic: str, count: int, login_instructions: str, delimiter: str) -> str:
+        """Browser agent task for finding about `count` posts on `topic`."""
+        return (
+            f"Go to {self.base_url}. {login_instructions}"
+            f"In the search bar, search for content related to the topic: '{topic}'. "
+            f"If you cannot find a search bar directly, try to navigate to a state where searching is possible. "
+            f"Identify approximately {count} distinct posts from the search results. "
+            f"For each of these posts, extract its main textual content. "
+            f"Return all extracted post texts as a single string, with each post separated by '{delimiter}'."
+        )
+
+    # ---- posting ----------------------------------------------------------------
+
+    async def open_editor(self, page, timeout_seconds: float) -> bool:
+        """
+        Opens an empty post editor, without the agent, so that posting only has to type and submit.
+
+        Returns:
+            bool: False when the platform has no scripted way to open it.
+        """
+        return False
+
+    async def attach_media(self, page, paths: List[str], timeout_seconds: float) -> bool:
+        """
+        Opens the post editor and attaches the files through its file input, without the agent.
+
+        Returns:
+            bool: False when the platform has no scripted media attachment.
+        """
+        return False
+
+    def post_task(self, text: str, login_instructions: str, attached_media: int = 0, editor_open: bool = False) -> str:
+        """Browser agent task for publishing `text` (in an editor that is already open, or already holds `attached_media` files)."""
+        opening = self._editor_instructions(login_instructions, attached_media, examples="'Post' or '+'", editor_open=editor_open)
+        return opening + (
+            f"In the main content area for the new post, enter the following text exactly: '{text}'. "
+            f"Then click the button that publishes the post and wait a few seconds for the page to update. "
+            f"Look for a success notification or error message. Try posting again if the post editor is still shown unchanged. "
+            f"Do not look for the new post or its URL; once the post was sent, return 'Posted successfully'. "
+            f"If posting fails, describe the reason (e.g., 'Failed to post: Could not find post button', 'Failed to post: Error message encountered: [error message]')."
+        )
+
+    def _editor_instructions(self, login_instructions: str, attached_media: int, examples: str, editor_open: bool = False) -> str:
+        if attached_media:
+            return (
+                f"The post editor at {self.base_url} is already open with {attached_media} media file(s) attached. "
+                f"Do not navigate away, close the editor or remove the attachments. "
+            )
+        if editor_open:
+            return f"You are logged in and the post editor at {self.base_url} is already open. Do not navigate away or close the editor. "
+        return (
+            f"Go to {self.base_url}. {login_instructions} "
+            f"Once logged in (or if already logged in), find the interface to create a new post (e.g., a {examples} button). "
+        )
+
+    def post_capture(self):
+        """
+        Listener that reads the new post's URL from network traffic (see `CreatedPostCapture`).
+
+        Returns None when the platform has none; the URL is then looked up on the profile page.
+        """
+        return None
+
+    def is_post_commit_step(self, step) -> bool:
+        """True if a recorded `ScriptStep` submits the post; posting scripts are recorded up to it."""
+        return False
+
+    @property
+    def post_success_selector(self) -> str | None:
+        """Element shown once a post was sent, checked when a recorded posting script is replayed."""
+        return self.selectors.get("post_success")
+
+    @property
+    def post_url_pattern(self) -> re.Pattern:
+        """Matches the URL of a single post in text returned by the browser agent."""
+        return re.compile(rf"{re.escape(self.base_url)}/\S+")
+
+    def post_url(self, post_id: str, username: str | None = None) -> str | None:
+        """Canonical URL of the post with `post_id`, if the platform's URLs can be built from an id."""
+        return None
+
+    def profile_lookup_task(self) -> str:
+        """Browser agent task for reading the URL of the account's newest post."""
+        return (
+            f"You are logged in to {self.base_url} and have just published a post. "
+            f"Open your profile page (usually via the 'Profile' link or your avatar) and find your most recent post. "
+            f"Open the post's own page (e.g. by clicking its timestamp) and return only that page's URL. "
+            f"If you cannot find it, return 'URL not found'."
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r}, {self.base_url!r})"
@@ -0,0 +1,29 @@
+from typing import List
+from urllib.parse import urlparse
+
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.x import XAdapter
+
+# Platforms the social media tools support, selectable by name or alias
+_PLATFORMS: List[PlatformAdapter] = [XAdapter()]
+
+
+def register_platform(adapter: PlatformAdapter) -> None:
+    """Adds `adapter`, replacing a registered platform of the same name."""
+    _PLATFORMS[:] = [platform for platform in _PLATFORMS if platform.name != adapter.name]
+    _PLATFORMS.append(adapter)
+
+
+def get_platform(name: str) -> PlatformAdapter | None:
+    """Registered platform called `name` (case-insensitive, aliases included), or None."""
+    return next((platform for platform in _PLATFORMS if platform.matches(name)), None)
+
+
+def platform_for_url(url: str) -> PlatformAdapter:
+    """Registered platform hosted at `url`, or a generic agent-only adapter for an unknown site."""
+    host = urlparse(url).netloc or url
+    return next((platform for platform in _PLATFORMS if platform.source == host), None) or PlatformAdapter(host, url)
+
+
+def platform_names() -> List[str]:
+    return [platform.name for platform in _PLATFORMS]
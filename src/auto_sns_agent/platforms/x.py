@@ -0,0 +1,123 @@
+import re
+from typing import Dict, List
+
+from auto_sns_agent.config import X_API_BASE_URL
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.tools.action_replay import ScriptStep
+from auto_sns_agent.tools.media import MediaLimits
+from auto_sns_agent.tools.post_capture import CreatedPostCapture, post_url
+from auto_sns_agent.tools.x_login import (
+    X_SELECTORS,
+    scripted_x_login,
+    x_login_fallback_instructions,
+)
+from auto_sns_agent.tools.x_search_scraper import (
+    X_SEARCH_SELECTORS,
+    scrape_x_profile,
+    scrape_x_search,
+)
+
+# Clicking one of these buttons submits a post (inline composer and modal composer)
+X_POST_BUTTON_TESTIDS = ("tweetButtonInline", "tweetButton")
+
+# twitter-text counting rules: code points in these ranges weigh 1, all others 2,
+# and every URL counts as 23 whatever its length
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+_URL = re.compile(r"https?://\S+")
+_URL_WEIGHT = 23
+
+
+def x_weighted_length(text: str) -> int:
+    """Length of `text` as X counts it against the 280 limit (CJK characters and emoji count twice)."""
+    urls = _URL.findall(text)
+    text = _URL.sub("", text)
+    weighted = sum(1 if any(low <= ord(char) <= high for low, high in _LIGHT_RANGES) else 2 for char in text)
+    return weighted + _URL_WEIGHT * len(urls)
+
+
+class XAdapter(PlatformAdapter):
+    """X (Twitter): scripted login and search, network capture of the created post."""
+
+    selectors = {
+        **X_SELECTORS,
+        **X_SEARCH_SELECTORS,
+        "post_button": ", ".join(f'[data-testid="{testid}"]' for testid in X_POST_BUTTON_TESTIDS),
+        # Toast X shows once a post has been sent
+        "post_success": '[data-testid="toast"]',
+        "media_input": 'input[data-testid="fileInput"]',
+        "post_textarea": '[data-testid="tweetTextarea_0"]',
+        "attachments": '[data-testid="attachments"]',
+    }
+    # Up to 4 images (5 MB each), or one GIF (15 MB) or video (512 MB)
+    media_limits = MediaLimits()
+
+    def __init__(self, base_url: str = "https://x.com", api_base_url: str | None = X_API_BASE_URL):
+        super().__init__("Twitter", base_url, aliases=("x", "x.com", "twitter.com"), max_length=280)
+        self.api_base_url = api_base_url
+
+    def length(self, text: str) -> int:
+        return x_weighted_length(text)
+
+    async def login(self, page, identifier: str, password: str, username: str | None = None):
+        alternate_identifier = username if username and username != identifier else None
+        return await scripted_x_login(page, identifier, password, base_url=self.base_url, alternate_identifier=alternate_identifier)
+
+    def login_instructions(self, identifier: str, password: str, on_failure: str) -> str:
+        return x_login_fallback_instructions(identifier, password, on_failure=on_failure)
+
+    async def scrape_search(self, page, query: str, max_items: int) -> List[str] | None:
+        return [post.text for post in await scrape_x_search(page, query, max_items=max_items, base_url=self.base_url)]
+
+    async def own_posts(self, page, username: str, max_items: int) -> List[Dict[str, str]] | None:
+        # The profile timeline rather than search, which may not list a new post yet
+        posts = await scrape_x_profile(page, username, max_items=max_items, base_url=self.base_url)
+        if posts is None:
+            return None
+        return [{"text": post.text, "url": post.url} for post in posts]
+
+    async def open_editor(self, page, timeout_seconds: float) -> bool:
+        await page.goto(f"{self.base_url}/compose/post")
+        await page.locator(self.selectors["post_textarea"]).first.wait_for(state="visible", timeout=timeout_seconds * 1000)
+        return True
+
+    async def attach_media(self, page, paths: List[str], timeout_seconds: float) -> bool:
+        await page.goto(f"{self.base_url}/compose/post")
+        await page.locator(self.selectors["media_input"]).first.set_input_files(paths, timeout=timeout_seconds * 1000)
+        await page.locator(self.selectors["attachments"]).first.wait_for(state="visible", timeout=timeout_seconds * 1000)
+        # The post button is enabled once every attachment finished uploading
+        ready = ", ".join(f'[data-testid="{testid}"]:not([aria-disabled="true"])' for testid in X_POST_BUTTON_TESTIDS)
+        await page.locator(ready).first.wait_for(state="visible", timeout=timeout_seconds * 1000)
+        return True
+
+    def post_task(self, text: str, login_instructions: str, attached_media: int = 0, editor_open: bool = False) -> str:
+        opening = self._editor_instructions(login_instructions, attached_media, examples="'Post', 'Tweet', or '+'", editor_open=editor_open)
+        return opening + (
+            f"In the main content area for the new post, enter the following text exactly: '{text}'. "
+            f"Then, wait for 2 seconds to ensure the post button becomes enabled after text entry. "
+            f"To click the post button, use this exact approach in order: "
+            f"1. Try to click the button with data-testid=\"tweetButtonInline\" which contains the text 'ポストする' or 'Post'. "
+            f"2. If that doesn't work, try clicking by CSS selector 'button[data-testid=\"tweetButtonInline\"]'. "
+            f"3. If that doesn't work, try to find a blue-colored button that says '投稿する', 'ポストする', or contains role='button'. "
+            f"4. If the button still appears disabled, try explicitly sending keyboard shortcut Ctrl+Enter (or Command+Enter on Mac). "
+            f"5. Finally, try clicking any button-like element that appears enabled after text entry with a blue background. "
+            f"Be aware that the post button is initially disabled (has attributes aria-disabled='true' and disabled='') but becomes enabled after text is entered. "
+            f"After clicking the post button, wait a few seconds for the page to update. Look for a success notification (e.g., 'Your post was sent', 'Tweet sent'). "
+            f"Posting might fail if the text is too long or if the post button is not found. Check if there are any notification or error message. "
+            f"Try posting again if you still see the posting modal or posting page unchanged. "
+            f"Do not look for the new post or its URL; once the post was sent, return 'Posted successfully'. "
+            f"If posting fails, describe the reason (e.g., 'Failed to post: Could not find post button', 'Failed to post: Error message encountered: [error message]')."
+        )
+
+    def post_capture(self) -> CreatedPostCapture:
+        return CreatedPostCapture(base_url=self.base_url)
+
+    def post_url(self, post_id: str, username: str | None = None) -> str:
+        return post_url(post_id, username, self.base_url)
+
+    def is_post_commit_step(self, step: ScriptStep) -> bool:
+        return step.action == ScriptStep.CLICK and any(testid in selector for selector in step.selectors for testid in X_POST_BUTTON_TESTIDS)
+
+    @property
+    def post_url_pattern(self) -> re.Pattern:
+        hosts = "|".join(re.escape(host) for host in {self.source, "x.com", "twitter.com"})
+        return re.compile(rf"https?://(?:www\.)?(?:{hosts})/[^\s/'\"]+(?:/web)?/status/\d+")
@@ -0,0 +1,306 @@
+import atexit
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
+
+from auto_sns_agent.config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_TOP_N
+
+# Frame labels by code object, so that a sample costs no string formatting for code seen before
+_FRAME_LABELS: Dict[object, str] = {}
+
+
+class StageProfile:
+    """Samples and timings of one stage, summed over all the times it ran."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # Stack (outermost first, rooted at the enclosing stages) -> samples
+        self.stacks: Counter = Counter()
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0  # CPU time of the stage's thread
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    @property
+    def waiting_share(self) -> float:
+        """Share of the wall time the thread was not on the CPU (LLM API, browser, user input)."""
+        if self.wall_seconds <= 0:
+            return 0.0
+        return max(0.0, 1 - self.cpu_seconds / self.wall_seconds)
+
+    def collapsed(self) -> List[str]:
+        """Lines of the collapsed-stack format ("outer;inner;leaf count") read by flame graph tools."""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+
+class _ActiveStage:
+    def __init__(self, name: str, path: Tuple[str, ...], entry_frames: list):
+        self.name = name
+        self.path = path  # Names of the enclosing stages and this one
+        self.entry_frames = entry_frames  # Stack of the code that entered the stage
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+
+
+class _Stage:
+    """Context manager returned by `SamplingProfiler.stage`."""
+
+    def __init__(self, profiler: "SamplingProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.active: _ActiveStage | None = None
+
+    def __enter__(self):
+        self.active = self.profiler._enter(self.name, sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self.active)
+        self.active = None
+        return False
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampling profiler scoped to named stages (workflow steps, tool calls).
+
+    While a thread is inside a `stage`, a background thread reads its Python stack
+    every `interval_seconds` with `sys._current_frames`, so the profiled code runs
+    without any tracing hooks. Each sample is counted for the innermost stage the
+    thread is in, rooted at the names of its enclosing stages. The wall time and the
+    thread's CPU time of every stage are measured too: CPU time is Python-side work
+    (message building, DOM processing, truncation), the rest of the wall time was
+    spent waiting.
+
+    `write_report` writes one collapsed-stack file per stage, one for all stages and
+    a summary with the hottest functions to `output_dir`.
+    """
+
+    def __init__(self, output_dir: str, interval_seconds: float = PROFILE_SAMPLE_INTERVAL_MS / 1000, top_n: int = PROFILE_TOP_N):
+        """
+        Args:
+            output_dir (str): Directory the report is written to (created when writing).
+            interval_seconds (float): Time between two samples.
+            top_n (int): Functions listed in the summary.
+        """
+        self.output_dir = output_dir
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self.profiles: Dict[str, StageProfile] = {}
+        self._active: Dict[int, List[_ActiveStage]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager that profiles the enclosed block as stage `name`."""
+        return _Stage(self, name)
+
+    def _enter(self, name: str, caller_frame) -> _ActiveStage:
+        with self._lock:
+            stages = self._active.setdefault(threading.get_ident(), [])
+            path = (stages[-1].path if stages else ()) + (name,)
+            active = _ActiveStage(name, path, _frames(caller_frame))
+            stages.append(active)
+            if self._sampler is None and not self._stopped.is_set():
+                self._sampler = threading.Thread(target=self._sample_loop, name="stage-profiler", daemon=True)
+                self._sampler.start()
+        return active
+
+    def _exit(self, active: _ActiveStage) -> None:
+        wall = time.perf_counter() - active.started
+        cpu = time.thread_time() - active.cpu_started
+        with self._lock:
+            stages = self._active.get(active.thread_id, [])
+            if active in stages:
+                stages.remove(active)
+            if not stages:
+                self._active.pop(active.thread_id, None)
+            profile = self._profile(active.name)
+            profile.calls += 1
+            profile.wall_seconds += wall
+            profile.cpu_seconds += cpu
+
+    def _profile(self, name: str) -> StageProfile:
+        if name not in self.profiles:
+            self.profiles[name] = StageProfile(name)
+        return self.profiles[name]
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.sample()
+
+    def sample(self) -> None:
+        """Takes one sample of every thread inside a stage (called by the sampler thread)."""
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, stages in self._active.items():
+                frame = frames.get(thread_id)
+                if frame is None or not stages:
+                    continue
+                innermost = stages[-1]
+                stack = _frames(frame)
+                # Frames shared with the code that entered the stage are dropped, except the
+                # last one: the function the stage was entered from is the root of its stacks
+                common = _common_prefix(stack, innermost.entry_frames)
+                labels = tuple(_frame_label(f.f_code) for f in stack[max(0, common - 1):])
+                self._profile(innermost.name).stacks[innermost.path + labels] += 1
+        del frames
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler is not None and self._sampler is not threading.current_thread():
+            self._sampler.join(timeout=1)
+
+    def summary(self) -> str:
+        """Per-stage timings and the hottest functions by samples taken in them (own) and below them (total)."""
+        with self._lock:
+            profiles = list(self.profiles.values())
+        samples = sum(profile.samples for profile in profiles)
+        lines = [f"Profile: {samples} samples every {self.interval_seconds * 1000:.0f} ms, written to {self.output_dir}"]
+        for profile in profiles:
+            lines.append(
+                f"  {profile.name}: {profile.calls} call(s), {profile.wall_seconds:.2f}s wall, "
+                f"{profile.cpu_seconds:.2f}s CPU ({profile.waiting_share:.0%} waiting), {profile.samples} samples"
+            )
+        own: Counter = Counter()
+        total: Counter = Counter()
+        stage_names = {profile.name for profile in profiles}
+        for profile in profiles:
+            for stack, count in profile.stacks.items():
+                functions = [label for label in stack if label not in stage_names]
+                if functions:
+                    own[functions[-1]] += count
+                for label in set(functions):
+                    total[label] += count
+        if own:
+            lines.append(f"Top {min(self.top_n, len(own))} functions by own samples (own% / total%):")
+            for label, count in own.most_common(self.top_n):
+                lines.append(f"  {count / samples:6.1%} {total[label] / samples:6.1%}  {label}")
+        return "\n".join(lines)
+
+    def write_report(self) -> str | None:
+        """
+        Stops sampling and writes the report to `output_dir`.
+
+        Returns:
+            str | None: The summary, or None if no stage ran.
+        """
+        self.stop()
+        with self._lock:
+            profiles = list(self.profiles.values())
+        if not profiles:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        everything: List[str] = []
+        for profile in profiles:
+            lines = profile.collapsed()
+            everything += lines
+            _write_lines(os.path.join(self.output_dir, f"{_file_name(profile.name)}.collapsed"), lines)
+        _write_lines(os.path.join(self.output_dir, "all.collapsed"), everything)
+        summary = self.summary()
+        _write_lines(os.path.join(self.output_dir, "summary.txt"), [summary])
+        return summary
+
+
+def _frames(frame) -> list:
+    """Frames of a stack, outermost first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _common_prefix(stack: list, other: list) -> int:
+    count = 0
+    for a, b in zip(stack, other):
+        if a is not b:
+            break
+        count += 1
+    return count
+
+
+def _frame_label(code) -> str:
+    label = _FRAME_LABELS.get(code)
+    if label is None:
+        label = _FRAME_LABELS[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def _short_path(path: str) -> str:
+    """Path of a source file from its package root (e.g. "agno/agent/agent.py")."""
+    path = path.replace(os.sep, "/")
+    for marker in ("/site-packages/", "/src/"):
+        if marker in path:
+            return path.rsplit(marker, 1)[1]
+    return os.path.basename(path)
+
+
+def _file_name(stage: str) -> str:
+    return re.sub(r"[^\w.-]", "_", stage)
+
+
+def _write_lines(path: str, lines: List[str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+_PROFILER: SamplingProfiler | None = None
+
+
+def enable_profiling(output_dir: str | None = None) -> SamplingProfiler:
+    """
+    Starts profiling the stages of this process.
+
+    The report goes to a new directory under `output_dir` (default: PROFILE_DIR),
+    written by `finish_profiling`, or at exit if that is not called.
+    """
+    global _PROFILER
+    if _PROFILER is None:
+        run_dir = os.path.join(output_dir or PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        _PROFILER = SamplingProfiler(run_dir)
+        atexit.register(finish_profiling)
+        print(f"Profiling workflow stages and tool calls; the report will be written to {run_dir}")
+    return _PROFILER
+
+
+def finish_profiling() -> str | None:
+    """Writes and prints the report of `enable_profiling`; does nothing if profiling is off."""
+    global _PROFILER
+    profiler, _PROFILER = _PROFILER, None
+    if profiler is None:
+        return None
+    summary = profiler.write_report()
+    if summary:
+        print(summary)
+    return summary
+
+
+def profile_stage(name: str):
+    """Profiles the enclosed block as stage `name` when profiling is enabled; does nothing otherwise."""
+    return _PROFILER.stage(name) if _PROFILER is not None else nullcontext()
+
+
+def profiling_tool_hook(function_name: str, function_call, arguments: Dict):
+    """Agno tool hook that profiles each tool call as stage "tool.<name>"."""
+    with profile_stage(f"tool.{function_name}"):
+        return function_call(**arguments)
+
+
+def add_profile_argument(parser) -> None:
+    """Adds the `--profile [DIR]` option to an argparse parser."""
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+        help=f"Sample the Python stacks of each workflow stage and tool call; write collapsed stacks and a hot-function summary under DIR (default: {PROFILE_DIR}).",
+    )
@@ -0,0 +1,110 @@
+import hashlib
+import re
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from auto_sns_agent.storage.corpus import tokenize
+
+NUM_PERMUTATIONS = 128
+# Universal hashing h(x) = (a * x + b) mod p over 32-bit feature hashes; a < 2**31 keeps a * x within uint64
+_PRIME = np.uint64(4_294_967_291)
+_rng = np.random.default_rng(20240611)  # Fixed seed: signatures are persisted and must stay comparable
+_A = _rng.integers(1, 2**31, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 2**32, NUM_PERMUTATIONS, dtype=np.uint64)
+# Every hash value is below _PRIME, so this never collides with a real signature
+_EMPTY_SIGNATURE = np.full(NUM_PERMUTATIONS, 2**32 - 1, dtype=np.uint64)
+
+# Retweet markers and links differ between copies of the same text
+_RETWEET_PREFIX = re.compile(r"^\s*RT\s+@\w+:?\s*", re.IGNORECASE)
+_URL = re.compile(r"https?://\S+")
+
+
+def shingles(text: str) -> set[str]:
+    """Words and word pairs of the normalized text; pairs make the comparison sensitive to word order."""
+    words = tokenize(_URL.sub(" ", _RETWEET_PREFIX.sub("", text)))
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    MinHash signature of `text`'s shingles.
+
+    The fraction of positions at which two signatures agree estimates the Jaccard
+    similarity of the two shingle sets.
+    """
+    features = shingles(text)
+    if not features:
+        return _EMPTY_SIGNATURE.copy()
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little") for feature in features],
+        dtype=np.uint64,
+    )
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def signature_to_hex(signature: np.ndarray) -> str:
+    """Compact text form of a signature for storage (every value fits in 32 bits)."""
+    return signature.astype("<u4").tobytes().hex()
+
+
+def signature_from_hex(value: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(value), dtype="<u4").astype(np.uint64)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.count_nonzero(first == second)) / NUM_PERMUTATIONS
+
+
+class MinHashIndex:
+    """
+    Finds stored signatures similar to a query without comparing against all of them.
+
+    Signatures are cut into bands (LSH banding); only entries that agree with the query
+    on every position of at least one band are compared. With 32 bands of 4 rows, pairs
+    above 0.6 similarity become candidates about 99% of the time, while unrelated posts
+    almost never do. Below a 0.4 threshold, 64 bands of 2 rows are used instead.
+    """
+
+    def __init__(self, threshold: float = 0.7):
+        """
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of a match.
+        """
+        self.threshold = threshold
+        self._rows = 4 if threshold >= 0.4 else 2
+        self._tables: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(NUM_PERMUTATIONS // self._rows)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self._rows:(band + 1) * self._rows].tobytes() for band in range(len(self._tables))]
+
+    def add(self, key: Hashable, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            table.setdefault(band_key, []).append(key)
+
+    def query(self, signature: np.ndarray) -> List[Tuple[Hashable, float]]:
+        """Keys at or above the threshold with their estimated similarity, most similar first."""
+        candidates = set()
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            candidates.update(table.get(band_key, ()))
+        matches = [(key, similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted((match for match in matches if match[1] >= self.threshold), key=lambda match: match[1], reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+def drop_near_duplicates(texts: Sequence[str], threshold: float = 0.7) -> List[str]:
+    """Returns `texts` without items that nearly duplicate an earlier one (retweets, copies, templated spam)."""
+    index = MinHashIndex(threshold)
+    kept: List[str] = []
+    for text in texts:
+        signature = minhash(text)
+        if index.query(signature):
+            continue
+        index.add(len(kept), signature)
+        kept.append(text)
+    return kept
@@ -0,0 +1,129 @@
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from auto_sns_agent.storage.corpus import tokenize
+
+# Rough characters-per-token ratio of OpenAI tokenizers on English text
+_CHARS_PER_TOKEN = 4
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgets (no tokenizer dependency)."""
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents, stored as NumPy sparse arrays.
+
+    Postings are kept in compressed-sparse-column form (term -> documents) with the
+    BM25 weight of every (term, document) pair precomputed, so scoring a query is a
+    gather over the query terms' postings followed by one `np.bincount`.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents (Sequence[str]): Texts to index; scores are returned in this order.
+            k1 (float): Term frequency saturation.
+            b (float): Document length normalization.
+        """
+        self.size = len(documents)
+        self.vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        lengths = np.zeros(self.size, dtype=np.int64)
+        for doc, text in enumerate(documents):
+            terms = tokenize(text)
+            lengths[doc] = len(terms)
+            term_ids.extend(self.vocabulary.setdefault(term, len(self.vocabulary)) for term in terms)
+
+        # One key per term occurrence, ordered term-major: unique keys are the CSC postings
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+        keys = np.asarray(term_ids, dtype=np.int64) * max(self.size, 1) + rows
+        unique_keys, term_frequencies = np.unique(keys, return_counts=True)
+        posting_terms = unique_keys // max(self.size, 1)
+        self._posting_docs = unique_keys % max(self.size, 1)
+        self._indptr = np.searchsorted(posting_terms, np.arange(len(self.vocabulary) + 1))
+
+        document_frequencies = np.diff(self._indptr)
+        idf = np.log1p((self.size - document_frequencies + 0.5) / (document_frequencies + 0.5))
+        average_length = lengths.mean() if self.size and lengths.any() else 1.0
+        length_norm = k1 * (1 - b + b * lengths[self._posting_docs] / average_length)
+        self._weights = idf[posting_terms] * term_frequencies * (k1 + 1) / (term_frequencies + length_norm)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query` (0 for documents sharing no term)."""
+        term_ids = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        if not term_ids:
+            return np.zeros(self.size)
+        postings = np.concatenate([np.arange(self._indptr[term], self._indptr[term + 1]) for term in term_ids])
+        return np.bincount(self._posting_docs[postings], weights=self._weights[postings], minlength=self.size)
+
+
+def split_passages(text: str, max_words: int = 120) -> List[str]:
+    """
+    Splits a long text (e.g. an article) into passages of at most about `max_words` words.
+
+    Paragraphs are kept together where possible; short ones are merged and long ones
+    are split at sentence boundaries.
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    current_words = 0
+    for paragraph in (part.strip() for part in re.split(r"\n\s*\n|\n", text)):
+        if not paragraph:
+            continue
+        sentences = _SENTENCE_END.split(paragraph) if len(paragraph.split()) > max_words else [paragraph]
+        for sentence in sentences:
+            words = len(sentence.split())
+            if current and current_words + words > max_words:
+                passages.append(" ".join(current))
+                current, current_words = [], 0
+            current.append(sentence)
+            current_words += words
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def select_passages(query: str, passages: Sequence[str], top_k: int, token_budget: int, keep_order: bool = False) -> List[str]:
+    """
+    Picks the passages most relevant to `query` that fit in a prompt.
+
+    Args:
+        query (str): Topic the passages are ranked against.
+        passages (Sequence[str]): Candidate posts or article passages.
+        top_k (int): Maximum number of passages returned.
+        token_budget (int): Maximum estimated tokens of the returned passages together.
+        keep_order (bool): Return the selection in its original order (for article text)
+            instead of best first.
+
+    Returns:
+        List[str]: Selected passages. Passages sharing no term with the query are dropped
+        unless none match at all; if even the best passage exceeds the budget, it is truncated.
+    """
+    if not passages:
+        return []
+    scores = BM25Index(passages).scores(query)
+    order = np.argsort(-scores, kind="stable")
+    if scores[order[0]] > 0:
+        order = order[scores[order] > 0]
+
+    selected: List[int] = []
+    used_tokens = 0
+    for index in order:
+        if len(selected) >= top_k:
+            break
+        cost = estimate_tokens(passages[index])
+        if used_tokens + cost > token_budget:
+            continue  # A shorter, lower-ranked passage may still fit
+        selected.append(int(index))
+        used_tokens += cost
+    if not selected:
+        return [passages[order[0]][:token_budget * _CHARS_PER_TOKEN]]
+    if keep_order:
+        selected.sort()
+    return [passages[index] for index in selected]
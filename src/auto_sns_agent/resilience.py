@@ -0,0 +1,333 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict
+
+from auto_sns_agent.cancellation import current_cancellation_token
+from auto_sns_agent.config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+
+# Operation classes with their own retry policy
+SEARCH = "search"
+ARTICLE = "article"
+POST = "post"
+MODEL = "model"
+
+# Granularity of cancellation checks while waiting between attempts
+_WAIT_SLICE_SECONDS = 0.25
+
+
+class ErrorResult(str):
+    """
+    A failed tool result: the message the agents read, typed with the kind of failure.
+
+    Tools return plain strings to the LLM, so an `ErrorResult` is a `str` and reads
+    like any other tool message; code that decides what to do next (retry, trip a
+    circuit breaker, check whether a post exists) looks at `kind` instead of parsing
+    the message.
+    """
+
+    # A dependency failed (network, browser, server error); worth retrying
+    TRANSIENT = "transient"
+    # The dependency asked to slow down
+    RATE_LIMITED = "rate_limited"
+    # Not attempted: the dependency's circuit breaker is open
+    UNAVAILABLE = "unavailable"
+    # The request itself was refused (credentials, content, unsupported); never retried
+    REJECTED = "rejected"
+    # A post may or may not have been published; only retried after checking it does not exist
+    UNKNOWN_OUTCOME = "unknown_outcome"
+    # Stopped by the agent budget or by the user; never retried
+    BUDGET_EXHAUSTED = "budget_exhausted"
+    CANCELLED = "cancelled"
+
+    RETRYABLE = frozenset({TRANSIENT, RATE_LIMITED})
+    # Kinds that say the dependency itself is unhealthy (counted by circuit breakers)
+    DEPENDENCY_FAILURES = frozenset({TRANSIENT, RATE_LIMITED, UNKNOWN_OUTCOME})
+
+    def __new__(cls, message: str, kind: str, retry_after: float | None = None):
+        result = super().__new__(cls, message)
+        result.kind = kind
+        result.retry_after = retry_after  # Seconds the dependency asked to wait, if it said
+        return result
+
+    def __getnewargs__(self):
+        return str(self), self.kind, self.retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in self.RETRYABLE
+
+    def __repr__(self) -> str:
+        return f"ErrorResult({self.kind}, {str(self)[:80]!r})"
+
+
+def error_kind(result) -> str | None:
+    """Kind of a tool result if it is an `ErrorResult`, else None."""
+    return result.kind if isinstance(result, ErrorResult) else None
+
+
+def classify_exception(error: BaseException) -> str:
+    """
+    `ErrorResult` kind of an exception raised while calling a dependency.
+
+    Judged from the HTTP status the exception carries (OpenAI, Agno and httpx errors
+    expose one) or from its type, so that no client library has to be imported.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    name = type(error).__name__
+    if status == 429 or "RateLimit" in name:
+        return ErrorResult.RATE_LIMITED
+    if isinstance(status, int) and status >= 500:
+        return ErrorResult.TRANSIENT
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return ErrorResult.TRANSIENT
+    if any(part in name for part in ("Timeout", "Connection", "ServiceUnavailable", "InternalServer", "TargetClosed")):
+        return ErrorResult.TRANSIENT
+    return ErrorResult.REJECTED
+
+
+class RetryPolicy:
+    """How often and how patiently one class of operation is retried."""
+
+    def __init__(self, max_attempts: int, base_delay_seconds: float = RETRY_BASE_DELAY_SECONDS, max_delay_seconds: float = RETRY_MAX_DELAY_SECONDS):
+        """
+        Args:
+            max_attempts (int): Attempts in total, including the first.
+            base_delay_seconds (float): Upper bound of the delay before the first retry;
+                it doubles with every further retry.
+            max_delay_seconds (float): Cap of the delay bound.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+    def delay(self, retry: int, retry_after: float | None = None) -> float:
+        """
+        Seconds to wait before retry number `retry` (1 for the first retry).
+
+        Full jitter: a uniformly random delay up to the exponential bound, so callers
+        that failed together do not retry together. A wait the dependency asked for
+        (`retry_after`) is respected when it is longer.
+        """
+        bound = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (retry - 1))
+        return max(random.uniform(0, bound), retry_after or 0.0)
+
+    def __repr__(self) -> str:
+        return f"RetryPolicy(max_attempts={self.max_attempts}, base={self.base_delay_seconds}s, max={self.max_delay_seconds}s)"
+
+
+RETRY_POLICIES: Dict[str, RetryPolicy] = {operation: RetryPolicy(attempts) for operation, attempts in RETRY_ATTEMPTS.items()}
+
+
+def retry_policy(operation: str) -> RetryPolicy:
+    """Configured policy of an operation class (`SEARCH`, `ARTICLE`, `POST` or `MODEL`)."""
+    return RETRY_POLICIES.get(operation) or RetryPolicy(1)
+
+
+class CircuitBreaker:
+    """
+    Fails calls to a dependency fast while it is down.
+
+    Closed: calls go through. After `failure_threshold` dependency failures in a row
+    the breaker opens and calls are refused without being attempted. Once
+    `reset_seconds` have passed it is half-open: one trial call goes through, and its
+    outcome closes the breaker again or reopens it for another `reset_seconds`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name (str): Dependency name, e.g. "platform:x.com:post" or "model:gpt-4o".
+            failure_threshold (int): Failures in a row that open the breaker.
+            reset_seconds (float): How long an open breaker refuses calls.
+            clock (Callable[[], float]): Time source (tests).
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """True if a call may be attempted now (in the half-open state, only the one trial call)."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_seconds - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"Circuit {self.name} closed: the dependency is responding again.")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+            if trial_failed or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                print(f"Circuit {self.name} opened after {self._failures} failures in a row; failing fast for {self.reset_seconds:.0f}s.")
+
+    def record_neutral(self) -> None:
+        """Ends a call that says nothing about the dependency's health (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_exception(self, error: BaseException) -> None:
+        """Ends a call that raised: an exception counts as a failure, a cancellation or interrupt as neither."""
+        if isinstance(error, Exception):
+            self.record_failure()
+        else:
+            self.record_neutral()
+
+    def record(self, result) -> None:
+        """Records a call by its tool result: dependency failures count, refused requests do not."""
+        kind = error_kind(result)
+        if kind is None or kind == ErrorResult.REJECTED:
+            self.record_success()  # The dependency answered
+        elif kind in ErrorResult.DEPENDENCY_FAILURES:
+            self.record_failure()
+        else:
+            self.record_neutral()
+
+    def open_error(self, activity: str) -> ErrorResult:
+        """Result of a call refused by the open breaker."""
+        return ErrorResult(
+            f"Error: {activity} skipped: {self.name} failed repeatedly and is given a rest; retry in {self.retry_after():.0f}s.",
+            ErrorResult.UNAVAILABLE, retry_after=self.retry_after(),
+        )
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker({self.name!r}, {self.state})"
+
+
+class CircuitBreakers:
+    """One breaker per dependency name, created on first use."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_seconds)
+            return self._breakers[name]
+
+    def platform(self, source: str, operation: str) -> CircuitBreaker:
+        """Breaker of one operation class (`SEARCH` or `POST`) on a platform, by its host (`PlatformAdapter.source`)."""
+        return self.get(f"platform:{source}:{operation}")
+
+    def model(self, model_id: str) -> CircuitBreaker:
+        return self.get(f"model:{model_id}")
+
+
+# Process-wide breakers shared by the tools and the model router
+CIRCUIT_BREAKERS = CircuitBreakers()
+
+
+def _cancelled() -> bool:
+    token = current_cancellation_token()
+    return token is not None and token.cancelled
+
+
+async def wait_unless_cancelled(seconds: float) -> bool:
+    """Sleeps up to `seconds`; returns False as soon as the current request is cancelled."""
+    deadline = time.monotonic() + seconds
+    while not _cancelled():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        await asyncio.sleep(min(_WAIT_SLICE_SECONDS, remaining))
+    return False
+
+
+def sleep_unless_cancelled(seconds: float) -> bool:
+    """Blocking counterpart of `wait_unless_cancelled` for synchronous callers."""
+    deadline = time.monotonic() + seconds
+    while not _cancelled():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(_WAIT_SLICE_SECONDS, remaining))
+    return False
+
+
+async def call_with_retries(operation: str, attempt: Callable[[], Awaitable[str]], activity: str, breaker: CircuitBreaker | None = None, policy: RetryPolicy | None = None) -> str:
+    """
+    Runs `attempt` until it returns something other than a retryable `ErrorResult`.
+
+    Args:
+        operation (str): Operation class whose retry policy applies, e.g. `SEARCH`.
+        attempt (Callable[[], Awaitable[str]]): One try; failures are returned as `ErrorResult`s.
+        activity (str): What is being done, for log lines and the open-circuit message.
+        breaker (CircuitBreaker, optional): Consulted before and updated after every try.
+        policy (RetryPolicy, optional): Overrides the operation's configured policy.
+
+    Returns:
+        str: The first result that is not retried (the last failure if every try failed).
+    """
+    policy = policy or retry_policy(operation)
+    result = None
+    for number in range(1, policy.max_attempts + 1):
+        if breaker is not None and not breaker.allow():
+            return breaker.open_error(activity)
+        try:
+            result = await attempt()
+        except BaseException as e:
+            # Always end the call on the breaker: an unfinished half-open trial would refuse every later call
+            if breaker is not None:
+                breaker.record_exception(e)
+            raise
+        if breaker is not None:
+            breaker.record(result)
+        if not (isinstance(result, ErrorResult) and result.retryable) or number == policy.max_attempts or _cancelled():
+            return result
+        delay = policy.delay(number, result.retry_after)
+        print(f"{activity} failed ({result.kind}); retry {number} of {policy.max_attempts - 1} in {delay:.1f}s.")
+        if not await wait_unless_cancelled(delay):
+            return result
+    return result
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict, List
+
+from auto_sns_agent.config import ACCOUNT_MIN_POST_INTERVAL_SECONDS, AUTO_SNS_DATA_DIR
+
+
+class Account:
+    """
+    A social media account the workflow can post as.
+
+    Passwords are never stored in the registry file: `password_env` names the
+    environment variable holding the password.
+    """
+
+    # Posting backends: the browser agent, or the platform's official API (browser as fallback)
+    BROWSER = "browser"
+    API = "api"
+
+    def __init__(self, name: str, login_identifier: str, password_env: str, platform: str = "Twitter", username: str | None = None, min_post_interval_seconds: float = ACCOUNT_MIN_POST_INTERVAL_SECONDS, last_posted_at: float | None = None, posting_backend: str = BROWSER):
+        """
+        Args:
+            name (str): Short unique name used to select the account, e.g. "brand-jp".
+            login_identifier (str): Username, email or phone number used to log in.
+            password_env (str): Environment variable holding the account's password.
+            platform (str): Platform the account belongs to (a registered platform name, see `platforms.registry`).
+            username (str, optional): Handle entered when the platform asks to confirm the account.
+            min_post_interval_seconds (float): Minimum time between two posts of this account.
+            last_posted_at (float, optional): Unix time of the account's last post.
+            posting_backend (str): `Account.BROWSER` or `Account.API`.
+        """
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+            raise ValueError(f"Invalid account name '{name}'. Use letters, digits, '.', '_' or '-'.")
+        if posting_backend not in (self.BROWSER, self.API):
+            raise ValueError(f"Invalid posting backend '{posting_backend}'. Use '{self.BROWSER}' or '{self.API}'.")
+        self.name = name
+        self.login_identifier = login_identifier
+        self.password_env = password_env
+        self.platform = platform
+        self.username = username
+        self.min_post_interval_seconds = min_post_interval_seconds
+        self.last_posted_at = last_posted_at
+        self.posting_backend = posting_backend
+
+    @property
+    def password(self) -> str | None:
+        return os.getenv(self.password_env)
+
+    def next_post_at(self) -> float:
+        """Unix time from which the account may post again."""
+        return (self.last_posted_at or 0.0) + self.min_post_interval_seconds
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Account":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"Account({self.name!r}, {self.platform}, {self.login_identifier!r})"
+
+
+class AccountRegistry:
+    """
+    Accounts persisted as one JSON file, written atomically after every change.
+
+    Each account also gets its own session file under `sessions_dir`, so its login
+    survives between runs without being shared with the other accounts, and its own
+    API token file under `api_tokens_dir`.
+    """
+
+    def __init__(self, path: str, sessions_dir: str | None = None, api_tokens_dir: str | None = None):
+        self.path = path
+        self.sessions_dir = sessions_dir or os.path.join(os.path.dirname(path) or ".", "sessions")
+        self.api_tokens_dir = api_tokens_dir or os.path.join(os.path.dirname(path) or ".", "api_tokens")
+        self.accounts: Dict[str, Account] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.accounts = {account.name: account for account in map(Account.from_dict, json.load(f))}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Ignoring unreadable account registry {path}: {e}")
+
+    def add(self, account: Account) -> Account:
+        """Adds or replaces the account with `account.name`, keeping its posting history."""
+        existing = self.accounts.get(account.name)
+        if existing is not None and account.last_posted_at is None:
+            account.last_posted_at = existing.last_posted_at
+        self.accounts[account.name] = account
+        self.save()
+        return account
+
+    def remove(self, name: str) -> bool:
+        if self.accounts.pop(name, None) is None:
+            return False
+        self.save()
+        return True
+
+    def get(self, name: str) -> Account | None:
+        return self.accounts.get(name)
+
+    def select(self, names: List[str] | None = None, platform: str | None = None) -> List[Account]:
+        """
+        Accounts to post as: `names` in the given order, or every account (of `platform`).
+
+        Raises:
+            KeyError: If a requested account is not registered.
+        """
+        if names:
+            missing = [name for name in names if name not in self.accounts]
+            if missing:
+                raise KeyError(f"Unknown accounts: {', '.join(missing)}. Registered: {', '.join(self.accounts) or 'none'}")
+            return [self.accounts[name] for name in names]
+        return [account for account in self.accounts.values() if platform is None or account.platform == platform]
+
+    def session_file(self, account: Account) -> str:
+        """Cookie file holding `account`'s logged-in session."""
+        return os.path.join(self.sessions_dir, f"{account.name}.json")
+
+    def api_token_file(self, account: Account) -> str:
+        """File holding `account`'s OAuth tokens for the API posting backend (see `TokenStore`)."""
+        return os.path.join(self.api_tokens_dir, f"{account.name}.json")
+
+    def mark_posted(self, name: str, posted_at: float | None = None) -> None:
+        account = self.accounts.get(name)
+        if account is None:
+            return
+        account.last_posted_at = posted_at if posted_at is not None else time.time()
+        self.save()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([account.to_dict() for account in self.accounts.values()], f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def default_registry() -> AccountRegistry:
+    return AccountRegistry(os.path.join(AUTO_SNS_DATA_DIR, "accounts.json"))
+
+
+def main():
+    """Command line entry point: `auto-sns-accounts add|remove|list|api-token`."""
+    parser = argparse.ArgumentParser(description="Manage the accounts the agent can post as.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_command = commands.add_parser("add", help="Register an account (the password stays in an environment variable)")
+    add_command.add_argument("name")
+    add_command.add_argument("login_identifier")
+    add_command.add_argument("--password-env", required=True, help="Environment variable holding the password")
+    add_command.add_argument("--platform", default="Twitter")
+    add_command.add_argument("--username", help="Handle entered if the platform asks to confirm the account")
+    add_command.add_argument("--min-interval", type=float, default=ACCOUNT_MIN_POST_INTERVAL_SECONDS, help="Minimum seconds between two posts of this account")
+    add_command.add_argument("--backend", choices=[Account.BROWSER, Account.API], default=Account.BROWSER, help="Post through the browser agent or the official API")
+    remove_command = commands.add_parser("remove", help="Remove an account")
+    remove_command.add_argument("name")
+    commands.add_parser("list", help="Show registered accounts")
+    token_command = commands.add_parser("api-token", help="Store an account's OAuth 2.0 refresh token for the API backend")
+    token_command.add_argument("name")
+    token_command.add_argument("--refresh-token-env", required=True, help="Environment variable holding the refresh token")
+    args = parser.parse_args()
+
+    registry = default_registry()
+    if args.command == "add":
+        account = registry.add(Account(args.name, args.login_identifier, args.password_env, platform=args.platform, username=args.username, min_post_interval_seconds=args.min_interval, posting_backend=args.backend))
+        print(f"Registered {account}")
+    elif args.command == "remove":
+        print("Removed." if registry.remove(args.name) else f"No account named '{args.name}'.")
+    elif args.command == "api-token":
+        from auto_sns_agent.tools.x_api import OAuthToken, token_store
+
+        account = registry.get(args.name)
+        refresh_token = os.getenv(args.refresh_token_env)
+        if account is None or not refresh_token:
+            print(f"No account named '{args.name}'." if account is None else f"${args.refresh_token_env} is not set.")
+            return
+        token_store(registry.api_token_file(account)).save(OAuthToken(None, refresh_token))
+        print(f"Stored the API refresh token of {account.name}; it is rotated on every refresh.")
+    else:
+        for account in registry.accounts.values():
+            password_state = "set" if account.password else "missing"
+            print(f"{account.name:20} {account.platform:8} {account.posting_backend:8} {account.login_identifier:30} password ${account.password_env} ({password_state})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Set
+
+try:
+    import fcntl  # POSIX only: serializes writers across processes (CLI, UI, monitor)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# One index entry per appended record:
+# id digest (16 bytes), segment number, byte offset, byte length, fetched_at (unix time)
+_INDEX_ENTRY = struct.Struct("<16sIQId")
+_INDEX_FILE = "index.bin"
+_LOCK_FILE = "corpus.lock"
+_META_FILE = "meta.json"
+_SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.log$")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "was", "with",
+}
+_WORD_PATTERN = re.compile(r"[#@]?\w+", re.UNICODE)
+# Scripts written without spaces (CJK, kana); indexed as overlapping character bigrams
+_CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase index terms.
+
+    Hashtags and mentions lose their '#'/'@' so "#AIethics" matches "aiethics", and runs
+    of CJK characters become overlapping bigrams so Japanese text is searchable without
+    a morphological analyzer.
+    """
+    terms: List[str] = []
+    for match in _WORD_PATTERN.finditer(text.lower()):
+        word = match.group().lstrip("#@")
+        if not word:
+            continue
+        cjk_runs = _CJK_PATTERN.findall(word)
+        if cjk_runs:
+            for run in cjk_runs:
+                terms.extend(run[i:i + 2] for i in range(max(len(run) - 1, 1)))
+            word = _CJK_PATTERN.sub(" ", word)
+            terms.extend(part for part in word.split() if part not in _STOPWORDS)
+        elif word not in _STOPWORDS:
+            terms.append(word)
+    return terms
+
+
+def content_id(source: str, text: str) -> str:
+    """Stable id for items that have no platform id: a hash of the source and normalized text."""
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha1(f"{source}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class CorpusItem:
+    """A scraped post or article."""
+
+    POST = "post"
+    ARTICLE = "article"
+
+    def __init__(self, id: str, kind: str, source: str, text: str, topic: str | None = None, url: str | None = None, author: str | None = None, posted_at: str | None = None, fetched_at: float | None = None):
+        """
+        Args:
+            id (str): Platform post id, article URL, or `content_id(...)` when neither is known.
+            kind (str): CorpusItem.POST or CorpusItem.ARTICLE.
+            source (str): Where the item came from, e.g. "x.com" or the article's host.
+            text (str): Item text.
+            topic (str, optional): Topic the item was collected for.
+            url (str, optional): Link to the item.
+            author (str, optional): Author handle or name.
+            posted_at (str, optional): Publication time as reported by the source.
+            fetched_at (float, optional): Unix time of the scrape (default: now).
+        """
+        self.id = id
+        self.kind = kind
+        self.source = source
+        self.text = text
+        self.topic = topic
+        self.url = url
+        self.author = author
+        self.posted_at = posted_at
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def to_dict(self) -> Dict:
+        return {key: value for key, value in vars(self).items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CorpusItem":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"CorpusItem(id={self.id!r}, kind={self.kind!r}, source={self.source!r}, text={self.text[:40]!r})"
+
+
+class CompactionStats:
+    """What a compaction pass kept and dropped."""
+
+    def __init__(self, kept: int, dropped_superseded: int, dropped_expired: int, dropped_over_limit: int, bytes_before: int, bytes_after: int):
+        self.kept = kept
+        self.dropped_superseded = dropped_superseded
+        self.dropped_expired = dropped_expired
+        self.dropped_over_limit = dropped_over_limit
+        self.bytes_before = bytes_before
+        self.bytes_after = bytes_after
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactionStats(kept={self.kept}, superseded={self.dropped_superseded}, expired={self.dropped_expired}, "
+            f"over_limit={self.dropped_over_limit}, bytes {self.bytes_before} -> {self.bytes_after})"
+        )
+
+
+class PostCorpus:
+    """
+    Append-only local store of scraped posts and articles.
+
+    Records are JSON lines appended to segment files. Each append also writes a
+    fixed-size entry (id digest, segment, offset, length, fetch time) to an index file
+    that readers memory-map, so opening the corpus and looking items up by id never
+    parses the segments. An inverted term index (term -> index slots) is built in
+    memory by the first search and then updated incrementally, including for records
+    appended by other processes.
+
+    Re-adding an id appends a new version; the newest version wins and older ones are
+    removed by `compact()`, which also applies the retention policy.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Directory holding the segments and index (created if missing).
+            max_segment_bytes (int): Size after which appends roll over to a new segment.
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._segment_maps: Dict[int, mmap.mmap] = {}
+        self._reset_views()
+        self._refresh()
+
+    # ---- public API -------------------------------------------------------------
+
+    def add(self, item: CorpusItem) -> bool:
+        """
+        Stores `item` unless an identical version (same id and text) is already stored.
+
+        Returns:
+            bool: True if a record was appended.
+        """
+        return self.add_many([item]) == 1
+
+    def add_many(self, items: Iterable[CorpusItem]) -> int:
+        """Stores several items under one writer lock. Returns the number of records appended."""
+        items = list(items)
+        if not items:
+            return 0
+        appended = 0
+        with self._lock, self._writer_lock():
+            self._refresh()
+            segment = self._active_segment()
+            segment_path = self._segment_path(segment)
+            with open(segment_path, "ab") as segment_file, open(self._path(_INDEX_FILE), "ab") as index_file:
+                offset = segment_file.tell()
+                batch_texts: Dict[str, str] = {}
+                for item in items:
+                    existing = self._get_unlocked(item.id)
+                    stored_text = batch_texts.get(item.id, existing.text if existing is not None else None)
+                    if stored_text == item.text:
+                        continue
+                    batch_texts[item.id] = item.text
+                    record = (json.dumps(item.to_dict(), ensure_ascii=False) + "\n").encode("utf-8")
+                    if offset > 0 and offset + len(record) > self.max_segment_bytes:
+                        segment_file.flush()
+                        segment_file.close()
+                        segment += 1
+                        segment_path = self._segment_path(segment)
+                        segment_file = open(segment_path, "ab")
+                        offset = 0
+                    segment_file.write(record)
+                    index_file.write(_INDEX_ENTRY.pack(_digest(item.id), segment, offset, len(record), item.fetched_at))
+                    offset += len(record)
+                    appended += 1
+                segment_file.flush()
+                index_file.flush()
+                segment_file.close()
+            self._refresh()
+        return appended
+
+    def get(self, item_id: str) -> CorpusItem | None:
+        """Returns the newest stored version of `item_id`, or None."""
+        with self._lock:
+            self._refresh()
+            return self._get_unlocked(item_id)
+
+    def search(self, query: str, limit: int = 10, max_age_seconds: float | None = None, kind: str | None = None, source: str | None = None, min_term_match: float = 1.0) -> List[CorpusItem]:
+        """
+        Finds stored items relevant to `query`.
+
+        Args:
+            query (str): Topic or keywords.
+            limit (int): Maximum number of items returned.
+            max_age_seconds (float, optional): Only items fetched within this many seconds.
+            kind (str, optional): Only items of this kind.
+            source (str, optional): Only items from this source.
+            min_term_match (float): Fraction of the query's terms an item must contain (default: all).
+
+        Returns:
+            List[CorpusItem]: Best matches first; ties go to the most recently fetched item.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+        required = max(1, int(len(query_terms) * min_term_match + 0.999))
+        oldest = time.time() - max_age_seconds if max_age_seconds is not None else None
+        with self._lock:
+            self._refresh()
+            self._index_terms()
+            match_counts: Dict[int, int] = {}
+            for term in query_terms:
+                for slot in self._postings.get(term, ()):
+                    match_counts[slot] = match_counts.get(slot, 0) + 1
+            candidates = [
+                (count, self._fetched_at[slot], slot)
+                for slot, count in match_counts.items()
+                if count >= required
+                and self._latest[self._digests[slot]] == slot
+                and (oldest is None or self._fetched_at[slot] >= oldest)
+            ]
+            candidates.sort(reverse=True)
+            results: List[CorpusItem] = []
+            for _, _, slot in candidates:
+                item = self._read_slot(slot)
+                if (kind is None or item.kind == kind) and (source is None or item.source == source):
+                    results.append(item)
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._latest)
+
+    def compact(self, max_age_seconds: float | None = None, max_items: int | None = None) -> CompactionStats:
+        """
+        Rewrites the corpus keeping only the newest version of each item.
+
+        Args:
+            max_age_seconds (float, optional): Retention: drop items fetched longer ago than this.
+            max_items (int, optional): Retention: keep at most this many items, newest first.
+        """
+        with self._lock, self._writer_lock():
+            self._refresh()
+            bytes_before = self._total_segment_bytes()
+            oldest = time.time() - max_age_seconds if max_age_seconds is not None else None
+            live_slots = sorted(self._latest.values(), key=lambda slot: self._fetched_at[slot], reverse=True)
+            dropped_superseded = len(self._digests) - len(live_slots)
+            fresh_slots = [slot for slot in live_slots if oldest is None or self._fetched_at[slot] >= oldest]
+            dropped_expired = len(live_slots) - len(fresh_slots)
+            kept_slots = fresh_slots[:max_items] if max_items is not None else fresh_slots
+            dropped_over_limit = len(fresh_slots) - len(kept_slots)
+            kept_slots.sort()  # Preserve append order
+
+            old_segments = self._segment_numbers()
+            segment = (max(old_segments) + 1) if old_segments else 1
+            offset = 0
+            tmp_index_path = self._path(_INDEX_FILE + ".tmp")
+            segment_file = open(self._segment_path(segment), "ab")
+            with open(tmp_index_path, "wb") as index_file:
+                for slot in kept_slots:
+                    record = self._read_slot_bytes(slot)
+                    if offset > 0 and offset + len(record) > self.max_segment_bytes:
+                        segment_file.close()
+                        segment += 1
+                        segment_file = open(self._segment_path(segment), "ab")
+                        offset = 0
+                    segment_file.write(record)
+                    index_file.write(_INDEX_ENTRY.pack(self._digests[slot], segment, offset, len(record), self._fetched_at[slot]))
+                    offset += len(record)
+            segment_file.close()
+
+            self._close_maps()
+            os.replace(tmp_index_path, self._path(_INDEX_FILE))
+            for old_segment in old_segments:
+                os.remove(self._segment_path(old_segment))
+            self._write_meta({"last_compaction": time.time()})
+            self._reset_views()
+            self._refresh()
+            return CompactionStats(len(kept_slots), dropped_superseded, dropped_expired, dropped_over_limit, bytes_before, self._total_segment_bytes())
+
+    def last_compaction(self) -> float | None:
+        """Unix time of the last compaction, if any."""
+        return self._read_meta().get("last_compaction")
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_maps()
+
+    # ---- index maintenance ------------------------------------------------------
+
+    def _reset_views(self) -> None:
+        self._index_map: mmap.mmap | None = None
+        self._index_identity = None  # (inode, device) of the mapped index file
+        self._digests: List[bytes] = []
+        self._segments: List[int] = []
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._fetched_at: List[float] = []
+        self._latest: Dict[bytes, int] = {}  # id digest -> newest slot
+        self._postings: Dict[str, Set[int]] = {}
+        self._indexed: Dict[bytes, int] = {}  # id digest -> slot whose terms are in _postings
+        self._indexed_slots = 0  # Slots below this have been through _index_terms
+
+    def _refresh(self) -> None:
+        """Picks up index entries appended since the last call (by any process)."""
+        index_path = self._path(_INDEX_FILE)
+        try:
+            stat = os.stat(index_path)
+        except FileNotFoundError:
+            return
+        identity = (stat.st_ino, stat.st_dev)
+        if self._index_identity is not None and identity != self._index_identity:
+            # Another process compacted the corpus: every slot changed
+            self._close_maps()
+            self._reset_views()
+        entry_count = stat.st_size // _INDEX_ENTRY.size
+        if entry_count <= len(self._digests):
+            return
+        if self._index_map is not None:
+            self._index_map.close()
+        with open(index_path, "rb") as index_file:
+            self._index_map = mmap.mmap(index_file.fileno(), entry_count * _INDEX_ENTRY.size, access=mmap.ACCESS_READ)
+        self._index_identity = identity
+        for slot in range(len(self._digests), entry_count):
+            digest, segment, offset, length, fetched_at = _INDEX_ENTRY.unpack_from(self._index_map, slot * _INDEX_ENTRY.size)
+            self._digests.append(digest)
+            self._segments.append(segment)
+            self._offsets.append(offset)
+            self._lengths.append(length)
+            self._fetched_at.append(fetched_at)
+            self._latest[digest] = slot
+
+    def _index_terms(self) -> None:
+        """Adds the terms of slots refreshed since the last call to the term index."""
+        for slot in range(self._indexed_slots, len(self._digests)):
+            digest = self._digests[slot]
+            if self._latest[digest] != slot:
+                continue  # Superseded before it was ever searched
+            previous = self._indexed.get(digest)
+            if previous is not None:
+                for term in set(tokenize(self._read_slot(previous).text)):
+                    self._postings.get(term, set()).discard(previous)
+            for term in set(tokenize(self._read_slot(slot).text)):
+                self._postings.setdefault(term, set()).add(slot)
+            self._indexed[digest] = slot
+        self._indexed_slots = len(self._digests)
+
+    def _get_unlocked(self, item_id: str) -> CorpusItem | None:
+        slot = self._latest.get(_digest(item_id))
+        return self._read_slot(slot) if slot is not None else None
+
+    def _read_slot(self, slot: int) -> CorpusItem:
+        return CorpusItem.from_dict(json.loads(self._read_slot_bytes(slot)))
+
+    def _read_slot_bytes(self, slot: int) -> bytes:
+        segment, offset, length = self._segments[slot], self._offsets[slot], self._lengths[slot]
+        segment_map = self._segment_maps.get(segment)
+        if segment_map is None or offset + length > len(segment_map):
+            if segment_map is not None:
+                segment_map.close()
+            with open(self._segment_path(segment), "rb") as segment_file:
+                segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._segment_maps[segment] = segment_map
+        return segment_map[offset:offset + length]
+
+    def _close_maps(self) -> None:
+        for segment_map in self._segment_maps.values():
+            segment_map.close()
+        self._segment_maps.clear()
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+
+    # ---- files ------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_path(self, segment: int) -> str:
+        return self._path(f"segment-{segment:06d}.log")
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _active_segment(self) -> int:
+        numbers = self._segment_numbers()
+        if not numbers:
+            return 1
+        last = numbers[-1]
+        return last + 1 if os.path.getsize(self._segment_path(last)) >= self.max_segment_bytes else last
+
+    def _total_segment_bytes(self) -> int:
+        return sum(os.path.getsize(self._segment_path(number)) for number in self._segment_numbers())
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._path(_META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: Dict) -> None:
+        tmp_path = self._path(_META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**self._read_meta(), **meta}, f)
+        os.replace(tmp_path, self._path(_META_FILE))
+
+    @contextmanager
+    def _writer_lock(self) -> Iterator[None]:
+        """Exclusive lock held while appending or compacting, shared by every process."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(_LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _digest(item_id: str) -> bytes:
+    return hashlib.blake2b(item_id.encode("utf-8"), digest_size=16).digest()
+
+
+_corpus: PostCorpus | None = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> PostCorpus:
+    """
+    Returns the process-wide corpus under AUTO_SNS_DATA_DIR, opening it on first use.
+
+    Opening applies the retention policy when the last compaction is older than
+    CORPUS_COMPACTION_INTERVAL_SECONDS.
+    """
+    global _corpus
+    from auto_sns_agent.config import (
+        AUTO_SNS_DATA_DIR,
+        CORPUS_COMPACTION_INTERVAL_SECONDS,
+        CORPUS_MAX_ITEMS,
+        CORPUS_MAX_SEGMENT_BYTES,
+        CORPUS_RETENTION_SECONDS,
+    )
+    with _corpus_lock:
+        if _corpus is None:
+            corpus = PostCorpus(os.path.join(AUTO_SNS_DATA_DIR, "corpus"), max_segment_bytes=CORPUS_MAX_SEGMENT_BYTES)
+            last_compaction = corpus.last_compaction()
+            if len(corpus) and (last_compaction is None or time.time() - last_compaction > CORPUS_COMPACTION_INTERVAL_SECONDS):
+                stats = corpus.compact(max_age_seconds=CORPUS_RETENTION_SECONDS, max_items=CORPUS_MAX_ITEMS)
+                print(f"Corpus compacted on open: {stats}")
+            _corpus = corpus
+        return _corpus
+
+
+if __name__ == "__main__":
+    # Maintenance entry point: `python -m auto_sns_agent.storage.corpus [stats|compact]`
+    import sys
+
+    from auto_sns_agent.config import CORPUS_MAX_ITEMS, CORPUS_RETENTION_SECONDS
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    corpus = get_corpus()
+    if command == "compact":
+        print(corpus.compact(max_age_seconds=CORPUS_RETENTION_SECONDS, max_items=CORPUS_MAX_ITEMS))
+    else:
+        print(f"{len(corpus)} items in {corpus.directory}")
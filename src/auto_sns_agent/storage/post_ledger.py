@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import time
+from typing import Dict
+
+
+class PostLedger:
+    """
+    Outcome of every post made under an idempotency key, shared by all processes.
+
+    A key names one logical post (e.g. "workflow:<run id>:Twitter"), whatever the
+    number of attempts it takes. Before posting, the key is marked pending; once the
+    outcome is known it is marked posted (with the URL) or failed. A later attempt
+    under the same key then returns the earlier post instead of posting again, or -
+    if the earlier attempt ended without a known outcome - first checks whether that
+    post exists.
+
+    Records are appended to a JSONL file (the last record of a key wins) and read
+    back on every lookup, so posting subprocesses see each other's records. Keys
+    older than `window_seconds` are forgotten.
+    """
+
+    PENDING = "pending"
+    POSTED = "posted"
+    FAILED = "failed"
+
+    def __init__(self, path: str, window_seconds: float):
+        """
+        Args:
+            path (str): JSONL file holding the ledger (created on the first record).
+            window_seconds (float): How long a key is remembered.
+        """
+        self.path = path
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Dict | None:
+        """Latest record of `key` within the window, or None."""
+        with self._lock:
+            return self._records().get(key)
+
+    def mark_pending(self, key: str, platform: str, account: str | None = None) -> None:
+        self._append({"key": key, "status": self.PENDING, "platform": platform, "account": account})
+
+    def mark_posted(self, key: str, result: str, url: str | None = None) -> None:
+        self._append({"key": key, "status": self.POSTED, "result": result, "url": url})
+
+    def mark_failed(self, key: str, result: str) -> None:
+        self._append({"key": key, "status": self.FAILED, "result": result[:500]})
+
+    def _records(self) -> Dict[str, Dict]:
+        records: Dict[str, Dict] = {}
+        if not os.path.exists(self.path):
+            return records
+        cutoff = time.time() - self.window_seconds
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partially written last line
+                if record.get("updated_at", 0) >= cutoff:
+                    # Later records of a key complete earlier ones (e.g. posted after pending)
+                    records[record["key"]] = {**records.get(record["key"], {}), **record}
+                else:
+                    records.pop(record.get("key"), None)
+        return records
+
+    def _append(self, record: Dict) -> None:
+        record["updated_at"] = time.time()
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a+b") as f:
+                # A writer that died mid-line left no newline; start on a fresh line
+                torn = False
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+                f.write((("\n" if torn else "") + json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._compact_if_large()
+
+    def _compact_if_large(self, max_bytes: int = 1024 * 1024) -> None:
+        """Rewrites the file with only the keys still in the window once it grows past `max_bytes`."""
+        if os.path.getsize(self.path) <= max_bytes:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._records().values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from auto_sns_agent.research.near_duplicates import (
+    MinHashIndex,
+    minhash,
+    signature_from_hex,
+    signature_to_hex,
+)
+
+
+class PostedHistory:
+    """
+    Everything the workflow has posted, with a MinHash/LSH index for near-duplicate lookups.
+
+    Records (text, platform, time, signature) are appended to a JSONL file; the index
+    is rebuilt from the stored signatures when the history is opened.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.6):
+        """
+        Args:
+            path (str): JSONL file holding the history (created on the first record).
+            threshold (float): Estimated Jaccard similarity from which a draft counts as a near-duplicate.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: List[Dict] = []
+        self._index = MinHashIndex(threshold)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        signature = signature_from_hex(record.pop("signature"))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Partially written last line
+                    self._index.add(len(self._records), signature)
+                    self._records.append(record)
+
+    def record(self, text: str, platform: str, url: str | None = None) -> None:
+        """Adds a published post to the history."""
+        signature = minhash(text)
+        record = {"text": text, "platform": platform, "posted_at": time.time()}
+        if url:
+            record["url"] = url
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({**record, "signature": signature_to_hex(signature)}, ensure_ascii=False) + "\n")
+            self._index.add(len(self._records), signature)
+            self._records.append(record)
+
+    def similar(self, text: str) -> List[Tuple[Dict, float]]:
+        """Previously posted records nearly identical to `text`, with their estimated similarity, most similar first."""
+        with self._lock:
+            return [(self._records[key], score) for key, score in self._index.query(minhash(text))]
+
+    def __len__(self) -> int:
+        return len(self._records)
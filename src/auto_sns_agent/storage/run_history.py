@@ -0,0 +1,273 @@
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+# Column name -> SQLite type. Values come from ContentCreationRunState (see `snapshot`).
+COLUMNS = {
+    "run_id": "TEXT PRIMARY KEY",
+    "topic": "TEXT",
+    "platform": "TEXT",
+    "research_mode": "TEXT",
+    "research_depth": "INTEGER",
+    "status": "TEXT",
+    "started_at": "REAL",
+    "updated_at": "REAL",
+    "research_prompt": "TEXT",
+    "research_summary": "TEXT",
+    "research_tokens": "INTEGER",
+    "generation_prompt": "TEXT",
+    "draft_post": "TEXT",
+    "decision": "TEXT",
+    "post_result": "TEXT",
+    "post_url": "TEXT",
+    "total_seconds": "REAL",
+    "timings": "TEXT",  # JSON object: span name -> seconds
+    "similar_posts": "TEXT",  # JSON list of earlier posts the draft nearly duplicated
+}
+_INDEXED_COLUMNS = ("topic", "platform", "status", "started_at")
+_SENTINEL = object()
+
+
+def snapshot(run_state) -> Dict:
+    """Row for `run_state`, taken on the caller's thread so later changes to the state cannot leak in."""
+    timings = run_state.timings.as_dict()
+    return {
+        "run_id": run_state.run_id,
+        "topic": run_state.topic,
+        "platform": run_state.platform,
+        "research_mode": run_state.research_mode,
+        "research_depth": run_state.research_depth,
+        "status": run_state.status,
+        "started_at": run_state.started_at,
+        "updated_at": time.time(),
+        "research_prompt": run_state.research_prompt,
+        "research_summary": run_state.research_summary,
+        "research_tokens": run_state.research_tokens,
+        "generation_prompt": run_state.generation_prompt,
+        "draft_post": run_state.draft_post,
+        "decision": run_state.decision,
+        "post_result": run_state.post_result,
+        "post_url": run_state.post_url,
+        "total_seconds": sum(timings.values()),
+        "timings": json.dumps(timings),
+        "similar_posts": json.dumps(run_state.similar_posts, ensure_ascii=False),
+    }
+
+
+class RunHistory:
+    """
+    SQLite store of workflow runs, one row per run, updated as the run progresses.
+
+    `record()` only queues a snapshot; a single background writer thread owns the write
+    connection and commits queued snapshots in batches, so workflow threads (and the
+    UI's event loop) never wait on disk. Reads use their own short-lived connections;
+    the database runs in WAL mode so they do not block the writer.
+    """
+
+    def __init__(self, path: str, batch_size: int = 50, flush_interval_seconds: float = 0.5):
+        """
+        Args:
+            path (str): SQLite database file (created with its schema if missing).
+            batch_size (int): Maximum snapshots committed in one transaction.
+            flush_interval_seconds (float): How long the writer waits to fill a batch.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(f"{name} {sql_type}" for name, sql_type in COLUMNS.items())
+            connection.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+            for column in _INDEXED_COLUMNS:
+                connection.execute(f"CREATE INDEX IF NOT EXISTS runs_{column} ON runs ({column})")
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        atexit.register(self.close)
+
+    # ---- writes -----------------------------------------------------------------
+
+    def record(self, run_state) -> None:
+        """Queues the current state of a run for writing."""
+        self._ensure_writer()
+        self._queue.put(snapshot(run_state))
+
+    def flush(self) -> None:
+        """Blocks until every queued snapshot has been committed."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Commits pending snapshots and stops the writer thread."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_SENTINEL)
+            writer.join()
+
+    def _ensure_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="run-history-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        names = list(COLUMNS)
+        updates = ", ".join(f"{name}=excluded.{name}" for name in names if name not in ("run_id", "started_at"))
+        upsert = f"INSERT INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) ON CONFLICT(run_id) DO UPDATE SET {updates}"
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.batch_size and batch[-1] is not _SENTINEL:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not _SENTINEL]
+            stopping = len(rows) < len(batch)
+            # Only the newest snapshot of each run in the batch needs writing
+            latest = {row["run_id"]: row for row in rows}
+            try:
+                with connection:
+                    connection.executemany(upsert, [[row[name] for name in names] for row in latest.values()])
+            except sqlite3.Error as e:
+                print(f"Warning: Could not write {len(latest)} runs to the run history: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    # ---- reads ------------------------------------------------------------------
+
+    def query(self, topic: str | None = None, platform: str | None = None, status: str | None = None, since: float | None = None, until: float | None = None, limit: int = 100) -> List[Dict]:
+        """Runs matching the filters, newest first."""
+        where, params = _where(topic, platform, status, since, until)
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ?", [*params, limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_chunks(self, chunk_size: int = 1000, **filters) -> Iterator[List[Dict]]:
+        """Streams matching runs, oldest first, `chunk_size` rows at a time."""
+        where, params = _where(**filters)
+        connection = self._connect()
+        try:
+            connection.row_factory = sqlite3.Row
+            cursor = connection.execute(f"SELECT * FROM runs {where} ORDER BY started_at", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            connection.close()
+
+    def export(self, path: str, format: str | None = None, chunk_size: int = 1000, **filters) -> int:
+        """
+        Writes matching runs to a JSONL or Parquet file without loading them all into memory.
+
+        Args:
+            path (str): Output file.
+            format (str, optional): "jsonl" or "parquet" (default: from the file extension).
+            chunk_size (int): Rows read and written at a time.
+            **filters: Same filters as `query` (topic, platform, status, since, until).
+
+        Returns:
+            int: Number of runs exported.
+        """
+        format = format or ("parquet" if path.endswith(".parquet") else "jsonl")
+        if format == "jsonl":
+            exported = 0
+            with open(path, "w", encoding="utf-8") as f:
+                for chunk in self.iter_chunks(chunk_size, **filters):
+                    f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk)
+                    exported += len(chunk)
+            return exported
+        if format == "parquet":
+            return self._export_parquet(path, chunk_size, filters)
+        raise ValueError(f"Unknown export format '{format}'. Expected 'jsonl' or 'parquet'.")
+
+    def _export_parquet(self, path: str, chunk_size: int, filters: Dict) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow: pip install 'auto-sns[export]'") from e
+        arrow_types = {"TEXT": pa.string(), "INTEGER": pa.int64(), "REAL": pa.float64()}
+        schema = pa.schema([(name, arrow_types[sql_type.split()[0]]) for name, sql_type in COLUMNS.items()])
+        exported = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in self.iter_chunks(chunk_size, **filters):
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                exported += len(chunk)
+        return exported
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+
+def _where(topic: str | None = None, platform: str | None = None, status: str | None = None, since: float | None = None, until: float | None = None) -> Tuple[str, List]:
+    clauses, params = [], []
+    for column, value in (("topic", topic), ("platform", platform), ("status", status)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("started_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("started_at < ?")
+        params.append(until)
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def main():
+    """Command line entry point: `auto-sns-history list|export`."""
+    from auto_sns_agent.config import AUTO_SNS_DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Inspect and export the workflow run history.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_command = commands.add_parser("list", help="Show recent runs")
+    export_command = commands.add_parser("export", help="Stream runs to a .jsonl or .parquet file")
+    export_command.add_argument("output")
+    export_command.add_argument("--format", choices=("jsonl", "parquet"))
+    export_command.add_argument("--chunk-size", type=int, default=1000)
+    for command in (list_command, export_command):
+        command.add_argument("--topic")
+        command.add_argument("--platform")
+        command.add_argument("--status")
+        command.add_argument("--since", help="ISO date or datetime, e.g. 2024-06-01")
+        command.add_argument("--until", help="ISO date or datetime (exclusive)")
+    list_command.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    history = RunHistory(os.path.join(AUTO_SNS_DATA_DIR, "run_history.sqlite3"))
+    filters = {
+        "topic": args.topic,
+        "platform": args.platform,
+        "status": args.status,
+        "since": datetime.fromisoformat(args.since).timestamp() if args.since else None,
+        "until": datetime.fromisoformat(args.until).timestamp() if args.until else None,
+    }
+    if args.command == "export":
+        exported = history.export(args.output, format=args.format, chunk_size=args.chunk_size, **filters)
+        print(f"Exported {exported} runs to {args.output}")
+    else:
+        for run in history.query(limit=args.limit, **filters):
+            started = datetime.fromtimestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{started}  {run['status']:22} {run['total_seconds'] or 0:7.1f}s  {run['platform']:8} {run['topic']}  {run['post_url'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import json
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+# Actions recorded from a browser-use history. Anything else (extract_content, done, ...)
+# does not change the page in a way a replay needs to reproduce.
+_NAVIGATE_ACTIONS = {"go_to_url", "open_tab"}
+_CLICK_ACTIONS = {"click_element", "click_element_by_index"}
+_INPUT_ACTIONS = {"input_text"}
+_KEY_ACTIONS = {"send_keys"}
+_WAIT_ACTIONS = {"wait"}
+
+
+class SelectorMissError(Exception):
+    """Raised when none of a recorded step's selectors matches an element on the page."""
+
+
+class ScriptStep:
+    """One deterministic browser action: navigate, click, fill, press keys or wait."""
+
+    NAVIGATE = "navigate"
+    CLICK = "click"
+    FILL = "fill"
+    PRESS = "press"
+    WAIT = "wait"
+
+    def __init__(self, action: str, selectors: List[str] | None = None, slot: str | None = None, text: str | None = None, url: str | None = None, keys: str | None = None, seconds: float | None = None):
+        """
+        Args:
+            action (str): One of the action constants above.
+            selectors (List[str], optional): Playwright selectors for the target element, most stable first.
+            slot (str, optional): Name of the text slot filled at replay time (e.g. "content", "password").
+            text (str, optional): Literal text for fills that did not match a slot.
+            url (str, optional): Target of a navigate step.
+            keys (str, optional): Key combination for a press step, e.g. "Enter".
+            seconds (float, optional): Duration of a wait step.
+        """
+        self.action = action
+        self.selectors = selectors or []
+        self.slot = slot
+        self.text = text
+        self.url = url
+        self.keys = keys
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if value not in (None, [])}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScriptStep":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"ScriptStep(action={self.action!r}, selectors={self.selectors!r}, slot={self.slot!r})"
+
+
+class ActionScript:
+    """A recorded, parameterised action sequence that can be replayed without an LLM."""
+
+    def __init__(self, name: str, steps: List[ScriptStep], success_selector: str | None = None, recorded_at: float | None = None):
+        """
+        Args:
+            name (str): Key under which the script is stored, e.g. "post:x.com".
+            steps (List[ScriptStep]): Steps in execution order. The last step is the commit
+                point (e.g. the click on the post button).
+            success_selector (str, optional): Element that must appear after the last step
+                for the replay to count as successful.
+            recorded_at (float, optional): Unix time of the recording.
+        """
+        self.name = name
+        self.steps = steps
+        self.success_selector = success_selector
+        self.recorded_at = recorded_at if recorded_at is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "steps": [step.to_dict() for step in self.steps],
+            "success_selector": self.success_selector,
+            "recorded_at": self.recorded_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ActionScript":
+        return cls(
+            name=data["name"],
+            steps=[ScriptStep.from_dict(step) for step in data.get("steps", [])],
+            success_selector=data.get("success_selector"),
+            recorded_at=data.get("recorded_at"),
+        )
+
+
+class ActionScriptStore:
+    """Stores action scripts as one JSON file per script name."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, name: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        return os.path.join(self.directory, f"{safe_name}.json")
+
+    def load(self, name: str) -> ActionScript | None:
+        """Returns the stored script, or None if there is none or it cannot be read."""
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return ActionScript.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable action script {path}: {e}")
+            return None
+
+    def save(self, script: ActionScript) -> None:
+        """Writes the script atomically so a concurrent reader never sees a partial file."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(script.name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(script.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+def _selectors_for_element(element) -> List[str]:
+    """Builds selectors for a browser-use DOMHistoryElement, most stable first."""
+    if element is None:
+        return []
+    selectors = []
+    attributes = getattr(element, "attributes", None) or {}
+    if attributes.get("data-testid"):
+        selectors.append(f'[data-testid="{attributes["data-testid"]}"]')
+    for attribute in ("name", "autocomplete"):
+        if attributes.get(attribute) and getattr(element, "tag_name", None):
+            selectors.append(f'{element.tag_name}[{attribute}="{attributes[attribute]}"]')
+    css_selector = getattr(element, "css_selector", None)
+    if css_selector:
+        selectors.append(css_selector)
+    xpath = getattr(element, "xpath", None)
+    if xpath:
+        selectors.append(f"xpath=/{xpath.lstrip('/')}")
+    return selectors
+
+
+def _history_actions(history):
+    """Yields (action_name, params, interacted_element) for every action that did not error."""
+    for item in getattr(history, "history", []):
+        model_output = getattr(item, "model_output", None)
+        if model_output is None:
+            continue
+        results = getattr(item, "result", None) or []
+        elements = getattr(getattr(item, "state", None), "interacted_element", None) or []
+        for index, action in enumerate(model_output.action):
+            if index < len(results) and getattr(results[index], "error", None):
+                continue
+            action_data = action.model_dump(exclude_unset=True)
+            if not action_data:
+                continue
+            name, params = next(iter(action_data.items()))
+            element = elements[index] if index < len(elements) else None
+            yield name, params or {}, element
+
+
+def script_from_history(name: str, history, slots: Dict[str, str], end_at: Callable[[ScriptStep], bool], success_selector: str | None = None) -> ActionScript | None:
+    """
+    Turns a successful browser-use history into a parameterised ActionScript.
+
+    Typed text equal to a slot value is stored as a reference to that slot, so
+    post content and credentials are never written to disk.
+
+    Args:
+        name (str): Script name.
+        history: browser-use AgentHistoryList of a completed run.
+        slots (Dict[str, str]): Slot name -> value typed during this run.
+        end_at (Callable[[ScriptStep], bool]): Identifies the commit step; recording stops after it.
+        success_selector (str, optional): See ActionScript.
+
+    Returns:
+        ActionScript | None: The script, or None if the history never reached the commit
+        step or contains an action that cannot be replayed reliably.
+    """
+    steps: List[ScriptStep] = []
+    for action_name, params, element in _history_actions(history):
+        if action_name in _NAVIGATE_ACTIONS:
+            steps.append(ScriptStep(ScriptStep.NAVIGATE, url=params.get("url")))
+        elif action_name in _WAIT_ACTIONS:
+            steps.append(ScriptStep(ScriptStep.WAIT, seconds=float(params.get("seconds", 1))))
+        elif action_name in _KEY_ACTIONS:
+            steps.append(ScriptStep(ScriptStep.PRESS, keys=params.get("keys")))
+        elif action_name in _CLICK_ACTIONS or action_name in _INPUT_ACTIONS:
+            selectors = _selectors_for_element(element)
+            if not selectors:
+                return None  # No way to find this element again
+            if action_name in _CLICK_ACTIONS:
+                steps.append(ScriptStep(ScriptStep.CLICK, selectors=selectors))
+            else:
+                typed = params.get("text", "")
+                slot = next((slot_name for slot_name, value in slots.items() if value and typed == value), None)
+                if slot is None and any(value and value in typed for value in slots.values()):
+                    return None  # Slot value typed with extra text: cannot parameterise without storing it
+                steps.append(ScriptStep(ScriptStep.FILL, selectors=selectors, slot=slot, text=None if slot else typed))
+        else:
+            continue
+        if end_at(steps[-1]):
+            return ActionScript(name, steps, success_selector=success_selector)
+    return None
+
+
+class ReplayResult:
+    """Outcome of replaying an ActionScript."""
+
+    def __init__(self, succeeded: bool, committed: bool, steps_run: int, duration_seconds: float, error: str | None = None):
+        self.succeeded = succeeded
+        # True once the commit step ran: falling back to the agent could then repeat the action
+        self.committed = committed
+        self.steps_run = steps_run
+        self.duration_seconds = duration_seconds
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ReplayResult(succeeded={self.succeeded}, committed={self.committed}, steps_run={self.steps_run}, error={self.error!r})"
+
+
+async def _locate(page, selectors: List[str], timeout_ms: int):
+    """Returns the first visible match among `selectors`, trying each in order."""
+    per_selector_timeout = max(timeout_ms // max(len(selectors), 1), 500)
+    for selector in selectors:
+        locator = page.locator(selector).first
+        try:
+            await locator.wait_for(state="visible", timeout=per_selector_timeout)
+            return locator
+        except Exception:
+            continue
+    raise SelectorMissError(f"No element matched any of {selectors}")
+
+
+async def replay_action_script(page, script: ActionScript, slots: Dict[str, str], step_timeout_ms: int = 10_000) -> ReplayResult:
+    """
+    Replays `script` on a Playwright page with no LLM involved.
+
+    Args:
+        page: Playwright page to drive.
+        script (ActionScript): Script to replay.
+        slots (Dict[str, str]): Values for the script's text slots.
+        step_timeout_ms (int): Time allowed for each step's element to become visible.
+
+    Returns:
+        ReplayResult: `committed` is False whenever the replay stopped before the commit
+        step ran, in which case it is safe to retry the task another way. It is True when
+        the commit step itself failed after its element was found.
+    """
+    start = time.perf_counter()
+    for index, step in enumerate(script.steps):
+        try:
+            if step.action == ScriptStep.NAVIGATE:
+                await page.goto(step.url)
+            elif step.action == ScriptStep.WAIT:
+                await page.wait_for_timeout((step.seconds or 0) * 1000)
+            elif step.action == ScriptStep.PRESS:
+                await page.keyboard.press(step.keys)
+            elif step.action == ScriptStep.CLICK:
+                locator = await _locate(page, step.selectors, step_timeout_ms)
+                await locator.click(timeout=step_timeout_ms)
+            elif step.action == ScriptStep.FILL:
+                if step.slot and step.slot not in slots:
+                    raise SelectorMissError(f"No value for slot '{step.slot}'")
+                locator = await _locate(page, step.selectors, step_timeout_ms)
+                await locator.fill(slots[step.slot] if step.slot else (step.text or ""), timeout=step_timeout_ms)
+            else:
+                raise SelectorMissError(f"Unknown script action '{step.action}'")
+        except Exception as e:
+            # Only the commit step itself can have taken effect before failing, and only
+            # once its element was found: a click that errors may still have gone through
+            committed = index == len(script.steps) - 1 and not isinstance(e, SelectorMissError)
+            return ReplayResult(False, committed=committed, steps_run=index, duration_seconds=time.perf_counter() - start, error=str(e))
+
+    if script.success_selector:
+        try:
+            await page.locator(script.success_selector).first.wait_for(state="visible", timeout=step_timeout_ms)
+        except Exception as e:
+            return ReplayResult(False, committed=True, steps_run=len(script.steps), duration_seconds=time.perf_counter() - start, error=f"Success indicator not seen: {e}")
+    return ReplayResult(True, committed=True, steps_run=len(script.steps), duration_seconds=time.perf_counter() - start)
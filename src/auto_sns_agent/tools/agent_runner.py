@@ -0,0 +1,308 @@
+import asyncio
+import functools
+import os
+import signal
+import threading
+import time
+from typing import Callable
+
+from browser_use import Agent as BrowserUseAgent
+from langchain_openai import ChatOpenAI
+
+from auto_sns_agent.cancellation import CancellationToken, current_cancellation_token
+from auto_sns_agent.config import (
+    BROWSER_AGENT_HISTORY_FULL_STEPS,
+    BROWSER_AGENT_MAX_INPUT_TOKENS,
+    BROWSER_AGENT_MAX_STEPS,
+    BROWSER_AGENT_TIMEOUT_SECONDS,
+    BROWSER_AGENT_VISION_TASKS,
+    OPENAI_API_KEY,
+)
+from auto_sns_agent.model_router import BUDGET_EXHAUSTED, INVALID_OUTPUT
+from auto_sns_agent.resilience import ErrorResult
+
+# Prefixes of tool results that did not come from a finished agent run.
+# Callers (and the orchestrator LLM) can tell these apart from ordinary failures.
+BUDGET_EXHAUSTED_PREFIX = "Budget exhausted"
+CANCELLED_PREFIX = "Cancelled"
+# Text kept from each result of a compacted history step
+_COMPACT_RESULT_CHARS = 200
+
+
+class AgentBudget:
+    """Limits enforced on a single BrowserUseAgent run."""
+
+    def __init__(self, max_steps: int = 25, timeout_seconds: float | None = 300.0, max_input_tokens: int | None = 250_000):
+        """
+        Args:
+            max_steps (int): Maximum number of LLM-driven browser steps.
+            timeout_seconds (float, optional): Wall-clock deadline for the whole run. None disables it.
+            max_input_tokens (int, optional): Cumulative LLM input tokens allowed. None disables it.
+        """
+        self.max_steps = max_steps
+        self.timeout_seconds = timeout_seconds
+        self.max_input_tokens = max_input_tokens
+
+    def with_overrides(self, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None) -> "AgentBudget":
+        """Returns a copy where every non-None argument replaces the corresponding limit."""
+        return AgentBudget(
+            max_steps=max_steps if max_steps is not None else self.max_steps,
+            timeout_seconds=timeout_seconds if timeout_seconds is not None else self.timeout_seconds,
+            max_input_tokens=max_input_tokens if max_input_tokens is not None else self.max_input_tokens,
+        )
+
+    def __repr__(self) -> str:
+        return f"AgentBudget(max_steps={self.max_steps}, timeout_seconds={self.timeout_seconds}, max_input_tokens={self.max_input_tokens})"
+
+
+# Budget used by the tools when a call does not override it
+DEFAULT_AGENT_BUDGET = AgentBudget(
+    max_steps=BROWSER_AGENT_MAX_STEPS,
+    timeout_seconds=BROWSER_AGENT_TIMEOUT_SECONDS,
+    max_input_tokens=BROWSER_AGENT_MAX_INPUT_TOKENS,
+)
+
+
+class AgentRunOutcome:
+    """Structured result of a budgeted BrowserUseAgent run."""
+
+    COMPLETED = "completed"
+    BUDGET_EXHAUSTED = "budget_exhausted"
+    CANCELLED = "cancelled"
+
+    # Values for `exhausted_limit`
+    MAX_STEPS = "max_steps"
+    TIMEOUT = "timeout"
+    MAX_INPUT_TOKENS = "max_input_tokens"
+
+    def __init__(self, status: str, final_result: str | None = None, exhausted_limit: str | None = None, reason: str | None = None, steps: int | None = None, input_tokens: int | None = None, duration_seconds: float = 0.0, history=None):
+        self.status = status
+        self.final_result = final_result
+        self.exhausted_limit = exhausted_limit
+        self.reason = reason
+        self.steps = steps
+        self.input_tokens = input_tokens
+        self.duration_seconds = duration_seconds
+        self.history = history
+
+    @property
+    def completed(self) -> bool:
+        return self.status == self.COMPLETED
+
+    def to_tool_message(self, activity: str) -> str:
+        """
+        Formats a non-completed outcome as a tool result string.
+
+        Args:
+            activity (str): What the agent was doing, e.g. "searching 'AI' on https://x.com".
+        """
+        partial = f" Partial result: {self.final_result}" if self.final_result else ""
+        if self.status == self.BUDGET_EXHAUSTED:
+            return ErrorResult(
+                f"{BUDGET_EXHAUSTED_PREFIX} ({self.exhausted_limit}) while {activity}: "
+                f"stopped after {self.steps} steps, {self.input_tokens} input tokens, {self.duration_seconds:.1f}s.{partial}",
+                ErrorResult.BUDGET_EXHAUSTED,
+            )
+        if self.status == self.CANCELLED:
+            return ErrorResult(f"{CANCELLED_PREFIX} while {activity}: {self.reason or 'cancelled'}.{partial}", ErrorResult.CANCELLED)
+        return self.final_result or ""
+
+    def __repr__(self) -> str:
+        return f"AgentRunOutcome(status={self.status!r}, exhausted_limit={self.exhausted_limit!r}, steps={self.steps}, input_tokens={self.input_tokens})"
+
+
+@functools.lru_cache(maxsize=None)
+def browser_llm(model_id: str) -> ChatOpenAI:
+    """Returns the (shared) LangChain chat model BrowserUseAgent uses for `model_id`."""
+    return ChatOpenAI(model=model_id, openai_api_key=OPENAI_API_KEY)
+
+
+def uses_vision(task: str) -> bool:
+    """
+    Whether the browser agent for `task` gets page screenshots (`use_vision`).
+
+    Reading tasks (search results, articles) work from the DOM text alone, which saves
+    the image tokens and latency of a screenshot per step. See `BROWSER_AGENT_VISION_TASKS`.
+    """
+    return task in BROWSER_AGENT_VISION_TASKS
+
+
+def compact_history(history, keep_full_steps: int) -> int:
+    """
+    Shrinks all but the last `keep_full_steps` steps of an agent history to an action summary.
+
+    Compacted steps lose their screenshot and the agent's reasoning text, and their
+    results are cut to a short excerpt. The actions and the elements they touched stay,
+    so the history can still be turned into a replayable script (`script_from_history`);
+    the final result lives in the last step, which is never compacted.
+
+    Returns:
+        int: Number of steps changed by this call (compacting again changes nothing).
+    """
+    items = getattr(history, "history", None) or []
+    compacted = 0
+    for item in items[:max(0, len(items) - keep_full_steps)]:
+        changed = False
+        state = getattr(item, "state", None)
+        if state is not None and getattr(state, "screenshot", None) is not None:
+            state.screenshot = None
+            changed = True
+        brain = getattr(getattr(item, "model_output", None), "current_state", None)
+        for field in ("evaluation_previous_goal", "memory"):
+            if getattr(brain, field, None):
+                setattr(brain, field, "")
+                changed = True
+        for result in getattr(item, "result", None) or []:
+            content = getattr(result, "extracted_content", None)
+            if isinstance(content, str) and len(content) > _COMPACT_RESULT_CHARS + 3:
+                result.extracted_content = content[:_COMPACT_RESULT_CHARS] + "..."
+                changed = True
+        compacted += changed
+    return compacted
+
+
+def _rss_bytes() -> int | None:
+    """Current resident memory of this process (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _agent_uses_vision(agent) -> bool | None:
+    settings = getattr(agent, "settings", None)
+    value = getattr(settings, "use_vision", getattr(agent, "use_vision", None))
+    return value if isinstance(value, bool) else None
+
+
+def outcome_failure_signal(outcome: AgentRunOutcome) -> str | None:
+    """
+    Model-router escalation signal for a browser agent run.
+
+    Cancelled runs never escalate; runs that hit their budget or finished without a
+    result do.
+    """
+    if outcome.status == AgentRunOutcome.BUDGET_EXHAUSTED:
+        return BUDGET_EXHAUSTED
+    if outcome.completed and not outcome.final_result:
+        return INVALID_OUTPUT
+    return None
+
+
+def _restore_default_sigint_handler() -> None:
+    """
+    Undoes the SIGINT handler browser-use installs for the duration of `Agent.run`.
+
+    browser-use pauses on the first Ctrl+C and calls os._exit() on the second, which
+    skips every cleanup handler and leaves Chromium orphaned. With the default handler
+    back, Ctrl+C raises KeyboardInterrupt, asyncio.run() cancels the pending tasks and
+    managed_browser closes the browser on the way out.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGINT)
+    except (NotImplementedError, RuntimeError, ValueError):
+        pass  # Windows or no running loop: browser-use did not install a loop handler
+
+
+def _history_input_tokens(history) -> int | None:
+    try:
+        return history.total_input_tokens()
+    except Exception:
+        return None
+
+
+def _history_steps(history) -> int | None:
+    try:
+        return history.number_of_steps()
+    except Exception:
+        return None
+
+
+async def run_browser_agent(agent: BrowserUseAgent, budget: AgentBudget, cancellation: CancellationToken | None = None, stop_when: Callable[[], bool] | None = None, keep_full_steps: int = BROWSER_AGENT_HISTORY_FULL_STEPS) -> AgentRunOutcome:
+    """
+    Runs `agent` under `budget` and cooperative cancellation.
+
+    The step cap is enforced by browser-use itself, the token budget is checked after
+    every step and the deadline and cancellation interrupt the run's task. The agent
+    must use an injected browser (see `managed_browser`) so that the caller's cleanup
+    closes it regardless of how the run ends.
+
+    Args:
+        agent (BrowserUseAgent): The configured agent.
+        budget (AgentBudget): Limits for this run.
+        cancellation (CancellationToken, optional): Token to observe. Defaults to the
+            current context's token.
+        stop_when (Callable[[], bool], optional): Checked after every step; the agent is
+            stopped as soon as it returns True (e.g. once the goal was observed directly).
+        keep_full_steps (int): Steps kept in full in the agent's history; older ones are
+            compacted after every step (see `compact_history`).
+
+    Returns:
+        AgentRunOutcome: Completed, budget-exhausted or cancelled outcome. Exceptions raised
+        by the agent itself propagate unchanged.
+    """
+    token = cancellation or current_cancellation_token()
+    loop = asyncio.get_running_loop()
+    exhausted: dict = {}
+    start = time.monotonic()
+    start_rss = _rss_bytes()
+    compacted_steps = 0
+
+    async def on_step_start(running_agent) -> None:
+        _restore_default_sigint_handler()
+        if token is not None and token.cancelled:
+            running_agent.stop()
+
+    async def on_step_end(running_agent) -> None:
+        nonlocal compacted_steps
+        compacted_steps += compact_history(running_agent.state.history, keep_full_steps)
+        if stop_when is not None and stop_when():
+            running_agent.stop()
+            return
+        if budget.max_input_tokens is None:
+            return
+        used = _history_input_tokens(running_agent.state.history)
+        if used is not None and used >= budget.max_input_tokens:
+            exhausted["limit"] = AgentRunOutcome.MAX_INPUT_TOKENS
+            running_agent.stop()
+
+    run_task = asyncio.ensure_future(agent.run(max_steps=budget.max_steps, on_step_start=on_step_start, on_step_end=on_step_end))
+    unregister = token.add_callback(lambda: loop.call_soon_threadsafe(run_task.cancel)) if token is not None else (lambda: None)
+    history = None
+    try:
+        history = await asyncio.wait_for(run_task, timeout=budget.timeout_seconds)
+    except asyncio.TimeoutError:
+        exhausted["limit"] = AgentRunOutcome.TIMEOUT
+    except asyncio.CancelledError:
+        if token is None or not token.cancelled:
+            raise  # The caller itself is being cancelled
+    finally:
+        unregister()
+
+    if history is None:
+        history = getattr(getattr(agent, "state", None), "history", None)
+    duration = time.monotonic() - start
+    steps = _history_steps(history) if history is not None else None
+    input_tokens = _history_input_tokens(history) if history is not None else None
+    final_result = history.final_result() if history is not None and hasattr(history, "final_result") else None
+    _log_run_cost(agent, steps, input_tokens, duration, start_rss, compacted_steps)
+
+    if token is not None and token.cancelled:
+        return AgentRunOutcome(AgentRunOutcome.CANCELLED, final_result=final_result, reason=token.reason, steps=steps, input_tokens=input_tokens, duration_seconds=duration, history=history)
+    if not exhausted and history is not None and not history.is_done() and steps is not None and steps >= budget.max_steps:
+        exhausted["limit"] = AgentRunOutcome.MAX_STEPS
+    if exhausted:
+        return AgentRunOutcome(AgentRunOutcome.BUDGET_EXHAUSTED, final_result=final_result, exhausted_limit=exhausted["limit"], steps=steps, input_tokens=input_tokens, duration_seconds=duration, history=history)
+    return AgentRunOutcome(AgentRunOutcome.COMPLETED, final_result=final_result, steps=steps, input_tokens=input_tokens, duration_seconds=duration, history=history)
+
+
+def _log_run_cost(agent, steps: int | None, input_tokens: int | None, duration: float, start_rss: int | None, compacted_steps: int) -> None:
+    """Prints what a run cost, so runs with and without vision can be compared."""
+    vision = {True: "on", False: "off"}.get(_agent_uses_vision(agent), "unknown")
+    per_step = f" ({input_tokens // steps} per step)" if input_tokens and steps else ""
+    end_rss = _rss_bytes()
+    memory = f", RSS {end_rss / 1e6:.0f} MB ({(end_rss - start_rss) / 1e6:+.0f} MB)" if start_rss is not None and end_rss is not None else ""
+    print(f"Browser agent run: vision {vision}, {steps} steps, {input_tokens} input tokens{per_step}, {duration:.1f}s{memory}, {compacted_steps} history steps compacted")
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from agno.tools import tool
+
+from auto_sns_agent.cancellation import current_cancellation_token
+from auto_sns_agent.config import (
+    OPENAI_API_KEY,
+    SEARCH_BATCH_MAX_TABS,
+    SEARCH_BATCH_TAB_STAGGER_SECONDS,
+    X_LOGIN_IDENTIFIER,
+    X_PASSWORD,
+)
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.registry import get_platform, platform_names
+from auto_sns_agent.resilience import (
+    CIRCUIT_BREAKERS,
+    SEARCH,
+    ErrorResult,
+    call_with_retries,
+    classify_exception,
+    wait_unless_cancelled,
+)
+from auto_sns_agent.tools.agent_runner import CANCELLED_PREFIX, DEFAULT_AGENT_BUDGET, AgentBudget
+from auto_sns_agent.tools.browser_resources import managed_browser
+from auto_sns_agent.tools.lean_browser import lean_profile
+from auto_sns_agent.tools.social_media_tools import (
+    POST_DELIMITER,
+    _agent_search,
+    _combined_posts,
+    _local_posts,
+    _ranked_posts,
+    _scripted_login,
+    _scripted_search,
+    _search_login_instructions,
+    found_posts,
+)
+
+
+async def search_topics_async(
+    topics: List[str],
+    adapter: PlatformAdapter,
+    count: int = 3,
+    login_identifier: str | None = X_LOGIN_IDENTIFIER,
+    password: str | None = X_PASSWORD,
+    budget: AgentBudget | None = None,
+    max_tabs: int = SEARCH_BATCH_MAX_TABS,
+    stagger_seconds: float = SEARCH_BATCH_TAB_STAGGER_SECONDS,
+) -> Dict[str, str]:
+    """
+    Searches a platform for posts on several topics in one browser session.
+
+    Topics the local corpus answers are not searched. The others share one browser:
+    it logs in once, then each topic is searched with the adapter's scripted search
+    in its own tab of the logged-in context. Up to `max_tabs` tabs run at the same
+    time, and each tab's search starts at least `stagger_seconds` after the previous
+    one, so the platform sees paced requests. Topics the scripted search does not
+    answer are handed to the browser agent in the same session, one after another.
+    Failed topics are retried in a new session under the search retry policy.
+
+    Args:
+        topics (List[str]): Topics, hashtags or other search queries (duplicates are searched once).
+        adapter (PlatformAdapter): Platform to search.
+        count (int): Posts wanted per topic.
+        login_identifier (str, optional): Login for the scripted login.
+        password (str, optional): Password for the scripted login.
+        budget (AgentBudget, optional): Browser agent budget per topic that needs the agent.
+        max_tabs (int): Tabs searched at the same time.
+        stagger_seconds (float): Minimum time between the starts of two tabs' searches.
+
+    Returns:
+        Dict[str, str]: Topic -> what `get_social_media_posts_for_topic` returns for it
+        (posts separated by POST_DELIMITER, or an error/status message), in topic order.
+    """
+    topics = list(dict.fromkeys(topic.strip() for topic in topics if topic.strip()))
+    local = {topic: _local_posts(topic, adapter.source, count) for topic in topics}
+    live_counts = {topic: count - len(posts) for topic, posts in local.items() if len(posts) < count}
+    live: Dict[str, str] = {}
+
+    async def attempt() -> str:
+        # A retry searches only the topics whose last search failed in a retryable way
+        pending = {topic: wanted for topic, wanted in live_counts.items() if topic not in live or _retryable(live[topic])}
+        live.update(await _search_in_session(adapter, pending, login_identifier, password, budget, max_tabs, stagger_seconds))
+        failures = [live[topic] for topic in pending if _retryable(live[topic])]
+        return failures[0] if failures else f"Searched {len(pending)} topics on {adapter.name}"
+
+    if live_counts:
+        print(f"Searching {len(live_counts)} of {len(topics)} topics live on {adapter.name} ({len(topics) - len(live_counts)} answered from the local corpus).")
+        outcome = await call_with_retries(
+            SEARCH, attempt,
+            activity=f"Searching {len(live_counts)} topics on {adapter.name}",
+            breaker=CIRCUIT_BREAKERS.platform(adapter.source, SEARCH),
+        )
+        for topic in live_counts:
+            live.setdefault(topic, outcome)  # Not searched at all: the circuit breaker was open
+
+    return {
+        topic: _combined_posts(topic, adapter.source, count, local[topic], live[topic]) if topic in live_counts
+        else POST_DELIMITER.join(_ranked_posts(topic, local[topic], count))
+        for topic in topics
+    }
+
+
+async def _search_in_session(adapter: PlatformAdapter, counts: Dict[str, int], login_identifier: str | None, password: str | None, budget: AgentBudget | None, max_tabs: int, stagger_seconds: float) -> Dict[str, str]:
+    """Searches every topic of `counts` (topic -> posts wanted) in one browser; returns topic -> search result."""
+    results: Dict[str, str] = {}
+    try:
+        async with managed_browser(owner=f"batch-search:{adapter.base_url}", lean=lean_profile("search")) as (browser, browser_context):
+            login = await _scripted_login(adapter, browser_context, login_identifier, password)
+            if login is not None and login.logged_in:
+                page = await browser_context.get_current_page()
+                start = time.monotonic()
+                results.update(await _search_in_tabs(adapter, page.context, counts, max_tabs, stagger_seconds))
+                print(f"Scripted search on {adapter.name} answered {len(results)} of {len(counts)} topics in {time.monotonic() - start:.1f}s (no LLM).")
+
+            # The browser agent drives a single page, so the remaining topics are searched one after another
+            login_instructions = _search_login_instructions(adapter, login, login_identifier, password)
+            for topic, wanted in counts.items():
+                if topic in results:
+                    continue
+                token = current_cancellation_token()
+                if token is not None and token.cancelled:
+                    results[topic] = ErrorResult(f"{CANCELLED_PREFIX} while searching '{topic}' on {adapter.base_url}: {token.reason or 'cancelled'}.", ErrorResult.CANCELLED)
+                    continue
+                try:
+                    results[topic] = await _agent_search(adapter, browser, browser_context, topic, wanted, login_instructions, budget)
+                except Exception as e:
+                    results[topic] = ErrorResult(f"Error searching social media for '{topic}' on '{adapter.base_url}': {str(e)}", classify_exception(e))
+    except Exception as e:
+        for topic in counts:
+            results.setdefault(topic, ErrorResult(f"Error searching social media for '{topic}' on '{adapter.base_url}': {str(e)}", classify_exception(e)))
+    return results
+
+
+async def _search_in_tabs(adapter: PlatformAdapter, context, counts: Dict[str, int], max_tabs: int, stagger_seconds: float) -> Dict[str, str]:
+    """
+    Runs the adapter's scripted search for each topic in its own tab of the Playwright `context`.
+
+    Returns:
+        Dict[str, str]: Topic -> posts separated by POST_DELIMITER, for the topics with posts.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_tabs))
+    pacing = asyncio.Lock()
+    next_start = 0.0
+
+    async def scrape(topic: str, wanted: int) -> List[str]:
+        nonlocal next_start
+        async with semaphore:
+            async with pacing:
+                if not await wait_unless_cancelled(next_start - time.monotonic()):
+                    return []
+                next_start = time.monotonic() + stagger_seconds
+            page = await context.new_page()
+            try:
+                return await _scripted_search(adapter, page, topic, wanted)
+            finally:
+                await page.close()
+
+    scraped = await asyncio.gather(*(scrape(topic, wanted) for topic, wanted in counts.items()), return_exceptions=True)
+    results: Dict[str, str] = {}
+    for topic, posts in zip(counts, scraped):
+        if isinstance(posts, Exception):
+            print(f"Scripted search for '{topic}' on {adapter.name} failed, falling back to the browser agent: {posts}")
+        elif posts:
+            results[topic] = POST_DELIMITER.join(posts)
+    return results
+
+
+def _retryable(result: str) -> bool:
+    return isinstance(result, ErrorResult) and result.retryable
+
+
+def format_results(results: Dict[str, str]) -> str:
+    """One section per topic plus a summary line, for the orchestrator."""
+    sections = [f"=== Posts for '{topic}' ===\n{result}" for topic, result in results.items()]
+    found = sum(found_posts(result) for result in results.values())
+    sections.append(f"Found posts for {found} of {len(results)} topics.")
+    return "\n\n".join(sections)
+
+
+@tool(show_result=True)
+def get_social_media_posts_for_topics(topics: List[str], platform: str = "Twitter", count: int = 3, max_tabs: int | None = None, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None) -> str:
+    """
+    Searches a social media platform for posts on several topics or hashtags at once.
+    Faster than calling get_social_media_posts_for_topic once per topic: the platform is
+    logged in to once and the topics are searched in parallel tabs.
+
+    Args:
+        topics (List[str]): Topics, keywords or hashtags to search for, e.g. ["AI ethics", "#healthtech"].
+        platform (str): The social media platform to search (default: "Twitter").
+        count (int): The approximate number of recent posts to retrieve per topic.
+        max_tabs (int, optional): Topics searched at the same time (default from config).
+        max_steps (int, optional): Maximum browser agent steps per topic the agent has to search (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline per topic the agent has to search (default from config).
+        max_input_tokens (int, optional): LLM input token budget per topic the agent has to search (default from config).
+
+    Returns:
+        str: One section per topic, headed "=== Posts for '<topic>' ===", holding the posts separated
+             by '---NEXT_POST_DELIMITER---' or an error/status message, and a summary line.
+    """
+    adapter = get_platform(platform)
+    if adapter is None:
+        return f"Error: Platform '{platform}' is not supported. Supported platforms: {platform_names()}"
+    if not topics:
+        return "Error: Provide at least one topic."
+    if not OPENAI_API_KEY:
+        return "Error: OPENAI_API_KEY not found for browser_use_llm."
+    print(f"Tool 'get_social_media_posts_for_topics' called with: topics={topics}, platform='{platform}', count={count}")
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    results = asyncio.run(search_topics_async(topics, adapter, count, budget=budget, max_tabs=max_tabs or SEARCH_BATCH_MAX_TABS))
+    return format_results(results)
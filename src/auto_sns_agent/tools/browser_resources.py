@@ -0,0 +1,175 @@
+import contextvars
+import copy
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Tuple
+
+from browser_use import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+from auto_sns_agent.tools.browser_watchdog import BROWSER_WATCHDOG
+from auto_sns_agent.tools.lean_browser import LeanMode, LeanProfile
+
+# Scope (usually a workflow run id) that browser resources opened in this context belong to.
+# Agno executes tools synchronously in the calling thread and asyncio.run() copies the
+# current context, so a scope set around an agent call reaches the tools it invokes.
+_current_scope: contextvars.ContextVar[str | None] = contextvars.ContextVar("browser_resource_scope", default=None)
+
+
+class BrowserResourceTracker:
+    """
+    Tracks browsers opened by the tools until they are fully closed or returned to a pool.
+
+    Callers that need a browser-free moment (e.g. the posting step after research)
+    wait on `wait_until_released` instead of sleeping for a fixed time.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._open: Dict[int, Tuple[str | None, str]] = {}  # handle -> (scope, owner)
+        self._handles = itertools.count(1)
+
+    def acquired(self, owner: str, scope: str | None = None) -> int:
+        """Registers an opened browser and returns the handle to pass to `released`."""
+        with self._condition:
+            handle = next(self._handles)
+            self._open[handle] = (scope, owner)
+            return handle
+
+    def released(self, handle: int) -> None:
+        """Marks a browser as closed (or returned to a pool) and wakes up waiters."""
+        with self._condition:
+            self._open.pop(handle, None)
+            self._condition.notify_all()
+
+    def open_owners(self, scope: str | None = None) -> list[str]:
+        """Returns the owners of browsers still open, limited to `scope` when given."""
+        with self._condition:
+            return [owner for owner_scope, owner in self._open.values() if scope is None or owner_scope == scope]
+
+    def wait_until_released(self, scope: str | None = None, timeout: float = 10.0) -> bool:
+        """
+        Blocks until no tracked browser is open (within `scope`, if given).
+
+        Returns:
+            bool: True once everything is released, False if `timeout` seconds passed first.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._is_busy(scope):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def _is_busy(self, scope: str | None) -> bool:
+        return any(scope is None or owner_scope == scope for owner_scope, _ in self._open.values())
+
+
+# Process-wide tracker shared by every tool
+BROWSER_RESOURCES = BrowserResourceTracker()
+
+
+@contextmanager
+def browser_resource_scope(scope: str) -> Iterator[None]:
+    """Attributes browsers opened inside the `with` block (including by tools) to `scope`."""
+    token = _current_scope.set(scope)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+@asynccontextmanager
+async def managed_browser(
+    owner: str,
+    browser_config: BrowserConfig | None = None,
+    context_config: BrowserContextConfig | None = None,
+    browser: Browser | None = None,
+    lean: LeanProfile | None = None,
+) -> AsyncIterator[Tuple[Browser, BrowserContext]]:
+    """
+    Opens a browser and context for a BrowserUseAgent and always closes both.
+
+    The agent must be given the yielded browser and context (`browser=`, `browser_context=`)
+    so that their lifetime is owned here rather than inside the agent. The tracker is
+    told about the release only after the context and browser have been closed. A
+    browser launched here is watched by `BROWSER_WATCHDOG`, which also kills whatever
+    of its processes survive the close.
+
+    Args:
+        owner (str): Human-readable owner used in logs, e.g. "search:https://x.com".
+        browser_config (BrowserConfig, optional): Browser launch settings.
+        context_config (BrowserContextConfig, optional): Context settings.
+        browser (Browser, optional): Already running browser (see `shared_browser`) to open
+            the context in. Only the context is closed here; the browser stays with its owner.
+        lean (LeanProfile, optional): Blocks the requests the task does not need and caps the
+            viewport (see `lean_profile`); what was saved is printed when the context closes.
+    """
+    handle = BROWSER_RESOURCES.acquired(owner, scope=_current_scope.get())
+    owns_browser = browser is None
+    watchdog_switch = None
+    if owns_browser:
+        watchdog_switch = BROWSER_WATCHDOG.register(owner)
+        browser = Browser(config=_watched_config(browser_config, watchdog_switch))
+    context = None
+    lean_mode = LeanMode(lean) if lean is not None else None
+    try:
+        context = await browser.new_context(config=lean.context_config(context_config) if lean is not None else context_config)
+        if lean_mode is not None:
+            await lean_mode.attach((await context.get_session()).context)
+        yield browser, context
+    finally:
+        if lean_mode is not None:
+            print(f"Lean mode ({lean.name}) for {owner}: {lean_mode.stats.summary()}")
+        try:
+            if context is not None:
+                await context.close()
+            if owns_browser:
+                await browser.close()
+            print(f"Successfully closed browser resources for {owner}")
+        except Exception as cleanup_error:
+            print(f"Warning: Error during browser cleanup for {owner}: {cleanup_error}")
+        finally:
+            if watchdog_switch:
+                BROWSER_WATCHDOG.close_leftovers(watchdog_switch)
+            BROWSER_RESOURCES.released(handle)
+
+
+@asynccontextmanager
+async def shared_browser(owner: str, browser_config: BrowserConfig | None = None) -> AsyncIterator[Browser]:
+    """
+    Launches one browser process for several isolated contexts and always closes it.
+
+    Pass the yielded browser to `managed_browser(..., browser=...)` for each context;
+    contexts share the process but not cookies, storage or sessions.
+    """
+    handle = BROWSER_RESOURCES.acquired(owner, scope=_current_scope.get())
+    watchdog_switch = BROWSER_WATCHDOG.register(owner)
+    browser = Browser(config=_watched_config(browser_config, watchdog_switch))
+    try:
+        yield browser
+    finally:
+        try:
+            await browser.close()
+            print(f"Successfully closed shared browser for {owner}")
+        except Exception as cleanup_error:
+            print(f"Warning: Error during browser cleanup for {owner}: {cleanup_error}")
+        finally:
+            if watchdog_switch:
+                BROWSER_WATCHDOG.close_leftovers(watchdog_switch)
+            BROWSER_RESOURCES.released(handle)
+
+
+def _watched_config(browser_config: BrowserConfig | None, watchdog_switch: str) -> BrowserConfig | None:
+    """Copy of `browser_config` that launches Chromium with the watchdog's marker switch."""
+    if not watchdog_switch:
+        return browser_config
+    config = copy.copy(browser_config) if browser_config is not None else BrowserConfig()
+    # Later browser-use releases renamed the option
+    field = "extra_browser_args" if hasattr(config, "extra_browser_args") else "extra_chromium_args"
+    setattr(config, field, [*(getattr(config, field, None) or []), watchdog_switch])
+    return config
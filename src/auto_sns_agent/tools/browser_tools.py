@@ -1,17 +1,43 @@
 import asyncio
+import time
 from typing import Dict, Any # Removed Type as it wasn't used
+from urllib.parse import urlparse
 
 from browser_use import Agent as BrowserUseAgent
-from langchain_openai import ChatOpenAI
 from agno.tools import tool # Import the decorator
 
-from auto_sns_agent.config import OPENAI_API_KEY
+from auto_sns_agent.config import (
+    CORPUS_ENABLED,
+    CORPUS_FRESHNESS_SECONDS,
+    OPENAI_API_KEY,
+    RESEARCH_TOKEN_BUDGET,
+    RESEARCH_TOP_K,
+)
+from auto_sns_agent.research.ranking import select_passages, split_passages
+from auto_sns_agent.resilience import (
+    ARTICLE,
+    CIRCUIT_BREAKERS,
+    ErrorResult,
+    call_with_retries,
+    classify_exception,
+)
+from auto_sns_agent.storage.corpus import CorpusItem, get_corpus
+from auto_sns_agent.model_router import EXTRACTION, MODEL_ROUTER
+from auto_sns_agent.tools.agent_runner import (
+    DEFAULT_AGENT_BUDGET,
+    AgentBudget,
+    browser_llm,
+    outcome_failure_signal,
+    run_browser_agent,
+    uses_vision,
+)
+from auto_sns_agent.tools.browser_resources import managed_browser
+from auto_sns_agent.tools.lean_browser import lean_profile
 
-# Initialize the LLM for BrowserUseAgent (as per browser-use documentation)
-# This LLM is used by BrowserUseAgent internally to understand tasks.
-browser_use_llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=OPENAI_API_KEY)
+# Prefix of a successful extraction; the extracted text follows the first newline
+_EXTRACTED_PREFIX = "Successfully extracted main content from"
 
-async def _get_webpage_main_content_async(url: str) -> str:
+async def _get_webpage_main_content_async(url: str, budget: AgentBudget | None = None) -> str:
     """(Async) Uses BrowserUseAgent to navigate to a URL and get its main textual content."""
     try:
         # This prompt asks for main content, trying to avoid boilerplate.
@@ -21,20 +47,31 @@ async def _get_webpage_main_content_async(url: str) -> str:
             f"Focus on the primary body of text, and try to exclude headers, footers, navigation menus, sidebars, and advertisements. "
             f"Return the extracted clean text."
         )
-        agent = BrowserUseAgent(
-            task=task_prompt,
-            llm=browser_use_llm,
-        )
-        bua_result_history = await agent.run()
-        final_text_result = bua_result_history.final_result() if hasattr(bua_result_history, 'final_result') else str(bua_result_history)
+        async with managed_browser(owner=f"webpage:{url}", lean=lean_profile("article")) as (browser, browser_context):
+            # The LLM used by BrowserUseAgent comes from the extraction model chain,
+            # cheapest first; a stronger model runs only if the cheap one fails
+            async def run_extraction(model_id: str):
+                agent = BrowserUseAgent(
+                    task=task_prompt,
+                    llm=browser_llm(model_id),
+                    browser=browser,
+                    browser_context=browser_context,
+                    use_vision=uses_vision("article"),
+                )
+                return await run_browser_agent(agent, budget or DEFAULT_AGENT_BUDGET)
+
+            outcome = await MODEL_ROUTER.arun(EXTRACTION, run_extraction, outcome_failure_signal)
+        if not outcome.completed:
+            return outcome.to_tool_message(f"extracting main content from {url}")
+        final_text_result = outcome.final_result
         
         # Return a more descriptive success message including the URL for clarity
-        return f"Successfully extracted main content from {url}:\n{final_text_result}" if final_text_result else f"No main content extracted or found at {url}"
+        return f"{_EXTRACTED_PREFIX} {url}:\n{final_text_result}" if final_text_result else f"No main content extracted or found at {url}"
     except Exception as e:
-        return f"Error extracting main content from {url}: {str(e)}"
+        return ErrorResult(f"Error extracting main content from {url}: {str(e)}", classify_exception(e))
 
 @tool(show_result=True) # Add the Agno tool decorator with show_result=True
-def get_webpage_main_content(url: str) -> str:
+def get_webpage_main_content(url: str, focus: str | None = None, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None) -> str:
     """ 
     Navigates to a specified URL using BrowserUseAgent and returns the main textual content 
     of the page, attempting to exclude boilerplate like headers, footers, and ads.
@@ -42,9 +79,44 @@ def get_webpage_main_content(url: str) -> str:
 
     Args:
         url (str): The URL to navigate to and extract content from.
+        focus (str, optional): Topic of interest. When given, only the passages of the page
+                               most relevant to it are returned, in page order.
+        max_steps (int, optional): Maximum browser agent steps (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline for the browser agent (default from config).
+        max_input_tokens (int, optional): LLM input token budget for the browser agent (default from config).
+
+    Returns:
+        str: The extracted text, an error message, or a message starting with
+             "Budget exhausted" or "Cancelled" if the run was stopped early.
     """
     print(f"Tool 'get_webpage_main_content' called with URL: {url}")
-    return asyncio.run(_get_webpage_main_content_async(url=url))
+    corpus = get_corpus() if CORPUS_ENABLED else None
+    cached = corpus.get(url) if corpus is not None else None
+    if cached is not None and time.time() - cached.fetched_at <= CORPUS_FRESHNESS_SECONDS:
+        print(f"Answered {url} from the local corpus (no browser).")
+        return f"{_EXTRACTED_PREFIX} {url}:\n{_focused_text(cached.text, focus)}"
+
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    result = asyncio.run(call_with_retries(
+        ARTICLE,
+        lambda: _get_webpage_main_content_async(url=url, budget=budget),
+        activity=f"Extracting {url}",
+        breaker=CIRCUIT_BREAKERS.get(f"site:{urlparse(url).netloc or url}"),
+    ))
+    if corpus is not None and result.startswith(_EXTRACTED_PREFIX):
+        text = result.split("\n", 1)[1] if "\n" in result else ""
+        if text.strip():
+            corpus.add(CorpusItem(url, CorpusItem.ARTICLE, urlparse(url).netloc, text, url=url))
+    if focus and result.startswith(_EXTRACTED_PREFIX) and "\n" in result:
+        header, text = result.split("\n", 1)
+        return f"{header}\n{_focused_text(text, focus)}"
+    return result
+
+def _focused_text(text: str, focus: str | None) -> str:
+    """The passages of `text` most relevant to `focus`, in their original order (all of `text` without a focus)."""
+    if not focus:
+        return text
+    return "\n\n".join(select_passages(focus, split_passages(text), top_k=RESEARCH_TOP_K, token_budget=RESEARCH_TOKEN_BUDGET, keep_order=True))
 
 # For direct testing of this module
 if __name__ == '__main__':
@@ -0,0 +1,347 @@
+import atexit
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+from typing import Callable, Dict, List
+
+from auto_sns_agent.config import (
+    BROWSER_MAX_LIFETIME_SECONDS,
+    BROWSER_MEMORY_CAP_MB,
+    BROWSER_METRICS_PATH,
+    BROWSER_WATCHDOG_ENABLED,
+    BROWSER_WATCHDOG_INTERVAL_SECONDS,
+)
+
+# Command-line switch added to every Chromium the tools launch. Chromium ignores switches it
+# does not know; the value names the launching process (pid and start time, so a reused pid
+# is not mistaken for it) and the browser, which lets the watchdog find the process tree.
+MARKER_SWITCH = "--auto-sns-browser="
+
+
+class ProcessInfo:
+    """One process as read from /proc."""
+
+    def __init__(self, pid: int, ppid: int, start_time: int, rss_bytes: int, marker: str | None = None):
+        self.pid = pid
+        self.ppid = ppid
+        self.start_time = start_time  # Clock ticks after boot; identifies the process together with its pid
+        self.rss_bytes = rss_bytes
+        self.marker = marker  # Value of MARKER_SWITCH, on the main process of a browser we launched
+
+    def __repr__(self) -> str:
+        return f"ProcessInfo(pid={self.pid}, ppid={self.ppid}, rss={self.rss_bytes / 1e6:.0f} MB, marker={self.marker!r})"
+
+
+class ProcessTable:
+    """
+    Snapshot of the processes on the host, read from a /proc directory.
+
+    `proc_root` can point at a fake /proc tree (tests).
+    """
+
+    def __init__(self, proc_root: str = "/proc"):
+        self.proc_root = proc_root
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def available(self) -> bool:
+        return os.path.isdir(self.proc_root) and os.path.exists(os.path.join(self.proc_root, "self", "stat"))
+
+    def snapshot(self) -> Dict[int, ProcessInfo]:
+        processes: Dict[int, ProcessInfo] = {}
+        for entry in os.listdir(self.proc_root):
+            if entry.isdigit():
+                info = self.read(int(entry))
+                if info is not None:
+                    processes[info.pid] = info
+        return processes
+
+    def read(self, pid: int | str) -> ProcessInfo | None:
+        """The process `pid` ("self" for this one), or None if it exited meanwhile."""
+        path = os.path.join(self.proc_root, str(pid))
+        try:
+            with open(os.path.join(path, "stat")) as f:
+                stat = f.read()
+            # The command name is in parentheses and may itself contain spaces or parentheses
+            fields = stat[stat.rindex(")") + 2:].split()
+            with open(os.path.join(path, "statm")) as f:
+                rss_pages = int(f.read().split()[1])
+            marker = None
+            if pid != "self":
+                with open(os.path.join(path, "cmdline"), "rb") as f:
+                    for arg in f.read().decode(errors="replace").split("\0"):
+                        if arg.startswith(MARKER_SWITCH):
+                            marker = arg[len(MARKER_SWITCH):]
+                            break
+            return ProcessInfo(int(stat.split(None, 1)[0]), int(fields[1]), int(fields[19]), rss_pages * self._page_size, marker)
+        except (OSError, ValueError, IndexError):
+            return None
+
+
+class WatchedBrowser:
+    """A browser launched by this process, from launch until it is closed."""
+
+    def __init__(self, marker: str, owner: str, max_lifetime_seconds: float):
+        self.marker = marker
+        self.owner = owner
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.started = time.monotonic()
+        self.killed_reason: str | None = None
+        self.rss_bytes = 0
+        self.processes = 0
+
+
+class BrowserWatchdog:
+    """
+    Keeps the Chromium processes started by the tools from piling up.
+
+    Every browser the tools launch carries a marker switch (`register` returns it).
+    A background thread samples the process tree of each marked browser and:
+
+    - kills a tree whose summed RSS exceeds `memory_cap_bytes`;
+    - kills a tree that has run longer than its maximum lifetime;
+    - reaps trees whose launching process is gone (e.g. a killed posting subprocess).
+
+    `close_leftovers` kills what a browser left behind after it was closed, and the
+    trees of this process that are still running at exit are killed too. The latest
+    sample is available from `metrics` (and appended to `metrics_path` if set).
+    Linux only: without /proc the watchdog stays inactive.
+    """
+
+    def __init__(
+        self,
+        memory_cap_bytes: float = BROWSER_MEMORY_CAP_MB * 1024 * 1024,
+        max_lifetime_seconds: float = BROWSER_MAX_LIFETIME_SECONDS,
+        interval_seconds: float = BROWSER_WATCHDOG_INTERVAL_SECONDS,
+        metrics_path: str | None = BROWSER_METRICS_PATH,
+        processes: ProcessTable | None = None,
+        kill: Callable[[int, int], None] = os.kill,
+    ):
+        """
+        Args:
+            memory_cap_bytes (float): Largest summed RSS of one browser's process tree.
+            max_lifetime_seconds (float): Longest time a browser may run.
+            interval_seconds (float): Time between two samples.
+            metrics_path (str, optional): JSONL file receiving every sample.
+            processes (ProcessTable, optional): Where processes are read from (tests).
+            kill (Callable[[int, int], None]): Sends a signal to a pid (tests).
+        """
+        self.memory_cap_bytes = memory_cap_bytes
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.interval_seconds = interval_seconds
+        self.metrics_path = metrics_path
+        self.processes = processes or ProcessTable()
+        self._kill = kill
+        self._lock = threading.Lock()
+        self._browsers: Dict[str, WatchedBrowser] = {}
+        self._handles = itertools.count(1)
+        self._owner_id: str | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self.counters = {"killed_over_memory": 0, "killed_past_deadline": 0, "reaped_orphans": 0, "reaped_after_close": 0}
+        self._last_sample = {"live_browsers": 0, "processes": 0, "rss_bytes": 0}
+
+    # ---- registration -----------------------------------------------------------
+
+    def register(self, owner: str, max_lifetime_seconds: float | None = None) -> str:
+        """
+        Registers a browser about to be launched and returns the Chromium switch to launch it with.
+
+        Starts the watchdog on first use.
+        """
+        self.start()
+        with self._lock:
+            marker = f"{self._owner()}.{next(self._handles)}"
+            self._browsers[marker] = WatchedBrowser(marker, owner, max_lifetime_seconds or self.max_lifetime_seconds)
+        return MARKER_SWITCH + marker
+
+    def close_leftovers(self, switch: str) -> int:
+        """
+        Forgets a closed browser and kills whatever of its process tree is still running.
+
+        Returns:
+            int: Processes killed (0 when the browser closed cleanly).
+        """
+        marker = switch[len(MARKER_SWITCH):] if switch.startswith(MARKER_SWITCH) else switch
+        with self._lock:
+            browser = self._browsers.pop(marker, None)
+        if not self.processes.available():
+            return 0
+        killed = self._kill_trees(self.processes.snapshot(), lambda info: info.marker == marker)
+        if killed:
+            self.counters["reaped_after_close"] += 1
+            print(f"Browser watchdog: killed {killed} processes left running after {browser.owner if browser else marker} was closed.")
+        return killed
+
+    def _owner(self) -> str:
+        if self._owner_id is None:
+            me = self.processes.read("self")
+            self._owner_id = f"{me.pid}-{me.start_time}" if me else f"{os.getpid()}-0"
+        return self._owner_id
+
+    # ---- background thread ------------------------------------------------------
+
+    def start(self) -> bool:
+        """Reaps orphaned browsers and starts sampling (once); False if /proc is unavailable."""
+        with self._lock:
+            if self._thread is not None:
+                return True
+            if not self.processes.available():
+                return False
+            self._thread = threading.Thread(target=self._run, name="browser-watchdog", daemon=True)
+        reaped = self.reap_orphans()
+        if reaped:
+            print(f"Browser watchdog: reaped {reaped} browser processes left behind by earlier runs.")
+        self._thread.start()
+        atexit.register(self.shutdown)
+        return True
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Warning: Browser watchdog check failed: {e}")
+
+    def shutdown(self) -> int:
+        """Stops sampling and kills the browsers of this process that are still running."""
+        self._stopped.set()
+        if not self.processes.available():
+            return 0
+        prefix = f"{self._owner()}."
+        return self._kill_trees(self.processes.snapshot(), lambda info: info.marker is not None and info.marker.startswith(prefix))
+
+    # ---- sampling and enforcement -----------------------------------------------
+
+    def check(self) -> Dict:
+        """Samples every marked browser tree once, enforces the limits and returns the sample."""
+        snapshot = self.processes.snapshot()
+        children = _children(snapshot)
+        now = time.monotonic()
+        with self._lock:
+            browsers = dict(self._browsers)
+        trees: Dict[str, List[int]] = {}
+        for info in snapshot.values():
+            if info.marker is not None:
+                trees.setdefault(info.marker, []).extend(_tree(info.pid, children))
+
+        for marker, pids in trees.items():
+            browser = browsers.get(marker)
+            if browser is None:
+                if not marker.startswith(f"{self._owner()}.") and not self._owner_alive(marker, snapshot):
+                    self.counters["reaped_orphans"] += 1
+                    print(f"Browser watchdog: reaping {len(pids)} browser processes of exited process {marker.split('-')[0]}.")
+                    self._signal(pids)
+                continue
+            browser.processes = len(pids)
+            browser.rss_bytes = sum(snapshot[pid].rss_bytes for pid in pids if pid in snapshot)
+            if browser.killed_reason is not None:
+                continue
+            if browser.rss_bytes > self.memory_cap_bytes:
+                browser.killed_reason = f"{browser.rss_bytes / 1e6:.0f} MB over the {self.memory_cap_bytes / 1e6:.0f} MB cap"
+                self.counters["killed_over_memory"] += 1
+            elif now - browser.started > browser.max_lifetime_seconds:
+                browser.killed_reason = f"running for {now - browser.started:.0f}s, past its {browser.max_lifetime_seconds:.0f}s deadline"
+                self.counters["killed_past_deadline"] += 1
+            if browser.killed_reason is not None:
+                print(f"Browser watchdog: killing the browser of {browser.owner} ({len(pids)} processes): {browser.killed_reason}.")
+                self._signal(pids)
+
+        live = [browser for marker, browser in browsers.items() if marker in trees and browser.killed_reason is None]
+        sample = {
+            "live_browsers": len(live),
+            "processes": sum(browser.processes for browser in live),
+            "rss_bytes": sum(browser.rss_bytes for browser in live),
+        }
+        with self._lock:
+            self._last_sample = sample
+        if self.metrics_path:
+            self._append_metrics({"time": time.time(), **sample, **self.counters, "browsers": {browser.owner: browser.rss_bytes for browser in live}})
+        return sample
+
+    def metrics(self) -> Dict:
+        """Live browsers, their processes and summed RSS at the last sample, and the kill counters."""
+        with self._lock:
+            return {**self._last_sample, **self.counters}
+
+    def format(self) -> str:
+        metrics = self.metrics()
+        line = f"Browsers: {metrics['live_browsers']} live, {metrics['processes']} processes, {metrics['rss_bytes'] / 1e6:.0f} MB RSS"
+        kills = {name: count for name, count in self.counters.items() if count}
+        if kills:
+            line += " | " + ", ".join(f"{name}={count}" for name, count in kills.items())
+        return line
+
+    def reap_orphans(self) -> int:
+        """Kills marked browser trees whose launching process no longer runs; returns the processes killed."""
+        snapshot = self.processes.snapshot()
+        own = f"{self._owner()}."
+        orphaned = {info.marker for info in snapshot.values() if info.marker is not None and not info.marker.startswith(own) and not self._owner_alive(info.marker, snapshot)}
+        self.counters["reaped_orphans"] += len(orphaned)
+        return self._kill_trees(snapshot, lambda info: info.marker in orphaned)
+
+    def _owner_alive(self, marker: str, snapshot: Dict[int, ProcessInfo]) -> bool:
+        try:
+            pid, start_time = (int(part) for part in marker.split(".", 1)[0].split("-", 1))
+        except ValueError:
+            return True  # Not a marker this watchdog wrote; leave it alone
+        owner = snapshot.get(pid)
+        return owner is not None and owner.start_time == start_time
+
+    def _kill_trees(self, snapshot: Dict[int, ProcessInfo], selected: Callable[[ProcessInfo], bool]) -> int:
+        children = _children(snapshot)
+        pids = [pid for info in snapshot.values() if selected(info) for pid in _tree(info.pid, children)]
+        self._signal(pids)
+        return len(pids)
+
+    def _signal(self, pids: List[int]) -> None:
+        # Children first, so the browser cannot respawn them
+        for pid in reversed(pids):
+            try:
+                self._kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _append_metrics(self, record: Dict) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+            with open(self.metrics_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write browser metrics to {self.metrics_path}: {e}")
+
+
+def _children(snapshot: Dict[int, ProcessInfo]) -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for info in snapshot.values():
+        children.setdefault(info.ppid, []).append(info.pid)
+    return children
+
+
+def _tree(root: int, children: Dict[int, List[int]]) -> List[int]:
+    """`root` and its descendants, parents before children."""
+    pids, pending = [], [root]
+    while pending:
+        pid = pending.pop(0)
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+class _DisabledWatchdog(BrowserWatchdog):
+    """Stand-in when BROWSER_WATCHDOG_ENABLED is off: browsers are neither marked nor watched."""
+
+    def register(self, owner: str, max_lifetime_seconds: float | None = None) -> str:
+        return ""
+
+    def close_leftovers(self, switch: str) -> int:
+        return 0
+
+    def start(self) -> bool:
+        return False
+
+
+# Process-wide watchdog of the browsers launched by the tools
+BROWSER_WATCHDOG = BrowserWatchdog() if BROWSER_WATCHDOG_ENABLED else _DisabledWatchdog()
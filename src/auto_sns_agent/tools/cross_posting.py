@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from agno.tools import tool
+
+from auto_sns_agent.config import OPENAI_API_KEY, X_LOGIN_IDENTIFIER, X_PASSWORD, X_POSTING_BACKEND
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.registry import get_platform, platform_names
+from auto_sns_agent.storage.accounts import Account
+from auto_sns_agent.tools.agent_runner import DEFAULT_AGENT_BUDGET, AgentBudget
+from auto_sns_agent.tools.browser_resources import shared_browser
+from auto_sns_agent.tools.social_media_tools import (
+    POSTING_PREFIX,
+    _publish,
+    posted_successfully,
+    posted_url,
+)
+from auto_sns_agent.tools.x_api import default_api_credentials
+
+
+class PlatformPostResult:
+    """Outcome of posting to one platform during a cross-post."""
+
+    POSTED = "posted"
+    FAILED = "failed"
+
+    def __init__(self, platform: str, status: str, message: str, url: str | None = None, duration_seconds: float = 0.0):
+        self.platform = platform
+        self.status = status
+        self.message = message
+        self.url = url
+        self.duration_seconds = duration_seconds
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return f"PlatformPostResult({self.platform!r}, {self.status}, url={self.url!r})"
+
+
+def platform_credentials(adapter: PlatformAdapter) -> tuple[str | None, str | None]:
+    """Login identifier and password configured for `adapter`'s platform."""
+    if adapter.matches("x.com"):
+        return X_LOGIN_IDENTIFIER, X_PASSWORD
+    return None, None  # Other platforms rely on an existing session
+
+
+async def cross_post_async(content: str, platforms: List[PlatformAdapter], budget: AgentBudget | None = None, credentials: Dict[str, tuple] | None = None, idempotency_key: str | None = None) -> List[PlatformPostResult]:
+    """
+    Posts `content` to every platform at the same time.
+
+    Each platform gets its own browser context inside one shared browser. Content
+    that breaks a platform's length rules fails there without touching the others.
+
+    Args:
+        content (str): Text to post (the posting prefix is added per platform).
+        platforms (List[PlatformAdapter]): Platforms to post to.
+        budget (AgentBudget, optional): Browser agent budget per platform.
+        credentials (Dict[str, tuple], optional): Platform name -> (login identifier, password);
+            defaults to `platform_credentials`.
+        idempotency_key (str, optional): Names this cross-post; each platform's post is
+            kept under "<key>:<platform>", so posting again skips the platforms already done.
+
+    Returns:
+        List[PlatformPostResult]: One result per platform, in the given order.
+    """
+    credentials = credentials or {}
+
+    async def post_to(adapter: PlatformAdapter, browser) -> PlatformPostResult:
+        length_error = adapter.length_error(content, prefix=POSTING_PREFIX)
+        if length_error:
+            return PlatformPostResult(adapter.name, PlatformPostResult.FAILED, length_error)
+        login_identifier, password = credentials.get(adapter.name) or platform_credentials(adapter)
+        # API tokens belong to the configured account, so overridden credentials post through the browser
+        backend = X_POSTING_BACKEND if adapter.api_base_url and adapter.name not in credentials else Account.BROWSER
+        start = time.monotonic()
+        message = await _publish(
+            content, adapter, login_identifier, password, backend=backend, api_credentials=default_api_credentials(),
+            budget=budget or DEFAULT_AGENT_BUDGET, browser=browser, owner=f"cross-post:{adapter.base_url}",
+            idempotency_key=f"{idempotency_key}:{adapter.name}" if idempotency_key else None,
+        )
+        status = PlatformPostResult.POSTED if posted_successfully(message) else PlatformPostResult.FAILED
+        return PlatformPostResult(adapter.name, status, message, url=posted_url(message), duration_seconds=time.monotonic() - start)
+
+    if not platforms:
+        return []
+    async with shared_browser(owner=f"cross-post:{len(platforms)} platforms") as browser:
+        results = await asyncio.gather(*(post_to(adapter, browser) for adapter in platforms), return_exceptions=True)
+    return [
+        result if isinstance(result, PlatformPostResult) else PlatformPostResult(adapter.name, PlatformPostResult.FAILED, f"Error: {result}")
+        for adapter, result in zip(platforms, results)
+    ]
+
+
+@tool(show_result=True)
+def cross_post(content: str, platforms: List[str], max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None, idempotency_key: str | None = None) -> str:
+    """
+    Posts the same content to several social media platforms at once.
+    Prepends "[AutoPostingTest]" to the content, like post_to_social_media.
+
+    Args:
+        content (str): The text content to post.
+        platforms (List[str]): Platform names, e.g. ["Twitter"].
+        max_steps (int, optional): Maximum browser agent steps per platform (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline per platform (default from config).
+        max_input_tokens (int, optional): LLM input token budget per platform (default from config).
+        idempotency_key (str, optional): Any string naming this cross-post; calling again with the
+                        same key does not post again to the platforms that already have it.
+
+    Returns:
+        str: One line per platform (posted with URL, or failed with the reason) and a summary.
+    """
+    if not OPENAI_API_KEY:
+        return "Error: OPENAI_API_KEY not found for browser_use_llm."
+    adapters = [get_platform(name) for name in platforms]
+    unknown = [name for name, adapter in zip(platforms, adapters) if adapter is None]
+    if unknown:
+        return f"Error: Platforms {unknown} are not supported for posting. Supported platforms: {platform_names()}"
+    print(f"Tool 'cross_post' called for platforms: {[adapter.name for adapter in adapters]}")
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    results = asyncio.run(cross_post_async(content, adapters, budget=budget, idempotency_key=idempotency_key))
+    lines = [f"{result.platform}: {result.status} - {result.url or result.message}" for result in results]
+    lines.append(f"Posted to {sum(result.status == PlatformPostResult.POSTED for result in results)} of {len(results)} platforms.")
+    return "\n".join(lines)
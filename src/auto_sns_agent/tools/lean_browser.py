@@ -0,0 +1,192 @@
+from typing import Dict, Sequence
+from urllib.parse import urlparse
+
+from browser_use.browser.context import BrowserContextConfig
+
+from auto_sns_agent.config import (
+    LEAN_BROWSER_TASKS,
+    LEAN_VIEWPORT_EXPANSION,
+    LEAN_VIEWPORT_HEIGHT,
+    LEAN_VIEWPORT_WIDTH,
+)
+
+# Ad, analytics and tracking hosts; never needed to read or publish a post
+TRACKER_SITES = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "facebook.net",
+    "connect.facebook.net", "ads-twitter.com", "analytics.twitter.com", "scorecardresearch.com",
+    "amazon-adsystem.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adnxs.com",
+    "hotjar.com", "quantserve.com", "chartbeat.com", "newrelic.com", "nr-data.net", "moatads.com",
+    "rubiconproject.com", "pubmatic.com", "casalemedia.com", "teads.tv", "ad-stir.com",
+)
+# Typical transfer size of a request of each resource type, used to estimate the bytes saved by blocking it
+_TYPICAL_BYTES = {"image": 40_000, "media": 600_000, "font": 35_000, "script": 25_000, "stylesheet": 15_000}
+_DEFAULT_TYPICAL_BYTES = 5_000
+# Country-code second-level domains under which the registrable domain has three labels
+_SECOND_LEVEL = {"co", "com", "ne", "or", "ac", "go", "net", "org", "gov", "edu"}
+# Makes every audio and video element ignore autoplay and programmatic play()
+_NO_AUTOPLAY_SCRIPT = """
+Object.defineProperty(HTMLMediaElement.prototype, 'autoplay', {get() { return false; }, set() {}});
+HTMLMediaElement.prototype.play = function () { this.pause(); return Promise.resolve(); };
+"""
+
+
+def site_of(host: str) -> str:
+    """Registrable domain of a host, e.g. "pbs.twimg.com" -> "twimg.com", "www.nikkei.co.jp" -> "nikkei.co.jp"."""
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class LeanProfile:
+    """What a lean browser blocks for one kind of task."""
+
+    def __init__(
+        self,
+        name: str,
+        blocked_resource_types: Sequence[str] = (),
+        blocked_third_party_types: Sequence[str] = (),
+        first_party_sites: Sequence[str] = (),
+        block_trackers: bool = True,
+        disable_autoplay: bool = True,
+    ):
+        """
+        Args:
+            name (str): Task kind, e.g. "search"; selectable with `LEAN_BROWSER_TASKS`.
+            blocked_resource_types (Sequence[str]): Playwright resource types blocked from any site.
+            blocked_third_party_types (Sequence[str]): Resource types blocked unless they come from the
+                site of the current page or one of `first_party_sites`.
+            first_party_sites (Sequence[str]): Extra sites treated as the page's own (e.g. a CDN).
+            block_trackers (bool): Block requests to `TRACKER_SITES`.
+            disable_autoplay (bool): Keep audio and video elements from playing.
+        """
+        self.name = name
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_third_party_types = frozenset(blocked_third_party_types)
+        self.first_party_sites = frozenset(first_party_sites)
+        self.block_trackers = block_trackers
+        self.disable_autoplay = disable_autoplay
+
+    def context_config(self, context_config=None):
+        """
+        Copy of `context_config` (or a new `BrowserContextConfig`) with a capped viewport.
+
+        The window size bounds layout and screenshot cost; `viewport_expansion` bounds
+        how much of the DOM beyond the viewport browser-use sends to the LLM.
+        """
+        config = context_config if context_config is not None else BrowserContextConfig()
+        return config.model_copy(update={
+            "window_width": LEAN_VIEWPORT_WIDTH,
+            "window_height": LEAN_VIEWPORT_HEIGHT,
+            "viewport_expansion": LEAN_VIEWPORT_EXPANSION,
+        })
+
+    def __repr__(self) -> str:
+        return f"LeanProfile({self.name!r})"
+
+
+# Reading search results on X: text only, X's own scripts and API calls are needed
+SEARCH = LeanProfile("search", blocked_resource_types=("image", "media", "font"), blocked_third_party_types=("script", "xhr", "fetch", "other"), first_party_sites=("twimg.com", "twitter.com", "x.com"))
+# Extracting an article: the page's own text and layout, nothing embedded from elsewhere
+ARTICLE = LeanProfile("article", blocked_resource_types=("image", "media", "font"), blocked_third_party_types=("script", "xhr", "fetch", "stylesheet", "other", "websocket", "eventsource"))
+# Composing a post: images stay (avatars, attachment previews), only video, fonts and trackers go
+POST = LeanProfile("post", blocked_resource_types=("media", "font"))
+
+_PROFILES = {profile.name: profile for profile in (SEARCH, ARTICLE, POST)}
+
+
+def lean_profile(task: str) -> LeanProfile | None:
+    """Profile for a kind of task, or None if lean mode is off for it (`LEAN_BROWSER_TASKS`)."""
+    return _PROFILES.get(task) if task in LEAN_BROWSER_TASKS else None
+
+
+class LeanStats:
+    """What lean mode blocked and what was still transferred during one browser context's life."""
+
+    def __init__(self):
+        self.blocked: Dict[str, int] = {}
+        self.allowed_requests = 0
+        self.transferred_bytes = 0
+        self.transfer_seconds = 0.0
+        self.estimated_bytes_saved = 0
+
+    def record_blocked(self, reason: str, resource_type: str) -> None:
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        self.estimated_bytes_saved += _TYPICAL_BYTES.get(resource_type, _DEFAULT_TYPICAL_BYTES)
+
+    @property
+    def estimated_seconds_saved(self) -> float:
+        """Bytes saved divided by the throughput observed for the allowed requests."""
+        if not self.transferred_bytes or not self.transfer_seconds:
+            return 0.0
+        return self.estimated_bytes_saved / (self.transferred_bytes / self.transfer_seconds)
+
+    def summary(self) -> str:
+        blocked = sum(self.blocked.values())
+        reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(self.blocked.items(), key=lambda item: -item[1]))
+        return (
+            f"blocked {blocked} requests ({reasons or 'none'}), "
+            f"~{self.estimated_bytes_saved / 1e6:.1f} MB and ~{self.estimated_seconds_saved:.1f}s of transfer saved (estimated); "
+            f"{self.allowed_requests} requests, {self.transferred_bytes / 1e6:.1f} MB transferred"
+        )
+
+
+class LeanMode:
+    """
+    Applies a `LeanProfile` to a Playwright browser context by intercepting its requests.
+
+    Main-frame documents are always allowed; the site of the latest one is the first
+    party that third-party blocking is decided against.
+    """
+
+    def __init__(self, profile: LeanProfile):
+        self.profile = profile
+        self.stats = LeanStats()
+        self._page_sites: set[str] = set()
+
+    async def attach(self, context) -> None:
+        """Starts intercepting `context`'s requests (call before the first navigation)."""
+        if self.profile.disable_autoplay:
+            await context.add_init_script(script=_NO_AUTOPLAY_SCRIPT)
+        await context.route("**/*", self.handle_route)
+        context.on("requestfinished", self.on_request_finished)
+
+    def block_reason(self, url: str, resource_type: str, is_main_document: bool) -> str | None:
+        """Why a request should be blocked, or None to let it through."""
+        if is_main_document:
+            return None
+        host = urlparse(url).hostname
+        if not host:
+            return None  # data:, blob: and the like never leave the browser
+        if self.profile.block_trackers and any(host == tracker or host.endswith(f".{tracker}") for tracker in TRACKER_SITES):
+            return "tracker"
+        if resource_type in self.profile.blocked_resource_types:
+            return resource_type
+        first_party = self._page_sites | self.profile.first_party_sites
+        if resource_type in self.profile.blocked_third_party_types and first_party and site_of(host) not in first_party:
+            return f"third-party {resource_type}"
+        return None
+
+    async def handle_route(self, route, request) -> None:
+        is_main_document = request.is_navigation_request() and request.frame.parent_frame is None
+        if is_main_document:
+            host = urlparse(request.url).hostname
+            self._page_sites = {site_of(host)} if host else set()
+        reason = self.block_reason(request.url, request.resource_type, is_main_document)
+        if reason is None:
+            await route.fallback()
+            return
+        self.stats.record_blocked(reason, request.resource_type)
+        await route.abort("blockedbyclient")
+
+    async def on_request_finished(self, request) -> None:
+        self.stats.allowed_requests += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # The context may be closing
+        self.stats.transferred_bytes += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        timing = request.timing
+        if timing.get("requestStart", -1) >= 0 and timing.get("responseEnd", -1) >= 0:
+            self.stats.transfer_seconds += max(0.0, timing["responseEnd"] - timing["requestStart"]) / 1000
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+from auto_sns_agent.config import AUTO_SNS_DATA_DIR, MEDIA_WORKERS
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff", ".heic")
+_VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".webm", ".mkv", ".avi")
+# Extensions of finished cache entries; files being written end in ".part" until they are renamed
+_CACHED_EXTENSIONS = (".jpg", ".png", ".mp4")
+
+
+class MediaError(ValueError):
+    """A media file that cannot be attached (unsupported type, too large, missing tool)."""
+
+
+class MediaLimits:
+    """What a platform accepts as attachments of one post."""
+
+    def __init__(
+        self,
+        max_items: int = 4,
+        max_image_bytes: int = 5 * 1024 * 1024,
+        max_image_dimension: int = 4096,
+        max_gif_bytes: int = 15 * 1024 * 1024,
+        max_video_bytes: int = 512 * 1024 * 1024,
+        max_video_dimension: int = 1280,
+        passthrough_video_types: Sequence[str] = ("video/mp4",),
+    ):
+        """
+        Args:
+            max_items (int): Attachments per post; a GIF or a video must be the only attachment.
+            max_image_bytes (int): Largest still image, after re-encoding.
+            max_image_dimension (int): Longest image side in pixels; larger images are downscaled.
+            max_gif_bytes (int): Largest animated GIF (GIFs are not re-encoded).
+            max_video_bytes (int): Largest video.
+            max_video_dimension (int): Longest side of re-encoded videos.
+            passthrough_video_types (Sequence[str]): Video types attached as they are when small enough.
+        """
+        self.max_items = max_items
+        self.max_image_bytes = max_image_bytes
+        self.max_image_dimension = max_image_dimension
+        self.max_gif_bytes = max_gif_bytes
+        self.max_video_bytes = max_video_bytes
+        self.max_video_dimension = max_video_dimension
+        self.passthrough_video_types = tuple(passthrough_video_types)
+
+    def key(self) -> str:
+        """Short fingerprint of the limits; processed variants are cached per source and limits."""
+        return hashlib.sha256(repr(sorted(vars(self).items())).encode()).hexdigest()[:8]
+
+
+class PreparedMedia:
+    """A media file ready to attach: within the platform's limits, stored on disk."""
+
+    IMAGE = "image"
+    GIF = "gif"
+    VIDEO = "video"
+
+    def __init__(self, path: str, kind: str, mime_type: str, size_bytes: int, source: str):
+        self.path = path
+        self.kind = kind
+        self.mime_type = mime_type
+        self.size_bytes = size_bytes
+        self.source = source
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PreparedMedia":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"PreparedMedia({self.kind}, {self.path!r}, {self.size_bytes} bytes)"
+
+
+def media_kind(path: str) -> str:
+    """`PreparedMedia` kind of a file, from its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return PreparedMedia.GIF
+    if extension in _IMAGE_EXTENSIONS:
+        return PreparedMedia.IMAGE
+    if extension in _VIDEO_EXTENSIONS:
+        return PreparedMedia.VIDEO
+    raise MediaError(f"Unsupported media type: {os.path.basename(path)}")
+
+
+def content_hash(path: str) -> str:
+    """SHA-256 of a file, read in chunks so large videos are never held in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_chunks(path: str, chunk_bytes: int):
+    """Yields a file's content in chunks of at most `chunk_bytes`."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            yield chunk
+
+
+def prepare_file(path: str, limits: MediaLimits, cache_dir: str) -> Dict:
+    """
+    Brings one file within `limits` (runs in a worker process).
+
+    Still images are always re-encoded, which also strips their metadata (e.g. GPS
+    position), and downscaled until they fit. GIFs and small MP4 videos are attached
+    as they are; other videos are re-encoded with ffmpeg. Re-encoded variants are
+    cached under `cache_dir` by content hash and limits, so attaching the same file
+    again costs one hash.
+
+    Returns:
+        Dict: A `PreparedMedia` as a dict (picklable across processes).
+
+    Raises:
+        MediaError: If the file cannot be brought within the limits.
+    """
+    if not os.path.isfile(path):
+        raise MediaError(f"Media file not found: {path}")
+    kind = media_kind(path)
+    size = os.path.getsize(path)
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    if kind == PreparedMedia.GIF:
+        if size > limits.max_gif_bytes:
+            raise MediaError(f"{os.path.basename(path)} is {size} bytes; GIFs are limited to {limits.max_gif_bytes} bytes.")
+        return PreparedMedia(path, kind, "image/gif", size, path).to_dict()
+    if kind == PreparedMedia.VIDEO and mime_type in limits.passthrough_video_types and size <= limits.max_video_bytes:
+        return PreparedMedia(path, kind, mime_type, size, path).to_dict()
+
+    cache_key = f"{content_hash(path)[:32]}-{limits.key()}"
+    cached = [os.path.join(cache_dir, cache_key + extension) for extension in _CACHED_EXTENSIONS]
+    target = next((candidate for candidate in cached if os.path.isfile(candidate)), None)
+    if target is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        if kind == PreparedMedia.IMAGE:
+            target = _optimize_image(path, os.path.join(cache_dir, cache_key), limits)
+        else:
+            target = _transcode_video(path, os.path.join(cache_dir, f"{cache_key}.mp4"), limits)
+    target_size = os.path.getsize(target)
+    if kind == PreparedMedia.VIDEO and target_size > limits.max_video_bytes:
+        raise MediaError(f"{os.path.basename(path)} is still {target_size} bytes after re-encoding; videos are limited to {limits.max_video_bytes} bytes.")
+    return PreparedMedia(target, kind, mimetypes.guess_type(target)[0], target_size, path).to_dict()
+
+
+def _optimize_image(source: str, target_stem: str, limits: MediaLimits) -> str:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise ImportError("Image attachments require Pillow: pip install 'auto-sns[media]'") from e
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((limits.max_image_dimension, limits.max_image_dimension))
+        transparent = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image_format, quality = ("PNG", None) if transparent else ("JPEG", 85)
+        while True:
+            if image_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, optimize=True, **({"quality": quality} if quality else {}))
+            if buffer.tell() <= limits.max_image_bytes:
+                break
+            if image_format == "PNG":
+                # Transparency is lost, but a JPEG of the same image is far smaller
+                image_format, quality = "JPEG", 85
+            elif quality > 55:
+                quality -= 10
+            else:
+                image = image.resize((max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)))
+
+    target = f"{target_stem}.{'png' if image_format == 'PNG' else 'jpg'}"
+    _write_atomically(target, buffer.getvalue())
+    return target
+
+
+def _transcode_video(source: str, target: str, limits: MediaLimits) -> str:
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise MediaError(f"{os.path.basename(source)} has to be re-encoded to MP4 within the platform's limits, which requires ffmpeg.")
+    side = limits.max_video_dimension
+    # A name of its own, so workers preparing the same video never write to one file
+    fd, tmp_target = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".part")
+    os.close(fd)
+    command = [
+        ffmpeg, "-y", "-loglevel", "error", "-i", source,
+        # Fit within side x side without upscaling; H.264 needs even dimensions
+        "-vf", f"scale='min({side},iw)':'min({side},ih)':force_original_aspect_ratio=decrease,scale=trunc(iw/2)*2:trunc(ih/2)*2",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", "-f", "mp4", tmp_target,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+        raise MediaError(f"ffmpeg could not re-encode {os.path.basename(source)}: {result.stderr.strip()[-300:]}")
+    os.replace(tmp_target, target)
+    return target
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    """Writes through a temporary file of its own, so `path` is only ever seen complete."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class MediaProcessor:
+    """
+    Prepares a post's media in a pool of worker processes.
+
+    Image decoding and encoding is CPU-bound, so files are processed in parallel
+    processes instead of on the event loop. The pool is created on first use and
+    reused for later posts.
+    """
+
+    def __init__(self, cache_dir: str, max_workers: int = MEDIA_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_workers = max(1, max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def prepare(self, paths: List[str], limits: MediaLimits) -> List[PreparedMedia]:
+        """
+        Prepares every file of one post, in the given order.
+
+        Raises:
+            MediaError: If the files do not fit the limits together or one of them cannot be prepared.
+        """
+        if len(paths) > limits.max_items:
+            raise MediaError(f"At most {limits.max_items} media files can be attached to one post.")
+        if len(paths) > 1 and any(media_kind(path) != PreparedMedia.IMAGE for path in paths):
+            raise MediaError("A GIF or video must be the only media file of a post.")
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        loop = asyncio.get_running_loop()
+        prepared = await asyncio.gather(*(loop.run_in_executor(self._executor, prepare_file, path, limits, self.cache_dir) for path in paths))
+        return [PreparedMedia.from_dict(data) for data in prepared]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+MEDIA_PROCESSOR = MediaProcessor(os.path.join(AUTO_SNS_DATA_DIR, "media_cache"))
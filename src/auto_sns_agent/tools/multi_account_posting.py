@@ -0,0 +1,189 @@
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, List
+
+from agno.tools import tool
+from browser_use.browser.context import BrowserContextConfig
+
+from auto_sns_agent.config import (
+    ACCOUNT_MAX_PACING_WAIT_SECONDS,
+    ACCOUNT_POST_CONCURRENCY,
+    ACCOUNT_POST_STAGGER_SECONDS,
+    OPENAI_API_KEY,
+)
+from auto_sns_agent.platforms.registry import get_platform
+from auto_sns_agent.storage.accounts import Account, AccountRegistry, default_registry
+from auto_sns_agent.tools.agent_runner import DEFAULT_AGENT_BUDGET, AgentBudget
+from auto_sns_agent.tools.browser_resources import shared_browser
+from auto_sns_agent.tools.social_media_tools import (
+    POSTING_PREFIX,
+    _publish,
+    posted_successfully,
+    posted_url,
+)
+from auto_sns_agent.tools.x_api import XApiClient, api_credentials
+
+
+class AccountPostResult:
+    """Outcome of posting to one account during a fan-out."""
+
+    POSTED = "posted"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, account: str, status: str, message: str, url: str | None = None, duration_seconds: float = 0.0):
+        self.account = account
+        self.status = status
+        self.message = message
+        self.url = url
+        self.duration_seconds = duration_seconds
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return f"AccountPostResult({self.account!r}, {self.status}, url={self.url!r})"
+
+
+async def post_to_accounts_async(
+    content: str | None = None,
+    variants: Dict[str, str] | None = None,
+    accounts: List[str] | None = None,
+    registry: AccountRegistry | None = None,
+    budget: AgentBudget | None = None,
+    concurrency: int = ACCOUNT_POST_CONCURRENCY,
+    max_pacing_wait_seconds: float = ACCOUNT_MAX_PACING_WAIT_SECONDS,
+    stagger_seconds: float = ACCOUNT_POST_STAGGER_SECONDS,
+    media_paths: List[str] | None = None,
+    idempotency_key: str | None = None,
+) -> List[AccountPostResult]:
+    """
+    Posts `content` (or a per-account variant) as each selected account.
+
+    All accounts share one browser process; each posts from its own browser context
+    whose cookies are loaded from and saved to the account's session file, so a
+    login is reused on the next run and never leaks into another account. Up to
+    `concurrency` accounts post at the same time, started `stagger_seconds` apart. An
+    account that posted less than its minimum interval ago waits for the interval to
+    pass, or is skipped if that would take longer than `max_pacing_wait_seconds`.
+    Accounts with the API posting backend share one pooled API client per platform
+    and use the browser only as a fallback.
+
+    Args:
+        content (str, optional): Text posted by accounts without a variant.
+        variants (Dict[str, str], optional): Account name -> text for that account.
+        accounts (List[str], optional): Accounts to post as (default: the variants' accounts,
+            or every registered account).
+        registry (AccountRegistry, optional): Account registry (default: `AUTO_SNS_DATA_DIR/accounts.json`).
+        budget (AgentBudget, optional): Browser agent budget per account.
+        media_paths (List[str], optional): Media attached to every account's post (re-encoded variants are cached).
+        idempotency_key (str, optional): Names this fan-out; each account's post is kept under
+            "<key>:<account>", so posting again skips the accounts already done.
+
+    Returns:
+        List[AccountPostResult]: One result per selected account, in selection order.
+
+    Raises:
+        KeyError: If a selected account is not registered.
+    """
+    registry = registry or default_registry()
+    variants = variants or {}
+    selected = registry.select(accounts or list(variants) or None)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def post_as(index: int, account: Account, browser, api_clients: Dict[str, XApiClient]) -> AccountPostResult:
+        text = variants.get(account.name, content)
+        adapter = get_platform(account.platform)
+        if not text:
+            return AccountPostResult(account.name, AccountPostResult.SKIPPED, "No content or variant for this account.")
+        if adapter is None:
+            return AccountPostResult(account.name, AccountPostResult.FAILED, f"Platform '{account.platform}' is not supported for posting.")
+        length_error = adapter.length_error(text, prefix=POSTING_PREFIX)
+        if length_error:
+            return AccountPostResult(account.name, AccountPostResult.FAILED, length_error)
+        if not account.password:
+            return AccountPostResult(account.name, AccountPostResult.FAILED, f"Password variable ${account.password_env} is not set.")
+
+        wait = account.next_post_at() - time.time()
+        if wait > max_pacing_wait_seconds:
+            return AccountPostResult(account.name, AccountPostResult.SKIPPED, f"Posted too recently; next post allowed in {wait:.0f}s.")
+        await asyncio.sleep(max(wait, index * stagger_seconds))
+
+        async with semaphore:
+            start = time.monotonic()
+            message = await _publish(
+                text, adapter, account.login_identifier, account.password, backend=account.posting_backend,
+                api_credentials=api_credentials(registry.api_token_file(account), account.username),
+                api_client=api_clients.get(adapter.api_base_url), budget=budget or DEFAULT_AGENT_BUDGET,
+                username=account.username, browser=browser,
+                context_config=BrowserContextConfig(cookies_file=registry.session_file(account)),
+                owner=f"post:{adapter.base_url}:{account.name}", media_paths=media_paths,
+                idempotency_key=f"{idempotency_key}:{account.name}" if idempotency_key else None,
+            )
+            duration = time.monotonic() - start
+        if posted_successfully(message):
+            registry.mark_posted(account.name)
+            return AccountPostResult(account.name, AccountPostResult.POSTED, message, url=posted_url(message), duration_seconds=duration)
+        return AccountPostResult(account.name, AccountPostResult.FAILED, message, duration_seconds=duration)
+
+    if not selected:
+        return []
+    api_base_urls = {
+        adapter.api_base_url for adapter in (get_platform(account.platform) for account in selected if account.posting_backend == Account.API)
+        if adapter is not None and adapter.api_base_url
+    }
+    async with AsyncExitStack() as stack:
+        api_clients = {base_url: await stack.enter_async_context(XApiClient(base_url)) for base_url in api_base_urls}
+        browser = await stack.enter_async_context(shared_browser(owner=f"post-fan-out:{len(selected)} accounts"))
+        results = await asyncio.gather(*(post_as(index, account, browser, api_clients) for index, account in enumerate(selected)), return_exceptions=True)
+    return [
+        result if isinstance(result, AccountPostResult) else AccountPostResult(account.name, AccountPostResult.FAILED, f"Error: {result}")
+        for account, result in zip(selected, results)
+    ]
+
+
+def format_results(results: List[AccountPostResult]) -> str:
+    """One line per account plus a summary line, for the orchestrator and the CLI."""
+    lines = [f"{result.account}: {result.status} - {result.url or result.message}" for result in results]
+    posted = sum(result.status == AccountPostResult.POSTED for result in results)
+    lines.append(f"Posted to {posted} of {len(results)} accounts.")
+    return "\n".join(lines)
+
+
+@tool(show_result=True)
+def post_to_accounts(content: str | None = None, accounts: List[str] | None = None, variants_json: str | None = None, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None, media_paths: List[str] | None = None, idempotency_key: str | None = None) -> str:
+    """
+    Posts the same content, or per-account variants, as several registered accounts.
+    Prepends "[AutoPostingTest]" to every post, like post_to_social_media.
+
+    Args:
+        content (str, optional): Text posted by accounts that have no variant.
+        accounts (List[str], optional): Names of the registered accounts to post as (default: all).
+        variants_json (str, optional): JSON object mapping account name to that account's text.
+        max_steps (int, optional): Maximum browser agent steps per account (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline per account (default from config).
+        max_input_tokens (int, optional): LLM input token budget per account (default from config).
+        media_paths (List[str], optional): Local image files (up to 4) or one GIF or video attached to every post.
+        idempotency_key (str, optional): Any string naming this fan-out; calling again with the same
+                        key does not post again as the accounts that already posted it.
+
+    Returns:
+        str: One line per account (posted with URL, failed or skipped with the reason) and a summary.
+    """
+    if not OPENAI_API_KEY:
+        return "Error: OPENAI_API_KEY not found for browser_use_llm."
+    try:
+        variants = json.loads(variants_json) if variants_json else None
+    except ValueError as e:
+        return f"Error: variants_json is not valid JSON: {e}"
+    if not content and not variants:
+        return "Error: Provide content or variants_json."
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    print(f"Tool 'post_to_accounts' called for accounts: {accounts or 'all'}")
+    try:
+        results = asyncio.run(post_to_accounts_async(content, variants=variants, accounts=accounts, budget=budget, media_paths=media_paths, idempotency_key=idempotency_key))
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    return format_results(results) if results else "Error: No accounts registered. Add them with `auto-sns-accounts add`."
@@ -0,0 +1,85 @@
+import asyncio
+import re
+from typing import Any, Dict, Tuple
+
+# X's web client creates posts through this GraphQL operation; the query id segment changes between deployments
+CREATE_POST_URL_PATTERN = re.compile(r"/i/api/graphql/[^/]+/CreateTweet(\?|$)")
+
+
+def created_post_from_response(data: Dict[str, Any]) -> Tuple[str | None, str | None]:
+    """
+    Reads (post id, author screen name) from a CreateTweet response body.
+
+    Returns (None, None) when the body does not describe a created post (e.g. an error
+    payload such as a duplicate-content rejection).
+    """
+    result = (((data.get("data") or {}).get("create_tweet") or {}).get("tweet_results") or {}).get("result") or {}
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet") or {}
+    post_id = result.get("rest_id") or (result.get("legacy") or {}).get("id_str")
+    user = ((result.get("core") or {}).get("user_results") or {}).get("result") or {}
+    screen_name = (user.get("core") or {}).get("screen_name") or (user.get("legacy") or {}).get("screen_name")
+    return (str(post_id) if post_id else None), screen_name
+
+
+def post_url(post_id: str, screen_name: str | None = None, base_url: str = "https://x.com") -> str:
+    """Canonical URL of a post; `/i/web/status/<id>` resolves without knowing the author."""
+    return f"{base_url.rstrip('/')}/{screen_name or 'i/web'}/status/{post_id}"
+
+
+class CreatedPostCapture:
+    """
+    Listens to a browser context's network responses for the post that gets created.
+
+    Attach it before the post button is clicked; once X answers the create-post request,
+    `url` holds the new post's canonical URL without any page having to be visited.
+    """
+
+    def __init__(self, base_url: str = "https://x.com"):
+        self.base_url = base_url
+        self.post_id: str | None = None
+        self.screen_name: str | None = None
+        self.error: str | None = None  # Set when X answered the request without creating a post
+        self._captured = asyncio.Event()
+        self._context = None
+
+    @property
+    def url(self) -> str | None:
+        return post_url(self.post_id, self.screen_name, self.base_url) if self.post_id else None
+
+    def attach(self, playwright_context) -> None:
+        """Starts listening on a Playwright BrowserContext (covers every page the agent opens)."""
+        self._context = playwright_context
+        playwright_context.on("response", self.on_response)
+
+    def detach(self) -> None:
+        if self._context is not None:
+            try:
+                self._context.remove_listener("response", self.on_response)
+            except Exception:
+                pass  # Context already closed
+            self._context = None
+
+    async def on_response(self, response) -> None:
+        if self.post_id or not CREATE_POST_URL_PATTERN.search(response.url):
+            return
+        try:
+            data = await response.json()
+        except Exception as e:
+            self.error = f"Unreadable create-post response ({response.status}): {e}"
+            return
+        post_id, screen_name = created_post_from_response(data)
+        if post_id:
+            self.post_id, self.screen_name = post_id, screen_name
+            self._captured.set()
+        else:
+            errors = data.get("errors") or []
+            self.error = "; ".join(str(error.get("message", error)) for error in errors) or f"No post in create-post response ({response.status})"
+
+    async def wait(self, timeout_seconds: float) -> str | None:
+        """Waits up to `timeout_seconds` for the post to be captured and returns its URL, or None."""
+        try:
+            await asyncio.wait_for(self._captured.wait(), timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self.url
@@ -1,17 +1,122 @@
 import asyncio
+import html
+import os
+import re
 from typing import List, Dict, Any
 
 from agno.tools import tool
 from browser_use import Agent as BrowserUseAgent
-from langchain_openai import ChatOpenAI
 
-from auto_sns_agent.config import OPENAI_API_KEY, X_LOGIN_IDENTIFIER, X_PASSWORD
+from auto_sns_agent.config import (
+    ACTION_REPLAY_ENABLED,
+    AUTO_SNS_DATA_DIR,
+    CORPUS_ENABLED,
+    CORPUS_FRESHNESS_SECONDS,
+    MEDIA_UPLOAD_TIMEOUT_SECONDS,
+    NEAR_DUPLICATE_THRESHOLD,
+    OPENAI_API_KEY,
+    POST_CAPTURE_TIMEOUT_SECONDS,
+    POST_IDEMPOTENCY_WINDOW_SECONDS,
+    RESEARCH_TOKEN_BUDGET,
+    X_LOGIN_IDENTIFIER,
+    X_PASSWORD,
+    X_POSTING_BACKEND,
+    X_USERNAME,
+)
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.registry import get_platform, platform_for_url, platform_names
+from auto_sns_agent.research.near_duplicates import drop_near_duplicates
+from auto_sns_agent.research.ranking import select_passages
+from auto_sns_agent.resilience import (
+    CIRCUIT_BREAKERS,
+    POST,
+    SEARCH,
+    ErrorResult,
+    call_with_retries,
+    classify_exception,
+    error_kind,
+    retry_policy,
+    wait_unless_cancelled,
+)
+from auto_sns_agent.storage.accounts import Account
+from auto_sns_agent.storage.corpus import CorpusItem, content_id, get_corpus
+from auto_sns_agent.storage.post_ledger import PostLedger
+from auto_sns_agent.tools.action_replay import (
+    ActionScriptStore,
+    replay_action_script,
+    script_from_history,
+)
+from auto_sns_agent.model_router import BROWSER_NAVIGATION, INVALID_OUTPUT, MODEL_ROUTER, POSTING
+from auto_sns_agent.tools.agent_runner import (
+    BUDGET_EXHAUSTED_PREFIX,
+    CANCELLED_PREFIX,
+    DEFAULT_AGENT_BUDGET,
+    AgentBudget,
+    AgentRunOutcome,
+    browser_llm,
+    outcome_failure_signal,
+    run_browser_agent,
+    uses_vision,
+)
+from auto_sns_agent.tools.browser_resources import managed_browser
+from auto_sns_agent.tools.lean_browser import lean_profile
+from auto_sns_agent.tools.media import MEDIA_PROCESSOR, MediaError, PreparedMedia
+from auto_sns_agent.tools.x_api import (
+    XApiClient,
+    XApiCredentials,
+    XApiError,
+    default_api_credentials,
+)
+from auto_sns_agent.tools.x_login import LoginResult
 
-# Consider centralizing this if used by multiple browser tool files
-browser_use_llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
+# Separates posts in the output of get_social_media_posts_for_topic
+POST_DELIMITER = "---NEXT_POST_DELIMITER---"
 
-async def _get_social_media_posts_async(topic: str, platform_url: str, count: int, login_identifier: str | None, password: str | None) -> str:
-    """(Async) Uses BrowserUseAgent to search a platform for posts on a topic and extract text."""
+# Marks posts published by this agent; counted against the platform's length limit
+POSTING_PREFIX = "[AutoPostingTest] "
+
+# Recorded posting action sequences, replayed with plain Playwright before involving the LLM
+ACTION_SCRIPTS = ActionScriptStore(os.path.join(AUTO_SNS_DATA_DIR, "action_scripts"))
+# Outcomes of posts made under an idempotency key
+POST_LEDGER = PostLedger(os.path.join(AUTO_SNS_DATA_DIR, "post_ledger.jsonl"), POST_IDEMPOTENCY_WINDOW_SECONDS)
+_RESULT_URL = re.compile(r"URL:\s*(\S+)")
+# Posts checked for when an attempt ended without a known outcome
+_RECENT_POSTS_CHECKED = 10
+
+async def _get_social_media_posts_async(topic: str, platform_url: str, count: int, login_identifier: str | None, password: str | None, budget: AgentBudget | None = None, adapter: PlatformAdapter | None = None) -> str:
+    """
+    (Async) Searches a platform for posts on a topic and extracts their text.
+
+    Uses the adapter's scripted search when the scripted login succeeded, and
+    BrowserUseAgent otherwise (or when the scripted search found nothing).
+    """
+    adapter = adapter or platform_for_url(platform_url)
+    try:
+        # The browser is owned by managed_browser, which closes it and reports the release
+        async with managed_browser(owner=f"search:{platform_url}", lean=lean_profile("search")) as (browser, browser_context):
+            login = await _scripted_login(adapter, browser_context, login_identifier, password)
+            if login is not None and login.logged_in:
+                scraped = await _scripted_search(adapter, await browser_context.get_current_page(), topic, count)
+                if scraped:
+                    print(f"Scripted search on {adapter.name} found {len(scraped)} posts for '{topic}' (no LLM).")
+                    return POST_DELIMITER.join(scraped)
+            return await _agent_search(adapter, browser, browser_context, topic, count, _search_login_instructions(adapter, login, login_identifier, password), budget)
+    except Exception as e:
+        return ErrorResult(f"Error searching social media for '{topic}' on '{platform_url}': {str(e)}", classify_exception(e))
+
+def _search_login_instructions(adapter: PlatformAdapter, login: LoginResult | None, login_identifier: str | None, password: str | None) -> str:
+    """What the search agent is told about logging in, given the outcome of the scripted login."""
+    if login is not None and login.needs_human:
+        return f"The account could not be logged in ({login.detail}); search for the topic as a guest. "
+    if (login is None or not login.logged_in) and login_identifier and password:
+        return adapter.login_instructions(
+            login_identifier, password,
+            on_failure="If repeated login attempts fail, try to continue without logging in (search for the topic as a guest).",
+        )
+    return ""
+
+async def _agent_search(adapter: PlatformAdapter, browser, browser_context, topic: str, count: int, login_instructions: str, budget: AgentBudget | None = None) -> str:
+    """Searches with BrowserUseAgent in an open browser context; returns delimited post texts or a status message."""
     # This prompt needs to be carefully crafted and tested.
     # It should guide BrowserUseAgent to:
     # 1. Navigate to the platform_url.
@@ -20,66 +125,43 @@ async def _get_social_media_posts_async(topic: str, platform_url: str, count: in
     # 4. Identify 'count' number of posts (e.g., top, recent).
     # 5. Extract the main text content of each post.
     # 6. Return the texts, ideally in a structured way or clearly delimited.
-    
-    login_instructions = ""
-    if login_identifier and password and "x.com" in platform_url: # Specific instructions for X.com
-        login_instructions = (
-            f"If you encounter a login page, try to log in using the identifier '{login_identifier}' and password '{password}'. "
-            f"For X.com login, follow these exact steps: "
-            f"1. Click the 'ログイン' button on the homepage if present. "
-            f"2. On the login form, type '{login_identifier}' in the username/email field. "
-            f"3. Click '次へ' (Next) button. "
-            f"4. On the password screen, type '{password}' carefully. "
-            f"5. Click 'ログイン' button or press Enter to submit. "
-            f"6. If login fails the first time, try again following the same steps. "
-            f"7. If repeated login attempts fail, try to continue without logging in (search for the topic as a guest). "
-            f"8. If the site requests a 2-Factor Authentication (2FA) code, you won't be able to proceed - report this as an error. "
-        )
-
-    task_prompt = (
-        f"Go to {platform_url}. {login_instructions}"
-        f"In the search bar, search for content related to the topic: '{topic}'. "
-        f"If you cannot find a search bar directly, try to navigate to a state where searching is possible. "
-        f"Identify approximately {count} distinct posts from the search results. "
-        f"For each of these posts, extract its main textual content. "
-        f"Return all extracted post texts as a single string, with each post separated by '---NEXT_POST_DELIMITER---'."
-    )
-    
-    agent = None  # Define outside try block to access in finally
-    
-    try:
+    task_prompt = adapter.search_task(topic, count, login_instructions, POST_DELIMITER)
+    async def run_search(model_id: str):
         agent = BrowserUseAgent(
             task=task_prompt,
-            llm=browser_use_llm,
-            # Might need to adjust viewport, wait times, or other BrowserUseAgent params
+            llm=browser_llm(model_id),
+            browser=browser,
+            browser_context=browser_context,
+            use_vision=uses_vision("search"),
         )
-        bua_result_history = await agent.run()
-        
-        # Process bua_result_history to get the desired string
-        # final_result() should give the text BrowserUseAgent was instructed to return.
-        extracted_posts_str = bua_result_history.final_result() if hasattr(bua_result_history, 'final_result') else str(bua_result_history)
-        
-        if "---NEXT_POST_DELIMITER---" not in extracted_posts_str and extracted_posts_str:
-             # If delimiter is missing but we have content, it might be a single post or an error message from BUA.
-             # For now, we'll assume it's a valid (single) extraction if it's not an obvious error pattern.
-             # More robust error handling or specific BUA error parsing can be added.
-             print(f"Warning: Delimiter '---NEXT_POST_DELIMITER---' not found in BrowserUseAgent output for topic '{topic}'. Output: {extracted_posts_str[:200]}...") # Log a snippet
-        
-        return extracted_posts_str if extracted_posts_str else f"No posts found or extracted for topic: {topic} on {platform_url}"
+        return await run_browser_agent(agent, budget or DEFAULT_AGENT_BUDGET)
+
+    outcome = await MODEL_ROUTER.arun(BROWSER_NAVIGATION, run_search, outcome_failure_signal)
+    if not outcome.completed:
+        return outcome.to_tool_message(f"searching '{topic}' on {adapter.base_url}")
+
+    # final_result() should give the text BrowserUseAgent was instructed to return.
+    extracted_posts_str = outcome.final_result
 
+    if "---NEXT_POST_DELIMITER---" not in extracted_posts_str and extracted_posts_str:
+         # If delimiter is missing but we have content, it might be a single post or an error message from BUA.
+         # For now, we'll assume it's a valid (single) extraction if it's not an obvious error pattern.
+         # More robust error handling or specific BUA error parsing can be added.
+         print(f"Warning: Delimiter '---NEXT_POST_DELIMITER---' not found in BrowserUseAgent output for topic '{topic}'. Output: {extracted_posts_str[:200]}...") # Log a snippet
+
+    return extracted_posts_str if extracted_posts_str else f"No posts found or extracted for topic: {topic} on {adapter.base_url}"
+
+async def _scripted_search(adapter: PlatformAdapter, page, topic: str, count: int) -> List[str]:
+    """Post texts from the adapter's scripted search on `page`; empty when unsupported or when it failed."""
+    try:
+        posts = await adapter.scrape_search(page, topic, count)
     except Exception as e:
-        return f"Error searching social media for '{topic}' on '{platform_url}': {str(e)}"
-    finally:
-        # Attempt to explicitly clean up browser resources
-        if agent and hasattr(agent, 'controller') and agent.controller:
-            try:
-                await agent.controller.close_all()
-                print(f"Successfully closed browser resources for search operation on {platform_url}")
-            except Exception as cleanup_error:
-                print(f"Warning: Error during browser cleanup after search: {cleanup_error}")
+        print(f"Scripted search on {adapter.name} failed, falling back to the browser agent: {e}")
+        return []
+    return [post.strip() for post in posts or [] if post.strip()]
 
 @tool(show_result=True)
-def get_social_media_posts_for_topic(topic: str, platform: str = "Twitter", count: int = 3) -> str:
+def get_social_media_posts_for_topic(topic: str, platform: str = "Twitter", count: int = 3, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None) -> str:
     """
     Searches a social media platform for posts related to a given topic and extracts their text.
 
@@ -88,102 +170,483 @@ def get_social_media_posts_for_topic(topic: str, platform: str = "Twitter", coun
         platform (str): The social media platform to search (default: "Twitter"). 
                         Currently, only "Twitter" (which navigates to x.com) is explicitly handled.
         count (int): The approximate number of recent posts to try and retrieve.
+        max_steps (int, optional): Maximum browser agent steps (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline for the browser agent (default from config).
+        max_input_tokens (int, optional): LLM input token budget for the browser agent (default from config).
 
     Returns:
         str: A string containing the text of the found posts, separated by 
-             '---NEXT_POST_DELIMITER---', or an error/status message.
+             '---NEXT_POST_DELIMITER---', or an error/status message. Runs stopped early
+             return a message starting with "Budget exhausted" or "Cancelled".
     """
-    platform_url_map = {
-        "Twitter": "https://x.com"
-        # Add other platforms here if needed, e.g., "Reddit": "https://www.reddit.com"
-    }
-    
-    actual_platform_url = platform_url_map.get(platform)
+    adapter = get_platform(platform)
     
-    if not actual_platform_url:
-        return f"Error: Platform '{platform}' is not supported. Supported platforms: {list(platform_url_map.keys())}"
+    if adapter is None:
+        return f"Error: Platform '{platform}' is not supported. Supported platforms: {platform_names()}"
         
-    print(f"Tool 'get_social_media_posts_for_topic' called with: topic='{topic}', platform='{platform}', count={count}, url='{actual_platform_url}'")
+    print(f"Tool 'get_social_media_posts_for_topic' called with: topic='{topic}', platform='{platform}', count={count}, url='{adapter.base_url}'")
     
     # Ensure OPENAI_API_KEY is available (could also be checked at app startup)
     if not OPENAI_API_KEY:
         return "Error: OPENAI_API_KEY not found for browser_use_llm."
 
-    return asyncio.run(_get_social_media_posts_async(topic, actual_platform_url, count, X_LOGIN_IDENTIFIER, X_PASSWORD))
+    # Answer from the local corpus first; only the shortfall is scraped live
+    source = adapter.source
+    local_posts = _local_posts(topic, source, count)
+    if len(local_posts) >= count:
+        print(f"Answered '{topic}' from the local corpus ({len(local_posts)} fresh posts, no browser).")
+        return POST_DELIMITER.join(_ranked_posts(topic, local_posts, count))
 
-async def _post_to_social_media_async(content: str, platform_url: str, login_identifier: str | None, password: str | None) -> str:
-    """(Async) Uses BrowserUseAgent to post content to a social media platform."""
-    
-    login_instructions = ""
-    if login_identifier and password and "x.com" in platform_url: # Specific instructions for X.com
-        login_instructions = (
-            f"If you encounter a login page, try to log in using the identifier '{login_identifier}' and password '{password}'. "
-            f"For X.com login, follow these exact steps: "
-            f"1. Click the 'ログイン' button on the homepage if present. "
-            f"2. On the login form, type '{login_identifier}' in the username/email field. "
-            f"3. Click '次へ' (Next) button. "
-            f"4. On the password screen, type '{password}' carefully. "
-            f"5. Search for the login button element after typing the password. "
-            f"6. Click the login button or press Enter to submit. "
-            f"* The login button may be disabled initially but will become enabled after typing the password. Need to find the button after it becomes enabled. "
-            f"7. If login fails the first time, try again following the same steps. "
-            f"8. If repeated login attempts fail, you won't be able to proceed - report this as an error. "
-            f"8. If the site requests a 2-Factor Authentication (2FA) code, you won't be able to proceed - report this as an error. "
-        )
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    live_result = asyncio.run(call_with_retries(
+        SEARCH,
+        lambda: _get_social_media_posts_async(topic, adapter.base_url, count - len(local_posts), X_LOGIN_IDENTIFIER, X_PASSWORD, budget=budget, adapter=adapter),
+        activity=f"Searching '{topic}' on {adapter.name}",
+        breaker=CIRCUIT_BREAKERS.platform(source, SEARCH),
+    ))
+    return _combined_posts(topic, source, count, local_posts, live_result)
 
-    post_content_with_tag = f"[AutoPostingTest] {content}"
-
-    task_prompt = (
-        f"Go to {platform_url}. {login_instructions} "
-        f"Once logged in (or if already logged in), find the interface to create a new post (e.g., a 'Post', 'Tweet', or '+' button). "
-        f"In the main content area for the new post, enter the following text exactly: '{post_content_with_tag}'. "
-        f"Then, wait for 2 seconds to ensure the post button becomes enabled after text entry. "
-        f"To click the post button, use this exact approach in order: "
-        f"1. Try to click the button with data-testid=\"tweetButtonInline\" which contains the text 'ポストする' or 'Post'. "
-        f"2. If that doesn't work, try clicking by CSS selector 'button[data-testid=\"tweetButtonInline\"]'. "
-        f"3. If that doesn't work, try to find a blue-colored button that says '投稿する', 'ポストする', or contains role='button'. "
-        f"4. If the button still appears disabled, try explicitly sending keyboard shortcut Ctrl+Enter (or Command+Enter on Mac). "
-        f"5. Finally, try clicking any button-like element that appears enabled after text entry with a blue background. "
-        f"Be aware that the post button is initially disabled (has attributes aria-disabled='true' and disabled='') but becomes enabled after text is entered. "
-        f"After clicking the post button, wait a few seconds for the page to update. Look for a success notification (e.g., 'Your post was sent', 'Tweet sent'). "
-        f"Posting might fail if the text is too long or if the post button is not found. Check if there are any notification or error message. "
-        f"Try posting again if you still see the posting modal or posting page unchanged. "
-        f"To confirm the post and get its URL: "
-        f"1. If a success message with a 'View post' link appears, click it and get the current URL. "
-        f"2. If not, try to navigate to your profile page (usually by clicking a 'Profile' link or your avatar/icon). "
-        f"3. On your profile page, identify the most recent post you just submitted. "
-        f"4. Extract the direct URL of this most recent post. This might involve clicking on the post's timestamp to go to its individual page, or finding a 'share' or 'copy link' option associated with it. "
-        f"If you successfully retrieve the post URL, return 'Successfully posted. URL: [retrieved URL]'. "
-        f"If you believe the post was successful but cannot retrieve the URL, return 'Posted successfully but could not retrieve URL'. "
-        f"If posting fails, describe the reason (e.g., 'Failed to post: Could not find post button', 'Failed to post: Error message encountered: [error message]')."
-    )
-    
-    agent = None  # Define outside try block to access in finally
+def _combined_posts(topic: str, source: str, count: int, local_posts: List[str], live_result: str) -> str:
+    """Stores the posts of a live search and ranks them with the local ones; a failed search falls back to the local posts."""
+    live_posts = _store_live_posts(topic, source, live_result)
+    if not live_posts:
+        if local_posts and not live_result.startswith(CANCELLED_PREFIX):
+            print(f"Live search for '{topic}' returned no posts ({live_result[:100]}); using {len(local_posts)} posts from the local corpus.")
+            return POST_DELIMITER.join(_ranked_posts(topic, local_posts, count))
+        return live_result
+    if local_posts:
+        print(f"Combined {len(local_posts)} posts from the local corpus with {len(live_posts)} scraped live for '{topic}'.")
+    return POST_DELIMITER.join(_ranked_posts(topic, local_posts + live_posts, count))
+
+def _ranked_posts(topic: str, posts: List[str], count: int) -> List[str]:
+    """Most relevant posts first, dropping near-duplicates and off-topic ones, within the research token budget."""
+    return select_passages(topic, drop_near_duplicates(posts, NEAR_DUPLICATE_THRESHOLD), top_k=count, token_budget=RESEARCH_TOKEN_BUDGET)
+
+def _local_posts(topic: str, source: str, count: int) -> List[str]:
+    """Fresh posts about `topic` already in the local corpus, best matches first."""
+    if not CORPUS_ENABLED:
+        return []
+    try:
+        items = get_corpus().search(topic, limit=count, max_age_seconds=CORPUS_FRESHNESS_SECONDS, kind=CorpusItem.POST, source=source)
+    except Exception as e:
+        print(f"Warning: Local corpus lookup failed, scraping live instead: {e}")
+        return []
+    return [item.text for item in items]
+
+def found_posts(result: str) -> bool:
+    """True if a search result holds posts rather than an error or status message."""
+    return bool(result) and not result.startswith(("Error", "No posts found", BUDGET_EXHAUSTED_PREFIX, CANCELLED_PREFIX))
+
+def _store_live_posts(topic: str, source: str, result: str) -> List[str]:
+    """Splits a live search result into posts and adds them to the local corpus. Status messages yield no posts."""
+    if not found_posts(result):
+        return []
+    posts = [post.strip() for post in result.split(POST_DELIMITER) if post.strip()]
+    if CORPUS_ENABLED and posts:
+        try:
+            get_corpus().add_many(CorpusItem(content_id(source, post), CorpusItem.POST, source, post, topic=topic) for post in posts)
+        except Exception as e:
+            print(f"Warning: Could not store scraped posts in the local corpus: {e}")
+    return posts
+
+async def _post_to_social_media_async(content: str, platform_url: str, login_identifier: str | None, password: str | None, budget: AgentBudget | None = None, username: str | None = None, browser=None, context_config=None, owner: str | None = None, adapter: PlatformAdapter | None = None, media: List[PreparedMedia] | None = None, warm=None) -> str:
+    """
+    (Async) Uses BrowserUseAgent to post content to a social media platform.
+
+    The new post's URL is read from the platform's create-post network response when
+    the adapter supports it (see `CreatedPostCapture`); the agent only browses to the
+    profile for it when that response was not seen.
+
+    `username`, `browser`, `context_config` and `owner` let the multi-account poster run
+    each account in its own context (with its own saved session) inside a shared browser.
+
+    `media` is attached through the editor's file input with Playwright before the agent
+    runs, so the agent never drives a file picker. Recorded posting scripts are neither
+    replayed nor recorded for posts with media.
+
+    `warm` is a `WarmPostingSession` opened before the post was approved; when it is
+    still unused, its logged-in browser (and open editor) is used instead of a new one.
+    """
     
+    adapter = adapter or platform_for_url(platform_url)
+    post_content_with_tag = f"{POSTING_PREFIX}{content}"
+
+    # Text typed during posting; recorded scripts refer to these by slot name only
+    slots = {"content": post_content_with_tag}
+    if login_identifier and password:
+        slots.update(login_identifier=login_identifier, password=password)
+    script_name = _posting_script_name(adapter)
+    script = ACTION_SCRIPTS.load(script_name) if ACTION_REPLAY_ENABLED and not media else None
+    capture = adapter.post_capture()
+    may_have_posted = False
+    warm = warm if warm is not None and warm.claim() else None
+    if warm is not None:
+        session = warm.borrowed()
+    else:
+        session = managed_browser(owner=owner or f"post:{platform_url}", context_config=context_config, browser=browser, lean=lean_profile("post"))
+
     try:
-        agent = BrowserUseAgent(
-            task=task_prompt,
-            llm=browser_use_llm,
-        )
-        bua_result_history = await agent.run()
-        
-        post_result_str = bua_result_history.final_result() if hasattr(bua_result_history, 'final_result') else str(bua_result_history)
-        
-        return post_result_str if post_result_str else f"No specific confirmation received after attempting to post to {platform_url}."
+        async with session as (browser, browser_context):
+            if capture is not None:
+                capture.attach((await browser_context.get_session()).context)
+            try:
+                if warm is not None:
+                    login = warm.login
+                    print(f"Posting with the warm {adapter.name} session.")
+                else:
+                    login = await _scripted_login(adapter, browser_context, login_identifier, password, username=username)
+                if login is not None and login.needs_human:
+                    return ErrorResult(f"Failed to post: login to {platform_url} requires manual action ({login.status}: {login.detail})", ErrorResult.REJECTED)
+                login_instructions = ""
+                if (login is None or not login.logged_in) and login_identifier and password:
+                    login_instructions = adapter.login_instructions(
+                        login_identifier, password,
+                        on_failure="If repeated login attempts fail, you won't be able to proceed - report this as an error.",
+                    )
+
+                if media:
+                    try:
+                        attached = await adapter.attach_media(await browser_context.get_current_page(), [item.path for item in media], MEDIA_UPLOAD_TIMEOUT_SECONDS)
+                    except Exception as e:
+                        # Nothing was submitted yet
+                        return ErrorResult(f"Failed to post: could not attach media on {platform_url}: {e}", ErrorResult.TRANSIENT)
+                    if not attached:
+                        return ErrorResult(f"Failed to post: attaching media is not supported on {platform_url}.", ErrorResult.REJECTED)
+                    print(f"Attached {len(media)} media file(s) to the post editor.")
+
+                # From here on, a failure may come after the post was submitted
+                may_have_posted = True
+                if script is not None:
+                    replay = await replay_action_script(await browser_context.get_current_page(), script, slots)
+                    if (replay.succeeded or replay.committed) and capture is not None:
+                        url = await capture.wait(POST_CAPTURE_TIMEOUT_SECONDS)
+                        if url:
+                            print(f"Replayed posting script '{script_name}' in {replay.duration_seconds:.2f}s ({replay.steps_run} steps, no LLM); post captured at {url}")
+                            return f"Successfully posted. URL: {url}"
+                    if replay.succeeded:
+                        print(f"Replayed posting script '{script_name}' in {replay.duration_seconds:.2f}s ({replay.steps_run} steps, no LLM)")
+                        return "Posted successfully but could not retrieve URL"
+                    if replay.committed:
+                        # Re-running the agent now could post the same content twice
+                        return ErrorResult(f"Failed to confirm post after replaying recorded actions: {replay.error} (the post may or may not have been submitted)", ErrorResult.UNKNOWN_OUTCOME)
+                    print(f"Posting script '{script_name}' missed at step {replay.steps_run + 1} ({replay.error}). Falling back to the browser agent.")
+
+                def captured() -> bool:
+                    return capture is not None and capture.post_id is not None
+
+                async def run_posting(model_id: str):
+                    agent = BrowserUseAgent(
+                        task=adapter.post_task(post_content_with_tag, login_instructions, attached_media=len(media or []), editor_open=warm is not None and warm.editor_open),
+                        llm=browser_llm(model_id),
+                        browser=browser,
+                        browser_context=browser_context,
+                        use_vision=uses_vision("post"),
+                    )
+                    # The captured create-post response is the confirmation; no need to let the agent look for it
+                    return await run_browser_agent(agent, budget or DEFAULT_AGENT_BUDGET, stop_when=captured)
 
+                # Never escalate to a stronger model once the platform has created the post
+                outcome = await MODEL_ROUTER.arun(POSTING, run_posting, lambda outcome: None if captured() else _posting_failure_signal(outcome))
+                post_result_str = outcome.final_result if outcome.completed else None
+                reported_posted = bool(post_result_str and ("Successfully posted" in post_result_str or "Posted successfully" in post_result_str))
+                if capture is not None and reported_posted and not captured():
+                    await capture.wait(POST_CAPTURE_TIMEOUT_SECONDS)  # The response may still be in flight
+                if captured():
+                    print(f"Post captured from the create-post response: {capture.url}")
+                    if not media:
+                        _record_posting_script(adapter, script_name, outcome.history, slots)
+                    return f"Successfully posted. URL: {capture.url}"
+                if not outcome.completed:
+                    # The post may or may not have been submitted before the run was stopped
+                    return outcome.to_tool_message(f"posting to {platform_url} (the post may or may not have been submitted)")
+                if capture is not None and capture.error:
+                    print(f"Create-post response did not contain a post: {capture.error}")
+                if reported_posted:
+                    if not media:
+                        _record_posting_script(adapter, script_name, outcome.history, slots)
+                    url = await _find_latest_post_url(adapter, browser, browser_context, budget)
+                    return f"Successfully posted. URL: {url}" if url else "Posted successfully but could not retrieve URL"
+            finally:
+                if capture is not None:
+                    capture.detach()
+
+        if not post_result_str:
+            return ErrorResult(f"No specific confirmation received after attempting to post to {platform_url}.", ErrorResult.UNKNOWN_OUTCOME)
+        if post_result_str.startswith("Failed to post"):
+            return ErrorResult(post_result_str, ErrorResult.REJECTED)
+        return post_result_str
+
+    except Exception as e:
+        kind = ErrorResult.UNKNOWN_OUTCOME if may_have_posted else classify_exception(e)
+        return ErrorResult(f"Error attempting to post to '{platform_url}': {str(e)}", kind)
+
+async def _find_latest_post_url(adapter: PlatformAdapter, browser, browser_context, budget: AgentBudget | None = None) -> str | None:
+    """
+    Fallback when the create-post response was not captured: lets the agent open the
+    profile page and read the URL of the newest post.
+    """
+    async def run_lookup(model_id: str):
+        agent = BrowserUseAgent(task=adapter.profile_lookup_task(), llm=browser_llm(model_id), browser=browser, browser_context=browser_context, use_vision=uses_vision("profile_lookup"))
+        return await run_browser_agent(agent, budget or DEFAULT_AGENT_BUDGET)
+
+    try:
+        outcome = await MODEL_ROUTER.arun(BROWSER_NAVIGATION, run_lookup, outcome_failure_signal)
+    except Exception as e:
+        print(f"Warning: Could not look up the new post's URL on the profile page: {e}")
+        return None
+    match = adapter.post_url_pattern.search(outcome.final_result or "") if outcome.completed else None
+    return match.group(0) if match else None
+
+def _posting_failure_signal(outcome: AgentRunOutcome) -> str | None:
+    """
+    Escalates posting only when the agent reports that it could not post.
+
+    A stopped or unconfirmed run may already have submitted the post, so retrying
+    it with a stronger model could post the same content twice.
+    """
+    if outcome.completed and (outcome.final_result or "").startswith("Failed to post"):
+        return INVALID_OUTPUT
+    return None
+
+async def _scripted_login(adapter: PlatformAdapter, browser_context, login_identifier: str | None, password: str | None, username: str | None = None) -> LoginResult | None:
+    """
+    Logs in with the adapter's deterministic Playwright routine before any agent runs.
+
+    `username` is entered if X asks to confirm the account (default: `X_USERNAME`).
+
+    Returns:
+        LoginResult | None: None when no login applies (no scripted login or no credentials).
+    """
+    if not (login_identifier and password):
+        return None
+    page = await browser_context.get_current_page()
+    login = await adapter.login(page, login_identifier, password, username=username or X_USERNAME)
+    if login is None:
+        return None
+    print(f"Scripted {adapter.name} login: {login.status} in {login.duration_seconds:.2f}s {login.detail}".rstrip())
+    if not login.logged_in and not login.needs_human:
+        print("Falling back to LLM-driven login.")
+    return login
+
+def _posting_script_name(adapter: PlatformAdapter) -> str:
+    return f"post:{adapter.source}"
+
+def _record_posting_script(adapter: PlatformAdapter, script_name: str, history, slots: Dict[str, str]) -> None:
+    """Stores the agent's successful posting actions so the next post can be replayed without the LLM."""
+    if not ACTION_REPLAY_ENABLED or history is None:
+        return
+    try:
+        script = script_from_history(script_name, history, slots, end_at=adapter.is_post_commit_step, success_selector=adapter.post_success_selector)
+        if script is None:
+            print(f"Posting actions could not be turned into a replayable script; '{script_name}' not recorded.")
+            return
+        ACTION_SCRIPTS.save(script)
+        print(f"Recorded posting script '{script_name}' ({len(script.steps)} steps).")
     except Exception as e:
-        return f"Error attempting to post to '{platform_url}': {str(e)}"
+        print(f"Warning: Failed to record posting script '{script_name}': {e}")
+
+async def _publish(content: str, adapter: PlatformAdapter, login_identifier: str | None, password: str | None, backend: str = X_POSTING_BACKEND, api_credentials: XApiCredentials | None = None, api_client: XApiClient | None = None, budget: AgentBudget | None = None, media_paths: List[str] | None = None, idempotency_key: str | None = None, **browser_options) -> str:
+    """
+    Posts `content` through the selected backend, retrying without ever posting twice.
+
+    `Account.API` publishes with a single request to the platform's API. The post goes
+    through the browser agent instead when the API cannot be used (no API for the
+    platform, no app credentials, rejected authorization, rate limit, API unreachable),
+    but not when X may already have created it or rejected its content.
+
+    Failed attempts are retried under the `POST` retry policy and the platform's
+    circuit breaker, but only when the post certainly was not published: after an
+    attempt with an unknown outcome, the account's latest posts are checked first
+    (see `_find_existing_post`), and nothing is retried if they cannot be read.
+
+    With an `idempotency_key`, the outcome is kept in `POST_LEDGER`: posting again
+    under the same key returns the earlier post instead of publishing a second one.
+
+    Args:
+        backend (str): `Account.BROWSER` or `Account.API`.
+        api_credentials (XApiCredentials, optional): App and token file of the account.
+        api_client (XApiClient, optional): Shared client; a temporary one is used otherwise.
+        media_paths (List[str], optional): Images or a video to attach; they are brought
+            within the platform's limits first (see `MediaProcessor`).
+        idempotency_key (str, optional): Names this logical post across attempts, tool
+            calls and processes, e.g. "workflow:<run id>".
+        **browser_options: Passed to `_post_to_social_media_async` (browser, context_config, warm, ...).
+
+    Returns:
+        str: The posting result, in the same format for both backends.
+    """
+    media = []
+    if media_paths:
+        if adapter.media_limits is None:
+            return ErrorResult(f"Failed to post: {adapter.name} does not support media attachments.", ErrorResult.REJECTED)
+        try:
+            media = await MEDIA_PROCESSOR.prepare(media_paths, adapter.media_limits)
+        except (MediaError, ImportError) as e:
+            return ErrorResult(f"Failed to post: {e}", ErrorResult.REJECTED)
+
+    async def find_existing() -> tuple:
+        return await _find_existing_post(content, adapter, login_identifier, password, backend, api_credentials, api_client, **browser_options)
+
+    if idempotency_key:
+        record = POST_LEDGER.get(idempotency_key)
+        if record is not None and record["status"] == PostLedger.POSTED:
+            print(f"Post '{idempotency_key}' was already published; not posting again.")
+            return record.get("result") or _posted_result(record.get("url"))
+        if record is not None and record["status"] == PostLedger.PENDING:
+            # An earlier attempt under this key ended without a known outcome
+            checked, url = await find_existing()
+            if url:
+                result = _posted_result(url)
+                POST_LEDGER.mark_posted(idempotency_key, result, url)
+                return result
+            if not checked:
+                return ErrorResult(
+                    f"Failed to post: an earlier attempt ('{idempotency_key}') may have published this post and the profile could not be checked; check it before posting again.",
+                    ErrorResult.UNKNOWN_OUTCOME,
+                )
+        POST_LEDGER.mark_pending(idempotency_key, adapter.name, login_identifier)
+
+    breaker = CIRCUIT_BREAKERS.platform(adapter.source, POST)
+    policy = retry_policy(POST)
+    result = None
+    for number in range(1, policy.max_attempts + 1):
+        if not breaker.allow():
+            result = breaker.open_error(f"posting to {adapter.name}")
+            break
+        try:
+            result = await _publish_once(content, adapter, login_identifier, password, backend, api_credentials, api_client, budget, media, **browser_options)
+        except BaseException as e:
+            breaker.record_exception(e)
+            raise
+        breaker.record(result)
+        if error_kind(result) == ErrorResult.UNKNOWN_OUTCOME:
+            checked, url = await find_existing()
+            if url:
+                result = _posted_result(url)
+                break
+            if not checked:
+                break
+            # Confirmed not published, so another attempt cannot duplicate it
+            result = ErrorResult(str(result), ErrorResult.TRANSIENT)
+        if not (isinstance(result, ErrorResult) and result.retryable) or number == policy.max_attempts:
+            break
+        delay = policy.delay(number, result.retry_after)
+        print(f"Posting to {adapter.name} failed ({result.kind}); retry {number} of {policy.max_attempts - 1} in {delay:.1f}s.")
+        if not await wait_unless_cancelled(delay):
+            break
+
+    if idempotency_key:
+        if posted_successfully(result):
+            POST_LEDGER.mark_posted(idempotency_key, result, posted_url(result))
+        elif error_kind(result) not in (ErrorResult.UNKNOWN_OUTCOME, ErrorResult.BUDGET_EXHAUSTED, ErrorResult.CANCELLED):
+            POST_LEDGER.mark_failed(idempotency_key, result)
+        # Otherwise the key stays pending: the next attempt checks the profile first
+    return result
+
+async def _publish_once(content: str, adapter: PlatformAdapter, login_identifier: str | None, password: str | None, backend: str, api_credentials: XApiCredentials | None, api_client: XApiClient | None, budget: AgentBudget | None, media: List[PreparedMedia], **browser_options) -> str:
+    """One posting attempt through the selected backend (see `_publish`)."""
+    if backend == Account.API:
+        result = await _post_via_api(content, adapter, api_credentials, api_client, media=media)
+        if result is not None:
+            return result
+    return await _post_to_social_media_async(content, adapter.base_url, login_identifier, password, budget=budget, adapter=adapter, media=media, **browser_options)
+
+def _posted_result(url: str | None) -> str:
+    return f"Successfully posted. URL: {url}" if url else "Posted successfully, but the post URL could not be built."
+
+def _normalized_post_text(text: str) -> str:
+    """Post text as compared with what a platform displays: entities decoded, links (shortened by X) and whitespace ignored."""
+    text = re.sub(r"https?://\S+", "<link>", html.unescape(text or ""))
+    return " ".join(text.split()).casefold()
+
+async def _find_existing_post(content: str, adapter: PlatformAdapter, login_identifier: str | None, password: str | None, backend: str, api_credentials: XApiCredentials | None, api_client: XApiClient | None = None, username: str | None = None, browser=None, context_config=None, **_) -> tuple:
+    """
+    Looks for `content` among the account's latest posts.
+
+    Read through the API when the account posts through it, otherwise with the
+    adapter's scripted reader in a browser context logged in as the account.
+
+    Returns:
+        tuple: (checked, url). `checked` is False when the posts could not be read, so
+        whether the post exists is unknown; `url` is the existing post's URL, if found.
+    """
+    wanted = _normalized_post_text(f"{POSTING_PREFIX}{content}")
+    handle = username or (api_credentials.username if api_credentials else None) or (X_USERNAME if login_identifier == X_LOGIN_IDENTIFIER else None)
+
+    if backend == Account.API and adapter.api_base_url and api_credentials is not None:
+        owned_client = api_client is None
+        client = api_client or XApiClient(adapter.api_base_url)
+        try:
+            posts = await client.recent_posts(api_credentials, max_results=_RECENT_POSTS_CHECKED)
+            match = next((post for post in posts if _normalized_post_text(post["text"]) == wanted), None)
+            print(f"Checked {len(posts)} recent {adapter.name} posts through the API: the post {'exists' if match else 'was not published'}.")
+            return True, (adapter.post_url(match["id"], handle) or adapter.base_url) if match else None
+        except Exception as e:
+            print(f"Warning: Could not read recent {adapter.name} posts through the API ({e}); checking in the browser.")
+        finally:
+            if owned_client:
+                await client.aclose()
+
+    if not handle:
+        print(f"Warning: No username to check recent {adapter.name} posts with; the post's outcome stays unknown.")
+        return False, None
+    try:
+        async with managed_browser(owner=f"post-check:{adapter.base_url}", context_config=context_config, browser=browser, lean=lean_profile("search")) as (_browser, browser_context):
+            await _scripted_login(adapter, browser_context, login_identifier, password, username=username)
+            page = await browser_context.get_current_page()
+            posts = await adapter.own_posts(page, handle, _RECENT_POSTS_CHECKED)
+    except Exception as e:
+        print(f"Warning: Could not read recent {adapter.name} posts of @{handle}: {e}")
+        return False, None
+    if posts is None:
+        return False, None
+    match = next((post for post in posts if _normalized_post_text(post["text"]) == wanted), None)
+    print(f"Checked {len(posts)} recent {adapter.name} posts of @{handle}: the post {'exists' if match else 'was not published'}.")
+    return True, (match.get("url") or adapter.base_url) if match else None
+
+async def _post_via_api(content: str, adapter: PlatformAdapter, credentials: XApiCredentials | None, client: XApiClient | None = None, media: List[PreparedMedia] | None = None) -> str | None:
+    """Posting result of the API backend, or None if the post should go through the browser."""
+    if adapter.api_base_url is None or credentials is None:
+        print(f"API posting to {adapter.name} is not configured (X_API_CLIENT_ID); posting through the browser.")
+        return None
+    owned_client = client is None
+    client = client or XApiClient(adapter.api_base_url)
+    try:
+        try:
+            media_ids = [await client.upload_media(credentials, item) for item in media or []]
+        except XApiError as e:
+            if e.fallback_safe or e.may_have_posted:
+                # Nothing was posted yet; at worst an unused upload is left behind
+                print(f"API media upload to {adapter.name} failed ({e}); posting through the browser.")
+                return None
+            return ErrorResult(f"Failed to post: {e}", ErrorResult.REJECTED)
+        try:
+            post_id = await client.create_post(credentials, f"{POSTING_PREFIX}{content}", media_ids=media_ids)
+        except XApiError as e:
+            if e.fallback_safe:
+                print(f"API posting to {adapter.name} unavailable ({e}); posting through the browser.")
+                return None
+            if e.may_have_posted:
+                return ErrorResult(f"Failed to post: {e}. The post may or may not have been published; check the profile before retrying.", ErrorResult.UNKNOWN_OUTCOME)
+            return ErrorResult(f"Failed to post: {e}", ErrorResult.REJECTED)
     finally:
-        # Attempt to explicitly clean up browser resources
-        if agent and hasattr(agent, 'controller') and agent.controller:
-            try:
-                await agent.controller.close_all()
-                print(f"Successfully closed browser resources for posting operation on {platform_url}")
-            except Exception as cleanup_error:
-                print(f"Warning: Error during browser cleanup after posting: {cleanup_error}")
+        if owned_client:
+            await client.aclose()
+    url = adapter.post_url(post_id, credentials.username)
+    print(f"Posted to {adapter.name} through the API (post {post_id}).")
+    return _posted_result(url)
+
+def posted_successfully(result: str) -> bool:
+    """True if a posting result reports a published post (with or without its URL)."""
+    return result.startswith(("Successfully posted", "Posted successfully"))
+
+def posted_url(result: str) -> str | None:
+    """URL of the new post in a posting result, if it was retrieved."""
+    match = _RESULT_URL.search(result)
+    return match.group(1) if match else None
 
 @tool(show_result=True)
-def post_to_social_media(content: str, platform: str = "Twitter", login_identifier_override: str | None = None, password_override: str | None = None) -> str:
+def post_to_social_media(content: str, platform: str = "Twitter", login_identifier_override: str | None = None, password_override: str | None = None, max_steps: int | None = None, timeout_seconds: float | None = None, max_input_tokens: int | None = None, media_paths: List[str] | None = None, idempotency_key: str | None = None) -> str:
     """
     Posts the given content to a specified social media platform.
     Prepends "[AutoPostingTest]" to the content before posting.
@@ -194,37 +657,39 @@ def post_to_social_media(content: str, platform: str = "Twitter", login_identifi
                         Currently, only "Twitter" (which navigates to x.com) is explicitly handled.
         login_identifier_override (str, optional): Override the login identifier from config.
         password_override (str, optional): Override the password from config.
+        max_steps (int, optional): Maximum browser agent steps (default from config).
+        timeout_seconds (float, optional): Wall-clock deadline for the browser agent (default from config).
+        max_input_tokens (int, optional): LLM input token budget for the browser agent (default from config).
+        media_paths (List[str], optional): Local image files (up to 4) or one GIF or video to attach.
+        idempotency_key (str, optional): Any string naming this post; calling again with the same key
+                        returns the earlier post instead of publishing it twice.
 
     Returns:
         str: A message indicating the outcome of the posting attempt (e.g., success with URL, or an error).
+             Runs stopped early return a message starting with "Budget exhausted" or "Cancelled".
     """
-    platform_url_map = {
-        "Twitter": "https://x.com"
-        # Add other platforms here if needed
-    }
-    
-    actual_platform_url = platform_url_map.get(platform)
+    adapter = get_platform(platform)
     
-    if not actual_platform_url:
-        return f"Error: Platform '{platform}' is not supported for posting. Supported platforms: {list(platform_url_map.keys())}"
+    if adapter is None:
+        return f"Error: Platform '{platform}' is not supported for posting. Supported platforms: {platform_names()}"
         
-    print(f"Tool 'post_to_social_media' called for platform: '{platform}', url: '{actual_platform_url}'")
+    print(f"Tool 'post_to_social_media' called for platform: '{platform}', url: '{adapter.base_url}'")
     
     if not OPENAI_API_KEY:
         return "Error: OPENAI_API_KEY not found for browser_use_llm."
     
-    # Check character limits for Twitter
-    if platform.lower() in ["twitter", "x", "x.com"]:
-        # Account for the "[AutoPostingTest] " prefix (17 chars) that will be added
-        effective_length = len(content) + 17
-        if effective_length >= 280:
-            return f"Error: Content exceeds Twitter's 280 character limit. Current length with prefix: {effective_length} characters. Please shorten your content to less than {280-17} characters."
+    length_error = adapter.length_error(content, prefix=POSTING_PREFIX)
+    if length_error:
+        return length_error
 
     # Use overrides if provided, otherwise use resolved values from config
     current_login_identifier = login_identifier_override if login_identifier_override is not None else X_LOGIN_IDENTIFIER
     current_password = password_override if password_override is not None else X_PASSWORD
+    # The API tokens belong to the configured account, so an override always posts through the browser
+    backend = Account.BROWSER if login_identifier_override is not None else X_POSTING_BACKEND
     
-    return asyncio.run(_post_to_social_media_async(content, actual_platform_url, current_login_identifier, current_password))
+    budget = DEFAULT_AGENT_BUDGET.with_overrides(max_steps, timeout_seconds, max_input_tokens)
+    return asyncio.run(_publish(content, adapter, current_login_identifier, current_password, backend=backend, api_credentials=default_api_credentials(), budget=budget, media_paths=media_paths, idempotency_key=idempotency_key))
 
 if __name__ == '__main__':
     # Example for direct testing
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, TextIO, Tuple
+
+from browser_use.browser.context import BrowserContextConfig
+
+from auto_sns_agent.config import (
+    ACTION_REPLAY_ENABLED,
+    AUTO_SNS_DATA_DIR,
+    WARM_POSTING_TIMEOUT_SECONDS,
+    X_LOGIN_IDENTIFIER,
+    X_PASSWORD,
+)
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.storage.accounts import Account
+from auto_sns_agent.tools.agent_runner import DEFAULT_AGENT_BUDGET
+from auto_sns_agent.tools.browser_resources import managed_browser
+from auto_sns_agent.tools.lean_browser import lean_profile
+from auto_sns_agent.tools.social_media_tools import (
+    ACTION_SCRIPTS,
+    POSTING_PREFIX,
+    _posting_script_name,
+    _publish,
+    _scripted_login,
+)
+from auto_sns_agent.tools.x_api import default_api_credentials
+
+# Time the post editor gets to show its text box while the session warms up
+EDITOR_OPEN_TIMEOUT_SECONDS = 20
+
+
+class WarmPostingSession:
+    """
+    A posting browser that is launched and logged in before the post is known.
+
+    `open` restores the platform session from `session_file` (refreshing it with the
+    scripted login when it expired) and opens the post editor, unless a recorded
+    posting script will drive the post: recorded scripts start from the page the
+    login leaves. The session is lent to a single posting attempt (`claim`); retries
+    launch a browser of their own.
+    """
+
+    def __init__(self, adapter: PlatformAdapter, login_identifier: str | None, password: str | None, username: str | None = None, session_file: str | None = None):
+        self.adapter = adapter
+        self.login_identifier = login_identifier
+        self.password = password
+        self.username = username
+        self.session_file = session_file
+        self.login = None  # LoginResult of the scripted login, None when none applied
+        self.editor_open = False
+        self.ready_seconds: float | None = None  # Time the warm-up took
+        self._stack: AsyncExitStack | None = None
+        self._browser = None
+        self._context = None
+        self._claimed = False
+
+    async def open(self) -> None:
+        """Launches the browser, logs in and opens the post editor; the browser stays open until `close`."""
+        start = time.monotonic()
+        context_config = None
+        if self.session_file:
+            os.makedirs(os.path.dirname(self.session_file) or ".", exist_ok=True)
+            context_config = BrowserContextConfig(cookies_file=self.session_file)
+        stack = AsyncExitStack()
+        try:
+            self._browser, self._context = await stack.enter_async_context(
+                managed_browser(owner=f"warm-post:{self.adapter.base_url}", context_config=context_config, lean=lean_profile("post"))
+            )
+            self.login = await _scripted_login(self.adapter, self._context, self.login_identifier, self.password, username=self.username)
+            if self.login is not None and self.login.logged_in and not self._replays_script():
+                try:
+                    self.editor_open = await self.adapter.open_editor(await self._context.get_current_page(), EDITOR_OPEN_TIMEOUT_SECONDS)
+                except Exception as e:
+                    print(f"Warning: Could not open the {self.adapter.name} post editor ahead of time: {e}")
+        except BaseException:
+            await stack.aclose()
+            raise
+        self._stack = stack
+        self.ready_seconds = time.monotonic() - start
+        login_status = self.login.status if self.login is not None else "no scripted login"
+        print(f"Warm posting session for {self.adapter.name} ready in {self.ready_seconds:.1f}s (login: {login_status}, editor open: {self.editor_open}).")
+
+    def claim(self) -> bool:
+        """Hands the session to one posting attempt; False if it is not open or already used."""
+        if self._stack is None or self._claimed:
+            return False
+        self._claimed = True
+        return True
+
+    @asynccontextmanager
+    async def borrowed(self) -> AsyncIterator[Tuple[object, object]]:
+        """Yields the warm browser and context like `managed_browser`, without closing them."""
+        yield self._browser, self._context
+
+    async def close(self) -> None:
+        """Closes the browser (saving the session to `session_file`)."""
+        stack, self._stack = self._stack, None
+        if stack is not None:
+            await stack.aclose()
+
+    def _replays_script(self) -> bool:
+        return ACTION_REPLAY_ENABLED and ACTION_SCRIPTS.load(_posting_script_name(self.adapter)) is not None
+
+
+async def post_when_confirmed(
+    adapter: PlatformAdapter,
+    login_identifier: str | None = X_LOGIN_IDENTIFIER,
+    password: str | None = X_PASSWORD,
+    idempotency_key: str | None = None,
+    timeout_seconds: float = WARM_POSTING_TIMEOUT_SECONDS,
+    stream: TextIO | None = None,
+    session_file: str | None = None,
+) -> str | None:
+    """
+    Warms up a posting session, then posts the draft once it is approved.
+
+    The approved draft arrives as one JSON line, `{"content": "..."}`, on `stream`.
+    The session warms up while that line is awaited; an approval that arrives first
+    waits for the warm-up to finish rather than starting over. The post goes through
+    the browser backend.
+
+    Args:
+        adapter (PlatformAdapter): Platform to post to.
+        idempotency_key (str, optional): See `_publish`.
+        timeout_seconds (float): How long the draft is awaited before the browser is released.
+        stream (TextIO, optional): Where the draft arrives (default: stdin).
+        session_file (str, optional): Saved platform session (default: `AUTO_SNS_DATA_DIR/sessions/warm-<host>.json`).
+
+    Returns:
+        str | None: The posting result, or None when the session was released without a
+        draft (end of `stream`, an empty line, or `timeout_seconds` passed).
+    """
+    stream = stream or sys.stdin
+    session = WarmPostingSession(
+        adapter, login_identifier, password,
+        session_file=session_file or os.path.join(AUTO_SNS_DATA_DIR, "sessions", f"warm-{adapter.source}.json"),
+    )
+    warm_up = asyncio.create_task(session.open())
+    try:
+        line = await asyncio.wait_for(_read_line(stream), timeout_seconds)
+        draft = json.loads(line) if line.strip() else {}
+        content = draft.get("content")
+        if not content:
+            print("No draft received; releasing the warm posting session.")
+            return None
+        confirmed_at = time.monotonic()
+        try:
+            await warm_up
+        except Exception as e:
+            print(f"Warning: Warm-up failed, posting with a new browser: {e}")
+        length_error = adapter.length_error(content, prefix=POSTING_PREFIX)
+        if length_error:
+            return length_error
+        result = await _publish(
+            content, adapter, login_identifier, password, backend=Account.BROWSER,
+            api_credentials=default_api_credentials(), budget=DEFAULT_AGENT_BUDGET,
+            idempotency_key=idempotency_key, warm=session,
+        )
+        print(f"Posted {time.monotonic() - confirmed_at:.1f}s after the draft was approved.")
+        return result
+    except asyncio.TimeoutError:
+        print(f"No draft received within {timeout_seconds:.0f}s; releasing the warm posting session.")
+        return None
+    finally:
+        if not warm_up.done():
+            warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await session.close()
+
+
+async def _read_line(stream: TextIO) -> str:
+    """Reads one line of `stream` in a daemon thread, so a timeout never waits on a blocked read."""
+    loop = asyncio.get_running_loop()
+    line = loop.create_future()
+
+    def read() -> None:
+        try:
+            text = stream.readline()
+        except (OSError, ValueError):
+            text = ""
+        try:
+            loop.call_soon_threadsafe(lambda: line.done() or line.set_result(text))
+        except RuntimeError:
+            pass  # The loop already finished after a timeout
+
+    threading.Thread(target=read, daemon=True).start()
+    return await line
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List
+
+import httpx
+
+from auto_sns_agent.config import (
+    AUTO_SNS_DATA_DIR,
+    MEDIA_UPLOAD_CHUNK_BYTES,
+    MEDIA_UPLOAD_TIMEOUT_SECONDS,
+    X_API_BASE_URL,
+    X_API_CLIENT_ID,
+    X_API_CLIENT_SECRET,
+    X_API_MAX_RATE_LIMIT_WAIT_SECONDS,
+    X_API_REFRESH_TOKEN,
+    X_API_TIMEOUT_SECONDS,
+    X_USERNAME,
+)
+from auto_sns_agent.tools.media import PreparedMedia, iter_chunks
+
+# Seconds before expiry at which an access token is refreshed instead of used
+_REFRESH_MARGIN_SECONDS = 60
+# media_category of each attachment kind in a media upload
+_MEDIA_CATEGORIES = {PreparedMedia.IMAGE: "tweet_image", PreparedMedia.GIF: "tweet_gif", PreparedMedia.VIDEO: "tweet_video"}
+# Token file of the account configured with X_LOGIN_IDENTIFIER / X_USERNAME
+DEFAULT_TOKEN_FILE = os.path.join(AUTO_SNS_DATA_DIR, "api_tokens", "default.json")
+
+
+class XApiError(Exception):
+    """
+    A failed call to X's API.
+
+    `may_have_posted` is True when the request may have reached X before failing
+    (e.g. the response timed out), so retrying it elsewhere could post twice.
+    `fallback_safe` is True when the post certainly was not created for reasons the
+    browser path does not share (credentials, rate limit, network), so it can be
+    posted through the browser instead.
+    """
+
+    def __init__(self, message: str, status: int | None = None, may_have_posted: bool = False, fallback_safe: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.may_have_posted = may_have_posted
+        self.fallback_safe = fallback_safe and not may_have_posted
+
+
+class OAuthToken:
+    """OAuth 2.0 user-context token pair of one account."""
+
+    def __init__(self, access_token: str | None, refresh_token: str | None, expires_at: float = 0.0):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+
+    def expired(self, now: float | None = None) -> bool:
+        return not self.access_token or (now or time.time()) >= self.expires_at - _REFRESH_MARGIN_SECONDS
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "OAuthToken":
+        return cls(**data)
+
+
+class TokenStore:
+    """
+    An account's token pair in a JSON file readable only by the owner.
+
+    X rotates the refresh token on every refresh, so the new pair is written back
+    immediately; `lock` serializes refreshes of the same account. Use `token_store`
+    to get the one store of a token file, so that every caller shares its lock.
+    """
+
+    def __init__(self, path: str, seed_refresh_token: str | None = None):
+        """
+        Args:
+            path (str): Token file (created on the first save).
+            seed_refresh_token (str, optional): Refresh token to start from when the file does not exist yet.
+        """
+        self.path = path
+        self.seed_refresh_token = seed_refresh_token
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._locks_guard = threading.Lock()
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """The store's lock in the running event loop (an asyncio lock cannot be shared between loops)."""
+        loop = asyncio.get_running_loop()
+        with self._locks_guard:
+            lock = self._locks.get(loop)
+            if lock is None:
+                lock = self._locks[loop] = asyncio.Lock()
+            return lock
+
+    def load(self) -> OAuthToken | None:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    return OAuthToken.from_dict(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Warning: Ignoring unreadable X API token file {self.path}: {e}")
+        if self.seed_refresh_token:
+            return OAuthToken(None, self.seed_refresh_token)
+        return None
+
+    def save(self, token: OAuthToken) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            json.dump(token.to_dict(), f)
+        os.replace(tmp_path, self.path)
+
+
+class XApiCredentials:
+    """Which app and which account's tokens a request is made with."""
+
+    def __init__(self, token_store: TokenStore, client_id: str, client_secret: str | None = None, username: str | None = None):
+        """
+        Args:
+            token_store (TokenStore): The account's tokens.
+            client_id (str): OAuth 2.0 client id of the X app.
+            client_secret (str, optional): Client secret (confidential apps only).
+            username (str, optional): The account's handle, used in post URLs.
+        """
+        self.token_store = token_store
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.username = username
+
+
+_TOKEN_STORES: Dict[str, TokenStore] = {}
+_TOKEN_STORES_LOCK = threading.Lock()
+
+
+def token_store(path: str, seed_refresh_token: str | None = None) -> TokenStore:
+    """The process's one `TokenStore` of the token file `path`, created on first use."""
+    key = os.path.abspath(path)
+    with _TOKEN_STORES_LOCK:
+        store = _TOKEN_STORES.get(key)
+        if store is None:
+            store = _TOKEN_STORES[key] = TokenStore(path, seed_refresh_token)
+        return store
+
+
+def api_credentials(token_file: str, username: str | None = None, seed_refresh_token: str | None = None) -> XApiCredentials | None:
+    """Credentials of the configured X app for the account whose tokens are in `token_file`; None if no app is configured."""
+    if not X_API_CLIENT_ID:
+        return None
+    return XApiCredentials(token_store(token_file, seed_refresh_token), X_API_CLIENT_ID, X_API_CLIENT_SECRET, username)
+
+
+def default_api_credentials() -> XApiCredentials | None:
+    """Credentials of the configured account, seeded from X_API_REFRESH_TOKEN."""
+    return api_credentials(DEFAULT_TOKEN_FILE, X_USERNAME, X_API_REFRESH_TOKEN)
+
+
+class RateLimit:
+    """Rate limit window reported in X's `x-rate-limit-*` response headers."""
+
+    def __init__(self, limit: int, remaining: int, reset_at: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+    @classmethod
+    def from_headers(cls, headers) -> "RateLimit | None":
+        try:
+            return cls(int(headers["x-rate-limit-limit"]), int(headers["x-rate-limit-remaining"]), float(headers["x-rate-limit-reset"]))
+        except (KeyError, ValueError):
+            return None
+
+    def wait_seconds(self, now: float | None = None) -> float:
+        """How long to wait before the next request is allowed (0 if it is allowed now)."""
+        if self.remaining > 0:
+            return 0.0
+        return max(0.0, self.reset_at - (now or time.time()))
+
+
+class XApiClient:
+    """
+    Async client for X's official API, sharing one pooled HTTP connection set.
+
+    One client serves any number of accounts: credentials are passed per call. Rate
+    limits are tracked per account and endpoint from the response headers, so a call
+    that would be rejected waits for the window to reset (up to
+    `max_rate_limit_wait_seconds`) or fails without being sent.
+
+    Use as an async context manager, or call `aclose()` when done.
+    """
+
+    def __init__(self, base_url: str = X_API_BASE_URL, timeout_seconds: float = X_API_TIMEOUT_SECONDS, max_rate_limit_wait_seconds: float = X_API_MAX_RATE_LIMIT_WAIT_SECONDS, max_connections: int = 10, transport: httpx.AsyncBaseTransport | None = None):
+        """
+        Args:
+            base_url (str): API root, overridable to test against a local stub server.
+            timeout_seconds (float): Timeout of each HTTP request.
+            max_rate_limit_wait_seconds (float): Longest wait for a rate limit window to reset.
+            max_connections (int): Size of the connection pool.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport (tests).
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_rate_limit_wait_seconds = max_rate_limit_wait_seconds
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._rate_limits: Dict[tuple, RateLimit] = {}
+        self._user_ids: Dict[str, str] = {}  # Authenticated user id per token file
+
+    async def __aenter__(self) -> "XApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # ---- posts ------------------------------------------------------------------
+
+    async def create_post(self, credentials: XApiCredentials, text: str, media_ids: List[str] | None = None) -> str:
+        """
+        Publishes a post and returns its id.
+
+        Raises:
+            XApiError: If the post was not (or not certainly) created.
+        """
+        body: Dict = {"text": text}
+        if media_ids:
+            body["media"] = {"media_ids": list(media_ids)}
+        data = await self.request(credentials, "POST", "/2/tweets", json=body)
+        post_id = (data.get("data") or {}).get("id")
+        if not post_id:
+            raise XApiError(f"No post id in the create-post response: {data}", may_have_posted=True)
+        return str(post_id)
+
+    async def recent_posts(self, credentials: XApiCredentials, max_results: int = 10) -> List[Dict]:
+        """
+        The account's latest posts, newest first, as `{"id", "text"}` dicts.
+
+        Used to check whether a post whose creation had no known outcome was published.
+
+        Raises:
+            XApiError: If the posts could not be read.
+        """
+        user_id = self._user_ids.get(credentials.token_store.path)
+        if user_id is None:
+            me = await self.request(credentials, "GET", "/2/users/me")
+            user_id = str((me.get("data") or {}).get("id") or "")
+            if not user_id:
+                raise XApiError(f"No user id in the users/me response: {me}")
+            self._user_ids[credentials.token_store.path] = user_id
+        # The endpoint accepts between 5 and 100 results
+        data = await self.request(credentials, "GET", f"/2/users/{user_id}/tweets", params={"max_results": min(100, max(5, max_results))})
+        return [{"id": str(post.get("id")), "text": post.get("text", "")} for post in data.get("data") or []]
+
+    # ---- media ------------------------------------------------------------------
+
+    async def upload_media(self, credentials: XApiCredentials, media: PreparedMedia, chunk_bytes: int = MEDIA_UPLOAD_CHUNK_BYTES, processing_timeout_seconds: float = MEDIA_UPLOAD_TIMEOUT_SECONDS) -> str:
+        """
+        Uploads one file with the chunked media upload and returns its media id.
+
+        The file is streamed from disk one chunk at a time, so memory use does not
+        depend on its size. Videos and GIFs are processed by X after the upload; this
+        waits until they are ready to be attached.
+
+        Raises:
+            XApiError: If the upload or X's processing of the file failed.
+        """
+        init = await self.request(credentials, "POST", "/2/media/upload/initialize", json={
+            "media_type": media.mime_type, "total_bytes": media.size_bytes, "media_category": _MEDIA_CATEGORIES[media.kind],
+        })
+        media_id = (init.get("data") or {}).get("id")
+        if not media_id:
+            # Uploading media never creates the post, so nothing was published
+            raise XApiError(f"No media id in the upload response: {init}")
+        media_id = str(media_id)
+        for index, chunk in enumerate(iter_chunks(media.path, chunk_bytes)):
+            await self.request(credentials, "POST", f"/2/media/upload/{media_id}/append", data={"segment_index": str(index)}, files={"media": chunk})
+        finalized = await self.request(credentials, "POST", f"/2/media/upload/{media_id}/finalize")
+        processing = (finalized.get("data") or {}).get("processing_info")
+        deadline = time.monotonic() + processing_timeout_seconds
+        while processing and processing.get("state") in ("pending", "in_progress"):
+            if time.monotonic() >= deadline:
+                raise XApiError(f"X did not finish processing {media.source} within {processing_timeout_seconds:.0f}s", fallback_safe=True)
+            await asyncio.sleep(float(processing.get("check_after_secs", 1)))
+            status = await self.request(credentials, "GET", "/2/media/upload", params={"command": "STATUS", "media_id": media_id})
+            processing = (status.get("data") or {}).get("processing_info")
+        if processing and processing.get("state") == "failed":
+            raise XApiError(f"X could not process {media.source}: {(processing.get('error') or {}).get('message', 'unknown error')}")
+        return media_id
+
+    # ---- requests ---------------------------------------------------------------
+
+    async def request(self, credentials: XApiCredentials, method: str, path: str, **kwargs) -> Dict:
+        """
+        Sends an authorized request and returns the decoded JSON body.
+
+        The access token is refreshed when it is about to expire, and once more if X
+        answers 401.
+        """
+        key = (credentials.token_store.path, method, path)
+        await self._respect_rate_limit(key)
+        token = await self._valid_token(credentials)
+        response = await self._send(method, path, token, **kwargs)
+        if response.status_code == 401:
+            token = await self._valid_token(credentials, force_refresh=True)
+            response = await self._send(method, path, token, **kwargs)
+
+        rate_limit = RateLimit.from_headers(response.headers)
+        if rate_limit is not None:
+            self._rate_limits[key] = rate_limit
+        if response.status_code == 429:
+            wait = rate_limit.wait_seconds() if rate_limit else self.max_rate_limit_wait_seconds + 1
+            if wait > self.max_rate_limit_wait_seconds:
+                raise XApiError(f"Rate limited by X for another {wait:.0f}s", status=429, fallback_safe=True)
+            await asyncio.sleep(wait)
+            response = await self._send(method, path, token, **kwargs)
+        return _decoded(response, method)
+
+    async def _respect_rate_limit(self, key: tuple) -> None:
+        rate_limit = self._rate_limits.get(key)
+        wait = rate_limit.wait_seconds() if rate_limit else 0.0
+        if wait > self.max_rate_limit_wait_seconds:
+            raise XApiError(f"Rate limit exhausted for another {wait:.0f}s", status=429, fallback_safe=True)
+        if wait > 0:
+            print(f"X API rate limit exhausted; waiting {wait:.0f}s for the window to reset.")
+            await asyncio.sleep(wait)
+
+    async def _send(self, method: str, path: str, token: OAuthToken, **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {token.access_token}"}
+        try:
+            return await self._http.request(method, path, headers=headers, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            raise XApiError(f"Could not reach the X API: {e}", fallback_safe=True) from e
+        except httpx.HTTPError as e:
+            # The request may have been received; the post may exist
+            raise XApiError(f"X API request failed after it was sent: {e}", may_have_posted=method != "GET") from e
+
+    async def _valid_token(self, credentials: XApiCredentials, force_refresh: bool = False) -> OAuthToken:
+        store = credentials.token_store
+        async with store.lock:
+            token = store.load()
+            if token is None:
+                raise XApiError("No X API token for this account", fallback_safe=True)
+            if force_refresh or token.expired():
+                token = await self._refresh(credentials, token)
+                store.save(token)
+            return token
+
+    async def _refresh(self, credentials: XApiCredentials, token: OAuthToken) -> OAuthToken:
+        if not token.refresh_token:
+            raise XApiError("X API access token expired and no refresh token is stored", fallback_safe=True)
+        form = {"grant_type": "refresh_token", "refresh_token": token.refresh_token, "client_id": credentials.client_id}
+        auth = (credentials.client_id, credentials.client_secret) if credentials.client_secret else None
+        try:
+            response = await self._http.post("/2/oauth2/token", data=form, auth=auth)
+        except httpx.HTTPError as e:
+            raise XApiError(f"Could not refresh the X API token: {e}", fallback_safe=True) from e
+        if response.status_code != 200:
+            raise XApiError(f"X API token refresh rejected ({response.status_code}): {response.text[:200]}", status=response.status_code, fallback_safe=True)
+        try:
+            data = response.json()
+            return OAuthToken(data["access_token"], data.get("refresh_token", token.refresh_token), time.time() + float(data.get("expires_in", 7200)))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise XApiError(f"Unreadable X API token refresh response: {response.text[:200]}", fallback_safe=True) from e
+
+
+def _decoded(response: httpx.Response, method: str) -> Dict:
+    if response.status_code < 300:
+        try:
+            body = response.json() if response.content else {}
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            # X accepted the request, so a POST may have created the post
+            raise XApiError(f"Unreadable X API response ({response.status_code}): {response.text[:200]}", status=response.status_code, may_have_posted=method != "GET")
+        return body
+    try:
+        body = response.json()
+        detail = body.get("detail") or body.get("title") or "; ".join(error.get("message", "") for error in body.get("errors", []))
+    except ValueError:
+        detail = response.text[:200]
+    status = response.status_code
+    if status >= 500:
+        raise XApiError(f"X API error {status}: {detail}", status=status, may_have_posted=True)
+    # Auth and permission problems are specific to the API app; content rejections (e.g. duplicates) are not
+    rejected_content = status == 400 or "duplicate" in (detail or "").lower()
+    raise XApiError(f"X API rejected the request ({status}): {detail}", status=status, fallback_safe=not rejected_content)
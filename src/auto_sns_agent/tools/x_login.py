@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+# Selectors rely on data-testid and standard form attributes, never on visible labels,
+# so the routine works whatever language the X UI is displayed in.
+X_SELECTORS = {
+    "home": '[data-testid="AppTabBar_Home_Link"], [data-testid="SideNav_AccountSwitcher_Button"]',
+    "username": 'input[autocomplete="username"]',
+    "password": 'input[name="password"], input[autocomplete="current-password"]',
+    "login_button": '[data-testid="LoginForm_Login_Button"]',
+    # Generic text prompt of the login flow: identity confirmation before the password, 2FA code after it
+    "challenge_input": '[data-testid="ocfEnterTextTextInput"]',
+    "captcha": 'iframe[src*="arkoselabs"], iframe[id*="arkose"], iframe[title*="captcha" i], iframe[src*="recaptcha"]',
+    "error_toast": '[data-testid="toast"], [role="alert"]',
+}
+
+_POLL_INTERVAL_SECONDS = 0.25
+
+
+class LoginResult:
+    """Outcome of the scripted X login."""
+
+    LOGGED_IN = "logged_in"
+    ALREADY_LOGGED_IN = "already_logged_in"
+    TWO_FACTOR_REQUIRED = "two_factor_required"
+    CAPTCHA_REQUIRED = "captcha_required"
+    FAILED = "failed"
+
+    def __init__(self, status: str, detail: str = "", duration_seconds: float = 0.0):
+        self.status = status
+        self.detail = detail
+        self.duration_seconds = duration_seconds
+
+    @property
+    def logged_in(self) -> bool:
+        return self.status in (self.LOGGED_IN, self.ALREADY_LOGGED_IN)
+
+    @property
+    def needs_human(self) -> bool:
+        """True for challenges that neither the script nor the LLM agent can get past."""
+        return self.status in (self.TWO_FACTOR_REQUIRED, self.CAPTCHA_REQUIRED)
+
+    def __repr__(self) -> str:
+        return f"LoginResult(status={self.status!r}, detail={self.detail!r})"
+
+
+async def _wait_for_any(page, names: list[str], timeout_ms: int) -> str | None:
+    """Polls until one of the named X_SELECTORS is visible and returns its name, or None on timeout."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        for name in names:
+            try:
+                if await page.locator(X_SELECTORS[name]).first.is_visible():
+                    return name
+            except Exception:
+                pass  # Page navigating; try again on the next poll
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+
+
+async def scripted_x_login(
+    page,
+    identifier: str,
+    password: str,
+    base_url: str = "https://x.com",
+    alternate_identifier: str | None = None,
+    timeout_ms: int = 15_000,
+) -> LoginResult:
+    """
+    Logs in to X with plain Playwright, one deterministic action per form field.
+
+    Args:
+        page: Playwright page to use; the session cookies end up in its browser context.
+        identifier (str): Username, email or phone number.
+        password (str): Account password.
+        base_url (str): Site root, overridable to test against a local fake login page.
+        alternate_identifier (str, optional): Answer for X's "confirm your identity" prompt
+            (usually the username when `identifier` is an email or phone number).
+        timeout_ms (int): Time allowed for each screen of the flow to appear.
+
+    Returns:
+        LoginResult: Never raises for page-level problems; they are reported as FAILED.
+    """
+    start = time.perf_counter()
+
+    def result(status: str, detail: str = "") -> LoginResult:
+        return LoginResult(status, detail, time.perf_counter() - start)
+
+    try:
+        await page.goto(f"{base_url.rstrip('/')}/home")
+        if await _wait_for_any(page, ["home", "username", "password"], timeout_ms) == "home":
+            return result(LoginResult.ALREADY_LOGGED_IN)
+
+        await page.goto(f"{base_url.rstrip('/')}/i/flow/login")
+        screen = await _wait_for_any(page, ["username", "captcha"], timeout_ms)
+        if screen == "captcha":
+            return result(LoginResult.CAPTCHA_REQUIRED, "Captcha shown before the login form")
+        if screen is None:
+            return result(LoginResult.FAILED, "Login form did not appear")
+        await page.locator(X_SELECTORS["username"]).first.fill(identifier)
+        await page.keyboard.press("Enter")
+
+        screen = await _wait_for_any(page, ["password", "challenge_input", "captcha", "error_toast"], timeout_ms)
+        if screen == "challenge_input":
+            if not alternate_identifier:
+                return result(LoginResult.FAILED, "X asked to confirm the account identity and no alternate identifier is configured")
+            await page.locator(X_SELECTORS["challenge_input"]).first.fill(alternate_identifier)
+            await page.keyboard.press("Enter")
+            screen = await _wait_for_any(page, ["password", "captcha", "error_toast"], timeout_ms)
+        if screen == "captcha":
+            return result(LoginResult.CAPTCHA_REQUIRED, "Captcha shown after entering the identifier")
+        if screen != "password":
+            return result(LoginResult.FAILED, "Password field did not appear after entering the identifier")
+
+        await page.locator(X_SELECTORS["password"]).first.fill(password)
+        login_button = page.locator(X_SELECTORS["login_button"]).first
+        try:
+            # The button stays disabled until the password is typed
+            await login_button.click(timeout=timeout_ms)
+        except Exception:
+            await page.keyboard.press("Enter")
+
+        screen = await _wait_for_any(page, ["home", "challenge_input", "captcha", "error_toast"], timeout_ms)
+        if screen == "home":
+            return result(LoginResult.LOGGED_IN)
+        if screen == "challenge_input":
+            return result(LoginResult.TWO_FACTOR_REQUIRED, "X requested a verification code")
+        if screen == "captcha":
+            return result(LoginResult.CAPTCHA_REQUIRED, "Captcha shown after entering the password")
+        if screen == "error_toast":
+            return result(LoginResult.FAILED, "X rejected the credentials")
+        return result(LoginResult.FAILED, "Home timeline did not appear after submitting the password")
+    except Exception as e:
+        return result(LoginResult.FAILED, f"Scripted login error: {e}")
+
+
+def x_login_fallback_instructions(login_identifier: str, password: str, on_failure: str) -> str:
+    """
+    Login steps for the LLM agent, used only when the scripted login failed.
+
+    Labels are described by purpose rather than by text so the agent copes with any UI locale.
+
+    Args:
+        login_identifier (str): Username, email or phone number.
+        password (str): Account password.
+        on_failure (str): What the agent should do if login keeps failing.
+    """
+    return (
+        f"If you encounter a login page, log in using the identifier '{login_identifier}' and password '{password}'. "
+        f"The X.com interface may be in any language, so identify controls by their role rather than their label: "
+        f"1. Click the sign-in / log-in button on the homepage if present. "
+        f"2. Type '{login_identifier}' in the username/email/phone field (the first text input of the login dialog). "
+        f"3. Click the button that advances to the next screen, or press Enter. "
+        f"4. Type '{password}' carefully in the password field. "
+        f"5. Click the login button (it is disabled until the password has been typed) or press Enter. "
+        f"6. If login fails the first time, try again following the same steps. "
+        f"7. {on_failure} "
+        f"8. If the site requests a 2-Factor Authentication (2FA) code or shows a captcha, you won't be able to proceed - report this as an error. "
+    )
+
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Dict, List
+from urllib.parse import quote
+
+# Like the login routine, the scraper relies on data-testid attributes and URL shapes
+# only, so it works whatever language the X UI is displayed in.
+X_SEARCH_SELECTORS = {
+    "post": 'article[data-testid="tweet"]',
+    "post_text": '[data-testid="tweetText"]',
+    "empty_state": '[data-testid="emptyState"]',
+}
+
+# Collects id, author, URL, timestamp and text of every post currently rendered.
+# The permalink is the status link that wraps the post's <time> element.
+_EXTRACT_POSTS_JS = """
+(selectors) => Array.from(document.querySelectorAll(selectors.post)).map((article) => {
+    const time = article.querySelector('a[href*="/status/"] time');
+    const link = time ? time.closest('a') : article.querySelector('a[href*="/status/"]');
+    const match = link ? link.getAttribute('href').match(/^\\/([^/]+)\\/status\\/(\\d+)/) : null;
+    const textNode = article.querySelector(selectors.post_text);
+    return match ? {
+        id: match[2],
+        author: match[1],
+        url: new URL(link.getAttribute('href'), location.origin).href,
+        posted_at: time ? time.getAttribute('datetime') : null,
+        text: textNode ? textNode.innerText : '',
+    } : null;
+}).filter(Boolean)
+"""
+
+
+class ScrapedPost:
+    """A post read from an X search results page or profile timeline."""
+
+    def __init__(self, id: str, text: str, author: str | None = None, url: str | None = None, posted_at: str | None = None):
+        self.id = id
+        self.text = text
+        self.author = author
+        self.url = url
+        self.posted_at = posted_at
+
+    def __repr__(self) -> str:
+        return f"ScrapedPost(id={self.id!r}, author={self.author!r}, text={self.text[:40]!r})"
+
+
+def is_newer_post_id(post_id: str, cursor: str | None) -> bool:
+    """X post ids are time-ordered integers, so a larger id is a newer post."""
+    return cursor is None or int(post_id) > int(cursor)
+
+
+def x_search_url(query: str, base_url: str = "https://x.com", since_id: str | None = None) -> str:
+    """URL of the "Latest" search results for `query`, limited to posts newer than `since_id`."""
+    if since_id:
+        query = f"{query} since_id:{since_id}"
+    return f"{base_url.rstrip('/')}/search?q={quote(query)}&src=typed_query&f=live"
+
+
+async def scrape_x_search(page, query: str, since_id: str | None = None, max_items: int = 50, base_url: str = "https://x.com", max_scrolls: int = 5, timeout_ms: int = 15_000) -> List[ScrapedPost]:
+    """
+    Reads the latest posts matching `query` without an LLM.
+
+    Args:
+        page: Logged-in Playwright page (search results need a session on X).
+        query (str): X search query, e.g. "AI healthcare", "@handle" or "#hashtag".
+        since_id (str, optional): Cursor; only posts with a larger id are returned.
+        max_items (int): Maximum number of posts returned.
+        base_url (str): Site root, overridable for tests against a local fake page.
+        max_scrolls (int): How many times to scroll for more results.
+        timeout_ms (int): Time allowed for the first results to appear.
+
+    Returns:
+        List[ScrapedPost]: New posts, newest first, without duplicates.
+    """
+    await page.goto(x_search_url(query, base_url, since_id))
+    if not await _wait_for_posts(page, timeout_ms):
+        return []  # No results rendered in time; the next poll tries again
+    return await _read_posts(page, since_id, max_items, max_scrolls)
+
+
+async def scrape_x_profile(page, username: str, max_items: int = 10, base_url: str = "https://x.com", max_scrolls: int = 2, timeout_ms: int = 15_000) -> List[ScrapedPost] | None:
+    """
+    Reads the latest posts on the profile timeline of `username` without an LLM.
+
+    Unlike search, which can take a while to index a new post, the profile timeline
+    shows a post as soon as it is published. Reposts of other accounts' posts are left out.
+
+    Returns:
+        List[ScrapedPost] | None: The account's own posts, newest first; None when the
+        timeline did not render in time, so which posts exist is unknown.
+    """
+    handle = username.lstrip("@")
+    await page.goto(f"{base_url.rstrip('/')}/{quote(handle)}")
+    if not await _wait_for_posts(page, timeout_ms):
+        return None
+    return await _read_posts(page, None, max_items, max_scrolls, author=handle)
+
+
+async def _wait_for_posts(page, timeout_ms: int) -> bool:
+    """True once a post or X's empty-state message has rendered."""
+    try:
+        await page.locator(f'{X_SEARCH_SELECTORS["post"]}, {X_SEARCH_SELECTORS["empty_state"]}').first.wait_for(state="visible", timeout=timeout_ms)
+    except Exception:
+        return False
+    return True
+
+
+async def _read_posts(page, since_id: str | None, max_items: int, max_scrolls: int, author: str | None = None) -> List[ScrapedPost]:
+    """Collects the rendered posts newer than `since_id` (by `author` only, if given), scrolling for more."""
+    posts: Dict[str, ScrapedPost] = {}
+    for _ in range(max_scrolls + 1):
+        seen_before = len(posts)
+        reached_cursor = False
+        for data in await page.evaluate(_EXTRACT_POSTS_JS, X_SEARCH_SELECTORS):
+            if not is_newer_post_id(data["id"], since_id):
+                reached_cursor = True
+                continue
+            if author is not None and data["author"].lower() != author.lower():
+                continue
+            if data["id"] not in posts and data["text"].strip():
+                posts[data["id"]] = ScrapedPost(**data)
+        if reached_cursor or len(posts) >= max_items or len(posts) == seen_before:
+            break
+        await page.mouse.wheel(0, 4000)
+        await asyncio.sleep(1)
+
+    # Sorting by id also moves a pinned older post below the newer ones
+    newest_first = sorted(posts.values(), key=lambda post: int(post.id), reverse=True)
+    return newest_first[:max_items]
@@ -2,30 +2,44 @@ import streamlit as st
 import subprocess
 import sys
 import os
+import time
+import uuid
 import asyncio # Required for Agno workflow interaction
+from concurrent.futures import ThreadPoolExecutor
 
 # Attempt to import workflow and event, handle if not found during initial dev
 try:
+    from auto_sns_agent.config import WORKFLOW_RESEARCH_MODE
     from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
     from agno.workflow import RunEvent
 except ImportError:
+    WORKFLOW_RESEARCH_MODE = "agent"
     ContentCreationWorkflow = None
     RunEvent = None 
     st.error("Failed to import ContentCreationWorkflow. Ensure it's correctly defined and paths are set.")
 
 
+@st.cache_resource
+def _get_shared_workflow():
+    # Ensure an event loop is available for Agno
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+    return ContentCreationWorkflow()
+
+@st.cache_resource
+def _get_step_executor():
+    # Workflow steps run off the script thread so the page stays responsive
+    # (and the Cancel button can reach the run) while research or posting is in progress.
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="workflow-step")
+
 def get_workflow():
-    if "workflow_instance" not in st.session_state:
-        if ContentCreationWorkflow:
-            # Ensure an event loop is available for Agno
-            try:
-                asyncio.get_running_loop()
-            except RuntimeError:
-                asyncio.set_event_loop(asyncio.new_event_loop())
-            st.session_state.workflow_instance = ContentCreationWorkflow()
-        else:
-            st.session_state.workflow_instance = None
-    return st.session_state.workflow_instance
+    # One workflow instance is shared by every browser session; each run keeps its
+    # own state and receives its confirmation through its own generator.
+    if ContentCreationWorkflow:
+        return _get_shared_workflow()
+    return None
 
 def build_ui():
     """Defines and builds the Streamlit user interface."""
@@ -39,6 +53,18 @@ def build_ui():
         st.session_state.awaiting_confirmation = False
     if "draft_to_confirm" not in st.session_state:
         st.session_state.draft_to_confirm = None
+    if "pending_step" not in st.session_state:
+        st.session_state.pending_step = None
+    if "active_run_id" not in st.session_state:
+        st.session_state.active_run_id = None
+
+    # Research mode used by the next content creation run
+    research_mode = st.sidebar.radio(
+        "Research mode",
+        options=["agent", "direct"],
+        index=["agent", "direct"].index(WORKFLOW_RESEARCH_MODE) if WORKFLOW_RESEARCH_MODE in ("agent", "direct") else 0,
+        help="agent: the orchestrator decides which research tools to call. direct: the research tool is called from code and an LLM only summarizes (fewer LLM turns).",
+    )
 
     # Display chat messages
     for message in st.session_state.agent_messages:
@@ -47,8 +73,20 @@ def build_ui():
 
     # Handle pending workflow responses if not awaiting specific button confirmation
     if st.session_state.workflow_generator and not st.session_state.awaiting_confirmation:
+        if st.session_state.pending_step is None:
+            st.session_state.pending_step = _get_step_executor().submit(next, st.session_state.workflow_generator)
+        pending_step = st.session_state.pending_step
+        if not pending_step.done():
+            st.info("Workflow running...")
+            if st.button("⏹ Cancel Run", key="cancel_run"):
+                workflow = get_workflow()
+                if workflow and st.session_state.active_run_id:
+                    workflow.cancel_run(st.session_state.active_run_id, "Cancelled from the UI")
+            time.sleep(0.5)
+            st.rerun()
+        st.session_state.pending_step = None
         try:
-            response = next(st.session_state.workflow_generator)
+            response = pending_step.result()
             st.session_state.agent_messages.append({"role": "assistant", "content": response.content})
             if response.event == RunEvent.run_response: # Expecting user input (confirmation)
                 st.session_state.awaiting_confirmation = True
@@ -78,43 +116,15 @@ def build_ui():
         with col1:
             if st.button("✅ Approve Post", key="approve_post"):
                 if st.session_state.workflow_generator:
-                    try:
-                        workflow = get_workflow()
-                        if workflow:
-                            workflow.user_provided_confirmation = "yes"
-                        # The .send() is tricky because the generator might expect it via the main loop above.
-                        # For now, we set the flag and let the main loop call send() or next().
-                        # This part will need refinement based on exact generator behavior.
-                        response = st.session_state.workflow_generator.send("yes")
-                        st.session_state.agent_messages.append({"role": "assistant", "content": response.content})
-                        if response.event == RunEvent.workflow_completed:
-                            st.session_state.workflow_generator = None
-                    except StopIteration:
-                        st.session_state.agent_messages.append({"role": "assistant", "content": "Workflow completed after approval."})
-                        st.session_state.workflow_generator = None
-                    except Exception as e:
-                        st.error(f"Error sending approval: {e}")
-                        st.session_state.workflow_generator = None
+                    # Posting can take a while; the result is picked up by the pending-step handler above
+                    st.session_state.pending_step = _get_step_executor().submit(st.session_state.workflow_generator.send, "yes")
                 st.session_state.awaiting_confirmation = False
                 st.session_state.draft_to_confirm = None
                 st.rerun()
         with col2:
             if st.button("❌ Cancel Post", key="cancel_post"):
                 if st.session_state.workflow_generator:
-                    try:
-                        workflow = get_workflow()
-                        if workflow:
-                            workflow.user_provided_confirmation = "no"
-                        response = st.session_state.workflow_generator.send("no")
-                        st.session_state.agent_messages.append({"role": "assistant", "content": response.content})
-                        if response.event == RunEvent.workflow_completed:
-                            st.session_state.workflow_generator = None
-                    except StopIteration:
-                        st.session_state.agent_messages.append({"role": "assistant", "content": "Posting cancelled by user."})
-                        st.session_state.workflow_generator = None
-                    except Exception as e:
-                        st.error(f"Error sending cancellation: {e}")
-                        st.session_state.workflow_generator = None
+                    st.session_state.pending_step = _get_step_executor().submit(st.session_state.workflow_generator.send, "no")
                 st.session_state.awaiting_confirmation = False
                 st.session_state.draft_to_confirm = None
                 st.rerun()
@@ -132,7 +142,9 @@ def build_ui():
                     workflow = get_workflow()
                     if workflow:
                         st.session_state.agent_messages.append({"role": "assistant", "content": f"Starting content creation for: {topic}"})
-                        st.session_state.workflow_generator = workflow.run(topic=topic, platform="Twitter")
+                        # The run id is chosen here so the run can be cancelled before it yields anything
+                        st.session_state.active_run_id = str(uuid.uuid4())
+                        st.session_state.workflow_generator = workflow.run(topic=topic, platform="Twitter", run_id=st.session_state.active_run_id, research_mode=research_mode)
                         # Rerun to start processing the generator
                         st.rerun()
                     else:
@@ -1,22 +1,219 @@
+import re
+import signal
+import threading
 import time
 from agno.workflow import Workflow, RunResponse, RunEvent
-from agno.agent import Agent
 from textwrap import dedent
-from typing import Generator
+from typing import Callable, Dict, Generator
 import subprocess
 import json
 import sys
 import os
 
+from auto_sns_agent.agents.agent_pool import AgentPool
 from auto_sns_agent.agents.orchestrator import get_orchestrator_agent
 from auto_sns_agent.agents.content_generator import get_content_generator_agent
+from auto_sns_agent.agents.research_summarizer import get_research_summarizer_agent
+from auto_sns_agent.cancellation import cancellation_scope, current_cancellation_token
+from auto_sns_agent.config import (
+    AUTO_SNS_DATA_DIR,
+    BROWSER_RELEASE_TIMEOUT_SECONDS,
+    DRAFT_SIMILARITY_THRESHOLD,
+    NEAR_DUPLICATE_THRESHOLD,
+    OPENAI_API_KEY,
+    RESEARCH_TOKEN_BUDGET,
+    RESEARCH_TOP_K,
+    WARM_POSTING_ENABLED,
+    WORKFLOW_RESEARCH_MODE,
+    X_LOGIN_IDENTIFIER,
+    X_PASSWORD,
+    X_POSTING_BACKEND,
+)
+from auto_sns_agent.profiling import (
+    add_profile_argument,
+    enable_profiling,
+    finish_profiling,
+    profile_stage,
+)
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.registry import get_platform
+from auto_sns_agent.model_router import (
+    DRAFTING,
+    INVALID_OUTPUT,
+    MODEL_ROUTER,
+    RESEARCH_PLANNING,
+    STAGE_METRICS,
+    TOOL_ERROR,
+    ModelRouter,
+)
+from auto_sns_agent.research.near_duplicates import drop_near_duplicates
+from auto_sns_agent.research.ranking import estimate_tokens, select_passages, split_passages
+from auto_sns_agent.resilience import ErrorResult
+from auto_sns_agent.storage.accounts import Account
+from auto_sns_agent.storage.posted_history import PostedHistory
+from auto_sns_agent.storage.run_history import RunHistory
+from auto_sns_agent.tools.agent_runner import BUDGET_EXHAUSTED_PREFIX, CANCELLED_PREFIX
+from auto_sns_agent.tools.browser_resources import BROWSER_RESOURCES, browser_resource_scope
+from auto_sns_agent.tools.browser_watchdog import BROWSER_WATCHDOG
+from auto_sns_agent.tools.social_media_tools import (
+    POST_DELIMITER,
+    POSTING_PREFIX,
+    get_social_media_posts_for_topic,
+)
+from auto_sns_agent.workflows.run_state import ContentCreationRunState
 
-# Length of the prefix added by the posting tool (e.g., "[AutoPostingTest] " is 18 chars)
-POSTING_PREFIX_LENGTH = 18
-TWITTER_CHAR_LIMIT = 280
-# Max length for the content itself, to ensure (content + prefix) < TWITTER_CHAR_LIMIT
-# So, len(content) <= TWITTER_CHAR_LIMIT - 1 - POSTING_PREFIX_LENGTH
-MAX_CONTENT_LENGTH_FOR_TWITTER_POST = TWITTER_CHAR_LIMIT - 1 - POSTING_PREFIX_LENGTH # 279 - 18 = 261
+# Hashtags at the end of a truncated draft are kept only if this much text still fits before them
+MIN_TRUNCATED_TEXT_LENGTH = 20
+
+# Time a cancelled posting process gets to close its browser before it is killed
+POSTING_CANCEL_GRACE_SECONDS = 15
+
+# Script executed in a separate process to post the approved draft.
+# Passed with `python -c` so concurrent runs never share a temporary file on disk.
+# With "--warm" it is started before the draft is approved: it warms up a posting
+# browser and reads the draft from stdin (see `WarmPostingProcess`).
+POSTING_SCRIPT = """
+import asyncio
+import sys
+import json
+from auto_sns_agent.tools.social_media_tools import post_to_social_media
+
+def warm_main():
+    from auto_sns_agent.platforms.registry import get_platform
+    from auto_sns_agent.tools.warm_posting import post_when_confirmed
+    try:
+        platform = sys.argv[2]
+        idempotency_key = sys.argv[3]
+        print("==LOGS_START==")
+        result = asyncio.run(post_when_confirmed(get_platform(platform), idempotency_key=idempotency_key))
+        print("==LOGS_END==")
+        # "released": the browser was closed without posting (no draft, or its timeout passed)
+        print(json.dumps({"success": True, "result": result, "error_kind": getattr(result, "kind", None), "released": result is None}))
+        return 0
+    except Exception as e:
+        print("==LOGS_END==")
+        print(json.dumps({"success": False, "error": str(e)}))
+        return 1
+
+def main():
+    if sys.argv[1] == "--warm":
+        return warm_main()
+    try:
+        # Get arguments from command line
+        post_content = sys.argv[1]
+        platform = sys.argv[2]
+        # Names the post across retries and re-runs of this workflow run
+        idempotency_key = sys.argv[3] if len(sys.argv) > 3 else None
+        
+        # Clear marker to separate logs from actual result
+        print("==LOGS_START==") # Everything before this will be ignored for JSON parsing
+        
+        # Call the posting function using entrypoint - the proper way to call a tool
+        result = post_to_social_media.entrypoint(
+            content=post_content,
+            platform=platform,
+            idempotency_key=idempotency_key
+        )
+        
+        # Output a clear separator to identify where logs end and result begins
+        print("==LOGS_END==")
+        
+        # Return result as JSON to stdout
+        print(json.dumps({"success": True, "result": result, "error_kind": getattr(result, "kind", None)}))
+        return 0
+    except Exception as e:
+        # Output a clear separator
+        print("==LOGS_END==")
+        # Return error as JSON to stdout 
+        print(json.dumps({"success": False, "error": str(e)}))
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
+"""
+
+class WarmPostingProcess:
+    """
+    Posting process started while a draft awaits confirmation.
+
+    It launches the posting browser, logs in and opens the post editor right away
+    (see `post_when_confirmed`), then waits for the approved draft on its stdin.
+    Closing stdin without a draft releases the browser and ends the process.
+    The process is spawned from a background thread once `wait_before_start` returns,
+    so creating it never holds the caller up.
+    """
+
+    def __init__(self, platform: str, idempotency_key: str, wait_before_start: Callable[[], None] | None = None):
+        self.command = [sys.executable, "-c", POSTING_SCRIPT, "--warm", platform, idempotency_key]
+        self.process: subprocess.Popen | None = None  # Set once the starter thread spawned it
+        self.delivered = False  # The draft was handed to the process
+        self._output: list[str] = []
+        self._reader: threading.Thread | None = None
+        self._released = False
+        self._lock = threading.Lock()
+        self._starter = threading.Thread(target=self._start, args=(wait_before_start,), daemon=True)
+        self._starter.start()
+
+    def post(self, content: str) -> bool:
+        """Hands over the approved draft once the process is up; False if it never started or has already exited (e.g. its timeout passed)."""
+        self._starter.join()
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            self.process.stdin.write(json.dumps({"content": content}) + "\n")
+            self.process.stdin.close()
+        except OSError:
+            return False
+        self.delivered = True
+        return True
+
+    def release(self) -> None:
+        """Lets the process close its browser and exit, and kills it if it has not after a grace period; a process not started yet never starts."""
+        with self._lock:
+            self._released = True
+            process = self.process
+        if process is None:
+            return
+        try:
+            if not process.stdin.closed:
+                process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            killer = threading.Timer(POSTING_CANCEL_GRACE_SECONDS, lambda: process.poll() is None and process.kill())
+            killer.daemon = True
+            killer.start()
+
+    def output(self) -> str:
+        """Waits for the process to exit and returns everything it printed."""
+        self.process.wait()
+        self._reader.join()
+        return "".join(self._output)
+
+    def _start(self, wait_before_start: Callable[[], None] | None) -> None:
+        if wait_before_start is not None:
+            wait_before_start()
+        with self._lock:
+            if self._released:
+                return
+            try:
+                self.process = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    env=_posting_env()
+                )
+            except OSError as e:
+                print(f"Workflow: Warning: could not start the warm posting process: {e}")
+                return
+        # Drained while waiting, so the warm-up's logs never fill the pipe
+        self._reader = threading.Thread(target=self._drain, daemon=True)
+        self._reader.start()
+
+    def _drain(self) -> None:
+        for line in self.process.stdout:
+            self._output.append(line)
 
 class ContentCreationWorkflow(Workflow):
     """Workflow to research a topic and generate a draft social media post."""
@@ -26,51 +223,155 @@ class ContentCreationWorkflow(Workflow):
         based on that research.
     """)
 
-    orchestrator_agent: Agent
-    content_generator_agent: Agent
-    user_provided_confirmation: str | None = None # Attribute to store user's decision
+    model_router: ModelRouter
+    orchestrator_agents: Dict[str, AgentPool]  # model id -> pool
+    content_generator_agents: Dict[str, AgentPool]  # model id -> pool
+    research_summarizer_agents: Dict[str, AgentPool]  # model id -> pool (direct research mode)
+    posted_history: PostedHistory  # Published posts, checked for near-duplicate drafts
+    run_history: RunHistory  # Every run's prompts, outputs, decision and timings
 
     def __init__(self, **data):
         super().__init__(**data)
-        self.orchestrator_agent = get_orchestrator_agent()
-        self.content_generator_agent = get_content_generator_agent()
+        # Shared, reusable resources only. Per-run values live on ContentCreationRunState.
+        self.model_router = MODEL_ROUTER
+        self._agent_pools_lock = threading.Lock()
+        self.orchestrator_agents = {}
+        self.content_generator_agents = {}
+        self.research_summarizer_agents = {}  # Built on first direct-mode run
+        self.posted_history = PostedHistory(os.path.join(AUTO_SNS_DATA_DIR, "posted_history.jsonl"), threshold=DRAFT_SIMILARITY_THRESHOLD)
+        self.run_history = RunHistory(os.path.join(AUTO_SNS_DATA_DIR, "run_history.sqlite3"))
+        # Pools for the cheapest models are built up front; escalation models on first use
+        self._agent_pool(self.orchestrator_agents, get_orchestrator_agent, self.model_router.primary_model(RESEARCH_PLANNING))
+        self._agent_pool(self.content_generator_agents, get_content_generator_agent, self.model_router.primary_model(DRAFTING))
+        self._active_runs: Dict[str, ContentCreationRunState] = {}
+        self._active_runs_lock = threading.Lock()
+
+    def _agent_pool(self, pools: Dict[str, AgentPool], factory, model_id: str) -> AgentPool:
+        """Returns the pool of agents built by `factory` for `model_id`, creating it if needed."""
+        with self._agent_pools_lock:
+            if model_id not in pools:
+                pools[model_id] = AgentPool(lambda: factory(model_id=model_id))
+            return pools[model_id]
+
+    def run_workflow(self, **kwargs):
+        """
+        Starts a run and returns its generator directly.
+
+        Agno's default wrapper iterates the run generator with a for-loop, which drops
+        every value passed to `send()`, and it records run ids on the shared workflow
+        instance. Handing the caller the run-scoped generator itself keeps `send()` as
+        the decision channel and lets several runs share this workflow.
+        """
+        return self._subclass_run(**kwargs)
+
+    def get_run_state(self, run_id: str) -> ContentCreationRunState | None:
+        """Returns the state of an in-flight run, or None if it is unknown or finished."""
+        with self._active_runs_lock:
+            return self._active_runs.get(run_id)
+
+    def active_run_states(self) -> list[ContentCreationRunState]:
+        """Returns the states of all runs that have started but not finished."""
+        with self._active_runs_lock:
+            return list(self._active_runs.values())
+
+    def cancel_run(self, run_id: str, reason: str = "Cancelled by user") -> bool:
+        """
+        Cooperatively cancels an in-flight run from any thread.
+
+        Running browser agents stop at their next step and close their browsers, and a
+        posting process in progress is interrupted.
 
-    def run(self, topic: str, platform: str = "Twitter", research_depth: int = 3) -> Generator[RunResponse, str, RunResponse]:
+        Returns:
+            bool: True if the run was found, False if it is unknown or already finished.
+        """
+        run_state = self.get_run_state(run_id)
+        if run_state is None:
+            return False
+        run_state.cancellation.cancel(reason)
+        return True
+
+    def run(self, topic: str, platform: str = "Twitter", research_depth: int = 3, run_id: str | None = None, research_mode: str | None = None) -> Generator[RunResponse, str, None]:
         """
         Args:
             topic (str): The topic to research and generate a post about.
             platform (str): The social media platform to target for research (default: "Twitter").
             research_depth (int): The number of posts to retrieve during research (default: 3).
+            run_id (str, optional): Id for this run, e.g. so a caller can cancel it before the
+                first response is yielded. Generated when omitted.
+            research_mode (str, optional): "agent" (the orchestrator chooses the research tools)
+                or "direct" (the research tool is called from code and an LLM only summarizes).
+                Defaults to WORKFLOW_RESEARCH_MODE.
+
+        Yields a `RunEvent.run_response` asking for confirmation; answer it with
+        `generator.send("yes")` or `generator.send("no")`. Every yielded response
+        carries the run's id in `run_id`.
         """
-        print(f"Workflow starting for topic: {topic} on {platform} with research depth: {research_depth}")
+        # A cancellation token set by the caller (e.g. the CLI's Ctrl+C handling) also cancels this run
+        run_state = ContentCreationRunState(
+            topic=topic, platform=platform, research_depth=research_depth, run_id=run_id,
+            cancellation=current_cancellation_token(), research_mode=research_mode or WORKFLOW_RESEARCH_MODE,
+        )
+        with self._active_runs_lock:
+            self._active_runs[run_state.run_id] = run_state
+        self.run_history.record(run_state)
+        try:
+            yield from self._run_steps(run_state)
+        finally:
+            # Final state, or the last one reached if the caller abandoned the run
+            self.run_history.record(run_state)
+            with self._active_runs_lock:
+                self._active_runs.pop(run_state.run_id, None)
 
-        # Original logic (simplified path has been removed)
-        # Step 1: Research the topic using the OrchestratorAgent
-        # We'll construct a prompt for the orchestrator similar to how a user might ask.
-        # The orchestrator's tools should handle the actual research (e.g., get_social_media_posts_for_topic)
-        research_prompt = (
-            f"Please research the topic '{topic}' on {platform}. "
-            f"Focus on approximately {research_depth} key posts or pieces of information. "
-            f"Provide a concise summary of the findings, highlighting key discussion points, sentiment, and any actionable insights suitable for creating a new social media post."
+    def _run_steps(self, run_state: ContentCreationRunState) -> Generator[RunResponse, str, None]:
+        """Runs research, drafting, confirmation and posting for one run."""
+        topic, platform, research_depth = run_state.topic, run_state.platform, run_state.research_depth
+        print(f"Workflow [{run_state.run_id}] starting for topic: {topic} on {platform} with research depth: {research_depth}")
+
+        # Step 1: Research the topic, either through the OrchestratorAgent (agent mode) or by
+        # calling the research tool from code and only summarizing with an LLM (direct mode).
+        # Browsers opened by the research tools are attributed to this run and observe its
+        # cancellation token.
+        research_start = time.perf_counter()
+        failure_detail = None
+        with run_state.timings.span("research"), browser_resource_scope(run_state.run_id), cancellation_scope(run_state.cancellation):
+            if run_state.research_mode == ContentCreationRunState.DIRECT_RESEARCH:
+                research_response, failure_detail = self._direct_research(run_state)
+            else:
+                research_response = self._agent_research(run_state)
+        run_state.research_tokens = _response_tokens(research_response)
+        # Per-mode latency and token usage, so the two modes can be compared
+        STAGE_METRICS.record(
+            "research", f"{run_state.research_mode} mode",
+            succeeded=bool(research_response and research_response.content),
+            seconds=time.perf_counter() - research_start, tokens=run_state.research_tokens,
         )
-        print(f"Running OrchestratorAgent with prompt: {research_prompt}")
-        orchestrator_response = self.orchestrator_agent.run(research_prompt)
 
-        if not orchestrator_response or not orchestrator_response.content:
+        if run_state.cancellation.cancelled:
+            yield self._cancelled_response(run_state)
+            return
+
+        if not research_response or not research_response.content:
+            run_state.status = ContentCreationRunState.FAILED
+            if run_state.research_mode == ContentCreationRunState.DIRECT_RESEARCH:
+                failure_content = f"Failed to get research for topic: {topic}. {failure_detail or 'The summary was empty.'}"
+            else:
+                failure_content = f"Failed to get research from OrchestratorAgent for topic: {topic}"
             yield RunResponse(
-                content=f"Failed to get research from OrchestratorAgent for topic: {topic}", 
+                run_id=run_state.run_id,
+                content=failure_content,
                 event=RunEvent.workflow_completed  # Workflow completed, but with an error message in content
             )
             return
         
-        research_summary = orchestrator_response.content
-        print(f"OrchestratorAgent research summary: {research_summary[:500]}...") # Print a snippet
+        research_summary = research_response.content
+        run_state.research_summary = research_summary
+        print(f"Research summary ({run_state.research_mode} mode, {run_state.research_tokens} tokens): {research_summary[:500]}...") # Print a snippet
 
         # Step 2: Generate content using the ContentGeneratorAgent
         # The generator agent is tool-less and takes the research summary as input.
         # Add platform-specific constraints to the prompt
         character_limit_instruction = ""
-        if platform.lower() in ["twitter", "x", "x.com"]:
+        if run_state.is_twitter:
             character_limit_instruction = "IMPORTANT: The post must be strictly less than 280 characters in total, including hashtags, to comply with X.com/Twitter's character limit. "
         
         generation_prompt = (
@@ -79,52 +380,42 @@ class ContentCreationWorkflow(Workflow):
             f"{character_limit_instruction}"
             f"The post should be original and capture the essence of the research. "
             f"Please include 2-3 relevant hashtags. "
-            f"Research Summary:\n---\n{research_summary}\n---"
+            f"Research Summary:\n---\n{_prompt_research(topic, research_summary)}\n---"
         )
+        run_state.generation_prompt = generation_prompt
         print(f"Running ContentGeneratorAgent with prompt based on research.")
-        generator_response = self.content_generator_agent.run(generation_prompt)
+        def run_drafting(model_id: str):
+            with self._agent_pool(self.content_generator_agents, get_content_generator_agent, model_id).lease() as content_generator_agent:
+                return content_generator_agent.run(generation_prompt)
+
+        with run_state.timings.span("drafting"), cancellation_scope(run_state.cancellation):
+            generator_response = self.model_router.run(DRAFTING, run_drafting, _empty_content_signal)
 
         if not generator_response or not generator_response.content:
+            run_state.status = ContentCreationRunState.FAILED
             yield RunResponse(
+                run_id=run_state.run_id,
                 content=f"Failed to generate content from ContentGeneratorAgent for topic: {topic}",
                 event=RunEvent.workflow_completed  # Workflow completed, but with an error message in content
             )
             return
 
+        if run_state.cancellation.cancelled:
+            yield self._cancelled_response(run_state)
+            return
+
         draft_post = generator_response.content
         print(f"ContentGeneratorAgent draft post: {draft_post}")
         
-        # Add character limit validation for Twitter/X posts
-        if platform.lower() in ["twitter", "x", "x.com"]:
-            if len(draft_post) > MAX_CONTENT_LENGTH_FOR_TWITTER_POST:
-                print(f"Warning: Generated post (length {len(draft_post)}) exceeds effective Twitter limit of {MAX_CONTENT_LENGTH_FOR_TWITTER_POST} (to allow for prefix). Truncating...")
-                # Truncate the post to fit within Twitter's character limit while preserving hashtags
-                if "#" in draft_post:
-                    hashtag_position = draft_post.rfind("#") # Find last hashtag to keep more text
-                    # Ensure hashtags are at the end or reasonably close
-                    if len(draft_post) - hashtag_position < 80: # Heuristic: hashtags are likely at the end
-                        hashtags = draft_post[hashtag_position:]
-                        main_text = draft_post[:hashtag_position].strip()
-                        # Calculate available space for main text, aiming for MAX_CONTENT_LENGTH_FOR_TWITTER_POST
-                        # Ellipsis takes 3 chars, space before hashtags takes 1.
-                        available_space = MAX_CONTENT_LENGTH_FOR_TWITTER_POST - len(hashtags) - 4 
-                        if available_space > 20:  # Ensure we have reasonable space for main text
-                            draft_post = main_text[:available_space] + "... " + hashtags
-                        else:
-                            # Not enough space for both; prioritize main content with minimal hashtags, truncate harder
-                            draft_post = draft_post[:(MAX_CONTENT_LENGTH_FOR_TWITTER_POST - 3)] + "..."
-                    else: # Hashtags are too early, simple truncation
-                         draft_post = draft_post[:(MAX_CONTENT_LENGTH_FOR_TWITTER_POST - 3)] + "..."
-                else:
-                    # No hashtags, simply truncate with ellipsis
-                    draft_post = draft_post[:(MAX_CONTENT_LENGTH_FOR_TWITTER_POST - 3)] + "..."
-                
-                # Ensure it doesn't exceed by any chance after manipulations
-                if len(draft_post) > MAX_CONTENT_LENGTH_FOR_TWITTER_POST:
-                    draft_post = draft_post[:MAX_CONTENT_LENGTH_FOR_TWITTER_POST]
+        # Shorten the draft by the platform's own length rule, the one the posting tool enforces
+        adapter = get_platform(platform)
+        if adapter is not None and adapter.length_error(draft_post, prefix=POSTING_PREFIX):
+            print(f"Warning: Generated post (length {adapter.length(POSTING_PREFIX + draft_post)} with prefix) exceeds {adapter.name}'s limit of {adapter.max_length}. Truncating...")
+            draft_post = fit_to_length(draft_post, adapter)
+            print(f"Post truncated. New length with prefix: {adapter.length(POSTING_PREFIX + draft_post)}")
+            print(f"Truncated post: {draft_post}")
 
-                print(f"Post truncated. New content length: {len(draft_post)} characters")
-                print(f"Truncated post: {draft_post}")
+        run_state.draft_post = draft_post
 
         # Step 3: Ask for user confirmation and get their response
         # Update confirmation prompt to show character count for Twitter/X posts
@@ -133,124 +424,362 @@ class ContentCreationWorkflow(Workflow):
             f"---S\n{draft_post}\n---S\n\n"
         )
         
-        if platform.lower() in ["twitter", "x", "x.com"]:
-            final_post_length_with_prefix = len(draft_post) + POSTING_PREFIX_LENGTH
-            confirmation_prompt_content += f"Character count (including prefix): {final_post_length_with_prefix}/{TWITTER_CHAR_LIMIT}\n\n"
+        if adapter is not None and adapter.max_length is not None:
+            confirmation_prompt_content += f"Character count (including prefix): {adapter.length(POSTING_PREFIX + draft_post)}/{adapter.max_length}\n\n"
+
+        # Warn before the user approves something we have already published
+        similar_posts = self.posted_history.similar(draft_post)
+        run_state.similar_posts = [record for record, _ in similar_posts]
+        if similar_posts:
+            record, score = similar_posts[0]
+            posted_on = time.strftime("%Y-%m-%d", time.localtime(record["posted_at"]))
+            confirmation_prompt_content += (
+                f"Warning: this draft is {score:.0%} similar to a post published on {posted_on}"
+                f"{' (' + record['url'] + ')' if record.get('url') else ''}:\n{record['text']}\n\n"
+            )
             
         confirmation_prompt_content += f"Do you want to post this to {platform}? (yes/no)"
         
-        print("Workflow: About to yield for user confirmation...")
-        # The yield expression itself will evaluate to what is .send() into the generator
-        user_confirmation_content: str = yield RunResponse(content=confirmation_prompt_content, event=RunEvent.run_response)
-        print(f"Workflow: Resumed. Value of self.user_provided_confirmation: '{self.user_provided_confirmation}'")
+        # A posting browser warms up while the user reads the draft, so a "yes" only has to type and submit
+        warm_posting = self._start_warm_posting(run_state)
+
+        print(f"Workflow [{run_state.run_id}]: About to yield for user confirmation...")
+        run_state.status = ContentCreationRunState.AWAITING_CONFIRMATION
+        self.run_history.record(run_state)
+        # The yield expression itself evaluates to what the caller passes to .send()
+        try:
+            with run_state.timings.span("awaiting_confirmation"):
+                user_confirmation_content = yield RunResponse(
+                    run_id=run_state.run_id, content=confirmation_prompt_content, event=RunEvent.run_response
+                )
+        except BaseException:
+            # The caller closed or abandoned the run
+            if warm_posting is not None:
+                warm_posting.release()
+            raise
+        confirmed_at = time.perf_counter()
+        run_state.decision = (user_confirmation_content or "").strip().lower()
+        print(f"Workflow [{run_state.run_id}]: Resumed with decision: '{run_state.decision}'")
+        if warm_posting is not None and (run_state.decision != "yes" or run_state.cancellation.cancelled):
+            warm_posting.release()
         
-        if not self.user_provided_confirmation or self.user_provided_confirmation.lower() != "yes":
-            print(f"Workflow: User confirmation is not 'yes' (got: {self.user_provided_confirmation}). Cancelling posting.")
-            self.user_provided_confirmation = None # Reset after use
+        if run_state.decision != "yes":
+            print(f"Workflow [{run_state.run_id}]: User confirmation is not 'yes' (got: {user_confirmation_content}). Cancelling posting.")
+            run_state.status = ContentCreationRunState.CANCELLED
+            print(f"Workflow [{run_state.run_id}] timings: {run_state.timings.format()}")
             yield RunResponse(
+                run_id=run_state.run_id,
                 content="Posting cancelled by user.", 
                 event=RunEvent.workflow_completed
             )
             return
 
-        print(f"Workflow: User confirmed 'yes' via self.user_provided_confirmation. Proceeding to post.")
-        self.user_provided_confirmation = None # Reset after use
-        
-        # Add a delay before posting to allow browser resources to clean up
-        print("Workflow: Pausing for 3 seconds before posting attempt...")
-        time.sleep(3)  # Short pause before subprocess call
-        
-        # Create a temporary script to perform the posting in a separate process
-        print("Workflow: Starting posting in separate process...")
-        temp_script_path = "temp_posting_script.py"
-        with open(temp_script_path, "w") as f:
-            f.write("""
-import sys
-import json
-import asyncio
-from auto_sns_agent.tools.social_media_tools import post_to_social_media
+        if run_state.cancellation.cancelled:
+            yield self._cancelled_response(run_state)
+            return
 
-def main():
-    try:
-        # Get arguments from command line
-        post_content = sys.argv[1]
-        platform = sys.argv[2]
-        
-        # Clear marker to separate logs from actual result
-        print("==LOGS_START==") # Everything before this will be ignored for JSON parsing
+        print(f"Workflow [{run_state.run_id}]: User confirmed 'yes'. Proceeding to post.")
+        run_state.status = ContentCreationRunState.POSTING
+        self.run_history.record(run_state)
         
-        # Call the posting function using entrypoint - the proper way to call a tool
-        result = post_to_social_media.entrypoint(
-            content=post_content,
-            platform=platform
-        )
+        # A warm posting process waited for the research browsers before it started
+        if warm_posting is None:
+            self._wait_for_browser_release(run_state)
         
-        # Output a clear separator to identify where logs end and result begins
-        print("==LOGS_END==")
+        with run_state.timings.span("posting"):
+            post_result = self._post_draft(run_state, warm_posting)
+        run_state.confirmation_to_posted_seconds = time.perf_counter() - confirmed_at
+        start_kind = "warm session" if warm_posting is not None and warm_posting.delivered else "cold start"
+        STAGE_METRICS.record("confirmation_to_posted", start_kind, succeeded=_post_succeeded(post_result), seconds=run_state.confirmation_to_posted_seconds)
+        print(f"Workflow [{run_state.run_id}]: {run_state.confirmation_to_posted_seconds:.1f}s from confirmation to posting result ({start_kind}).")
+        run_state.post_result = post_result
+        url_match = re.search(r"https?://\S+", post_result or "")
+        run_state.post_url = url_match.group().rstrip(".,)") if url_match else None
+        if _post_succeeded(post_result):
+            self.posted_history.record(run_state.draft_post, platform, url=run_state.post_url)
+        run_state.status = ContentCreationRunState.COMPLETED
+        print(f"Workflow [{run_state.run_id}] timings: {run_state.timings.format()}")
+        print(f"Model stage metrics:\n{STAGE_METRICS.format()}")
+        print(BROWSER_WATCHDOG.format())
         
-        # Return result as JSON to stdout
-        print(json.dumps({"success": True, "result": result}))
-        return 0
-    except Exception as e:
-        # Output a clear separator
-        print("==LOGS_END==")
-        # Return error as JSON to stdout 
-        print(json.dumps({"success": False, "error": str(e)}))
-        return 1
+        # Assume post_result contains the outcome message (URL or error)
+        yield RunResponse(
+            run_id=run_state.run_id,
+            content=f"Posting attempt result: {post_result}",
+            event=RunEvent.workflow_completed
+        )
+        return
 
-if __name__ == "__main__":
-    sys.exit(main())
-""")
-        
-        # Run the temporary script in a separate process
-        final_post_content = draft_post  # No need for [AutoPostingTest] here since it's added in social_media_tools.py
-        try:
-            print(f"Running posting in separate process: {sys.executable} {temp_script_path} '{final_post_content}' {platform}")
-            
-            # Use subprocess.check_output to capture the output from the script
-            result = subprocess.check_output(
-                [sys.executable, temp_script_path, final_post_content, platform],
-                text=True,
-                env=dict(os.environ, PYTHONPATH="src")  # Ensure PYTHONPATH includes src
+    def _agent_research(self, run_state: ContentCreationRunState):
+        """Asks the OrchestratorAgent to research the topic; it picks and calls the tools itself."""
+        # We'll construct a prompt for the orchestrator similar to how a user might ask.
+        # The orchestrator's tools should handle the actual research (e.g., get_social_media_posts_for_topic)
+        research_prompt = (
+            f"Please research the topic '{run_state.topic}' on {run_state.platform}. "
+            f"Focus on approximately {run_state.research_depth} key posts or pieces of information. "
+            f"Provide a concise summary of the findings, highlighting key discussion points, sentiment, and any actionable insights suitable for creating a new social media post."
+        )
+        run_state.research_prompt = research_prompt
+        print(f"Running OrchestratorAgent with prompt: {research_prompt}")
+
+        def run_research(model_id: str):
+            with self._agent_pool(self.orchestrator_agents, get_orchestrator_agent, model_id).lease() as orchestrator_agent:
+                return orchestrator_agent.run(research_prompt)
+
+        return self.model_router.run(RESEARCH_PLANNING, run_research, _research_failure_signal)
+
+    def _direct_research(self, run_state: ContentCreationRunState) -> tuple:
+        """
+        Calls the research tool from code and has a tool-less agent summarize the results.
+
+        The research plan of the workflow never changes (search the platform for
+        `research_depth` posts), so no LLM turn is spent choosing a tool.
+
+        Returns:
+            tuple: (summarizer response or None, detail explaining why there is no response).
+        """
+        print(f"Workflow [{run_state.run_id}]: Direct research of '{run_state.topic}' on {run_state.platform}")
+        with profile_stage("tool.get_social_media_posts_for_topic"):
+            raw_posts = get_social_media_posts_for_topic.entrypoint(
+                topic=run_state.topic, platform=run_state.platform, count=run_state.research_depth
             )
-            
-            # Parse the JSON result
+        posts = _split_research_posts(raw_posts)
+        if not posts:
+            return None, raw_posts
+        # Only distinct, relevant posts that fit the budget reach the summarizer
+        posts = select_passages(run_state.topic, drop_near_duplicates(posts, NEAR_DUPLICATE_THRESHOLD), top_k=RESEARCH_TOP_K, token_budget=RESEARCH_TOKEN_BUDGET)
+        if run_state.cancellation.cancelled:
+            return None, None
+
+        numbered_posts = "\n".join(f"{index}. {post}" for index, post in enumerate(posts, start=1))
+        summary_prompt = (
+            f"Topic: '{run_state.topic}' on {run_state.platform}.\n"
+            f"Posts collected ({len(posts)}):\n{numbered_posts}\n\n"
+            f"Provide a concise summary of these posts, highlighting key discussion points, sentiment, and any actionable insights suitable for creating a new social media post."
+        )
+        run_state.research_prompt = summary_prompt
+
+        def run_summary(model_id: str):
+            with self._agent_pool(self.research_summarizer_agents, get_research_summarizer_agent, model_id).lease() as summarizer_agent:
+                return summarizer_agent.run(summary_prompt)
+
+        return self.model_router.run(RESEARCH_PLANNING, run_summary, _empty_content_signal), None
+
+    def _cancelled_response(self, run_state: ContentCreationRunState) -> RunResponse:
+        run_state.status = ContentCreationRunState.CANCELLED
+        print(f"Workflow [{run_state.run_id}]: Run cancelled: {run_state.cancellation.reason}")
+        print(f"Workflow [{run_state.run_id}] timings: {run_state.timings.format()}")
+        return RunResponse(
+            run_id=run_state.run_id,
+            content=f"{CANCELLED_PREFIX}: {run_state.cancellation.reason}",
+            event=RunEvent.workflow_completed
+        )
+
+    def _wait_for_browser_release(self, run_state: ContentCreationRunState) -> None:
+        """
+        Waits until this run's research browsers report that they are closed,
+        instead of sleeping for a fixed time before launching the posting browser.
+        """
+        with run_state.timings.span("wait_for_browser_release"):
+            released = BROWSER_RESOURCES.wait_until_released(
+                scope=run_state.run_id, timeout=BROWSER_RELEASE_TIMEOUT_SECONDS
+            )
+        if not released:
+            still_open = BROWSER_RESOURCES.open_owners(scope=run_state.run_id)
+            print(f"Workflow: Warning: browser resources still open after {BROWSER_RELEASE_TIMEOUT_SECONDS}s: {still_open}. Posting anyway.")
+
+    def _start_warm_posting(self, run_state: ContentCreationRunState) -> WarmPostingProcess | None:
+        """
+        Starts the posting process for the run before its draft is approved.
+
+        Returns:
+            WarmPostingProcess | None: None when posting starts cold after the approval: warm
+            posting is disabled, the platform is unknown, no X login is configured, or posts
+            go through the API (which needs no browser).
+        """
+        if not (WARM_POSTING_ENABLED and OPENAI_API_KEY and X_LOGIN_IDENTIFIER and X_PASSWORD) or X_POSTING_BACKEND == Account.API:
+            return None
+        if get_platform(run_state.platform) is None:
+            return None
+        # The process starts once the research browsers are closed; the prompt does not wait for that
+        warm_posting = WarmPostingProcess(run_state.platform, _posting_key(run_state), wait_before_start=lambda: self._wait_for_browser_release(run_state))
+        # Cancelling the run releases the warm browser too
+        run_state.cancellation.add_callback(warm_posting.release)
+        print(f"Workflow [{run_state.run_id}]: Warming up a posting browser while the draft awaits confirmation.")
+        return warm_posting
+
+    def _post_draft(self, run_state: ContentCreationRunState, warm_posting: WarmPostingProcess | None = None) -> str:
+        """
+        Posts the run's approved draft from a separate process and returns the outcome message.
+
+        The draft goes to `warm_posting` while it is still waiting for one, and to a new
+        posting process otherwise.
+        """
+        final_post_content = run_state.draft_post  # No need for [AutoPostingTest] here since it's added in social_media_tools.py
+        platform = run_state.platform
+        try:
+            if warm_posting is not None and warm_posting.post(final_post_content):
+                print("Workflow: Posting through the warm posting process...")
+                command, process, read_output = warm_posting.command, warm_posting.process, warm_posting.output
+            else:
+                print("Workflow: Starting posting in separate process...")
+                print(f"Running posting in separate process: {sys.executable} -c <posting script> '{final_post_content}' {platform}")
+                command = [sys.executable, "-c", POSTING_SCRIPT, final_post_content, platform, _posting_key(run_state)]
+                process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    env=_posting_env()
+                )
+                read_output = lambda: process.communicate()[0]
+            # Cancelling the run interrupts the posting process so it can close its browser
+            unregister = run_state.cancellation.add_callback(lambda: _interrupt_process(process))
             try:
-                # Look for the JSON output after ==LOGS_END==
-                if "==LOGS_END==" in result:
-                    json_str = result.split("==LOGS_END==")[-1].strip()
-                    parsed_result = json.loads(json_str)
-                    if parsed_result["success"]:
-                        post_result = parsed_result["result"]
-                    else:
-                        post_result = f"Error in posting subprocess: {parsed_result.get('error', 'Unknown error')}"
-                else:
-                    post_result = f"Failed to parse result: separator '==LOGS_END==' not found in output. Raw output: {result[:300]}..."
-            except json.JSONDecodeError:
-                post_result = f"Failed to parse JSON from subprocess output. Raw output after separator: {result.split('==LOGS_END==')[-1][:300] if '==LOGS_END==' in result else 'No separator found'}"
-                
+                result = read_output()
+            finally:
+                unregister()
+            if run_state.cancellation.cancelled:
+                return f"{CANCELLED_PREFIX} while posting: {run_state.cancellation.reason}. The post may or may not have been submitted."
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, command, output=result)
+
+            post_result = _parse_posting_output(result)
+            if post_result is None:
+                # The warm process released its browser (its timeout passed) just before the draft arrived
+                print("Workflow: The warm posting process had already released its browser; posting from a new process.")
+                warm_posting.delivered = False
+                return self._post_draft(run_state)
             print(f"Posting subprocess completed with result: {post_result}")
         except subprocess.CalledProcessError as e:
             post_result = f"Subprocess error (exit code {e.returncode}): {e.output}"
         except Exception as e:
             post_result = f"Error running posting subprocess: {str(e)}"
-        finally:
-            # Clean up the temporary script
-            try:
-                os.remove(temp_script_path)
-                print(f"Removed temporary script {temp_script_path}")
-            except:
-                print(f"Failed to remove temporary script {temp_script_path}")
-        
-        # Assume post_result contains the outcome message (URL or error)
-        yield RunResponse(
-            content=f"Posting attempt result: {post_result}",
-            event=RunEvent.workflow_completed
-        )
+        return post_result
+
+def fit_to_length(text: str, adapter: PlatformAdapter, prefix: str = POSTING_PREFIX) -> str:
+    """
+    Shortens `text` with an ellipsis until `prefix + text` passes `adapter.length_error`.
+
+    Hashtags near the end of the text are kept after the ellipsis while at least
+    MIN_TRUNCATED_TEXT_LENGTH characters of the text fit before them.
+    """
+    if adapter.length_error(text, prefix=prefix) is None:
+        return text
+    hashtag_position = text.rfind("#")
+    if hashtag_position > 0 and len(text) - hashtag_position < 80:  # Heuristic: hashtags are likely at the end
+        main_text, hashtags = text[:hashtag_position].strip(), text[hashtag_position:]
+        cut = _longest_fitting_cut(main_text, "... " + hashtags, adapter, prefix)
+        if cut > MIN_TRUNCATED_TEXT_LENGTH:
+            return main_text[:cut] + "... " + hashtags
+    return text[:max(_longest_fitting_cut(text, "...", adapter, prefix), 0)] + "..."
+
+
+def _longest_fitting_cut(text: str, suffix: str, adapter: PlatformAdapter, prefix: str) -> int:
+    """Most leading characters of `text` that fit before `suffix`, or -1 if not even `suffix` fits."""
+    # Platform lengths never shrink as text is added, so the cut can be bisected
+    low, high = -1, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if adapter.length_error(text[:middle] + suffix, prefix=prefix) is None:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _posting_key(run_state: ContentCreationRunState) -> str:
+    """Idempotency key of the run's post: names it across retries and re-runs of the run."""
+    return f"workflow:{run_state.run_id}:{run_state.platform}"
+
+def _posting_env() -> Dict[str, str]:
+    """Environment of a posting process: PYTHONPATH includes src, and its data goes where this process keeps it."""
+    return dict(os.environ, PYTHONPATH="src", AUTO_SNS_DATA_DIR=AUTO_SNS_DATA_DIR)
+
+def _parse_posting_output(result: str) -> str | None:
+    """
+    Reads the outcome message from a posting process's output.
+
+    Returns:
+        str | None: None when a warm posting process was released without posting.
+    """
+    try:
+        # Look for the JSON output after ==LOGS_END==
+        if "==LOGS_END==" not in result:
+            return f"Failed to parse result: separator '==LOGS_END==' not found in output. Raw output: {result[:300]}..."
+        parsed_result = json.loads(result.split("==LOGS_END==")[-1].strip())
+    except json.JSONDecodeError:
+        return f"Failed to parse JSON from subprocess output. Raw output after separator: {result.split('==LOGS_END==')[-1][:300]}"
+    if not parsed_result["success"]:
+        return f"Error in posting subprocess: {parsed_result.get('error', 'Unknown error')}"
+    if parsed_result.get("released"):
+        return None
+    post_result = parsed_result["result"]
+    if parsed_result.get("error_kind"):
+        post_result = ErrorResult(post_result, parsed_result["error_kind"])
+    return post_result
+
+def _empty_content_signal(response) -> str | None:
+    """Escalation signal for agent responses that must carry content."""
+    if not response or not response.content:
+        return INVALID_OUTPUT
+    return None
+
+def _post_succeeded(post_result: str | None) -> bool:
+    return bool(post_result) and ("Successfully posted" in post_result or "Posted successfully" in post_result)
+
+def _split_research_posts(raw_posts: str | None) -> list[str]:
+    """Splits the research tool's output into posts; error and status messages yield no posts."""
+    if not raw_posts or raw_posts.startswith(("Error", "No posts found", BUDGET_EXHAUSTED_PREFIX, CANCELLED_PREFIX)):
+        return []
+    return [post.strip() for post in raw_posts.split(POST_DELIMITER) if post.strip()]
+
+def _prompt_research(topic: str, research_summary: str) -> str:
+    """The research summary, cut down to its passages most relevant to the topic if it exceeds the token budget."""
+    if estimate_tokens(research_summary) <= RESEARCH_TOKEN_BUDGET:
+        return research_summary
+    passages = select_passages(topic, split_passages(research_summary), top_k=RESEARCH_TOP_K, token_budget=RESEARCH_TOKEN_BUDGET, keep_order=True)
+    return "\n\n".join(passages)
+
+def _response_tokens(response) -> int | None:
+    """Total LLM tokens reported in an Agno RunResponse's metrics, if any."""
+    metrics = getattr(response, "metrics", None)
+    if not isinstance(metrics, dict) or "total_tokens" not in metrics:
+        return None
+    total = metrics["total_tokens"]
+    # Agno reports one value per model call
+    return sum(total) if isinstance(total, list) else int(total)
+
+def _research_failure_signal(response) -> str | None:
+    """Escalation signal for the research step: no summary, or a tool call the model got wrong."""
+    signal = _empty_content_signal(response)
+    if signal:
+        return signal
+    for tool_call in getattr(response, "tools", None) or []:
+        if isinstance(tool_call, dict) and tool_call.get("tool_call_error"):
+            return TOOL_ERROR
+    return None
+
+def _interrupt_process(process: subprocess.Popen) -> None:
+    """Asks a posting process to stop (SIGINT lets it close its browser), then kills it after a grace period."""
+    if process.poll() is not None:
         return
+    if os.name == "posix":
+        process.send_signal(signal.SIGINT)
+    else:
+        process.terminate()
+    killer = threading.Timer(POSTING_CANCEL_GRACE_SECONDS, lambda: process.poll() is None and process.kill())
+    killer.daemon = True
+    killer.start()
 
 if __name__ == '__main__':
+    import argparse
     import asyncio
+
+    parser = argparse.ArgumentParser(description="Run the content creation workflow once.")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
     # Ensure an event loop is available for any async operations within agents/tools
     try:
         asyncio.get_running_loop()
@@ -301,4 +830,5 @@ if __name__ == '__main__':
             if last_response:
                  print(f"Last yielded event: {last_response.event}")
                  print(f"Last yielded content: {last_response.content}")
-            # No e.value to check here since we are yielding final responses 
\ No newline at end of file
+            # No e.value to check here since we are yielding final responses 
+    finish_profiling()
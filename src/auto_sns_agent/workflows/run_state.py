@@ -0,0 +1,59 @@
+import time
+import uuid
+
+from auto_sns_agent.cancellation import CancellationToken
+from auto_sns_agent.metrics import RunTimings
+
+
+class ContentCreationRunState:
+    """
+    Everything a single ContentCreationWorkflow run produces or decides.
+
+    The workflow instance only holds shared, reusable resources (agent pools);
+    all per-run values live on one of these objects so concurrent runs on the same
+    workflow cannot read or overwrite each other's drafts and decisions.
+    """
+
+    # Lifecycle values for `status`
+    RUNNING = "running"
+    AWAITING_CONFIRMATION = "awaiting_confirmation"
+    POSTING = "posting"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+    # Values for `research_mode`
+    AGENT_RESEARCH = "agent"  # The orchestrator chooses and calls the research tools
+    DIRECT_RESEARCH = "direct"  # Code calls the research tools; an LLM only summarizes
+    RESEARCH_MODES = (AGENT_RESEARCH, DIRECT_RESEARCH)
+
+    def __init__(self, topic: str, platform: str = "Twitter", research_depth: int = 3, run_id: str | None = None, cancellation: CancellationToken | None = None, research_mode: str = AGENT_RESEARCH):
+        if research_mode not in self.RESEARCH_MODES:
+            raise ValueError(f"Unknown research mode '{research_mode}'. Expected one of {self.RESEARCH_MODES}.")
+        self.run_id = run_id or str(uuid.uuid4())
+        self.topic = topic
+        self.platform = platform
+        self.research_depth = research_depth
+        self.research_mode = research_mode
+        self.status = self.RUNNING
+        self.started_at = time.time()
+        self.research_prompt: str | None = None  # Prompt of the research LLM (orchestrator or summarizer)
+        self.research_summary: str | None = None
+        self.research_tokens: int | None = None  # LLM tokens spent by the research step's agents
+        self.generation_prompt: str | None = None
+        self.draft_post: str | None = None
+        self.similar_posts: list[dict] = []  # Earlier posts the draft nearly duplicates
+        self.decision: str | None = None  # Normalized value received through send()
+        self.post_result: str | None = None
+        self.post_url: str | None = None
+        self.confirmation_to_posted_seconds: float | None = None  # From the "yes" to the posting result
+        self.timings = RunTimings()
+        # Cancelling this token stops the run's browser agents and posting process
+        self.cancellation = cancellation or CancellationToken()
+
+    @property
+    def is_twitter(self) -> bool:
+        return self.platform.lower() in ["twitter", "x", "x.com"]
+
+    def __repr__(self) -> str:
+        return f"ContentCreationRunState(run_id={self.run_id!r}, topic={self.topic!r}, status={self.status!r})"
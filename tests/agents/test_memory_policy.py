@@ -0,0 +1,85 @@
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+from agno.run.response import RunResponse
+
+from auto_sns_agent.agents.memory_policy import OrchestratorMemoryPolicy
+
+ARTICLE = "\n\n".join(
+    [f"Paragraph {i} is about gardening, soil and compost in general terms." for i in range(200)]
+    + ["Dark mode reduces eye strain for many readers at night."]
+)
+
+
+def make_run(index: int, tool_output: str = "short result", history: int = 0) -> RunResponse:
+    messages = [Message(role="system", content="You are the orchestrator.")]
+    messages += [Message(role="user", content=f"old request {i}", from_history=True) for i in range(history)]
+    messages += [
+        Message(role="user", content=f"request {index}: what does the article say about dark mode?"),
+        Message(role="assistant", tool_calls=[{"id": f"call_{index}", "type": "function", "function": {"name": "get_webpage_main_content", "arguments": "{}"}}]),
+        Message(role="tool", content=tool_output, tool_call_id=f"call_{index}"),
+        Message(role="assistant", content=f"answer {index}"),
+    ]
+    return RunResponse(content=f"answer {index}", messages=messages, tools=[{"tool_name": "get_webpage_main_content", "content": tool_output}], metrics={"input_tokens": [900, 1400]})
+
+
+def make_agent(runs) -> Agent:
+    return Agent(memory=Memory(runs={"session": runs}))
+
+
+def test_configure_sends_the_window_of_history():
+    agent = Agent()
+    OrchestratorMemoryPolicy(history_runs=3).configure(agent)
+    assert agent.add_history_to_messages and agent.num_history_runs == 3
+
+    OrchestratorMemoryPolicy(history_runs=0).configure(agent)
+    assert not agent.add_history_to_messages
+
+
+def test_apply_keeps_the_window_and_reports_prompt_tokens():
+    runs = [make_run(i, history=min(i, 2)) for i in range(6)]
+    agent = make_agent(runs)
+
+    report = OrchestratorMemoryPolicy(history_runs=2).apply(agent, runs[-1])
+
+    assert [run.content for run in agent.memory.runs["session"]] == ["answer 4", "answer 5"]
+    assert report.prompt_tokens == [900, 1400] and report.dropped_runs == 4
+    assert "2300 prompt tokens (900 + 1400)" in report.summary()
+    # Stored runs no longer carry their own system message and history copies
+    kept = agent.memory.runs["session"][0].messages
+    assert [message.role for message in kept] == ["user", "assistant", "tool", "assistant"]
+    history = agent.memory.get_messages_from_last_n_runs("session", last_n=2, skip_role="system")
+    assert [message.content for message in history if message.role == "user"] == [
+        "request 4: what does the article say about dark mode?",
+        "request 5: what does the article say about dark mode?",
+    ]
+
+
+def test_long_tool_outputs_are_compacted_to_their_relevant_passages():
+    agent = make_agent([make_run(0, tool_output=ARTICLE)])
+    policy = OrchestratorMemoryPolicy(history_runs=4, tool_output_tokens=120)
+
+    report = policy.apply(agent)
+
+    run = agent.memory.runs["session"][0]
+    tool_message = next(message for message in run.messages if message.role == "tool")
+    assert tool_message.content.startswith("[compacted tool output")
+    assert "Dark mode reduces eye strain" in tool_message.content
+    assert len(tool_message.content) < len(ARTICLE) // 20
+    assert run.tools[0]["content"] == tool_message.content
+    assert report.compacted_outputs == 1
+    # Compacting again leaves the summary as it is
+    assert policy.apply(agent).compacted_outputs == 0
+
+
+def test_history_beyond_the_token_ceiling_is_forgotten_oldest_first():
+    run_tokens = OrchestratorMemoryPolicy().apply(make_agent([make_run(0)])).history_tokens
+    runs = [make_run(i) for i in range(4)]
+    agent = make_agent(runs)
+    policy = OrchestratorMemoryPolicy(history_runs=4, max_history_tokens=2 * run_tokens + 1)
+
+    report = policy.apply(agent)
+
+    assert report.history_tokens <= 2 * run_tokens + 1
+    assert [run.content for run in agent.memory.runs["session"]] == ["answer 2", "answer 3"]
+    assert report.dropped_runs == 2 and "2 turns forgotten" in report.summary()
@@ -16,12 +16,15 @@ def test_get_orchestrator_agent_initialization():
     """Test that the orchestrator agent can be initialized."""
     agent = get_orchestrator_agent()
     assert isinstance(agent, Agent), "Should be an instance of Agno Agent"
-    # Check if tools are registered - now expecting 3 tools
-    assert len(agent.tools) == 3 
+    # Check if tools are registered - now expecting 6 tools
+    assert len(agent.tools) == 6
     tool_names = [t.name for t in agent.tools] # t.name is the string name of the Agno tool
     # Check against the expected string names of the tools
     assert "get_webpage_main_content" in tool_names
     assert "get_social_media_posts_for_topic" in tool_names
+    assert "get_social_media_posts_for_topics" in tool_names
+    assert "post_to_accounts" in tool_names
+    assert "cross_post" in tool_names
 
 
 def test_orchestrator_agent_simple_run():
@@ -0,0 +1,16 @@
+from unittest.mock import patch
+
+import pytest
+
+from auto_sns_agent.resilience import CircuitBreakers
+from auto_sns_agent.storage.post_ledger import PostLedger
+
+
+@pytest.fixture
+def fresh_resilience_state(tmp_path):
+    """Gives a test its own posting circuit breakers and post ledger, so failures of one test never open a breaker for the next."""
+    from auto_sns_agent.tools import social_media_tools
+
+    with patch.object(social_media_tools, "CIRCUIT_BREAKERS", CircuitBreakers()), \
+            patch.object(social_media_tools, "POST_LEDGER", PostLedger(str(tmp_path / "post_ledger.jsonl"), 3600)):
+        yield
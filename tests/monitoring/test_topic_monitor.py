@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from auto_sns_agent.monitoring.topic_monitor import TopicMonitor, Watch, Watchlist
+from auto_sns_agent.storage.corpus import PostCorpus
+from auto_sns_agent.tools.x_search_scraper import ScrapedPost
+
+
+class FakeSearch:
+    """Returns queued batches of posts and records the cursor each fetch was given."""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.cursors = []
+
+    async def fetch(self, watch, max_items):
+        self.cursors.append(watch.cursor)
+        if not self.batches:
+            return []
+        batch = self.batches.pop(0)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch[:max_items]
+
+
+def _monitor(tmp_path, search, **kwargs):
+    watchlist = Watchlist(str(tmp_path / "watchlist.json"))
+    corpus = PostCorpus(str(tmp_path / "corpus"))
+    return TopicMonitor(watchlist, corpus, search.fetch, min_interval_seconds=60, max_interval_seconds=3600, max_items_per_poll=8, **kwargs)
+
+
+def test_watch_normalizes_handles_and_hashtags():
+    assert Watch(Watch.MENTION, "@OpenAI").query == "@OpenAI"
+    assert Watch(Watch.HASHTAG, "#AIethics").key == "hashtag:aiethics"
+    with pytest.raises(ValueError):
+        Watch("keyword", "x")
+
+
+def test_poll_advances_cursor_and_dedupes_by_post_id(tmp_path):
+    search = FakeSearch(
+        [ScrapedPost("105", "robots at work"), ScrapedPost("103", "robots at home")],
+        [ScrapedPost("107", "robots everywhere"), ScrapedPost("105", "robots at work")],
+    )
+    monitor = _monitor(tmp_path, search)
+    watch = monitor.watchlist.add(Watch(Watch.TOPIC, "robots", interval_seconds=600))
+
+    assert asyncio.run(monitor.poll(watch)) == 2
+    assert asyncio.run(monitor.poll(watch)) == 1
+
+    assert search.cursors == [None, "105"]
+    assert watch.cursor == "107"
+    assert len(monitor.corpus) == 3
+    assert monitor.corpus.get("107").topic == "robots"
+    # The cursor survives a restart
+    assert Watchlist(str(tmp_path / "watchlist.json")).watches["topic:robots"].cursor == "107"
+
+
+def test_interval_shrinks_when_busy_and_grows_when_quiet(tmp_path):
+    busy_batch = [ScrapedPost(str(id), f"post {id} about rockets") for id in range(200, 204)]
+    monitor = _monitor(tmp_path, FakeSearch(busy_batch, [], []))
+    watch = monitor.watchlist.add(Watch(Watch.HASHTAG, "rockets", interval_seconds=600))
+
+    asyncio.run(monitor.poll(watch))
+    assert watch.interval_seconds == 300
+    asyncio.run(monitor.poll(watch))
+    assert watch.interval_seconds == 450
+    watch.interval_seconds = 3000
+    asyncio.run(monitor.poll(watch))
+    assert watch.interval_seconds == 3600
+
+
+def test_poll_due_skips_scheduled_watches_and_retries_failures(tmp_path):
+    search = FakeSearch(RuntimeError("page crashed"))
+    monitor = _monitor(tmp_path, search)
+    failing = monitor.watchlist.add(Watch(Watch.TOPIC, "failing"))
+    later = monitor.watchlist.add(Watch(Watch.TOPIC, "later", next_poll_at=10**12))
+
+    assert asyncio.run(monitor.poll_due()) == {}
+    assert len(search.cursors) == 1
+    assert failing.next_poll_at > 0 and failing.cursor is None
+    assert later.last_polled_at is None
+
+
+def test_polls_keep_watches_added_and_removed_by_another_process(tmp_path):
+    monitor = _monitor(tmp_path, FakeSearch([ScrapedPost("300", "ai news")]))
+    monitor.watchlist.add(Watch(Watch.TOPIC, "ai"))
+    monitor.watchlist.add(Watch(Watch.TOPIC, "old"))
+    # `auto-sns-monitor add/remove` while the monitor runs
+    cli = Watchlist(str(tmp_path / "watchlist.json"))
+    cli.add(Watch(Watch.HASHTAG, "new", next_poll_at=10**12))
+    cli.remove("topic:old")
+
+    results = asyncio.run(monitor.poll_due())
+
+    assert results == {"topic:ai": 1}
+    on_disk = Watchlist(str(tmp_path / "watchlist.json")).watches
+    assert set(on_disk) == {"topic:ai", "hashtag:new"}
+    assert on_disk["topic:ai"].cursor == "300"
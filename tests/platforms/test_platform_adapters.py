@@ -0,0 +1,104 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from playwright.async_api import async_playwright
+
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.registry import get_platform, platform_for_url
+from auto_sns_agent.platforms.x import XAdapter, x_weighted_length
+from auto_sns_agent.tools.action_replay import ScriptStep
+from auto_sns_agent.tools.x_login import LoginResult
+
+FAKE_BASE_URL = "http://fake-x.test"
+
+HOME_PAGE = '<html><body><a data-testid="AppTabBar_Home_Link" href="/home">&#8962;</a></body></html>'
+
+SEARCH_PAGE = """
+<html><body>
+  <article data-testid="tweet">
+    <a href="/alice/status/100"><time datetime="2024-06-01T10:00:00.000Z">1h</time></a>
+    <div data-testid="tweetText">Older post about local models</div>
+  </article>
+  <article data-testid="tweet">
+    <a href="/bob/status/200"><time datetime="2024-06-01T11:00:00.000Z">now</time></a>
+    <div data-testid="tweetText">Newest post about local models</div>
+  </article>
+</body></html>
+"""
+
+
+def test_x_length_counts_like_x():
+    assert x_weighted_length("hello") == 5
+    assert x_weighted_length("日本語") == 6
+    assert x_weighted_length("see https://example.com/a/very/long/path/that/is/shortened") == 4 + 23
+
+
+def test_x_length_error_includes_prefix():
+    adapter = XAdapter()
+    assert adapter.length_error("a" * 262, prefix="[AutoPostingTest] ") is None
+    assert "280 character limit" in adapter.length_error("a" * 263, prefix="[AutoPostingTest] ")
+    # Japanese counts twice: 140 characters already fill the limit
+    assert adapter.length_error("あ" * 140, prefix="[AutoPostingTest] ") is not None
+
+
+def test_registry_resolves_names_aliases_and_urls():
+    assert isinstance(get_platform("Twitter"), XAdapter)
+    assert isinstance(get_platform("x"), XAdapter)
+    assert get_platform("Fakebook") is None
+    assert isinstance(platform_for_url("https://x.com"), XAdapter)
+    generic = platform_for_url("http://127.0.0.1:8000")
+    assert type(generic) is PlatformAdapter and generic.post_capture() is None
+
+
+def test_x_adapter_recognizes_post_button_clicks():
+    adapter = XAdapter()
+    assert adapter.is_post_commit_step(ScriptStep(ScriptStep.CLICK, ['[data-testid="tweetButtonInline"]']))
+    assert not adapter.is_post_commit_step(ScriptStep(ScriptStep.CLICK, ['[data-testid="SideNav_NewTweet_Button"]']))
+    assert adapter.post_url_pattern.search("Here: https://x.com/someone/status/42.").group(0) == "https://x.com/someone/status/42"
+
+
+def test_x_adapter_logs_in_and_searches_a_stand_in_site():
+    adapter = XAdapter(base_url=FAKE_BASE_URL)
+
+    async def handle(route):
+        path = route.request.url[len(FAKE_BASE_URL):]
+        body = SEARCH_PAGE if path.startswith("/search") else HOME_PAGE
+        await route.fulfill(content_type="text/html", body=body)
+
+    async def scenario():
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            try:
+                page = await browser.new_page()
+                await page.route(f"{FAKE_BASE_URL}/**", handle)
+                login = await adapter.login(page, "someone@example.com", "password")
+                posts = await adapter.scrape_search(page, "local models", max_items=5)
+                return login, posts
+            finally:
+                await browser.close()
+
+    login, posts = asyncio.run(scenario())
+    assert login.status == LoginResult.ALREADY_LOGGED_IN
+    assert posts == ["Newest post about local models", "Older post about local models"]
+
+
+def test_x_adapter_reads_own_posts_from_the_profile_timeline():
+    page = MagicMock()
+    page.goto = AsyncMock()
+    page.locator.return_value.first.wait_for = AsyncMock()
+    page.evaluate = AsyncMock(return_value=[
+        {"id": "50", "author": "Alice", "url": "https://x.com/Alice/status/50", "posted_at": None, "text": "Pinned older post"},
+        {"id": "300", "author": "carol", "url": "https://x.com/carol/status/300", "posted_at": None, "text": "A repost from carol"},
+        {"id": "200", "author": "alice", "url": "https://x.com/alice/status/200", "posted_at": None, "text": "Just published"},
+    ])
+
+    posts = asyncio.run(XAdapter().own_posts(page, "@alice", max_items=2))
+
+    assert page.goto.await_args.args[0] == "https://x.com/alice"
+    assert posts == [
+        {"text": "Just published", "url": "https://x.com/alice/status/200"},
+        {"text": "Pinned older post", "url": "https://x.com/Alice/status/50"},
+    ]
+
+    page.locator.return_value.first.wait_for = AsyncMock(side_effect=TimeoutError("timeline did not load"))
+    assert asyncio.run(XAdapter().own_posts(page, "alice", max_items=10)) is None
@@ -0,0 +1,47 @@
+import random
+
+from auto_sns_agent.research.near_duplicates import MinHashIndex, drop_near_duplicates, minhash, signature_from_hex, signature_to_hex, similarity
+from auto_sns_agent.storage.posted_history import PostedHistory
+
+POST = "Solid-state batteries could double EV range by 2030, new study finds #EV #batteries"
+
+
+def test_retweets_and_link_copies_are_identical():
+    assert similarity(minhash(POST), minhash(f"RT @news: {POST} https://t.co/abc123")) == 1.0
+    assert similarity(minhash(POST), minhash("Our pasta recipe uses garlic and olive oil")) < 0.1
+
+
+def test_drop_near_duplicates_keeps_first_occurrence():
+    posts = [
+        POST,
+        f"RT @someone: {POST}",
+        "Cooking pasta tonight with garlic",
+        POST.replace("finds", "finds!!"),
+        "cooking pasta tonight with garlic",
+    ]
+    assert drop_near_duplicates(posts) == [POST, "Cooking pasta tonight with garlic"]
+
+
+def test_index_finds_near_duplicates_among_many_unrelated_texts():
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    index = MinHashIndex(threshold=0.6)
+    for key in range(2000):
+        index.add(key, minhash(" ".join(rng.sample(vocabulary, 15))))
+    index.add("target", minhash(POST))
+
+    assert [key for key, _ in index.query(minhash(POST.replace("new study", "a new study")))] == ["target"]
+    assert index.query(minhash("Completely different words about gardening and tomatoes")) == []
+
+
+def test_signatures_round_trip_and_history_reloads(tmp_path):
+    signature = minhash(POST)
+    assert (signature_from_hex(signature_to_hex(signature)) == signature).all()
+
+    path = str(tmp_path / "history.jsonl")
+    PostedHistory(path).record(POST, "Twitter", url="https://x.com/u/status/1")
+    reloaded = PostedHistory(path)
+
+    (record, score), = reloaded.similar(POST.replace("finds", "shows"))
+    assert record["url"] == "https://x.com/u/status/1" and score >= 0.6
+    assert reloaded.similar("Gardening tips for spring") == []
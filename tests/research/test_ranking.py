@@ -0,0 +1,50 @@
+import math
+import time
+
+from auto_sns_agent.research.ranking import BM25Index, estimate_tokens, select_passages, split_passages
+
+
+def test_bm25_matches_reference_formula():
+    documents = ["solar power solar panels", "wind power", "cooking pasta"]
+    k1, b = 1.5, 0.75
+    scores = BM25Index(documents, k1=k1, b=b).scores("solar power")
+
+    average_length = (4 + 2 + 2) / 3
+    def term_score(tf, df, length):
+        idf = math.log(1 + (3 - df + 0.5) / (df + 0.5))
+        return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+
+    assert math.isclose(scores[0], term_score(2, 1, 4) + term_score(1, 2, 4))
+    assert math.isclose(scores[1], term_score(1, 2, 2))
+    assert scores[2] == 0
+
+
+def test_select_passages_drops_off_topic_items_and_respects_budget():
+    posts = [
+        "Cheap sneakers, click here",
+        "AI models are changing healthcare diagnostics",
+        "Hospitals adopt AI triage to cut healthcare waiting times " + "detail " * 200,
+        "Healthcare AI regulation debate heats up",
+    ]
+    selected = select_passages("AI in healthcare", posts, top_k=5, token_budget=60)
+
+    assert "Cheap sneakers, click here" not in selected
+    assert posts[2] not in selected  # Relevant but larger than the whole budget
+    assert sum(estimate_tokens(post) for post in selected) <= 60
+    assert set(selected) == {posts[1], posts[3]}
+
+
+def test_select_passages_keeps_order_and_truncates_a_single_oversized_passage():
+    article = "Intro about the weather.\n\nRockets launch from Florida.\n\nMore about rockets and launch pads."
+    passages = split_passages(article, max_words=6)
+    assert select_passages("rockets launch", passages, top_k=2, token_budget=100, keep_order=True) == passages[1:]
+    assert select_passages("rockets", ["rockets " * 100], top_k=1, token_budget=10) == [("rockets " * 100)[:40]]
+
+
+def test_ranking_thousands_of_items_is_fast():
+    posts = [f"post {i} about topic{i % 50} and electric vehicles battery range" for i in range(5000)]
+    index = BM25Index(posts)
+    start = time.perf_counter()
+    scores = index.scores("topic7 battery")
+    assert time.perf_counter() - start < 0.05
+    assert scores.argmax() % 50 == 7
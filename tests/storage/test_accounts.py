@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from auto_sns_agent.storage.accounts import Account, AccountRegistry
+
+
+def test_registry_round_trip_without_storing_passwords(tmp_path, monkeypatch):
+    monkeypatch.setenv("BRAND_JP_PASSWORD", "secret")
+    path = tmp_path / "accounts.json"
+    registry = AccountRegistry(str(path))
+    registry.add(Account("brand-jp", "brand_jp", "BRAND_JP_PASSWORD", username="brand_jp"))
+    registry.add(Account("brand-us", "brand_us@example.com", "BRAND_US_PASSWORD"))
+
+    assert "secret" not in path.read_text()
+    reopened = AccountRegistry(str(path))
+    assert [account.name for account in reopened.select()] == ["brand-jp", "brand-us"]
+    assert reopened.get("brand-jp").password == "secret"
+    assert reopened.get("brand-us").password is None
+    assert reopened.session_file(reopened.get("brand-jp")) == str(tmp_path / "sessions" / "brand-jp.json")
+
+
+def test_select_keeps_requested_order_and_rejects_unknown(tmp_path):
+    registry = AccountRegistry(str(tmp_path / "accounts.json"))
+    for name in ("a", "b", "c"):
+        registry.add(Account(name, name, f"{name.upper()}_PASSWORD"))
+    assert [account.name for account in registry.select(["c", "a"])] == ["c", "a"]
+    with pytest.raises(KeyError):
+        registry.select(["a", "missing"])
+    with pytest.raises(ValueError):
+        Account("bad name", "x", "X_PASSWORD")
+
+
+def test_mark_posted_sets_pacing_and_survives_re_adding(tmp_path):
+    path = tmp_path / "accounts.json"
+    registry = AccountRegistry(str(path))
+    registry.add(Account("a", "a", "A_PASSWORD", min_post_interval_seconds=600))
+    registry.mark_posted("a", posted_at=1000.0)
+    assert registry.get("a").next_post_at() == 1600.0
+
+    registry.add(Account("a", "a-new-login", "A_PASSWORD", min_post_interval_seconds=600))
+    assert AccountRegistry(str(path)).get("a").last_posted_at == 1000.0
+    assert json.loads(path.read_text())[0]["login_identifier"] == "a-new-login"
@@ -0,0 +1,111 @@
+import os
+import time
+from unittest.mock import patch
+
+from auto_sns_agent.storage.corpus import CorpusItem, PostCorpus, content_id, tokenize
+
+
+def _post(text: str, fetched_at: float | None = None, source: str = "x.com", topic: str | None = None) -> CorpusItem:
+    return CorpusItem(content_id(source, text), CorpusItem.POST, source, text, topic=topic, fetched_at=fetched_at)
+
+
+def test_tokenize_strips_hashtags_and_stopwords_and_splits_cjk():
+    assert tokenize("The #AIethics debate in @OpenAI") == ["aiethics", "debate", "openai"]
+    assert tokenize("生成AI") == ["生成", "ai"]
+
+
+def test_add_search_and_get_survive_reopen(tmp_path):
+    corpus = PostCorpus(str(tmp_path))
+    assert corpus.add(_post("AI in healthcare is moving fast"))
+    assert corpus.add(_post("Healthcare costs keep rising"))
+    assert corpus.add_many([_post("New AI models for healthcare triage"), _post("Cooking tips")]) == 2
+    corpus.close()
+
+    reopened = PostCorpus(str(tmp_path))
+    assert len(reopened) == 4
+    texts = [item.text for item in reopened.search("AI in healthcare", limit=5)]
+    assert sorted(texts) == ["AI in healthcare is moving fast", "New AI models for healthcare triage"]
+    assert reopened.get(content_id("x.com", "Cooking tips")).text == "Cooking tips"
+    assert reopened.search("healthcare", limit=5, source="reddit.com") == []
+
+
+def test_duplicate_ids_are_skipped_and_new_versions_replace_old_ones(tmp_path):
+    corpus = PostCorpus(str(tmp_path))
+    assert corpus.add(CorpusItem("123", CorpusItem.POST, "x.com", "first draft about robots"))
+    assert not corpus.add(CorpusItem("123", CorpusItem.POST, "x.com", "first draft about robots"))
+    assert corpus.add(CorpusItem("123", CorpusItem.POST, "x.com", "edited text about drones"))
+
+    assert len(corpus) == 1
+    assert corpus.search("robots") == []
+    assert [item.text for item in corpus.search("drones")] == ["edited text about drones"]
+
+
+def test_open_and_get_do_not_parse_records_until_the_first_search(tmp_path):
+    corpus = PostCorpus(str(tmp_path))
+    corpus.add(CorpusItem("123", CorpusItem.POST, "x.com", "first draft about robots"))
+    corpus.close()
+
+    with patch("auto_sns_agent.storage.corpus.tokenize", wraps=tokenize) as tokenize_spy:
+        reopened = PostCorpus(str(tmp_path))
+        assert reopened.get("123").text == "first draft about robots"
+        assert tokenize_spy.call_count == 0
+        assert [item.text for item in reopened.search("robots")] == ["first draft about robots"]
+
+    # A version added after the first search replaces the indexed one
+    reopened.add(CorpusItem("123", CorpusItem.POST, "x.com", "edited text about drones"))
+    assert reopened.search("robots") == []
+    assert [item.text for item in reopened.search("drones")] == ["edited text about drones"]
+
+
+def test_search_skips_stale_items_and_prefers_recent_ones(tmp_path):
+    corpus = PostCorpus(str(tmp_path))
+    now = time.time()
+    corpus.add_many([
+        _post("quantum computing old news", fetched_at=now - 7200),
+        _post("quantum computing yesterday", fetched_at=now - 60),
+        _post("quantum computing today", fetched_at=now),
+    ])
+
+    assert [item.text for item in corpus.search("quantum computing", limit=2)] == ["quantum computing today", "quantum computing yesterday"]
+    assert len(corpus.search("quantum computing", max_age_seconds=3600)) == 2
+
+
+def test_second_instance_sees_appends_from_first(tmp_path):
+    writer = PostCorpus(str(tmp_path))
+    reader = PostCorpus(str(tmp_path))
+    writer.add(_post("solar panels on every roof"))
+
+    assert [item.text for item in reader.search("solar panels")] == ["solar panels on every roof"]
+
+
+def test_segments_roll_over(tmp_path):
+    corpus = PostCorpus(str(tmp_path), max_segment_bytes=300)
+    corpus.add_many(_post(f"post number {i} about rollover") for i in range(10))
+
+    segments = [name for name in os.listdir(tmp_path) if name.startswith("segment-")]
+    assert len(segments) > 1
+    assert len(corpus.search("rollover", limit=20)) == 10
+
+
+def test_compaction_drops_superseded_expired_and_excess_items(tmp_path):
+    corpus = PostCorpus(str(tmp_path))
+    now = time.time()
+    corpus.add(CorpusItem("a", CorpusItem.POST, "x.com", "version one", fetched_at=now - 30))
+    corpus.add(CorpusItem("a", CorpusItem.POST, "x.com", "version two", fetched_at=now - 20))
+    corpus.add(CorpusItem("old", CorpusItem.POST, "x.com", "expired item", fetched_at=now - 10 * 86400))
+    corpus.add(CorpusItem("b", CorpusItem.POST, "x.com", "older item", fetched_at=now - 10))
+    corpus.add(CorpusItem("c", CorpusItem.POST, "x.com", "newest item", fetched_at=now))
+    other_process_view = PostCorpus(str(tmp_path))
+
+    stats = corpus.compact(max_age_seconds=86400, max_items=2)
+
+    assert (stats.kept, stats.dropped_superseded, stats.dropped_expired, stats.dropped_over_limit) == (2, 1, 1, 1)
+    assert stats.bytes_after < stats.bytes_before
+    assert corpus.get("a") is None and corpus.get("old") is None
+    assert corpus.get("c").text == "newest item"
+    assert corpus.last_compaction() is not None
+    # Other instances notice the rewritten index instead of reading stale offsets
+    assert other_process_view.get("b").text == "older item"
+    assert len(other_process_view) == 2
+    corpus.add(CorpusItem("d", CorpusItem.POST, "x.com", "after compaction"))
+    assert other_process_view.get("d").text == "after compaction"
@@ -0,0 +1,28 @@
+import json
+import time
+
+from auto_sns_agent.storage.post_ledger import PostLedger
+
+
+def test_last_record_of_a_key_wins_and_completes_earlier_ones(tmp_path):
+    ledger = PostLedger(str(tmp_path / "ledger.jsonl"), window_seconds=3600)
+
+    ledger.mark_pending("workflow:1:Twitter", "Twitter", "alpha")
+    assert ledger.get("workflow:1:Twitter")["status"] == PostLedger.PENDING
+    ledger.mark_posted("workflow:1:Twitter", "Successfully posted. URL: https://x.com/a/status/1", "https://x.com/a/status/1")
+
+    # A second ledger on the same file (e.g. another process) sees the outcome
+    record = PostLedger(ledger.path, window_seconds=3600).get("workflow:1:Twitter")
+    assert record["status"] == PostLedger.POSTED and record["url"] == "https://x.com/a/status/1"
+    assert record["account"] == "alpha"
+    assert ledger.get("workflow:2:Twitter") is None
+
+
+def test_keys_outside_the_window_are_forgotten(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    path.write_text(json.dumps({"key": "old", "status": "posted", "updated_at": time.time() - 7200}) + "\n{partial")
+    ledger = PostLedger(str(path), window_seconds=3600)
+
+    assert ledger.get("old") is None
+    ledger.mark_failed("new", "Failed to post: " + "x" * 1000)
+    assert len(ledger.get("new")["result"]) == 500
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from auto_sns_agent.storage.run_history import RunHistory
+from auto_sns_agent.workflows.run_state import ContentCreationRunState
+
+
+def _run(topic: str, started_at: float, platform: str = "Twitter", status: str = ContentCreationRunState.COMPLETED) -> ContentCreationRunState:
+    run_state = ContentCreationRunState(topic=topic, platform=platform)
+    run_state.started_at = started_at
+    run_state.status = status
+    return run_state
+
+
+def test_record_upserts_the_latest_state_of_each_run(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.sqlite3"))
+    run_state = _run("batteries", 100.0, status=ContentCreationRunState.RUNNING)
+    history.record(run_state)
+    run_state.status = ContentCreationRunState.COMPLETED
+    run_state.draft_post = "Draft #ev"
+    run_state.post_url = "https://x.com/u/status/1"
+    with run_state.timings.span("drafting"):
+        pass
+    history.record(run_state)
+    history.flush()
+
+    (row,) = history.query()
+    assert row["status"] == "completed"
+    assert row["draft_post"] == "Draft #ev"
+    assert row["post_url"] == "https://x.com/u/status/1"
+    assert "drafting" in json.loads(row["timings"])
+    history.close()
+
+
+def test_query_filters_by_indexed_columns(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.sqlite3"))
+    for index, (topic, platform, status) in enumerate([
+        ("ai", "Twitter", "completed"),
+        ("ai", "Twitter", "failed"),
+        ("ai", "Reddit", "completed"),
+        ("cooking", "Twitter", "completed"),
+    ]):
+        history.record(_run(topic, 1000.0 + index, platform, status))
+    history.close()
+
+    reopened = RunHistory(str(tmp_path / "runs.sqlite3"))
+    assert [row["started_at"] for row in reopened.query(topic="ai")] == [1002.0, 1001.0, 1000.0]
+    assert [row["platform"] for row in reopened.query(topic="ai", status="completed")] == ["Reddit", "Twitter"]
+    assert [row["topic"] for row in reopened.query(since=1001.0, until=1003.0)] == ["ai", "ai"]
+
+
+def test_export_streams_jsonl_in_chunks(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.sqlite3"))
+    for index in range(25):
+        history.record(_run(f"topic {index}", float(index)))
+    history.flush()
+
+    assert [len(chunk) for chunk in history.iter_chunks(chunk_size=10)] == [10, 10, 5]
+    output = tmp_path / "runs.jsonl"
+    assert history.export(str(output), chunk_size=10, since=5.0) == 20
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert rows[0]["topic"] == "topic 5" and rows[-1]["topic"] == "topic 24"
+    with pytest.raises(ValueError):
+        history.export(str(tmp_path / "runs.csv"), format="csv")
+    history.close()
+
+
+def test_export_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    history = RunHistory(str(tmp_path / "runs.sqlite3"))
+    for index in range(3):
+        history.record(_run("ai", float(index)))
+    history.flush()
+
+    assert history.export(str(tmp_path / "runs.parquet"), chunk_size=2) == 3
+    assert pq.read_table(str(tmp_path / "runs.parquet")).column("topic").to_pylist() == ["ai", "ai", "ai"]
+    history.close()
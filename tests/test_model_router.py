@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from auto_sns_agent.cancellation import CancellationToken, cancellation_scope
+from auto_sns_agent.metrics import StageMetrics
+from auto_sns_agent.model_router import CIRCUIT_OPEN, INVALID_OUTPUT, POSTING, TOOL_ERROR, CircuitOpenError, ModelRouter
+from auto_sns_agent.resilience import CircuitBreakers, RetryPolicy
+
+
+def _router():
+    return ModelRouter({"drafting": ["cheap", "mid", "strong"]}, metrics=StageMetrics())
+
+
+def _empty_is_invalid(result):
+    return INVALID_OUTPUT if not result else None
+
+
+def test_first_acceptable_model_wins():
+    router = _router()
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        return "" if model == "cheap" else f"draft by {model}"
+
+    assert router.run("drafting", attempt, _empty_is_invalid) == "draft by mid"
+    assert calls == ["cheap", "mid"]
+    summary = router.metrics.summary()["drafting"]
+    assert summary["cheap"]["success_rate"] == 0.0
+    assert summary["cheap"]["signals"] == {INVALID_OUTPUT: 1}
+    assert summary["mid"]["success_rate"] == 1.0
+    assert "strong" not in summary
+
+
+def test_exceptions_escalate_until_the_last_model():
+    router = _router()
+
+    def attempt(model):
+        raise RuntimeError(f"{model} broke")
+
+    with pytest.raises(RuntimeError, match="strong broke"):
+        router.run("drafting", attempt, _empty_is_invalid)
+    assert router.metrics.summary()["drafting"]["cheap"]["signals"] == {TOOL_ERROR: 1}
+
+
+def test_last_result_is_returned_when_every_model_fails():
+    router = _router()
+    assert router.run("drafting", lambda model: "", _empty_is_invalid) == ""
+    assert set(router.metrics.summary()["drafting"]) == {"cheap", "mid", "strong"}
+
+
+def test_cancelled_request_does_not_escalate():
+    router = _router()
+    token = CancellationToken()
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        token.cancel("stop")
+        return ""
+
+    with cancellation_scope(token):
+        router.run("drafting", attempt, _empty_is_invalid)
+    assert calls == ["cheap"]
+
+
+def test_async_run_escalates():
+    router = _router()
+
+    async def attempt(model):
+        return None if model == "cheap" else model
+
+    assert asyncio.run(router.arun("drafting", attempt, _empty_is_invalid)) == "mid"
+
+
+def test_transient_errors_are_retried_on_the_same_model():
+    router = ModelRouter({"drafting": ["cheap", "strong"]}, metrics=StageMetrics(), breakers=CircuitBreakers(), retry=RetryPolicy(2, 0, 0))
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        if len(calls) == 1:
+            raise TimeoutError("read timed out")
+        return f"draft by {model}"
+
+    assert router.run("drafting", attempt, _empty_is_invalid) == "draft by cheap"
+    assert calls == ["cheap", "cheap"]
+
+
+def test_posting_errors_are_neither_retried_nor_escalated():
+    router = ModelRouter({POSTING: ["cheap", "strong"]}, metrics=StageMetrics(), breakers=CircuitBreakers(), retry=RetryPolicy(3, 0, 0))
+    calls = []
+
+    async def attempt(model):
+        calls.append(model)
+        raise TimeoutError("timed out after clicking Post")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(router.arun(POSTING, attempt, _empty_is_invalid))
+    assert calls == ["cheap"]
+    assert router.metrics.summary()[POSTING]["cheap"]["signals"] == {TOOL_ERROR: 1}
+
+
+def test_a_cancelled_trial_call_leaves_the_model_circuit_usable():
+    breakers = CircuitBreakers(failure_threshold=1, reset_seconds=0)
+    router = ModelRouter({"drafting": ["cheap"]}, metrics=StageMetrics(), breakers=breakers, retry=RetryPolicy(1))
+    breakers.model("cheap").record_failure()
+
+    async def interrupted(model):
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(router.arun("drafting", interrupted, _empty_is_invalid))
+    assert router.run("drafting", lambda model: f"draft by {model}", _empty_is_invalid) == "draft by cheap"
+
+
+def test_models_with_an_open_circuit_are_skipped():
+    breakers = CircuitBreakers(failure_threshold=1)
+    router = ModelRouter({"drafting": ["cheap", "strong"]}, metrics=StageMetrics(), breakers=breakers, retry=RetryPolicy(1))
+    breakers.model("cheap").record_failure()
+
+    assert router.run("drafting", lambda model: f"draft by {model}", _empty_is_invalid) == "draft by strong"
+    assert router.metrics.summary()["drafting"]["cheap"]["signals"] == {CIRCUIT_OPEN: 1}
+
+    breakers.model("strong").record_failure()
+    with pytest.raises(CircuitOpenError):
+        router.run("drafting", lambda model: f"draft by {model}", _empty_is_invalid)
+
+
+def test_stage_metrics_log_file(tmp_path):
+    log_path = tmp_path / "metrics" / "stages.jsonl"
+    metrics = StageMetrics(log_path=str(log_path))
+    metrics.record("posting", "cheap", True, 1.5)
+    metrics.record("posting", "cheap", False, 0.5, INVALID_OUTPUT)
+
+    assert len(log_path.read_text().splitlines()) == 2
+    assert metrics.format() == f"posting cheap: 1/2 ok, mean 1.00s ({INVALID_OUTPUT}=1)"
@@ -0,0 +1,62 @@
+import os
+import time
+
+from auto_sns_agent import profiling
+from auto_sns_agent.metrics import RunTimings
+from auto_sns_agent.profiling import SamplingProfiler, profiling_tool_hook
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def _tool(seconds):
+    time.sleep(seconds)
+    return "result"
+
+
+def test_stages_are_sampled_and_written_as_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path / "profile"), interval_seconds=0.002, top_n=5)
+
+    with profiler.stage("workflow.drafting"):
+        _busy(0.2)
+        with profiler.stage("tool.search"):
+            _tool(0.2)
+
+    summary = profiler.write_report()
+
+    drafting, search = profiler.profiles["workflow.drafting"], profiler.profiles["tool.search"]
+    assert drafting.calls == 1 and drafting.wall_seconds >= 0.4
+    assert search.waiting_share > 0.8  # Sleeping, not running Python
+    assert drafting.samples > 10 and search.samples > 10
+    # Stacks are rooted at the enclosing stages, then at the function the stage was entered from
+    assert all(stack[:2] == ("workflow.drafting", next(iter(drafting.stacks))[1]) for stack in drafting.stacks)
+    assert any("_busy" in label for stack in drafting.stacks for label in stack)
+    assert all(stack[:2] == ("workflow.drafting", "tool.search") for stack in search.stacks)
+
+    files = sorted(os.listdir(tmp_path / "profile"))
+    assert files == ["all.collapsed", "summary.txt", "tool.search.collapsed", "workflow.drafting.collapsed"]
+    line = (tmp_path / "profile" / "tool.search.collapsed").read_text().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert stack.startswith("workflow.drafting;tool.search;") and int(count) > 0
+    assert "tool.search: 1 call(s)" in summary and "functions by own samples" in summary
+    assert "_busy (" in summary
+
+
+def test_profiling_is_a_no_op_until_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "_PROFILER", None)
+    timings = RunTimings()
+    with timings.span("research"):
+        assert profiling_tool_hook("search", lambda **kwargs: kwargs["topic"], {"topic": "ai"}) == "ai"
+    assert profiling.finish_profiling() is None
+
+    profiler = profiling.enable_profiling(str(tmp_path))
+    with timings.span("research"):
+        profiling_tool_hook("search", lambda **kwargs: _busy(0.05), {})
+    assert set(profiler.profiles) == {"workflow.research", "tool.search"}
+    assert "workflow.research: 1 call(s)" in profiling.finish_profiling()
+    assert profiling._PROFILER is None and os.path.exists(os.path.join(profiler.output_dir, "summary.txt"))
@@ -0,0 +1,133 @@
+import asyncio
+import pickle
+
+from auto_sns_agent.cancellation import CancellationToken, cancellation_scope
+from auto_sns_agent.resilience import CircuitBreaker, ErrorResult, RetryPolicy, call_with_retries, classify_exception
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_error_results_read_like_strings_and_survive_pickling():
+    result = ErrorResult("Error: timed out", ErrorResult.TRANSIENT, retry_after=3)
+
+    assert result == "Error: timed out" and result.startswith("Error")
+    copy = pickle.loads(pickle.dumps(result))
+    assert (copy, copy.kind, copy.retry_after, copy.retryable) == ("Error: timed out", ErrorResult.TRANSIENT, 3, True)
+    assert not ErrorResult("Failed to post: duplicate", ErrorResult.REJECTED).retryable
+
+
+def test_exceptions_are_classified_by_status_and_type():
+    class ApiError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    assert classify_exception(ApiError(429)) == ErrorResult.RATE_LIMITED
+    assert classify_exception(ApiError(503)) == ErrorResult.TRANSIENT
+    assert classify_exception(ApiError(400)) == ErrorResult.REJECTED
+    assert classify_exception(asyncio.TimeoutError()) == ErrorResult.TRANSIENT
+    assert classify_exception(ValueError("bad input")) == ErrorResult.REJECTED
+
+
+def test_backoff_is_jittered_within_a_growing_capped_bound():
+    policy = RetryPolicy(5, base_delay_seconds=1, max_delay_seconds=4)
+
+    delays = [[policy.delay(retry) for _ in range(200)] for retry in (1, 2, 3, 4)]
+
+    for bound, samples in zip((1, 2, 4, 4), delays):
+        assert all(0 <= delay <= bound for delay in samples)
+        assert len(set(samples)) > 100  # Not a fixed schedule
+    assert policy.delay(1, retry_after=10) == 10
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_successful_trial():
+    clock = Clock()
+    breaker = CircuitBreaker("platform:x.com", failure_threshold=2, reset_seconds=60, clock=clock)
+
+    breaker.record(ErrorResult("Error", ErrorResult.REJECTED))  # The dependency answered
+    breaker.record(ErrorResult("Error", ErrorResult.TRANSIENT))
+    assert breaker.allow()
+    breaker.record(ErrorResult("Error", ErrorResult.TRANSIENT))
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    assert breaker.open_error("posting").kind == ErrorResult.UNAVAILABLE
+
+    clock.now = 61
+    assert breaker.allow() and not breaker.allow()  # A single trial call
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 122
+    assert breaker.allow()
+    breaker.record("Successfully posted.")
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_transient_failures_are_retried_but_rejections_are_not():
+    outcomes = [ErrorResult("Error: timeout", ErrorResult.TRANSIENT), "posts"]
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        return outcomes[len(calls) - 1]
+
+    assert asyncio.run(call_with_retries("search", attempt, "Searching", policy=RetryPolicy(3, 0, 0))) == "posts"
+    assert len(calls) == 2
+
+    async def rejected():
+        calls.append(1)
+        return ErrorResult("Failed: not allowed", ErrorResult.REJECTED)
+
+    calls.clear()
+    assert asyncio.run(call_with_retries("search", rejected, "Searching", policy=RetryPolicy(3, 0, 0))).kind == ErrorResult.REJECTED
+    assert len(calls) == 1
+
+
+def test_open_breaker_skips_the_call_and_cancellation_stops_retrying():
+    clock = Clock()
+    breaker = CircuitBreaker("site:example.com", failure_threshold=1, reset_seconds=60, clock=clock)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        return ErrorResult("Error: timeout", ErrorResult.TRANSIENT)
+
+    result = asyncio.run(call_with_retries("article", failing, "Extracting", breaker=breaker, policy=RetryPolicy(3, 0, 0)))
+    assert result.kind == ErrorResult.UNAVAILABLE and len(calls) == 1
+
+    token = CancellationToken()
+    token.cancel("stop")
+    calls.clear()
+    with cancellation_scope(token):
+        asyncio.run(call_with_retries("article", failing, "Extracting", policy=RetryPolicy(3, 0, 0)))
+    assert len(calls) == 1
+
+
+def test_a_trial_call_that_raises_still_ends_the_half_open_state():
+    clock = Clock()
+    breaker = CircuitBreaker("platform:x.com:search", failure_threshold=1, reset_seconds=60, clock=clock)
+    breaker.record_failure()
+    clock.now = 61
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def broken():
+        raise RuntimeError("browser crashed")
+
+    try:
+        asyncio.run(call_with_retries("search", cancelled, "Searching", breaker=breaker, policy=RetryPolicy(1, 0, 0)))
+    except asyncio.CancelledError:
+        pass
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow()
+
+    breaker.record_neutral()
+    try:
+        asyncio.run(call_with_retries("search", broken, "Searching", breaker=breaker, policy=RetryPolicy(1, 0, 0)))
+    except RuntimeError:
+        pass
+    assert breaker.state == CircuitBreaker.OPEN
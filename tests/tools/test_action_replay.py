@@ -0,0 +1,161 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from auto_sns_agent.tools.action_replay import (
+    ActionScript,
+    ActionScriptStore,
+    ScriptStep,
+    replay_action_script,
+    script_from_history,
+)
+
+
+class FakeAction:
+    def __init__(self, **data):
+        self.data = data
+
+    def model_dump(self, exclude_unset=False):
+        return self.data
+
+
+def _element(testid=None, xpath="html/body/div", css_selector=None, tag_name="div"):
+    attributes = {"data-testid": testid} if testid else {}
+    return SimpleNamespace(attributes=attributes, xpath=xpath, css_selector=css_selector, tag_name=tag_name)
+
+
+def _item(actions, elements, errors=None):
+    results = [SimpleNamespace(error=error) for error in (errors or [None] * len(actions))]
+    return SimpleNamespace(
+        model_output=SimpleNamespace(action=actions),
+        result=results,
+        state=SimpleNamespace(interacted_element=elements),
+    )
+
+
+SLOTS = {"content": "[AutoPostingTest] hello", "login_identifier": "me", "password": "s3cret"}
+
+
+def _is_post_click(step):
+    return step.action == ScriptStep.CLICK and any("tweetButtonInline" in s for s in step.selectors)
+
+
+def _posting_history():
+    return SimpleNamespace(history=[
+        _item([FakeAction(go_to_url={"url": "https://x.com"})], [None]),
+        _item(
+            [FakeAction(input_text={"index": 3, "text": "me"}), FakeAction(input_text={"index": 4, "text": "s3cret"})],
+            [_element(tag_name="input", xpath="html/body/input[1]"), _element(tag_name="input", xpath="html/body/input[2]")],
+        ),
+        # A click that errored is not part of the recorded sequence
+        _item([FakeAction(click_element={"index": 9})], [_element(testid="wrongButton")], errors=["Element not found"]),
+        _item([FakeAction(input_text={"index": 7, "text": "[AutoPostingTest] hello"})], [_element(testid="tweetTextarea_0")]),
+        _item([FakeAction(click_element={"index": 8})], [_element(testid="tweetButtonInline")]),
+        # Steps after the commit click (e.g. browsing to the profile) are not recorded
+        _item([FakeAction(click_element={"index": 12})], [_element(testid="AppTabBar_Profile_Link")]),
+    ])
+
+
+def test_script_from_history_parameterises_text_and_stops_at_commit():
+    script = script_from_history("post:x.com", _posting_history(), SLOTS, end_at=_is_post_click, success_selector='[data-testid="toast"]')
+
+    assert [step.action for step in script.steps] == ["navigate", "fill", "fill", "fill", "click"]
+    assert [step.slot for step in script.steps[1:4]] == ["login_identifier", "password", "content"]
+    assert script.steps[3].selectors[0] == '[data-testid="tweetTextarea_0"]'
+    serialized = json.dumps(script.to_dict())
+    assert "s3cret" not in serialized and "hello" not in serialized
+
+
+def test_script_from_history_without_commit_step_is_not_recorded():
+    history = SimpleNamespace(history=_posting_history().history[:2])
+    assert script_from_history("post:x.com", history, SLOTS, end_at=_is_post_click) is None
+
+
+def test_store_roundtrip(tmp_path):
+    store = ActionScriptStore(str(tmp_path))
+    script = ActionScript("post:x.com", [ScriptStep(ScriptStep.FILL, selectors=["#a"], slot="content")], success_selector="#ok")
+    store.save(script)
+
+    loaded = store.load("post:x.com")
+    assert loaded.steps[0].slot == "content"
+    assert loaded.success_selector == "#ok"
+    store.delete("post:x.com")
+    assert store.load("post:x.com") is None
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+        self.first = self
+
+    async def wait_for(self, state="visible", timeout=None):
+        if self.selector not in self.page.visible:
+            raise TimeoutError(f"{self.selector} not visible")
+
+    async def click(self, timeout=None):
+        self.page.calls.append(("click", self.selector))
+        if self.selector in self.page.failing_clicks:
+            raise TimeoutError(f"{self.selector} click timed out")
+
+    async def fill(self, text, timeout=None):
+        self.page.calls.append(("fill", self.selector, text))
+
+
+class FakePage:
+    def __init__(self, visible, failing_clicks=()):
+        self.visible = set(visible)
+        self.failing_clicks = set(failing_clicks)
+        self.calls = []
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    async def goto(self, url):
+        self.calls.append(("goto", url))
+
+
+def _script():
+    return ActionScript("post:x.com", [
+        ScriptStep(ScriptStep.NAVIGATE, url="https://x.com/compose/post"),
+        ScriptStep(ScriptStep.FILL, selectors=['[data-testid="tweetTextarea_0"]'], slot="content"),
+        ScriptStep(ScriptStep.CLICK, selectors=['[data-testid="tweetButton"]', '[data-testid="tweetButtonInline"]']),
+    ], success_selector='[data-testid="toast"]')
+
+
+def test_replay_fills_slots_and_uses_fallback_selector():
+    page = FakePage(visible={'[data-testid="tweetTextarea_0"]', '[data-testid="tweetButtonInline"]', '[data-testid="toast"]'})
+    result = asyncio.run(replay_action_script(page, _script(), {"content": "hello"}, step_timeout_ms=100))
+
+    assert result.succeeded and result.committed
+    assert page.calls == [
+        ("goto", "https://x.com/compose/post"),
+        ("fill", '[data-testid="tweetTextarea_0"]', "hello"),
+        ("click", '[data-testid="tweetButtonInline"]'),
+    ]
+
+
+def test_replay_selector_miss_before_commit_is_safe_to_retry():
+    page = FakePage(visible={'[data-testid="tweetTextarea_0"]'})
+    result = asyncio.run(replay_action_script(page, _script(), {"content": "hello"}, step_timeout_ms=100))
+
+    assert not result.succeeded
+    assert not result.committed
+    assert result.steps_run == 2
+
+
+def test_replay_failing_on_the_commit_click_reports_committed():
+    page = FakePage(visible={'[data-testid="tweetTextarea_0"]', '[data-testid="tweetButton"]'}, failing_clicks={'[data-testid="tweetButton"]'})
+    result = asyncio.run(replay_action_script(page, _script(), {"content": "hello"}, step_timeout_ms=100))
+
+    assert not result.succeeded
+    assert result.committed
+    assert result.steps_run == 2
+
+
+def test_replay_without_success_indicator_reports_committed():
+    page = FakePage(visible={'[data-testid="tweetTextarea_0"]', '[data-testid="tweetButton"]'})
+    result = asyncio.run(replay_action_script(page, _script(), {"content": "hello"}, step_timeout_ms=100))
+
+    assert not result.succeeded
+    assert result.committed
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from auto_sns_agent.cancellation import CancellationToken, cancellation_scope
+from auto_sns_agent.tools.agent_runner import (
+    BUDGET_EXHAUSTED_PREFIX,
+    CANCELLED_PREFIX,
+    AgentBudget,
+    AgentRunOutcome,
+    compact_history,
+    run_browser_agent,
+    uses_vision,
+)
+
+
+class FakeHistory:
+    def __init__(self):
+        self.steps = 0
+        self.tokens = 0
+        self.done = False
+
+    def number_of_steps(self):
+        return self.steps
+
+    def total_input_tokens(self):
+        return self.tokens
+
+    def is_done(self):
+        return self.done
+
+    def final_result(self):
+        return "result text" if self.done else None
+
+
+class FakeState:
+    def __init__(self):
+        self.history = FakeHistory()
+        self.stopped = False
+
+
+class FakeBrowserAgent:
+    """Mimics the parts of browser_use.Agent.run that the runner relies on."""
+
+    def __init__(self, finish_after_steps=None, tokens_per_step=1000, step_seconds=0.0):
+        self.state = FakeState()
+        self.finish_after_steps = finish_after_steps
+        self.tokens_per_step = tokens_per_step
+        self.step_seconds = step_seconds
+
+    def stop(self):
+        self.state.stopped = True
+
+    async def run(self, max_steps=100, on_step_start=None, on_step_end=None):
+        history = self.state.history
+        for _ in range(max_steps):
+            if self.state.stopped:
+                break
+            if on_step_start is not None:
+                await on_step_start(self)
+            if self.state.stopped:
+                break
+            await asyncio.sleep(self.step_seconds)
+            history.steps += 1
+            history.tokens += self.tokens_per_step
+            if self.finish_after_steps is not None and history.steps >= self.finish_after_steps:
+                history.done = True
+            if on_step_end is not None:
+                await on_step_end(self)
+            if history.done:
+                break
+        else:
+            history.steps += 1  # browser-use appends an error entry when max_steps is reached
+        return history
+
+
+def test_completed_run():
+    agent = FakeBrowserAgent(finish_after_steps=2)
+    outcome = asyncio.run(run_browser_agent(agent, AgentBudget(max_steps=5)))
+    assert outcome.status == AgentRunOutcome.COMPLETED
+    assert outcome.final_result == "result text"
+    assert outcome.steps == 2
+
+
+def test_step_cap_is_reported_as_budget_exhausted():
+    agent = FakeBrowserAgent(finish_after_steps=None)
+    outcome = asyncio.run(run_browser_agent(agent, AgentBudget(max_steps=3, max_input_tokens=None)))
+    assert outcome.status == AgentRunOutcome.BUDGET_EXHAUSTED
+    assert outcome.exhausted_limit == AgentRunOutcome.MAX_STEPS
+    assert outcome.to_tool_message("searching 'x'").startswith(f"{BUDGET_EXHAUSTED_PREFIX} (max_steps)")
+
+
+def test_token_budget_stops_agent():
+    agent = FakeBrowserAgent(finish_after_steps=None, tokens_per_step=1000)
+    outcome = asyncio.run(run_browser_agent(agent, AgentBudget(max_steps=50, max_input_tokens=2500)))
+    assert outcome.status == AgentRunOutcome.BUDGET_EXHAUSTED
+    assert outcome.exhausted_limit == AgentRunOutcome.MAX_INPUT_TOKENS
+    assert outcome.steps == 3
+
+
+def test_deadline_interrupts_run():
+    agent = FakeBrowserAgent(finish_after_steps=None, step_seconds=0.05)
+    outcome = asyncio.run(run_browser_agent(agent, AgentBudget(max_steps=1000, timeout_seconds=0.2, max_input_tokens=None)))
+    assert outcome.status == AgentRunOutcome.BUDGET_EXHAUSTED
+    assert outcome.exhausted_limit == AgentRunOutcome.TIMEOUT
+    assert outcome.steps is not None and outcome.steps < 1000
+
+
+def test_cancellation_from_another_thread_uses_current_token():
+    agent = FakeBrowserAgent(finish_after_steps=None, step_seconds=0.05)
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel, args=("User pressed cancel",)).start()
+    with cancellation_scope(token):
+        outcome = asyncio.run(run_browser_agent(agent, AgentBudget(max_steps=1000, timeout_seconds=10, max_input_tokens=None)))
+    assert outcome.status == AgentRunOutcome.CANCELLED
+    assert outcome.to_tool_message("posting") == f"{CANCELLED_PREFIX} while posting: User pressed cancel."
+
+
+def test_cancellation_token_callbacks_run_once():
+    token = CancellationToken()
+    calls = []
+    unregister = token.add_callback(lambda: calls.append("first"))
+    token.add_callback(lambda: calls.append("second"))
+    unregister()
+    token.cancel("stop")
+    token.cancel("again")
+    assert calls == ["second"]
+    assert token.reason == "stop"
+    # Late registrations run immediately
+    token.add_callback(lambda: calls.append("late"))
+    assert calls == ["second", "late"]
+
+
+def make_step(index):
+    return SimpleNamespace(
+        state=SimpleNamespace(screenshot=f"base64-screenshot-{index}", url="https://x.com/home"),
+        model_output=SimpleNamespace(current_state=SimpleNamespace(evaluation_previous_goal="Success", memory="long notes " * 50, next_goal="click"), action=[f"click {index}"]),
+        result=[SimpleNamespace(extracted_content="page text " * 100, is_done=False)],
+    )
+
+
+def test_compact_history_keeps_actions_and_the_latest_steps():
+    history = SimpleNamespace(history=[make_step(index) for index in range(5)])
+
+    assert compact_history(history, keep_full_steps=2) == 3
+    assert compact_history(history, keep_full_steps=2) == 0
+
+    old, latest = history.history[0], history.history[-1]
+    assert old.state.screenshot is None and old.model_output.current_state.memory == ""
+    assert old.model_output.action == ["click 0"] and old.model_output.current_state.next_goal == "click"
+    assert len(old.result[0].extracted_content) == 203
+    assert latest.state.screenshot == "base64-screenshot-4" and len(latest.result[0].extracted_content) == 1000
+
+
+def test_vision_is_used_only_for_configured_tasks():
+    with patch("auto_sns_agent.tools.agent_runner.BROWSER_AGENT_VISION_TASKS", ("post",)):
+        assert uses_vision("post")
+        assert not uses_vision("search") and not uses_vision("article")
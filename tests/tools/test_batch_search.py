@@ -0,0 +1,144 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.resilience import CircuitBreakers, ErrorResult, RetryPolicy, error_kind
+from auto_sns_agent.tools import batch_search
+from auto_sns_agent.tools.batch_search import format_results, search_topics_async
+from auto_sns_agent.tools.social_media_tools import POST_DELIMITER
+from auto_sns_agent.tools.x_login import LoginResult
+
+
+class FakeTabs:
+    """Playwright context stand-in that records how many tabs are open at once."""
+
+    def __init__(self):
+        self.open = 0
+        self.most_open = 0
+        self.opened_at = []
+
+    async def new_page(self):
+        self.open += 1
+        self.most_open = max(self.most_open, self.open)
+        self.opened_at.append(time.monotonic())
+        page = MagicMock(name="tab")
+
+        async def close():
+            self.open -= 1
+
+        page.close = close
+        return page
+
+
+class ScriptedAdapter(PlatformAdapter):
+    def __init__(self, posts_by_topic, delay=0.05):
+        super().__init__("Fake", "http://fake.test")
+        self.posts_by_topic = posts_by_topic
+        self.delay = delay
+        self.searched = []
+
+    async def scrape_search(self, page, query, max_items):
+        self.searched.append(query)
+        await asyncio.sleep(self.delay)
+        posts = self.posts_by_topic.get(query)
+        if isinstance(posts, Exception):
+            raise posts
+        return posts
+
+
+def run_batch(adapter, topics, tabs, login=LoginResult(LoginResult.LOGGED_IN), agent_search=None, attempts=1, **kwargs):
+    sessions = []
+
+    @asynccontextmanager
+    async def fake_managed_browser(owner, **_):
+        sessions.append(owner)
+        first_page = MagicMock(context=tabs)
+        browser_context = MagicMock()
+        browser_context.get_current_page = AsyncMock(return_value=first_page)
+        yield MagicMock(name="browser"), browser_context
+
+    agent_search = agent_search or AsyncMock(return_value="No posts found or extracted for topic")
+    with patch.object(batch_search, "managed_browser", fake_managed_browser), \
+            patch.object(batch_search, "_scripted_login", AsyncMock(return_value=login)) as scripted_login, \
+            patch.object(batch_search, "_agent_search", agent_search), \
+            patch.object(batch_search, "_local_posts", return_value=[]), \
+            patch.object(batch_search, "CIRCUIT_BREAKERS", CircuitBreakers()), \
+            patch("auto_sns_agent.resilience.retry_policy", return_value=RetryPolicy(attempts, 0, 0)), \
+            patch("auto_sns_agent.tools.social_media_tools.CORPUS_ENABLED", False):
+        results = asyncio.run(search_topics_async(topics, adapter, count=2, login_identifier="me", password="pw", **kwargs))
+    return results, sessions, scripted_login
+
+
+def test_topics_share_one_login_and_run_in_capped_parallel_tabs():
+    topics = [f"topic {n}" for n in range(5)]
+    adapter = ScriptedAdapter({topic: [f"{topic} post A", f"{topic} post B"] for topic in topics})
+    tabs = FakeTabs()
+
+    results, sessions, scripted_login = run_batch(adapter, topics, tabs, max_tabs=2, stagger_seconds=0)
+
+    assert len(sessions) == 1
+    scripted_login.assert_awaited_once()
+    assert tabs.most_open == 2 and tabs.open == 0
+    assert list(results) == topics
+    assert set(results["topic 3"].split(POST_DELIMITER)) == {"topic 3 post A", "topic 3 post B"}
+
+
+def test_tab_searches_are_started_stagger_apart():
+    topics = ["a", "b", "c"]
+    tabs = FakeTabs()
+
+    run_batch(ScriptedAdapter({topic: [f"{topic} post"] for topic in topics}, delay=0), topics, tabs, max_tabs=3, stagger_seconds=0.05)
+
+    gaps = [later - earlier for earlier, later in zip(tabs.opened_at, tabs.opened_at[1:])]
+    assert len(gaps) == 2 and min(gaps) >= 0.045
+
+
+def test_topics_without_scripted_results_fall_back_to_the_agent_in_the_same_session():
+    adapter = ScriptedAdapter({"found": ["a post on found"], "empty": [], "broken": RuntimeError("selector changed")})
+    agent_search = AsyncMock(side_effect=lambda adapter, browser, context, topic, count, instructions, budget: f"agent post on {topic}")
+
+    results, sessions, _ = run_batch(adapter, ["found", "empty", "broken"], FakeTabs(), agent_search=agent_search, stagger_seconds=0)
+
+    assert len(sessions) == 1
+    assert [call.args[3] for call in agent_search.await_args_list] == ["empty", "broken"]
+    assert results == {"found": "a post on found", "empty": "agent post on empty", "broken": "agent post on broken"}
+
+
+def test_without_a_scripted_login_every_topic_goes_to_the_agent():
+    adapter = ScriptedAdapter({"a": ["unused"]})
+    agent_search = AsyncMock(return_value="agent post")
+
+    results, _, _ = run_batch(adapter, ["a", "b"], FakeTabs(), login=None, agent_search=agent_search)
+
+    assert adapter.searched == []
+    assert agent_search.await_count == 2
+    assert results == {"a": "agent post", "b": "agent post"}
+
+
+def test_retry_searches_only_the_failed_topics():
+    adapter = ScriptedAdapter({"ok": ["ok post"]})
+    agent_search = AsyncMock(side_effect=[TimeoutError("page did not load"), "late post"])
+
+    results, sessions, _ = run_batch(adapter, ["ok", "flaky"], FakeTabs(), agent_search=agent_search, attempts=2, stagger_seconds=0)
+
+    assert len(sessions) == 2
+    assert adapter.searched == ["ok", "flaky", "flaky"]
+    assert results == {"ok": "ok post", "flaky": "late post"}
+
+
+def test_rejected_searches_are_not_retried():
+    agent_search = AsyncMock(side_effect=ValueError("unsupported query"))
+
+    results, sessions, _ = run_batch(ScriptedAdapter({}), ["bad"], FakeTabs(), agent_search=agent_search, attempts=2, stagger_seconds=0)
+
+    assert len(sessions) == 1
+    assert error_kind(results["bad"]) == ErrorResult.REJECTED
+
+
+def test_format_results_has_a_section_per_topic_and_a_summary():
+    text = format_results({"a": "post one", "b": "No posts found or extracted for topic: b"})
+
+    assert "=== Posts for 'a' ===\npost one" in text
+    assert text.endswith("Found posts for 1 of 2 topics.")
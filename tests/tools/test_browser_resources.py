@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from auto_sns_agent.tools.browser_resources import (
+    BROWSER_RESOURCES,
+    BrowserResourceTracker,
+    browser_resource_scope,
+    managed_browser,
+)
+from auto_sns_agent.tools.browser_watchdog import MARKER_SWITCH
+
+
+def test_wait_until_released_returns_immediately_when_idle():
+    tracker = BrowserResourceTracker()
+    start = time.monotonic()
+    assert tracker.wait_until_released(timeout=5) is True
+    assert time.monotonic() - start < 0.5
+
+
+def test_wait_until_released_times_out_while_browser_open():
+    tracker = BrowserResourceTracker()
+    tracker.acquired("search:https://x.com", scope="run-1")
+    assert tracker.wait_until_released(scope="run-1", timeout=0.05) is False
+    assert tracker.open_owners(scope="run-1") == ["search:https://x.com"]
+
+
+def test_release_from_another_thread_wakes_waiter():
+    tracker = BrowserResourceTracker()
+    handle = tracker.acquired("search:https://x.com", scope="run-1")
+    threading.Timer(0.05, tracker.released, args=(handle,)).start()
+    assert tracker.wait_until_released(scope="run-1", timeout=5) is True
+
+
+def test_wait_is_limited_to_scope():
+    tracker = BrowserResourceTracker()
+    tracker.acquired("search:https://x.com", scope="other-run")
+    assert tracker.wait_until_released(scope="run-1", timeout=0.05) is True
+    assert tracker.wait_until_released(timeout=0.05) is False
+
+
+@patch("auto_sns_agent.tools.browser_resources.Browser")
+def test_managed_browser_releases_after_close_even_on_error(MockBrowser):
+    mock_browser = MockBrowser.return_value
+    mock_context = MagicMock()
+    mock_context.close = AsyncMock()
+    mock_browser.new_context = AsyncMock(return_value=mock_context)
+    mock_browser.close = AsyncMock()
+
+    async def use_browser():
+        async with managed_browser(owner="test-owner") as (browser, context):
+            assert BROWSER_RESOURCES.open_owners(scope="scoped-run") == ["test-owner"]
+            raise RuntimeError("agent failed")
+
+    with browser_resource_scope("scoped-run"):
+        with pytest.raises(RuntimeError):
+            asyncio.run(use_browser())
+
+    mock_context.close.assert_awaited_once()
+    mock_browser.close.assert_awaited_once()
+    assert BROWSER_RESOURCES.open_owners(scope="scoped-run") == []
+
+
+@patch("auto_sns_agent.tools.browser_resources.BROWSER_WATCHDOG")
+@patch("auto_sns_agent.tools.browser_resources.Browser")
+def test_managed_browser_is_launched_marked_and_leftovers_are_killed(MockBrowser, mock_watchdog):
+    mock_watchdog.register.return_value = MARKER_SWITCH + "1-2.3"
+    mock_browser = MockBrowser.return_value
+    mock_browser.new_context = AsyncMock(return_value=MagicMock(close=AsyncMock()))
+    mock_browser.close = AsyncMock()
+
+    async def use_browser():
+        async with managed_browser(owner="test-owner"):
+            pass
+
+    asyncio.run(use_browser())
+
+    config = MockBrowser.call_args.kwargs["config"]
+    args = getattr(config, "extra_browser_args", None) or getattr(config, "extra_chromium_args")
+    assert args[-1] == MARKER_SWITCH + "1-2.3"
+    mock_watchdog.register.assert_called_once_with("test-owner")
+    mock_watchdog.close_leftovers.assert_called_once_with(MARKER_SWITCH + "1-2.3")
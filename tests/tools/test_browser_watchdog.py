@@ -0,0 +1,178 @@
+import json
+import os
+import signal
+
+import pytest
+
+from auto_sns_agent.tools.browser_watchdog import MARKER_SWITCH, BrowserWatchdog, ProcessTable
+
+PAGE = os.sysconf("SC_PAGE_SIZE")
+MB = 1024 * 1024
+
+
+class FakeProc:
+    """Writes a /proc tree holding the processes the watchdog should see."""
+
+    def __init__(self, root):
+        self.root = root
+        self.add("self", ppid=1, start_time=5000)
+        self.add(100, ppid=1, start_time=5000)
+
+    def add(self, pid, ppid, start_time=1, rss_mb=0, args=("chrome",)):
+        path = self.root / str(pid)
+        path.mkdir(exist_ok=True)
+        real_pid = 100 if pid == "self" else pid
+        # Fields after the command name: state ppid ... starttime is the 20th
+        rest = ["S", str(ppid)] + ["0"] * 17 + [str(start_time)] + ["0"] * 5
+        (path / "stat").write_text(f"{real_pid} (chrome (renderer)) {' '.join(rest)}\n")
+        (path / "statm").write_text(f"1000 {int(rss_mb * MB / PAGE)} 0 0 0 0 0\n")
+        (path / "cmdline").write_bytes("\0".join(args).encode() + b"\0")
+
+    def remove(self, pid):
+        for name in ("stat", "statm", "cmdline"):
+            (self.root / str(pid) / name).unlink()
+        (self.root / str(pid)).rmdir()
+
+    def browser(self, switch, pid, rss_mb, children_mb=()):
+        """A browser main process launched with `switch` and its child processes."""
+        self.add(pid, ppid=100, rss_mb=rss_mb, args=("chrome", "--headless", switch))
+        for offset, child_mb in enumerate(children_mb, start=1):
+            self.add(pid + offset, ppid=pid, rss_mb=child_mb, args=("chrome", "--type=renderer"))
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProc(tmp_path)
+
+
+def make_watchdog(proc, kills, **kwargs):
+    kwargs.setdefault("memory_cap_bytes", 500 * MB)
+    kwargs.setdefault("max_lifetime_seconds", 600)
+    watchdog = BrowserWatchdog(processes=ProcessTable(str(proc.root)), kill=lambda pid, sig: kills.append((pid, sig)), metrics_path=None, interval_seconds=60, **kwargs)
+    # Sampling is driven by the tests instead of the background thread
+    watchdog._thread = object()
+    return watchdog
+
+
+def test_process_table_reads_marker_parent_and_memory(proc):
+    proc.browser(MARKER_SWITCH + "100-5000.1", pid=200, rss_mb=100)
+    info = ProcessTable(str(proc.root)).snapshot()[200]
+    assert (info.ppid, info.marker) == (100, "100-5000.1")
+    assert info.rss_bytes == pytest.approx(100 * MB, abs=PAGE)
+
+
+def test_tree_over_memory_cap_is_killed(proc):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    switch = watchdog.register("search:https://x.com")
+    assert switch == MARKER_SWITCH + "100-5000.1"
+    proc.browser(switch, pid=200, rss_mb=200, children_mb=(150, 250))
+
+    sample = watchdog.check()
+
+    assert sorted(kills) == [(200, signal.SIGKILL), (201, signal.SIGKILL), (202, signal.SIGKILL)]
+    assert kills[-1][0] == 200  # The browser itself goes last, so it cannot respawn its children
+    assert watchdog.counters["killed_over_memory"] == 1
+    assert sample["live_browsers"] == 0
+
+
+def test_tree_within_limits_is_left_alone_and_measured(proc):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    switch = watchdog.register("search:https://x.com")
+    proc.browser(switch, pid=200, rss_mb=100, children_mb=(50,))
+
+    sample = watchdog.check()
+
+    assert kills == []
+    assert sample["live_browsers"] == 1 and sample["processes"] == 2
+    assert sample["rss_bytes"] == pytest.approx(150 * MB, abs=2 * PAGE)
+    assert "1 live, 2 processes" in watchdog.format()
+
+
+def test_tree_past_its_deadline_is_killed(proc):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    switch = watchdog.register("monitor:x", max_lifetime_seconds=0.001)
+    proc.browser(switch, pid=200, rss_mb=10)
+    watchdog._browsers[switch[len(MARKER_SWITCH):]].started -= 1
+
+    watchdog.check()
+    watchdog.check()
+
+    assert kills == [(200, signal.SIGKILL)]
+    assert watchdog.counters["killed_past_deadline"] == 1
+    assert "killed_past_deadline=1" in watchdog.format()
+
+
+def test_browser_of_an_exited_process_is_reaped(proc):
+    proc.browser(MARKER_SWITCH + "321-77.4", pid=300, rss_mb=10, children_mb=(10,))
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+
+    assert watchdog.reap_orphans() == 2
+    assert sorted(pid for pid, _ in kills) == [300, 301]
+    assert watchdog.counters["reaped_orphans"] == 1
+
+
+def test_browser_of_a_running_process_is_not_reaped(proc):
+    proc.add(321, ppid=1, start_time=77, args=("python", "-c", "post"))
+    proc.browser(MARKER_SWITCH + "321-77.4", pid=300, rss_mb=10)
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+
+    assert watchdog.reap_orphans() == 0
+    watchdog.check()
+    assert kills == []
+
+
+def test_reused_pid_does_not_keep_an_orphan_alive(proc):
+    proc.add(321, ppid=1, start_time=99999, args=("bash",))
+    proc.browser(MARKER_SWITCH + "321-77.4", pid=300, rss_mb=10)
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+
+    watchdog.check()
+
+    assert kills == [(300, signal.SIGKILL)]
+
+
+def test_close_leftovers_kills_only_what_survived_the_close(proc):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    closed_cleanly = watchdog.register("search:a")
+    leaky = watchdog.register("search:b")
+    proc.browser(closed_cleanly, pid=200, rss_mb=10)
+    proc.browser(leaky, pid=400, rss_mb=10, children_mb=(10,))
+    proc.remove(200)
+
+    assert watchdog.close_leftovers(closed_cleanly) == 0
+    assert watchdog.close_leftovers(leaky) == 2
+    assert sorted(pid for pid, _ in kills) == [400, 401]
+    assert watchdog.counters["reaped_after_close"] == 1
+    assert watchdog._browsers == {}
+
+
+def test_shutdown_kills_own_browsers_only(proc):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    proc.browser(watchdog.register("search:a"), pid=200, rss_mb=10)
+    proc.add(321, ppid=1, start_time=77, args=("python",))
+    proc.browser(MARKER_SWITCH + "321-77.1", pid=300, rss_mb=10)
+
+    watchdog.shutdown()
+
+    assert kills == [(200, signal.SIGKILL)]
+
+
+def test_samples_are_appended_to_metrics_file(proc, tmp_path):
+    kills = []
+    watchdog = make_watchdog(proc, kills)
+    watchdog.metrics_path = str(tmp_path / "metrics" / "browsers.jsonl")
+    proc.browser(watchdog.register("search:https://x.com"), pid=200, rss_mb=10)
+
+    watchdog.check()
+
+    record = json.loads(open(watchdog.metrics_path).read().splitlines()[0])
+    assert record["live_browsers"] == 1
+    assert list(record["browsers"]) == ["search:https://x.com"]
@@ -0,0 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.platforms.x import XAdapter
+from auto_sns_agent.tools.cross_posting import PlatformPostResult, cross_post_async
+
+
+@asynccontextmanager
+async def fake_shared_browser(owner, browser_config=None):
+    yield MagicMock(name="shared-browser")
+
+
+@patch("auto_sns_agent.tools.cross_posting.shared_browser", fake_shared_browser)
+def test_cross_post_runs_platforms_concurrently_and_reports_each():
+    short_platform = PlatformAdapter("Shorty", "http://shorty.test", max_length=20)
+    other_platform = PlatformAdapter("Other", "http://other.test")
+    started = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def fake_post(content, platform_url, login_identifier, password, **kwargs):
+            started.append(kwargs["adapter"].name)
+            if len(started) == 2:
+                gate.set()
+            # Neither post finishes before both have started
+            await asyncio.wait_for(gate.wait(), timeout=2)
+            if kwargs["adapter"].name == "Other":
+                return "Failed to post: Could not find post button"
+            return f"Successfully posted. URL: {platform_url}/someone/status/1"
+
+        with patch("auto_sns_agent.tools.social_media_tools._post_to_social_media_async", fake_post):
+            return await cross_post_async("Cross-posted text", [XAdapter(), short_platform, other_platform], credentials={"Other": ("me", "pw")})
+
+    results = asyncio.run(scenario())
+
+    assert [result.platform for result in results] == ["Twitter", "Shorty", "Other"]
+    assert [result.status for result in results] == [PlatformPostResult.POSTED, PlatformPostResult.FAILED, PlatformPostResult.FAILED]
+    assert results[0].url == "https://x.com/someone/status/1"
+    assert "20 character limit" in results[1].message
+    assert sorted(started) == ["Other", "Twitter"]
@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from auto_sns_agent.platforms.x import XAdapter
+from auto_sns_agent.resilience import CircuitBreakers, ErrorResult, RetryPolicy
+from auto_sns_agent.storage.post_ledger import PostLedger
+from auto_sns_agent.tools import social_media_tools
+from auto_sns_agent.tools.social_media_tools import _normalized_post_text, _publish
+
+POSTED = "Successfully posted. URL: https://x.com/alpha/status/1"
+
+
+@pytest.fixture
+def posting(tmp_path):
+    """Patches the browser attempt and the existence check; no delay between retries."""
+    with patch.object(social_media_tools, "_post_to_social_media_async", new_callable=AsyncMock) as attempt, \
+            patch.object(social_media_tools, "_find_existing_post", new_callable=AsyncMock) as find_existing, \
+            patch.object(social_media_tools, "POST_LEDGER", PostLedger(str(tmp_path / "ledger.jsonl"), 3600)), \
+            patch.object(social_media_tools, "CIRCUIT_BREAKERS", CircuitBreakers(failure_threshold=5)), \
+            patch.object(social_media_tools, "retry_policy", return_value=RetryPolicy(3, 0, 0)):
+        yield attempt, find_existing
+
+
+def publish(**options):
+    return asyncio.run(_publish("hello", XAdapter(), "alpha_login", "pw", backend="browser", **options))
+
+
+def test_transient_failures_are_retried(posting):
+    attempt, find_existing = posting
+    attempt.side_effect = [ErrorResult("Error attempting to post: browser crashed", ErrorResult.TRANSIENT), POSTED]
+
+    assert publish() == POSTED
+    assert attempt.await_count == 2
+    find_existing.assert_not_awaited()
+
+
+def test_unknown_outcome_is_retried_only_once_the_post_is_known_to_be_missing(posting):
+    attempt, find_existing = posting
+    attempt.side_effect = [ErrorResult("No specific confirmation received", ErrorResult.UNKNOWN_OUTCOME), POSTED]
+    find_existing.return_value = (True, None)
+    assert publish() == POSTED and attempt.await_count == 2
+
+    attempt.reset_mock(side_effect=True)
+    attempt.return_value = ErrorResult("No specific confirmation received", ErrorResult.UNKNOWN_OUTCOME)
+    find_existing.return_value = (True, "https://x.com/alpha/status/7")
+    assert publish() == "Successfully posted. URL: https://x.com/alpha/status/7"
+    assert attempt.await_count == 1
+
+    attempt.reset_mock()
+    find_existing.return_value = (False, None)  # Could not check: never post twice
+    assert publish().kind == ErrorResult.UNKNOWN_OUTCOME and attempt.await_count == 1
+
+
+def test_rejections_are_not_retried(posting):
+    attempt, _ = posting
+    attempt.return_value = ErrorResult("Failed to post: Could not find post button", ErrorResult.REJECTED)
+
+    assert publish() == "Failed to post: Could not find post button"
+    assert attempt.await_count == 1
+
+
+def test_a_key_that_was_posted_is_not_posted_again(posting):
+    attempt, _ = posting
+    attempt.return_value = POSTED
+
+    assert publish(idempotency_key="workflow:1") == POSTED
+    assert publish(idempotency_key="workflow:1") == POSTED
+    assert attempt.await_count == 1
+    assert publish(idempotency_key="workflow:2") == POSTED and attempt.await_count == 2
+
+
+def test_a_pending_key_is_checked_before_posting_again(posting):
+    attempt, find_existing = posting
+    attempt.return_value = ErrorResult("Cancelled while posting", ErrorResult.CANCELLED)
+    publish(idempotency_key="workflow:1")
+    assert social_media_tools.POST_LEDGER.get("workflow:1")["status"] == PostLedger.PENDING
+
+    find_existing.return_value = (True, "https://x.com/alpha/status/3")
+    assert publish(idempotency_key="workflow:1") == "Successfully posted. URL: https://x.com/alpha/status/3"
+    assert attempt.await_count == 1
+    assert social_media_tools.POST_LEDGER.get("workflow:1")["status"] == PostLedger.POSTED
+
+
+def test_open_circuit_fails_fast(posting):
+    attempt, _ = posting
+    attempt.return_value = ErrorResult("Error attempting to post: timeout", ErrorResult.TRANSIENT)
+    with patch.object(social_media_tools, "CIRCUIT_BREAKERS", CircuitBreakers(failure_threshold=2)):
+        assert publish().kind == ErrorResult.UNAVAILABLE
+    assert attempt.await_count == 2
+
+
+def test_an_attempt_that_raises_still_ends_the_half_open_trial(posting):
+    attempt, _ = posting
+    breakers = CircuitBreakers(failure_threshold=1, reset_seconds=0)
+    breakers.platform("x.com", "post").record_failure()
+    attempt.side_effect = RuntimeError("unexpected API response")
+    with patch.object(social_media_tools, "CIRCUIT_BREAKERS", breakers):
+        with pytest.raises(RuntimeError):
+            publish()
+        attempt.side_effect, attempt.return_value = None, POSTED
+        assert publish() == POSTED
+
+
+def test_post_texts_are_compared_as_the_platform_displays_them():
+    assert _normalized_post_text("[AutoPostingTest] Read https://example.com/a?b=1  &amp; share") == \
+        _normalized_post_text("[autopostingtest] Read https://t.co/xyz\n& share")
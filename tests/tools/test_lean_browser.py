@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from browser_use.browser.context import BrowserContextConfig
+
+from auto_sns_agent.config import LEAN_VIEWPORT_EXPANSION, LEAN_VIEWPORT_HEIGHT, LEAN_VIEWPORT_WIDTH
+from auto_sns_agent.tools.lean_browser import ARTICLE, POST, SEARCH, LeanMode, lean_profile, site_of
+
+
+def make_request(url, resource_type, navigation=False):
+    request = MagicMock(url=url, resource_type=resource_type)
+    request.is_navigation_request.return_value = navigation
+    request.frame.parent_frame = None
+    return request
+
+
+def test_site_of_handles_country_code_second_level_domains():
+    assert site_of("pbs.twimg.com") == "twimg.com"
+    assert site_of("www.nikkei.co.jp") == "nikkei.co.jp"
+    assert site_of("x.com") == "x.com"
+
+
+def test_article_profile_keeps_the_page_and_drops_heavy_and_third_party_requests():
+    lean = LeanMode(ARTICLE)
+    routes = []
+
+    async def visit():
+        for request in (
+            make_request("https://news.example.com/story", "document", navigation=True),
+            make_request("https://static.example.com/site.css", "stylesheet"),
+            make_request("https://static.example.com/app.js", "script"),
+            make_request("https://cdn.example.org/hero.jpg", "image"),
+            make_request("https://widgets.other.net/embed.js", "script"),
+            make_request("https://www.google-analytics.com/collect", "xhr"),
+            make_request("data:image/png;base64,AAAA", "image"),
+        ):
+            route = AsyncMock()
+            routes.append(route)
+            await lean.handle_route(route, request)
+
+    asyncio.run(visit())
+
+    allowed = [route.fallback.await_count == 1 for route in routes]
+    assert allowed == [True, True, True, False, False, False, True]
+    assert lean.stats.blocked == {"image": 1, "third-party script": 1, "tracker": 1}
+    assert "blocked 3 requests" in lean.stats.summary()
+
+
+def test_search_profile_treats_x_cdn_as_first_party():
+    lean = LeanMode(SEARCH)
+
+    assert lean.block_reason("https://abs.twimg.com/responsive-web/client.js", "script", False) is None
+    assert lean.block_reason("https://pbs.twimg.com/media/photo.jpg", "image", False) == "image"
+    assert lean.block_reason("https://static.ads-twitter.com/uwt.js", "script", False) == "tracker"
+    assert POST.blocked_resource_types == {"media", "font"}
+
+
+def test_lean_context_config_caps_the_viewport_without_changing_the_callers_config():
+    original = BrowserContextConfig(cookies_file="alpha.json", window_width=1920, window_height=1080, viewport_expansion=1000)
+
+    config = POST.context_config(original)
+
+    assert config.cookies_file == "alpha.json"
+    assert (config.window_width, config.window_height) == (LEAN_VIEWPORT_WIDTH, LEAN_VIEWPORT_HEIGHT)
+    assert config.viewport_expansion == LEAN_VIEWPORT_EXPANSION
+    assert (original.window_width, original.window_height, original.viewport_expansion) == (1920, 1080, 1000)
+    assert POST.context_config().window_width == LEAN_VIEWPORT_WIDTH
+    with patch("auto_sns_agent.tools.lean_browser.LEAN_BROWSER_TASKS", ("search",)):
+        assert lean_profile("search") is SEARCH and lean_profile("post") is None
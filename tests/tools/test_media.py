@@ -0,0 +1,86 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from auto_sns_agent.tools.media import MediaError, MediaLimits, MediaProcessor, PreparedMedia, prepare_file
+
+
+def make_image(path, size, mode="RGB", exif_gps=False):
+    image = Image.effect_noise(size, 64).convert(mode)
+    exif = Image.Exif()
+    if exif_gps:
+        exif[0x8825] = {1: "N", 2: (35.0, 40.0, 0.0)}
+    image.save(path, exif=exif.tobytes()) if path.endswith(".jpg") else image.save(path)
+    return str(path)
+
+
+def test_large_image_is_downscaled_reencoded_and_cached(tmp_path):
+    source = make_image(str(tmp_path / "photo.jpg"), (3000, 2000), exif_gps=True)
+    limits = MediaLimits(max_image_bytes=200_000, max_image_dimension=1024)
+    cache_dir = str(tmp_path / "cache")
+
+    prepared = PreparedMedia.from_dict(prepare_file(source, limits, cache_dir))
+
+    assert prepared.kind == PreparedMedia.IMAGE and prepared.mime_type == "image/jpeg"
+    assert prepared.size_bytes <= 200_000 and os.path.dirname(prepared.path) == cache_dir
+    with Image.open(prepared.path) as image:
+        assert max(image.size) <= 1024
+        assert 0x8825 not in image.getexif()
+    with patch("auto_sns_agent.tools.media._optimize_image") as optimize:
+        assert prepare_file(source, limits, cache_dir)["path"] == prepared.path
+    optimize.assert_not_called()
+
+
+def test_unfinished_cache_files_are_never_served(tmp_path):
+    source = make_image(str(tmp_path / "photo.png"), (400, 300))
+    limits = MediaLimits()
+    cache_dir = tmp_path / "cache"
+    first = prepare_file(source, limits, str(cache_dir))
+    os.remove(first["path"])
+    # Left behind by a worker that was killed while writing
+    (cache_dir / f"{os.path.basename(first['path'])}.part").write_bytes(b"truncated")
+
+    prepared = prepare_file(source, limits, str(cache_dir))
+
+    assert prepared["path"] == first["path"] and prepared["mime_type"] == "image/jpeg"
+    assert os.path.getsize(prepared["path"]) == first["size_bytes"]
+    assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(first["path"]), f"{os.path.basename(first['path'])}.part"])
+
+
+def test_transparent_image_stays_png(tmp_path):
+    source = make_image(str(tmp_path / "logo.png"), (300, 300), mode="RGBA")
+
+    prepared = prepare_file(source, MediaLimits(), str(tmp_path / "cache"))
+
+    assert prepared["mime_type"] == "image/png"
+
+
+def test_small_mp4_is_attached_as_is_and_other_videos_need_ffmpeg(tmp_path):
+    mp4 = tmp_path / "clip.mp4"
+    mp4.write_bytes(b"\x00" * 1024)
+    mov = tmp_path / "clip.mov"
+    mov.write_bytes(b"\x00" * 1024)
+
+    assert prepare_file(str(mp4), MediaLimits(), str(tmp_path / "cache"))["path"] == str(mp4)
+    with patch("auto_sns_agent.tools.media.shutil.which", return_value=None), pytest.raises(MediaError, match="ffmpeg"):
+        prepare_file(str(mov), MediaLimits(), str(tmp_path / "cache"))
+
+
+def test_processor_prepares_files_in_worker_processes_and_checks_the_mix(tmp_path):
+    images = [make_image(str(tmp_path / f"image{index}.png"), (200, 100)) for index in range(2)]
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"\x00" * 16)
+    processor = MediaProcessor(str(tmp_path / "cache"), max_workers=2)
+
+    try:
+        prepared = asyncio.run(processor.prepare(images, MediaLimits()))
+        with pytest.raises(MediaError, match="only media file"):
+            asyncio.run(processor.prepare([images[0], str(video)], MediaLimits()))
+    finally:
+        processor.shutdown()
+
+    assert [item.source for item in prepared] == images
+    assert all(os.path.exists(item.path) for item in prepared)
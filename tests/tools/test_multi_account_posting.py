@@ -0,0 +1,57 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from auto_sns_agent.storage.accounts import Account, AccountRegistry
+from auto_sns_agent.tools.multi_account_posting import AccountPostResult, format_results, post_to_accounts_async
+
+
+@asynccontextmanager
+async def fake_shared_browser(owner, browser_config=None):
+    yield MagicMock(name="shared-browser")
+
+
+def make_registry(tmp_path, monkeypatch, *names):
+    registry = AccountRegistry(str(tmp_path / "accounts.json"))
+    for name in names:
+        monkeypatch.setenv(f"{name.upper()}_PASSWORD", "pw")
+        registry.add(Account(name, f"{name}_login", f"{name.upper()}_PASSWORD"))
+    return registry
+
+
+@patch("auto_sns_agent.tools.multi_account_posting.shared_browser", fake_shared_browser)
+@patch("auto_sns_agent.tools.social_media_tools._post_to_social_media_async")
+def test_fan_out_posts_variants_in_separate_contexts(mock_post, tmp_path, monkeypatch):
+    registry = make_registry(tmp_path, monkeypatch, "alpha", "beta", "gamma")
+    mock_post.side_effect = [
+        "Successfully posted. URL: https://x.com/alpha/status/1",
+        "Failed to post: Could not find post button",
+        "Successfully posted. URL: https://x.com/gamma/status/3",
+    ]
+
+    results = asyncio.run(post_to_accounts_async("campaign text", variants={"beta": "beta text"}, accounts=["alpha", "beta", "gamma"], registry=registry, stagger_seconds=0))
+
+    assert [result.status for result in results] == [AccountPostResult.POSTED, AccountPostResult.FAILED, AccountPostResult.POSTED]
+    assert results[0].url == "https://x.com/alpha/status/1"
+    texts = [call.args[0] for call in mock_post.call_args_list]
+    assert sorted(texts) == ["beta text", "campaign text", "campaign text"]
+    browsers = {call.kwargs["browser"] for call in mock_post.call_args_list}
+    assert len(browsers) == 1
+    cookie_files = {call.kwargs["context_config"].cookies_file for call in mock_post.call_args_list}
+    assert cookie_files == {registry.session_file(registry.get(name)) for name in ("alpha", "beta", "gamma")}
+    assert registry.get("alpha").last_posted_at is not None and registry.get("beta").last_posted_at is None
+    assert format_results(results).endswith("Posted to 2 of 3 accounts.")
+
+
+@patch("auto_sns_agent.tools.multi_account_posting.shared_browser", fake_shared_browser)
+@patch("auto_sns_agent.tools.social_media_tools._post_to_social_media_async", new_callable=AsyncMock)
+def test_fan_out_skips_accounts_inside_their_pacing_interval(mock_post, tmp_path, monkeypatch):
+    registry = make_registry(tmp_path, monkeypatch, "alpha", "beta")
+    registry.mark_posted("alpha", posted_at=time.time())
+    mock_post.return_value = "Posted successfully but could not retrieve URL"
+
+    results = asyncio.run(post_to_accounts_async("text", registry=registry, max_pacing_wait_seconds=1, stagger_seconds=0))
+
+    assert [result.status for result in results] == [AccountPostResult.SKIPPED, AccountPostResult.POSTED]
+    assert mock_post.await_count == 1
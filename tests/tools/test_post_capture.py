@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from auto_sns_agent.tools.post_capture import CreatedPostCapture, created_post_from_response, post_url
+
+CREATE_URL = "https://x.com/i/api/graphql/a1b2c3/CreateTweet"
+
+
+class FakeResponse:
+    def __init__(self, url: str, body=None, status: int = 200):
+        self.url = url
+        self.status = status
+        self._body = body
+
+    async def json(self):
+        if isinstance(self._body, Exception):
+            raise self._body
+        return self._body
+
+
+def create_tweet_body(post_id: str, screen_name: str, wrapped: bool = False) -> dict:
+    tweet = {
+        "rest_id": post_id,
+        "core": {"user_results": {"result": {"legacy": {"screen_name": screen_name}}}},
+        "legacy": {"id_str": post_id, "full_text": "hello"},
+    }
+    if wrapped:
+        tweet = {"__typename": "TweetWithVisibilityResults", "tweet": tweet}
+    return {"data": {"create_tweet": {"tweet_results": {"result": tweet}}}}
+
+
+def test_created_post_from_response_reads_id_and_author():
+    assert created_post_from_response(create_tweet_body("1790000000000000001", "someone")) == ("1790000000000000001", "someone")
+    assert created_post_from_response(create_tweet_body("42", "someone", wrapped=True)) == ("42", "someone")
+    assert created_post_from_response({"errors": [{"message": "Status is a duplicate. (187)"}]}) == (None, None)
+
+
+def test_post_url_falls_back_to_author_agnostic_path():
+    assert post_url("42", "someone") == "https://x.com/someone/status/42"
+    assert post_url("42", base_url="https://x.com/") == "https://x.com/i/web/status/42"
+
+
+def test_capture_ignores_other_responses_and_reads_create_post():
+    async def scenario():
+        capture = CreatedPostCapture()
+        await capture.on_response(FakeResponse("https://x.com/i/api/graphql/zz/HomeTimeline", create_tweet_body("1", "other")))
+        assert capture.post_id is None
+        asyncio.get_running_loop().call_later(0.01, lambda: asyncio.ensure_future(capture.on_response(FakeResponse(CREATE_URL, create_tweet_body("42", "someone")))))
+        return await capture.wait(timeout_seconds=2)
+
+    assert asyncio.run(scenario()) == "https://x.com/someone/status/42"
+
+
+def test_capture_records_rejection_and_times_out():
+    async def scenario():
+        capture = CreatedPostCapture()
+        await capture.on_response(FakeResponse(CREATE_URL, {"errors": [{"message": "Status is a duplicate. (187)"}]}, status=403))
+        await capture.on_response(FakeResponse(CREATE_URL + "?variables=x", ValueError("not json")))
+        return capture, await capture.wait(timeout_seconds=0.01)
+
+    capture, url = asyncio.run(scenario())
+    assert url is None
+    assert "not json" in capture.error
+
+
+def test_attach_and_detach_register_listener():
+    context = MagicMock()
+    capture = CreatedPostCapture()
+    capture.attach(context)
+    context.on.assert_called_once_with("response", capture.on_response)
+    capture.detach()
+    context.remove_listener.assert_called_once_with("response", capture.on_response)
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import threading
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from auto_sns_agent.platforms.base import PlatformAdapter
+from auto_sns_agent.tools import social_media_tools, warm_posting
+from auto_sns_agent.tools.warm_posting import WarmPostingSession, post_when_confirmed
+from auto_sns_agent.tools.x_login import LoginResult
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    # Warm sessions are saved under AUTO_SNS_DATA_DIR; keep them out of the working tree
+    monkeypatch.setattr(warm_posting, "AUTO_SNS_DATA_DIR", str(tmp_path))
+
+
+class EditorAdapter(PlatformAdapter):
+    def __init__(self):
+        super().__init__("Fake", "http://fake.test")
+        self.opened_editor = 0
+
+    async def open_editor(self, page, timeout_seconds):
+        self.opened_editor += 1
+        return True
+
+
+class FakeBrowsers:
+    """managed_browser stand-in that records which browsers were opened and closed."""
+
+    def __init__(self):
+        self.opened = []
+        self.closed = []
+
+    @asynccontextmanager
+    async def __call__(self, owner, context_config=None, **_):
+        self.opened.append((owner, context_config))
+        context = MagicMock(name="context")
+        context.get_current_page = AsyncMock(return_value=MagicMock(name="page"))
+        try:
+            yield MagicMock(name="browser"), context
+        finally:
+            self.closed.append(owner)
+
+
+def warm_patches(browsers, login=LoginResult(LoginResult.LOGGED_IN), script=None):
+    return (
+        patch.object(warm_posting, "managed_browser", browsers),
+        patch.object(warm_posting, "_scripted_login", AsyncMock(return_value=login)),
+        patch.object(warm_posting.ACTION_SCRIPTS, "load", return_value=script),
+    )
+
+
+def test_session_logs_in_opens_the_editor_and_is_lent_once(tmp_path):
+    browsers, adapter = FakeBrowsers(), EditorAdapter()
+    session = WarmPostingSession(adapter, "me", "pw", session_file=str(tmp_path / "sessions" / "warm.json"))
+    managed, login, load = warm_patches(browsers)
+
+    async def scenario():
+        await session.open()
+        claims = [session.claim(), session.claim()]
+        await session.close()
+        return claims
+
+    with managed, login, load:
+        claims = asyncio.run(scenario())
+
+    assert claims == [True, False]
+    assert adapter.opened_editor == 1 and session.editor_open
+    assert browsers.opened[0][1].cookies_file == str(tmp_path / "sessions" / "warm.json")
+    assert browsers.closed == ["warm-post:http://fake.test"]
+
+
+def test_session_leaves_the_editor_to_a_recorded_script():
+    browsers, adapter = FakeBrowsers(), EditorAdapter()
+    session = WarmPostingSession(adapter, "me", "pw")
+    managed, login, load = warm_patches(browsers, script=MagicMock(name="script"))
+
+    with managed, login, load, patch.object(warm_posting, "ACTION_REPLAY_ENABLED", True):
+        asyncio.run(session.open())
+
+    assert adapter.opened_editor == 0 and not session.editor_open
+
+
+def run_confirmation(stream, timeout_seconds=5.0):
+    browsers, publish = FakeBrowsers(), AsyncMock(return_value="Successfully posted. URL: http://fake.test/1")
+    managed, login, load = warm_patches(browsers)
+    with managed, login, load, patch.object(warm_posting, "_publish", publish):
+        result = asyncio.run(post_when_confirmed(EditorAdapter(), "me", "pw", idempotency_key="workflow:r1:Fake", timeout_seconds=timeout_seconds, stream=stream))
+    return result, publish, browsers
+
+
+def test_approved_draft_is_posted_with_the_warm_session():
+    result, publish, browsers = run_confirmation(io.StringIO('{"content": "Hello"}\n'))
+
+    assert result == "Successfully posted. URL: http://fake.test/1"
+    assert publish.await_args.args[0] == "Hello"
+    assert publish.await_args.kwargs["idempotency_key"] == "workflow:r1:Fake"
+    assert publish.await_args.kwargs["warm"].editor_open
+    assert len(browsers.opened) == 1 and len(browsers.closed) == 1
+
+
+def test_end_of_input_releases_the_session_without_posting():
+    result, publish, browsers = run_confirmation(io.StringIO(""))
+
+    assert result is None
+    publish.assert_not_awaited()
+    assert len(browsers.closed) == len(browsers.opened)
+
+
+def test_timeout_releases_the_session_without_posting():
+    unblock = threading.Event()
+    stream = MagicMock()
+    stream.readline.side_effect = lambda: unblock.wait(5) and ""
+
+    result, publish, browsers = run_confirmation(stream, timeout_seconds=0.1)
+    unblock.set()
+
+    assert result is None
+    publish.assert_not_awaited()
+    assert len(browsers.closed) == len(browsers.opened)
+
+
+def test_posting_uses_the_warm_browser_once_then_launches_its_own():
+    session = MagicMock(login=LoginResult(LoginResult.LOGGED_IN), editor_open=True)
+    session.claim.side_effect = [True, False]
+    warm_browser, warm_context = MagicMock(name="warm browser"), MagicMock(name="warm context")
+
+    @asynccontextmanager
+    async def borrowed():
+        warm_context.get_current_page = AsyncMock(return_value=MagicMock(name="compose page"))
+        yield warm_browser, warm_context
+
+    session.borrowed = borrowed
+    browsers = FakeBrowsers()
+    replay = AsyncMock(return_value=MagicMock(succeeded=True, committed=False, duration_seconds=0.2, steps_run=2))
+    scripted_login = AsyncMock(return_value=LoginResult(LoginResult.LOGGED_IN))
+
+    async def post_twice():
+        return [await social_media_tools._post_to_social_media_async("Hi", "http://fake.test", "me", "pw", adapter=EditorAdapter(), warm=session) for _ in range(2)]
+
+    with patch.object(social_media_tools, "managed_browser", browsers), \
+            patch.object(social_media_tools, "_scripted_login", scripted_login), \
+            patch.object(social_media_tools, "ACTION_REPLAY_ENABLED", True), \
+            patch.object(social_media_tools.ACTION_SCRIPTS, "load", return_value=MagicMock(name="script")), \
+            patch.object(social_media_tools, "replay_action_script", replay):
+        results = asyncio.run(post_twice())
+
+    assert results == ["Posted successfully but could not retrieve URL"] * 2
+    assert scripted_login.await_count == 1  # Only the second post logged in
+    assert browsers.opened[0][0] == "post:http://fake.test"
+    assert len(browsers.opened) == 1
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, patch
+from urllib.parse import parse_qs
+
+import pytest
+
+from auto_sns_agent.platforms.x import XAdapter
+from auto_sns_agent.storage.accounts import Account
+from auto_sns_agent.tools.media import PreparedMedia
+from auto_sns_agent.tools.social_media_tools import _publish
+from auto_sns_agent.tools import x_api
+from auto_sns_agent.tools.x_api import OAuthToken, TokenStore, XApiClient, XApiCredentials, XApiError, api_credentials
+
+
+class StubApi:
+    """Local stand-in for X's API: answers each path from a queue of (status, body, headers)."""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode(errors="replace")
+                stub.requests.append((self.path, self.headers.get("Authorization"), body))
+                status, payload, headers = stub.responses[self.path.split("?")[0]].pop(0)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, path, status, payload, headers=None):
+        self.responses.setdefault(path, []).append((status, payload, headers or {}))
+
+    def paths(self):
+        return [path for path, _, _ in self.requests]
+
+
+pytestmark = pytest.mark.usefixtures("fresh_resilience_state")
+
+
+@pytest.fixture
+def stub_api():
+    stub = StubApi()
+    yield stub
+    stub.server.shutdown()
+
+
+def make_credentials(tmp_path, token: OAuthToken) -> XApiCredentials:
+    store = TokenStore(str(tmp_path / "tokens" / "alpha.json"))
+    store.save(token)
+    return XApiCredentials(store, "client-id", "client-secret", username="alpha")
+
+
+def post(stub_api, credentials, text="hello", **client_options):
+    async def scenario():
+        async with XApiClient(stub_api.base_url, **client_options) as client:
+            return await client.create_post(credentials, text)
+
+    return asyncio.run(scenario())
+
+
+def test_create_post_refreshes_an_expired_token_and_persists_the_rotated_pair(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken(None, "refresh-1"))
+    stub_api.respond("/2/oauth2/token", 200, {"access_token": "access-2", "refresh_token": "refresh-2", "expires_in": 7200})
+    stub_api.respond("/2/tweets", 201, {"data": {"id": "1234", "text": "hello"}})
+
+    assert post(stub_api, credentials) == "1234"
+
+    assert stub_api.paths() == ["/2/oauth2/token", "/2/tweets"]
+    assert parse_qs(stub_api.requests[0][2])["refresh_token"] == ["refresh-1"]
+    assert stub_api.requests[1][1] == "Bearer access-2"
+    assert json.loads(stub_api.requests[1][2]) == {"text": "hello"}
+    stored = credentials.token_store.load()
+    assert (stored.access_token, stored.refresh_token) == ("access-2", "refresh-2")
+
+
+def test_create_post_refreshes_once_when_the_token_is_rejected(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("revoked", "refresh-1", expires_at=time.time() + 3600))
+    stub_api.respond("/2/tweets", 401, {"title": "Unauthorized"})
+    stub_api.respond("/2/oauth2/token", 200, {"access_token": "access-2", "refresh_token": "refresh-2", "expires_in": 7200})
+    stub_api.respond("/2/tweets", 201, {"data": {"id": "99"}})
+
+    assert post(stub_api, credentials) == "99"
+    assert stub_api.paths() == ["/2/tweets", "/2/oauth2/token", "/2/tweets"]
+
+
+def test_rate_limit_beyond_the_wait_limit_is_safe_to_post_elsewhere(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    reset = str(int(time.time()) + 900)
+    stub_api.respond("/2/tweets", 429, {"title": "Too Many Requests"}, {"x-rate-limit-limit": "100", "x-rate-limit-remaining": "0", "x-rate-limit-reset": reset})
+
+    async def scenario():
+        async with XApiClient(stub_api.base_url, max_rate_limit_wait_seconds=5) as client:
+            with pytest.raises(XApiError) as first:
+                await client.create_post(credentials, "hello")
+            # The exhausted window is remembered: the next call fails without a request
+            with pytest.raises(XApiError):
+                await client.create_post(credentials, "hello again")
+            return first.value
+
+    error = asyncio.run(scenario())
+
+    assert error.status == 429 and error.fallback_safe
+    assert stub_api.paths() == ["/2/tweets"]
+
+
+def test_duplicate_content_is_not_retried_through_the_browser(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    stub_api.respond("/2/tweets", 403, {"detail": "You are not allowed to create a Tweet with duplicate content."})
+
+    with pytest.raises(XApiError) as error:
+        post(stub_api, credentials)
+
+    assert not error.value.fallback_safe and not error.value.may_have_posted
+
+
+def test_credentials_of_one_account_share_its_token_store_and_lock(tmp_path):
+    token_file = str(tmp_path / "tokens" / "alpha.json")
+    with patch.object(x_api, "X_API_CLIENT_ID", "client-id"), patch.dict(x_api._TOKEN_STORES, clear=True):
+        first, second = api_credentials(token_file), api_credentials(token_file)
+        other = api_credentials(str(tmp_path / "tokens" / "beta.json"))
+
+    async def locks():
+        return first.token_store.lock, second.token_store.lock, other.token_store.lock
+
+    first_lock, second_lock, other_lock = asyncio.run(locks())
+    assert first.token_store is second.token_store and first_lock is second_lock
+    assert other.token_store is not first.token_store and other_lock is not first_lock
+    # Each event loop gets its own lock, since an asyncio lock is bound to one loop
+    assert asyncio.run(locks())[0] is not first_lock
+
+
+def test_an_unreadable_success_response_may_have_posted(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    stub_api.respond("/2/tweets", 200, b"<html>upstream proxy</html>")
+
+    with pytest.raises(XApiError) as error:
+        post(stub_api, credentials)
+
+    assert error.value.status == 200 and error.value.may_have_posted and not error.value.fallback_safe
+
+
+def test_a_token_response_without_an_access_token_falls_back(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken(None, "refresh-1"))
+    stub_api.respond("/2/oauth2/token", 200, {"token_type": "bearer"})
+
+    with pytest.raises(XApiError) as error:
+        post(stub_api, credentials)
+
+    assert error.value.fallback_safe and not error.value.may_have_posted
+    assert stub_api.paths() == ["/2/oauth2/token"]
+
+
+def test_an_upload_without_a_media_id_is_an_api_error(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"v" * 10)
+    stub_api.respond("/2/media/upload/initialize", 200, {"data": {}})
+
+    async def scenario():
+        async with XApiClient(stub_api.base_url) as client:
+            return await client.upload_media(credentials, PreparedMedia(str(video), PreparedMedia.VIDEO, "video/mp4", 10, str(video)))
+
+    with pytest.raises(XApiError) as error:
+        asyncio.run(scenario())
+
+    assert not error.value.may_have_posted
+
+
+def test_video_is_uploaded_in_chunks_and_waits_for_processing(stub_api, tmp_path):
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"v" * 2500)
+    stub_api.respond("/2/media/upload/initialize", 200, {"data": {"id": "77"}})
+    for _ in range(3):
+        stub_api.respond("/2/media/upload/77/append", 200, {})
+    stub_api.respond("/2/media/upload/77/finalize", 200, {"data": {"id": "77", "processing_info": {"state": "pending", "check_after_secs": 0}}})
+    stub_api.respond("/2/media/upload", 200, {"data": {"id": "77", "processing_info": {"state": "succeeded"}}})
+
+    async def scenario():
+        async with XApiClient(stub_api.base_url) as client:
+            return await client.upload_media(credentials, PreparedMedia(str(video), PreparedMedia.VIDEO, "video/mp4", 2500, str(video)), chunk_bytes=1000)
+
+    assert asyncio.run(scenario()) == "77"
+    assert stub_api.paths()[:5] == ["/2/media/upload/initialize"] + ["/2/media/upload/77/append"] * 3 + ["/2/media/upload/77/finalize"]
+    assert stub_api.paths()[5].startswith("/2/media/upload?")
+    assert json.loads(stub_api.requests[0][2]) == {"media_type": "video/mp4", "total_bytes": 2500, "media_category": "tweet_video"}
+    assert 'name="segment_index"\r\n\r\n2' in stub_api.requests[3][2]
+
+
+@patch("auto_sns_agent.tools.social_media_tools._post_to_social_media_async", new_callable=AsyncMock)
+def test_publish_uses_the_api_and_falls_back_to_the_browser(mock_browser_post, stub_api, tmp_path):
+    adapter = XAdapter(api_base_url=stub_api.base_url)
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    mock_browser_post.return_value = "Successfully posted. URL: https://x.com/alpha/status/2"
+    stub_api.respond("/2/tweets", 201, {"data": {"id": "1"}})
+    stub_api.respond("/2/tweets", 403, {"title": "Forbidden", "detail": "Your client app is not permitted to perform this action."})
+
+    async def scenario():
+        through_api = await _publish("hello", adapter, "alpha_login", "pw", backend=Account.API, api_credentials=credentials)
+        through_browser = await _publish("hello", adapter, "alpha_login", "pw", backend=Account.API, api_credentials=credentials)
+        return through_api, through_browser
+
+    through_api, through_browser = asyncio.run(scenario())
+
+    assert through_api == "Successfully posted. URL: https://x.com/alpha/status/1"
+    assert json.loads(stub_api.requests[0][2])["text"] == "[AutoPostingTest] hello"
+    assert through_browser == "Successfully posted. URL: https://x.com/alpha/status/2"
+    mock_browser_post.assert_awaited_once()
+
+
+def test_publish_checks_recent_posts_before_retrying_an_unknown_outcome(stub_api, tmp_path):
+    adapter = XAdapter(api_base_url=stub_api.base_url)
+    credentials = make_credentials(tmp_path, OAuthToken("access", "refresh", expires_at=time.time() + 3600))
+    # The create-post response is lost, but the post was published
+    stub_api.respond("/2/tweets", 200, {})
+    stub_api.respond("/2/users/me", 200, {"data": {"id": "42"}})
+    stub_api.respond("/2/users/42/tweets", 200, {"data": [{"id": "9", "text": "[AutoPostingTest] hello   &amp; welcome"}]})
+
+    result = asyncio.run(_publish("hello & welcome", adapter, "alpha_login", "pw", backend=Account.API, api_credentials=credentials))
+
+    assert result == "Successfully posted. URL: https://x.com/alpha/status/9"
+    assert stub_api.paths().count("/2/tweets") == 1
+    assert "max_results=10" in stub_api.paths()[-1]
@@ -0,0 +1,104 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from playwright.async_api import async_playwright
+
+from auto_sns_agent.tools.x_login import LoginResult, scripted_x_login
+
+FAKE_BASE_URL = "http://fake-x.test"
+
+HOME_PAGE = '<html><body><a data-testid="AppTabBar_Home_Link" href="/home">&#8962;</a></body></html>'
+
+# Labels are deliberately not English: the routine must rely on attributes only
+LOGIN_PAGE = """
+<html><body>
+  <div id="step-user"><input id="user" autocomplete="username"><button>次へ</button></div>
+  <div id="step-confirm" hidden><input id="confirm" data-testid="ocfEnterTextTextInput"></div>
+  <div id="step-password" hidden>
+    <input id="password" name="password" type="password">
+    <button id="login" data-testid="LoginForm_Login_Button" disabled>ログイン</button>
+  </div>
+  <div id="step-code" hidden><input data-testid="ocfEnterTextTextInput"></div>
+  <iframe id="captcha" title="Captcha" src="about:blank" hidden></iframe>
+  <div id="toast" data-testid="toast" hidden>エラー</div>
+  <script>
+    const mode = "__MODE__";
+    const show = (id) => { document.getElementById(id).hidden = false; };
+    const hide = (id) => { document.getElementById(id).hidden = true; };
+    document.getElementById("user").addEventListener("keydown", (e) => {
+      if (e.key !== "Enter") return;
+      hide("step-user");
+      if (mode === "captcha") { show("captcha"); }
+      else if (mode === "confirm") { show("step-confirm"); }
+      else { show("step-password"); }
+    });
+    document.getElementById("confirm").addEventListener("keydown", (e) => {
+      if (e.key !== "Enter") return;
+      hide("step-confirm");
+      show("step-password");
+    });
+    const password = document.getElementById("password");
+    password.addEventListener("input", () => { document.getElementById("login").disabled = !password.value; });
+    document.getElementById("login").addEventListener("click", () => {
+      if (mode === "2fa") { hide("step-password"); show("step-code"); return; }
+      if (password.value !== "right-password") { show("toast"); return; }
+      location.href = "/home?password=" + encodeURIComponent(password.value);
+    });
+  </script>
+</body></html>
+"""
+
+
+async def _run_login(mode: str, password: str = "right-password", attempts: int = 1) -> list[LoginResult]:
+    state = {"logged_in": False}
+
+    async def handle(route):
+        url = urlparse(route.request.url)
+        if url.path == "/home":
+            if parse_qs(url.query).get("password") == ["right-password"]:
+                state["logged_in"] = True
+            if state["logged_in"]:
+                await route.fulfill(content_type="text/html", body=HOME_PAGE)
+                return
+        # Like X, unauthenticated pages show the login flow
+        await route.fulfill(content_type="text/html", body=LOGIN_PAGE.replace("__MODE__", mode))
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            await page.route(f"{FAKE_BASE_URL}/**", handle)
+            return [
+                await scripted_x_login(page, "someone@example.com", password, base_url=FAKE_BASE_URL, alternate_identifier="someone", timeout_ms=3000)
+                for _ in range(attempts)
+            ]
+        finally:
+            await browser.close()
+
+
+def test_scripted_login_succeeds_and_detects_existing_session():
+    first, second = asyncio.run(_run_login("normal", attempts=2))
+    assert first.status == LoginResult.LOGGED_IN
+    assert second.status == LoginResult.ALREADY_LOGGED_IN
+
+
+def test_scripted_login_answers_identity_confirmation():
+    (result,) = asyncio.run(_run_login("confirm"))
+    assert result.status == LoginResult.LOGGED_IN
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("2fa", LoginResult.TWO_FACTOR_REQUIRED),
+    ("captcha", LoginResult.CAPTCHA_REQUIRED),
+])
+def test_scripted_login_reports_challenges(mode, expected):
+    (result,) = asyncio.run(_run_login(mode))
+    assert result.status == expected
+    assert result.needs_human
+
+
+def test_scripted_login_reports_rejected_credentials():
+    (result,) = asyncio.run(_run_login("normal", password="wrong-password"))
+    assert result.status == LoginResult.FAILED
+    assert not result.logged_in and not result.needs_human
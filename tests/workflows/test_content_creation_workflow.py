@@ -1,5 +1,7 @@
+import json
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 from agno.workflow import RunResponse, RunEvent
 
@@ -7,6 +9,20 @@ from agno.workflow import RunResponse, RunEvent
 # In this case, the workflow module imports and uses them.
 ORCHESTRATOR_GETTER_PATH = "auto_sns_agent.workflows.content_creation_workflow.get_orchestrator_agent"
 GENERATOR_GETTER_PATH = "auto_sns_agent.workflows.content_creation_workflow.get_content_generator_agent"
+POPEN_PATH = "auto_sns_agent.workflows.content_creation_workflow.subprocess.Popen"
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    # Posted-draft history is written under AUTO_SNS_DATA_DIR; keep it out of the working tree
+    monkeypatch.setattr("auto_sns_agent.workflows.content_creation_workflow.AUTO_SNS_DATA_DIR", str(tmp_path))
+    # Posting processes are only started by the tests that fake them
+    monkeypatch.setattr("auto_sns_agent.workflows.content_creation_workflow.WARM_POSTING_ENABLED", False)
+
+def posting_process(outcome):
+    """Stand-in for the posting subprocess: prints logs, the separator and `outcome` as JSON."""
+    process = MagicMock(returncode=0)
+    process.communicate.return_value = (f"logs\n==LOGS_END==\n{json.dumps(outcome)}", None)
+    return process
 
 @pytest.fixture
 def mock_orchestrator_agent():
@@ -28,41 +44,39 @@ def test_content_creation_workflow_run_successful_and_posts(mock_get_generator,
     mock_get_orchestrator.return_value = mock_orchestrator_agent
     mock_get_generator.return_value = mock_content_generator_agent
 
-    mock_orchestrator_agent.run.side_effect = [
-        RunResponse(content="Mocked research summary for successful post.", event=RunEvent.run_completed),
-        RunResponse(content="Successfully posted to Twitter! URL: http://x.com/mock_status", event=RunEvent.run_completed)
-    ]
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Mocked research summary for successful post.", event=RunEvent.run_completed)
     mock_content_generator_agent.run.return_value = RunResponse(content="Awesome mock post! #mock #test", event=RunEvent.run_completed)
 
     from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
     workflow = ContentCreationWorkflow()
     test_topic = "successful topic"
 
-    flow_generator = workflow.run(topic=test_topic, platform="Twitter", research_depth=1)
+    flow_generator = workflow.run(topic=test_topic, platform="Twitter", research_depth=1, run_id="posts-run")
     
     confirmation_response = next(flow_generator)
     assert confirmation_response.event == RunEvent.run_response
     assert "Awesome mock post! #mock #test" in confirmation_response.content
     assert "Do you want to post this to Twitter? (yes/no)" in confirmation_response.content
 
-    # Set user's decision on the workflow instance
-    workflow.user_provided_confirmation = "yes" 
 
     # Simulate user saying "yes"
-    # This send will resume the generator, which should then use self.user_provided_confirmation
-    # and yield its final RunResponse after attempting to post.
-    final_response = flow_generator.send("yes")
+    # The decision is delivered through send(); the generator resumes with it
+    # and yields its final RunResponse after the posting process has finished.
+    process = posting_process({"success": True, "result": "Successfully posted. URL: https://x.com/u/status/1", "error_kind": None})
+    with patch(POPEN_PATH, return_value=process) as popen:
+        final_response = flow_generator.send("yes")
 
     assert final_response is not None, "final_response from send() should be the last yielded RunResponse"
     assert final_response.event == RunEvent.workflow_completed
-    assert "Posting attempt result: Successfully posted to Twitter! URL: http://x.com/mock_status" in final_response.content # Note: updated to check for 'Posting attempt result:'
-    assert mock_orchestrator_agent.run.call_count == 2
+    assert final_response.content == "Posting attempt result: Successfully posted. URL: https://x.com/u/status/1"
+    # The posting process gets the draft itself; the posting tool adds the [AutoPostingTest] prefix
+    assert popen.call_args.args[0][-3:] == ["Awesome mock post! #mock #test", "Twitter", "workflow:posts-run:Twitter"]
+    mock_orchestrator_agent.run.assert_called_once()  # Research only
     research_call_args = mock_orchestrator_agent.run.call_args_list[0][0][0]
     assert f"research the topic '{test_topic}'" in research_call_args
-    posting_call_args = mock_orchestrator_agent.run.call_args_list[1][0][0]
-    assert "Please post the following content to Twitter:" in posting_call_args
-    assert "'''[AutoPostingTest] Awesome mock post! #mock #test'''" in posting_call_args
     mock_content_generator_agent.run.assert_called_once()
+    state = workflow.get_run_state("posts-run")
+    assert state.post_url == "https://x.com/u/status/1"
 
 @patch(ORCHESTRATOR_GETTER_PATH)
 @patch(GENERATOR_GETTER_PATH)
@@ -81,12 +95,10 @@ def test_content_creation_workflow_post_declined(mock_get_generator, mock_get_or
     confirmation_response = next(flow_generator)
     assert confirmation_response.event == RunEvent.run_response
 
-    # Set user's decision on the workflow instance
-    workflow.user_provided_confirmation = "no"
 
     # Simulate user saying "no"
-    # This send will resume the generator, which should then use self.user_provided_confirmation
-    # and yield its final RunResponse indicating cancellation.
+    # The decision is delivered through send(); the generator resumes with it
+    # and yields its final RunResponse indicating cancellation.
     final_response = flow_generator.send("no")
         
     assert final_response is not None, "final_response from send() should be the last yielded RunResponse"
@@ -101,36 +113,34 @@ def test_content_creation_workflow_post_declined(mock_get_generator, mock_get_or
 @patch(ORCHESTRATOR_GETTER_PATH)
 @patch(GENERATOR_GETTER_PATH)
 def test_content_creation_workflow_posting_fails(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
-    """Test workflow when user confirms but the posting step by orchestrator fails to yield expected content."""
+    """Test workflow when user confirms but the posting process reports a failure."""
     mock_get_orchestrator.return_value = mock_orchestrator_agent
     mock_get_generator.return_value = mock_content_generator_agent
 
-    mock_orchestrator_agent.run.side_effect = [
-        RunResponse(content="Research complete for failing post.", event=RunEvent.run_completed),
-        RunResponse(content="Simulated posting failure by orchestrator.", event=RunEvent.run_completed) 
-    ]
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research complete for failing post.", event=RunEvent.run_completed)
     mock_content_generator_agent.run.return_value = RunResponse(content="A post destined to fail at posting.", event=RunEvent.run_completed)
 
     from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
     workflow = ContentCreationWorkflow()
-    flow_generator = workflow.run(topic="failing post topic")
+    flow_generator = workflow.run(topic="failing post topic", run_id="failing-run")
 
     confirmation_response = next(flow_generator)
     assert confirmation_response.event == RunEvent.run_response
 
-    # Set user's decision on the workflow instance
-    workflow.user_provided_confirmation = "yes"
 
     # Simulate user saying "yes"
-    # This send will resume the generator, which should then use self.user_provided_confirmation,
-    # attempt to post (which will be mocked to fail), and yield the failure response.
-    final_response = flow_generator.send("yes")
+    # The decision is delivered through send(); the generator resumes with it,
+    # runs the (failing) posting process, and yields the failure response.
+    process = posting_process({"success": True, "result": "Failed to post: the login was rejected.", "error_kind": "rejected"})
+    with patch(POPEN_PATH, return_value=process):
+        final_response = flow_generator.send("yes")
 
     assert final_response is not None, "final_response from send() should be the last yielded RunResponse"
     assert final_response.event == RunEvent.workflow_completed
-    # The workflow prepends "Posting attempt result: " to the orchestrator's response
-    assert "Posting attempt result: Simulated posting failure by orchestrator." in final_response.content
-    assert mock_orchestrator_agent.run.call_count == 2 # Research + failed Post attempt
+    # The workflow prepends "Posting attempt result: " to the posting outcome
+    assert final_response.content == "Posting attempt result: Failed to post: the login was rejected."
+    assert workflow.get_run_state("failing-run").post_url is None
+    mock_orchestrator_agent.run.assert_called_once()  # Research only; posting runs in its own process
 
     # Ensure the generator is exhausted
     with pytest.raises(StopIteration):
@@ -182,7 +192,9 @@ def test_content_creation_workflow_generator_fails(mock_get_generator, mock_get_
     assert response.event == RunEvent.workflow_completed
     assert f"Failed to generate content from ContentGeneratorAgent for topic: {test_topic}" in response.content
     mock_orchestrator_agent.run.assert_called_once()
-    mock_content_generator_agent.run.assert_called_once()
+    # Empty drafts escalate through every model of the drafting chain before giving up
+    from auto_sns_agent.model_router import DRAFTING, MODEL_ROUTER
+    assert mock_content_generator_agent.run.call_count == len(MODEL_ROUTER.chain(DRAFTING))
 
     # Ensure the generator is exhausted after this yield
     with pytest.raises(StopIteration):
@@ -190,58 +202,446 @@ def test_content_creation_workflow_generator_fails(mock_get_generator, mock_get_
 
 @patch(ORCHESTRATOR_GETTER_PATH)
 @patch(GENERATOR_GETTER_PATH)
-def test_content_creation_workflow_handles_posting_step(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
-    """Test that after user confirmation, the workflow correctly calls orchestrator to post."""
+def test_content_creation_workflow_handles_posting_step(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent, tmp_path):
+    """Test that after user confirmation, the workflow hands the draft to a posting process and reports its outcome."""
     mock_get_orchestrator.return_value = mock_orchestrator_agent
     mock_get_generator.return_value = mock_content_generator_agent
 
     test_topic = "topic for posting test"
     draft_post_content = "This is the draft post for the posting test. #Test"
-    final_post_content_with_tag = f"[AutoPostingTest] {draft_post_content}"
     simulated_post_url = "https://x.com/mock_status/post123"
 
-    # Orchestrator: 1st call for research, 2nd for posting
-    mock_orchestrator_agent.run.side_effect = [
-        RunResponse(content="Mocked research summary for posting test.", event=RunEvent.run_completed),
-        RunResponse(content=f"Successfully posted! URL: {simulated_post_url}", event=RunEvent.run_completed)
-    ]
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Mocked research summary for posting test.", event=RunEvent.run_completed)
     # Generator: Returns the draft post
     mock_content_generator_agent.run.return_value = RunResponse(content=draft_post_content, event=RunEvent.run_completed)
 
     from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
     workflow = ContentCreationWorkflow()
-    flow_generator = workflow.run(topic=test_topic, platform="Twitter")
+    flow_generator = workflow.run(topic=test_topic, platform="Twitter", run_id="posting-step-run")
 
     # 1. Get the confirmation prompt
     confirmation_response = next(flow_generator)
     assert confirmation_response.event == RunEvent.run_response
     assert draft_post_content in confirmation_response.content
 
-    # SET THE USER'S DECISION ON THE WORKFLOW INSTANCE
-    workflow.user_provided_confirmation = "yes"
 
-    # 2. Send "yes" (or any value, as it seems to be ignored by yield, but good for consistency)
-    # The workflow will now use workflow.user_provided_confirmation.
-    final_post_yield_response = flow_generator.send("yes")
-    print(f"Test: Value received directly from send('yes'): {final_post_yield_response} (type: {type(final_post_yield_response)})")
+    # 2. Send "yes"; the value passed to send() is the user's decision.
+    process = posting_process({"success": True, "result": f"Successfully posted. URL: {simulated_post_url}", "error_kind": None})
+    with patch(POPEN_PATH, return_value=process) as popen:
+        final_post_yield_response = flow_generator.send("yes")
 
-    # The workflow, using self.user_provided_confirmation, should take the 'yes' path.
+    # The workflow should take the 'yes' path.
     assert final_post_yield_response is not None
     assert final_post_yield_response.event == RunEvent.workflow_completed
-    # The simplified path now has a slightly different success message
-    assert "Posting attempt result: Successfully posted! (Simplified Path)" in final_post_yield_response.content
-
-    # For this specific test topic (simplified path), orchestrator & generator are not called.
-    if test_topic == "topic for posting test":
-        mock_orchestrator_agent.run.assert_not_called()
-        mock_content_generator_agent.run.assert_not_called()
-    else:
-        # This block would be for the full path, not covered by this specific test name
-        assert mock_orchestrator_agent.run.call_count == 2 # Research + Post
-        posting_call_args, posting_call_kwargs = mock_orchestrator_agent.run.call_args_list[1]
-        assert "Please post the following content to Twitter:" in posting_call_args[0]
-        assert f"'''{final_post_content_with_tag}'''" in posting_call_args[0]
+    assert final_post_yield_response.content == f"Posting attempt result: Successfully posted. URL: {simulated_post_url}"
+    popen.assert_called_once()
+    command = popen.call_args.args[0]
+    assert command[-3:] == [draft_post_content, "Twitter", "workflow:posting-step-run:Twitter"]
+    # The child writes its ledger, corpus and sessions under the test's data directory
+    assert popen.call_args.kwargs["env"]["AUTO_SNS_DATA_DIR"] == str(tmp_path)
+    state = workflow.get_run_state("posting-step-run")
+    assert state.status == state.COMPLETED and state.post_url == simulated_post_url
 
     # Ensure the generator is exhausted
     with pytest.raises(StopIteration):
-        next(flow_generator) 
\ No newline at end of file
+        next(flow_generator) 
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_concurrent_runs_keep_separate_decisions(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """Two interleaved runs on one workflow instance each act only on the decision sent to them."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Shared research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.side_effect = [
+        RunResponse(content="Draft for run A #a", event=RunEvent.run_completed),
+        RunResponse(content="Draft for run B #b", event=RunEvent.run_completed),
+    ]
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+
+    with patch.object(ContentCreationWorkflow, "_post_draft", return_value="Successfully posted. URL: https://x.com/u/status/2") as mock_post:
+        run_a = workflow.run(topic="topic A")
+        run_b = workflow.run(topic="topic B")
+
+        prompt_a = next(run_a)
+        prompt_b = next(run_b)
+        assert prompt_a.run_id != prompt_b.run_id
+        assert len(workflow.active_run_states()) == 2
+
+        # Run B is approved while run A is still waiting
+        final_b = run_b.send("yes")
+        assert final_b.event == RunEvent.workflow_completed
+        assert "Successfully posted" in final_b.content
+        state_a = workflow.get_run_state(prompt_a.run_id)
+        assert state_a.status == "awaiting_confirmation"
+        assert state_a.decision is None
+
+        # Run A is declined; B's approval must not leak into it
+        final_a = run_a.send("no")
+        assert final_a.content == "Posting cancelled by user."
+
+        mock_post.assert_called_once()
+        assert mock_post.call_args[0][0].draft_post == "Draft for run B #b"
+
+    for generator in (run_a, run_b):
+        with pytest.raises(StopIteration):
+            next(generator)
+    assert workflow.active_run_states() == []
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_flags_drafts_similar_to_posted_ones(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """A draft nearly identical to an earlier published post carries a warning in the confirmation prompt."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.side_effect = [
+        RunResponse(content="Solid-state batteries could double EV range by 2030, new study finds #EV #batteries", event=RunEvent.run_completed),
+        RunResponse(content="Solid-state batteries could double EV range by 2030, a new study finds! #EV #batteries", event=RunEvent.run_completed),
+    ]
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+
+    with patch.object(ContentCreationWorkflow, "_post_draft", return_value="Successfully posted. URL: https://x.com/u/status/7"):
+        first_run = workflow.run(topic="batteries", run_id="first")
+        assert "Warning" not in next(first_run).content
+        first_run.send("yes")
+
+        second_run = workflow.run(topic="batteries", run_id="second")
+        second_prompt = next(second_run)
+
+    assert "Warning: this draft is" in second_prompt.content
+    assert "https://x.com/u/status/7" in second_prompt.content
+    assert workflow.get_run_state("second").similar_posts[0]["text"].startswith("Solid-state batteries could double")
+    second_run.close()
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_waits_for_browser_release_instead_of_sleeping(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """Posting waits on the browser release signal and records the wait as its own span."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #a", event=RunEvent.run_completed)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+
+    with patch.object(ContentCreationWorkflow, "_post_draft", return_value="Successfully posted. URL: https://x.com/u/status/1"), \
+         patch("auto_sns_agent.workflows.content_creation_workflow.BROWSER_RESOURCES") as mock_resources:
+        mock_resources.wait_until_released.return_value = True
+        flow_generator = workflow.run(topic="timed topic")
+        prompt = next(flow_generator)
+        flow_generator.send("yes")
+
+        state = workflow.get_run_state(prompt.run_id)
+        mock_resources.wait_until_released.assert_called_once()
+        assert mock_resources.wait_until_released.call_args.kwargs["scope"] == prompt.run_id
+        assert list(state.timings.as_dict()) == [
+            "research", "drafting", "awaiting_confirmation", "wait_for_browser_release", "posting"
+        ]
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_cancel_run_skips_posting(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """A run cancelled through cancel_run() never posts, even if 'yes' arrives afterwards."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #a", event=RunEvent.run_completed)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+
+    with patch.object(ContentCreationWorkflow, "_post_draft") as mock_post:
+        flow_generator = workflow.run(topic="cancelled topic", run_id="run-to-cancel")
+        prompt = next(flow_generator)
+        assert prompt.run_id == "run-to-cancel"
+
+        assert workflow.cancel_run("run-to-cancel", "Cancelled from the UI") is True
+        final_response = flow_generator.send("yes")
+
+        assert final_response.event == RunEvent.workflow_completed
+        assert final_response.content == "Cancelled: Cancelled from the UI"
+        mock_post.assert_not_called()
+
+    assert workflow.cancel_run("unknown-run") is False
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_escalates_empty_research_to_next_model(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """An empty research summary from the cheap model is retried on the next model of the chain."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.side_effect = [
+        RunResponse(content="", event=RunEvent.run_completed),
+        RunResponse(content="Research from the stronger model.", event=RunEvent.run_completed),
+    ]
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #x", event=RunEvent.run_completed)
+
+    from auto_sns_agent.model_router import ModelRouter
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    workflow.model_router = ModelRouter({"research_planning": ["cheap", "strong"], "drafting": ["cheap"]})
+
+    prompt = next(workflow.run(topic="escalation topic"))
+
+    assert prompt.event == RunEvent.run_response
+    assert "Draft #x" in prompt.content
+    assert [call.kwargs["model_id"] for call in mock_get_orchestrator.call_args_list][-2:] == ["cheap", "strong"]
+    assert mock_orchestrator_agent.run.call_count == 2
+
+RESEARCH_TOOL_PATH = "auto_sns_agent.workflows.content_creation_workflow.get_social_media_posts_for_topic"
+SUMMARIZER_GETTER_PATH = "auto_sns_agent.workflows.content_creation_workflow.get_research_summarizer_agent"
+
+@patch(SUMMARIZER_GETTER_PATH)
+@patch(RESEARCH_TOOL_PATH)
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_direct_research_skips_orchestrator(mock_get_generator, mock_get_orchestrator, mock_research_tool, mock_get_summarizer, mock_orchestrator_agent, mock_content_generator_agent):
+    """Direct mode calls the research tool from code and only asks an LLM to summarize."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    summarizer_agent = MagicMock()
+    summarizer_agent.run.return_value = RunResponse(content="Summary of two posts.", event=RunEvent.run_completed, metrics={"total_tokens": [120, 30]})
+    mock_get_summarizer.return_value = summarizer_agent
+    mock_research_tool.entrypoint.return_value = "First post---NEXT_POST_DELIMITER---Second post"
+    mock_content_generator_agent.run.return_value = RunResponse(content="Direct draft #d", event=RunEvent.run_completed)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    flow_generator = workflow.run(topic="direct topic", platform="Twitter", research_depth=2, run_id="direct-run", research_mode="direct")
+
+    prompt = next(flow_generator)
+
+    assert prompt.event == RunEvent.run_response
+    assert "Direct draft #d" in prompt.content
+    mock_research_tool.entrypoint.assert_called_once_with(topic="direct topic", platform="Twitter", count=2)
+    summary_prompt = summarizer_agent.run.call_args[0][0]
+    assert "1. First post" in summary_prompt and "2. Second post" in summary_prompt
+    mock_orchestrator_agent.run.assert_not_called()
+    assert workflow.get_run_state("direct-run").research_tokens == 150
+    assert "Summary of two posts." in mock_content_generator_agent.run.call_args[0][0]
+
+@patch(SUMMARIZER_GETTER_PATH)
+@patch(RESEARCH_TOOL_PATH)
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_direct_research_reports_tool_errors(mock_get_generator, mock_get_orchestrator, mock_research_tool, mock_get_summarizer, mock_orchestrator_agent, mock_content_generator_agent):
+    """A research tool error ends a direct-mode run without calling any LLM."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_research_tool.entrypoint.return_value = "Error searching social media for 'x' on 'https://x.com': boom"
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    response = next(workflow.run(topic="x", research_mode="direct"))
+
+    assert response.event == RunEvent.workflow_completed
+    assert "Failed to get research for topic: x. Error searching social media" in response.content
+    mock_get_summarizer.return_value.run.assert_not_called()
+    mock_content_generator_agent.run.assert_not_called()
+
+@patch(SUMMARIZER_GETTER_PATH)
+@patch(RESEARCH_TOOL_PATH)
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_direct_research_ranks_posts_before_summarizing(mock_get_generator, mock_get_orchestrator, mock_research_tool, mock_get_summarizer, mock_orchestrator_agent, mock_content_generator_agent):
+    """Off-topic posts are dropped and the best match comes first in the summary prompt."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    summarizer_agent = MagicMock()
+    summarizer_agent.run.return_value = RunResponse(content="Battery summary.", event=RunEvent.run_completed)
+    mock_get_summarizer.return_value = summarizer_agent
+    mock_research_tool.entrypoint.return_value = "---NEXT_POST_DELIMITER---".join([
+        "Win a free phone, click now",
+        "New battery chemistry",
+        "Solid-state battery breakthrough doubles battery range",
+    ])
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #battery", event=RunEvent.run_completed)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    next(workflow.run(topic="battery range", research_depth=3, research_mode="direct"))
+
+    summary_prompt = summarizer_agent.run.call_args[0][0]
+    assert "1. Solid-state battery breakthrough" in summary_prompt
+    assert "2. New battery chemistry" in summary_prompt
+    assert "free phone" not in summary_prompt
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_rejects_unknown_research_mode(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    with pytest.raises(ValueError, match="Unknown research mode"):
+        next(workflow.run(topic="x", research_mode="psychic"))
+
+def enable_warm_posting(monkeypatch):
+    module = "auto_sns_agent.workflows.content_creation_workflow"
+    monkeypatch.setattr(f"{module}.WARM_POSTING_ENABLED", True)
+    monkeypatch.setattr(f"{module}.OPENAI_API_KEY", "key")
+    monkeypatch.setattr(f"{module}.X_LOGIN_IDENTIFIER", "me")
+    monkeypatch.setattr(f"{module}.X_PASSWORD", "pw")
+    monkeypatch.setattr(f"{module}.X_POSTING_BACKEND", "browser")
+
+def fake_warm_process(output):
+    warm = MagicMock(command=["python", "-c", "<posting script>", "--warm"], delivered=False)
+    warm.process.returncode = 0
+    warm.output.return_value = f"logs\n==LOGS_END==\n{output}"
+
+    def post(content):
+        warm.delivered = True
+        return True
+
+    warm.post.side_effect = post
+    return warm
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_warms_posting_browser_while_awaiting_confirmation(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent, monkeypatch):
+    """The posting process is created without waiting for the research browsers and receives the draft on 'yes'."""
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #a", event=RunEvent.run_completed)
+    enable_warm_posting(monkeypatch)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    warm = fake_warm_process('{"success": true, "result": "Successfully posted. URL: https://x.com/u/status/9", "error_kind": null, "released": false}')
+
+    with patch("auto_sns_agent.workflows.content_creation_workflow.WarmPostingProcess", return_value=warm) as warm_class, \
+         patch("auto_sns_agent.workflows.content_creation_workflow.STAGE_METRICS") as stage_metrics:
+        flow_generator = workflow.run(topic="warm topic", run_id="warm-run")
+        prompt = next(flow_generator)
+        warm_class.assert_called_once_with("Twitter", "workflow:warm-run:Twitter", wait_before_start=ANY)
+        state = workflow.get_run_state(prompt.run_id)
+
+        final_response = flow_generator.send("yes")
+
+    warm.post.assert_called_once_with("Draft #a")
+    assert final_response.content == "Posting attempt result: Successfully posted. URL: https://x.com/u/status/9"
+    # The release wait runs in the process's own starter thread
+    assert list(state.timings.as_dict()) == ["research", "drafting", "awaiting_confirmation", "posting"]
+    assert state.confirmation_to_posted_seconds is not None
+    stage_metrics.record.assert_any_call("confirmation_to_posted", "warm session", succeeded=True, seconds=state.confirmation_to_posted_seconds)
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_releases_warm_posting_browser_on_no(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent, monkeypatch):
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.return_value = RunResponse(content="Draft #a", event=RunEvent.run_completed)
+    enable_warm_posting(monkeypatch)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    workflow = ContentCreationWorkflow()
+    declined, abandoned = fake_warm_process(""), fake_warm_process("")
+
+    with patch("auto_sns_agent.workflows.content_creation_workflow.WarmPostingProcess", side_effect=[declined, abandoned]):
+        flow_generator = workflow.run(topic="declined topic")
+        next(flow_generator)
+        assert flow_generator.send("no").content == "Posting cancelled by user."
+
+        abandoned_generator = workflow.run(topic="abandoned topic")
+        next(abandoned_generator)
+        abandoned_generator.close()
+
+    for warm in (declined, abandoned):
+        warm.release.assert_called()
+        warm.post.assert_not_called()
+
+def test_warm_posting_process_starts_in_the_background_after_the_wait():
+    import threading
+    from auto_sns_agent.workflows.content_creation_workflow import WarmPostingProcess
+
+    released = threading.Event()
+    process = MagicMock()
+    process.poll.return_value = None
+    process.stdout = []
+
+    with patch("auto_sns_agent.workflows.content_creation_workflow.subprocess.Popen", return_value=process) as popen:
+        warm = WarmPostingProcess("Twitter", "workflow:bg-run:Twitter", wait_before_start=lambda: released.wait(5))
+        assert warm.process is None  # Created without waiting for the release
+        released.set()
+        assert warm.post("Draft #bg")
+
+    popen.assert_called_once()
+    process.stdin.write.assert_called_once_with('{"content": "Draft #bg"}\n')
+
+def test_warm_posting_process_released_before_it_starts_never_starts():
+    import threading
+    from auto_sns_agent.workflows.content_creation_workflow import WarmPostingProcess
+
+    released = threading.Event()
+    with patch("auto_sns_agent.workflows.content_creation_workflow.subprocess.Popen") as popen:
+        warm = WarmPostingProcess("Twitter", "workflow:no-run:Twitter", wait_before_start=lambda: released.wait(5))
+        warm.release()
+        released.set()
+        assert not warm.post("Draft #no")
+
+    popen.assert_not_called()
+
+def test_post_draft_falls_back_to_a_new_process_when_the_warm_one_was_released():
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    from auto_sns_agent.workflows.run_state import ContentCreationRunState
+
+    run_state = ContentCreationRunState(topic="late answer", run_id="late-run")
+    run_state.draft_post = "Draft #late"
+    warm = fake_warm_process('{"success": true, "result": null, "error_kind": null, "released": true}')
+    cold = MagicMock(returncode=0)
+    cold.communicate.return_value = ('==LOGS_END==\n{"success": true, "result": "Successfully posted. URL: https://x.com/u/status/3", "error_kind": null}', None)
+
+    with patch("auto_sns_agent.workflows.content_creation_workflow.subprocess.Popen", return_value=cold) as popen:
+        workflow = MagicMock()
+        workflow._post_draft.side_effect = lambda *args: ContentCreationWorkflow._post_draft(workflow, *args)
+        result = workflow._post_draft(run_state, warm)
+
+    assert result == "Successfully posted. URL: https://x.com/u/status/3"
+    assert popen.call_args.args[0][-3:] == ["Draft #late", "Twitter", "workflow:late-run:Twitter"]
+    assert warm.delivered is False
+
+@patch(ORCHESTRATOR_GETTER_PATH)
+@patch(GENERATOR_GETTER_PATH)
+def test_content_creation_workflow_truncates_drafts_by_the_platform_length_rule(mock_get_generator, mock_get_orchestrator, mock_orchestrator_agent, mock_content_generator_agent):
+    """A CJK draft under 261 code points is still too long for X, which counts each character twice."""
+    from auto_sns_agent.platforms.x import XAdapter
+    from auto_sns_agent.tools.social_media_tools import POSTING_PREFIX
+
+    mock_get_orchestrator.return_value = mock_orchestrator_agent
+    mock_get_generator.return_value = mock_content_generator_agent
+    mock_orchestrator_agent.run.return_value = RunResponse(content="Research.", event=RunEvent.run_completed)
+    mock_content_generator_agent.run.return_value = RunResponse(content="電池" * 100 + " https://example.com/a/very/long/path #EV #電池", event=RunEvent.run_completed)
+
+    from auto_sns_agent.workflows.content_creation_workflow import ContentCreationWorkflow
+    run = ContentCreationWorkflow().run(topic="batteries", run_id="cjk")
+    prompt = next(run)
+    draft = prompt.content.split("---S\n")[1].rstrip("\n")
+    run.close()
+
+    adapter = XAdapter()
+    assert adapter.length_error(draft, prefix=POSTING_PREFIX) is None
+    assert draft.startswith("電池電池") and draft.endswith("... #電池")
+    assert f"Character count (including prefix): {adapter.length(POSTING_PREFIX + draft)}/280" in prompt.content
+
+def test_fit_to_length_drops_hashtags_that_leave_too_little_text():
+    from auto_sns_agent.platforms.x import XAdapter
+    from auto_sns_agent.workflows.content_creation_workflow import fit_to_length
+
+    adapter = XAdapter()
+    short = "A short post #ok"
+    crowded = "Too long a lead " * 20 + " ".join(f"#{'tag' * 6}{n}" for n in range(3))
+
+    assert fit_to_length(short, adapter) == short
+    fitted = fit_to_length(crowded, adapter, prefix="x" * 240)
+    assert fitted.endswith("...") and "#" not in fitted
+    assert adapter.length_error(fitted, prefix="x" * 240) is None